@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-ins for the external services the launch pipeline lambdas talk to
+
+* LocalObjectStore: S3 (source buckets, the lookup bucket and the pieriandx bucket)
+  and the file manager presigned urls, objects are served over a local http server
+  so that the lambdas' requests calls run unmodified.
+* Stand-in responses for SSM, the metadata api and the workflow manager api.
+
+Every stand-in call is counted by a CallCounter so that benchmarks can report calls per handler invocation.
+"""
+
+# Standard imports
+import gzip
+import hashlib
+import json
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class CallCounter:
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self._counts[name] = self._counts.get(name, 0) + 1
+            return func(*args, **kwargs)
+        return wrapper
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
+
+
+class LocalObjectStore:
+    """
+    In-memory object store, keyed by s3 uri.
+    Objects are also served at http://127.0.0.1:<port>/objects/<s3_object_id> to stand in for presigned urls
+    """
+    def __init__(self):
+        self._objects: Dict[str, bytes] = {}
+        self._metadata: Dict[str, Dict[str, str]] = {}
+        self._object_ids: Dict[str, str] = {}
+        self._uris_by_object_id: Dict[str, str] = {}
+        self._lock = Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # Fixtures
+    def put_object(self, uri: str, body: bytes, metadata: Optional[Dict[str, str]] = None):
+        with self._lock:
+            self._objects[uri] = body
+            self._metadata[uri] = metadata if metadata is not None else {}
+            if uri not in self._object_ids:
+                self._object_ids[uri] = f"s3obj.{len(self._object_ids):08d}"
+                self._uris_by_object_id[self._object_ids[uri]] = uri
+
+    def get_object(self, uri: str) -> bytes:
+        with self._lock:
+            return self._objects[uri]
+
+    # Http server
+    def start(self) -> str:
+        store = self
+
+        class ObjectRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                s3_object_id = self.path.rsplit("/", 1)[-1]
+                uri = store._get_uri_from_object_id(s3_object_id)
+                if uri is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = store.get_object(uri)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", f'"{hashlib.md5(body).hexdigest()}"')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), ObjectRequestHandler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _get_uri_from_object_id(self, s3_object_id: str) -> Optional[str]:
+        with self._lock:
+            return self._uris_by_object_id.get(s3_object_id, None)
+
+    # File manager stand-ins
+    def get_s3_object_id_from_s3_uri(self, s3_uri: str) -> str:
+        with self._lock:
+            return self._object_ids[s3_uri]
+
+    def get_presigned_url(self, s3_object_id: str) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/objects/{s3_object_id}"
+
+    def list_files_from_portal_run_id(self, portal_run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            uri_list = [uri for uri in self._objects.keys() if f"/{portal_run_id}/" in uri]
+        return [
+            {
+                "s3ObjectId": self._object_ids[uri],
+                "bucket": urlparse(uri).netloc,
+                "key": urlparse(uri).path.lstrip("/"),
+            }
+            for uri in uri_list
+        ]
+
+    # S3 stand-ins
+    def download_file(self, bucket: str, key: str, output_file_path: Path):
+        output_file_path.write_bytes(self.get_object(f"s3://{bucket}/{key.lstrip('/')}"))
+
+    def upload_fileobj(
+            self,
+            bucket: str,
+            key: str,
+            fileobj: BinaryIO,
+            metadata: Optional[Dict[str, str]] = None
+    ):
+        # Read in 8 MiB chunks, as boto3's managed transfer would
+        chunks_list = []
+        while True:
+            chunk = fileobj.read(8 * 1024 * 1024)
+            if not chunk:
+                break
+            chunks_list.append(chunk)
+        self.put_object(f"s3://{bucket}/{key.lstrip('/')}", b"".join(chunks_list), metadata)
+
+    def head_object(self, bucket: str, key: str) -> Optional[Dict[str, Any]]:
+        uri = f"s3://{bucket}/{key.lstrip('/')}"
+        with self._lock:
+            if uri not in self._objects:
+                return None
+            return {
+                "ETag": f'"{hashlib.md5(self._objects[uri]).hexdigest()}"',
+                "ContentLength": len(self._objects[uri]),
+                "Metadata": dict(self._metadata[uri]),
+            }
+
+    def get_object_metadata(self, bucket: str, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            return self._metadata.get(f"s3://{bucket}/{key.lstrip('/')}", None)
+
+    def copy_object(
+            self,
+            src_bucket: str,
+            src_key: str,
+            dest_bucket: str,
+            dest_key: str,
+            metadata: Optional[Dict[str, str]] = None
+    ):
+        self.put_object(
+            f"s3://{dest_bucket}/{dest_key.lstrip('/')}",
+            self.get_object(f"s3://{src_bucket}/{src_key.lstrip('/')}"),
+            metadata
+        )
+
+
+def get_gzipped_json_bytes(records_list: List[Dict]) -> bytes:
+    return gzip.compress(json.dumps(records_list).encode())
+
+
+def get_snomed_tree_records(
+        code_list: List[int],
+        label_key: str,
+        padding_record_count: int
+) -> List[Dict]:
+    """
+    Generate a synthetic SNOMED tree, the codes we look up plus padding records
+    so that lookups run against a realistically sized table
+    """
+    records_list = [
+        {"Code": code, "CodeSystem": "SNOMED-CT", label_key: f"Label for {code}"}
+        for code in code_list
+    ]
+    records_list.extend(
+        {"Code": 900000000 + index, "CodeSystem": "SNOMED-CT", label_key: f"Padding record {index}"}
+        for index in range(padding_record_count)
+    )
+    return records_list
+
+
+def get_filler_bytes(size: int, seed: int = 0) -> bytes:
+    """
+    Deterministic filler bytes for data files, cheap to generate for large sizes
+    """
+    block = hashlib.sha256(str(seed).encode()).digest() * 2048
+    return (block * (size // len(block) + 1))[:size]
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for the launch pipeline lambdas
+
+Runs each of the following handlers against local stand-ins for S3, SSM, the file manager,
+the workflow manager, the metadata api and PierianDx (the CGW simulator):
+
+* generate_pieriandx_objects
+* generate_case_metadata
+* get_data_files_from_tso500_workflow_run
+* upload_pieriandx_sample_data_to_s3
+* get_informaticsjob_and_report_status
+
+Each benchmark runs in its own python process, so that import time and peak RSS are attributable to a single handler.
+For each handler we record
+* importSeconds: Time to import the handler module (the lambda init phase)
+* firstInvocationMs: The first (cold) invocation, this includes populating module level caches
+* warm: mean / p50 / p95 latency over the remaining iterations
+* peakRssMb: Peak resident set size of the benchmark process
+* callsPerInvocation: Stand-in calls per warm invocation (i.e. s3.upload_fileobj, cgw.GET /case/{id})
+
+Handlers that memoise their output are sent forceRefresh on every invocation, so that warm invocations
+measure the handler rather than the memo store, set --allow-memo-hits to measure memo hits instead.
+No call leaves the process, S3 (including the pieriandx s3 client and its server-side copies) is the local object store.
+
+Save the results with --output, and compare a later run against them with --baseline,
+the script exits non-zero if any handler is slower (or uses more memory) than the baseline by more than --tolerance,
+or makes more stand-in calls per invocation than the baseline.
+
+Requires the lambda and layer dependencies (pandas, pydantic, pyriandx, v2_samplesheet_maker etc) to be installed.
+
+Usage:
+
+  python run_benchmarks.py --iterations 50 --output benchmarks.json
+  python run_benchmarks.py --iterations 50 --baseline benchmarks.json --tolerance 0.2
+"""
+
+# Standard imports
+import argparse
+import importlib
+import json
+import resource
+import subprocess
+import sys
+import time
+from copy import deepcopy
+from os import environ
+from pathlib import Path
+from statistics import mean, quantiles
+from tempfile import NamedTemporaryFile
+from typing import Callable, Dict, List
+import gzip
+import logging
+
+# Local imports
+from local_stand_ins import (
+    CallCounter, LocalObjectStore, get_filler_bytes, get_gzipped_json_bytes, get_snomed_tree_records
+)
+
+# Set logger
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Globals
+BENCHMARKS_DIR = Path(__file__).absolute().parent
+FIXTURES_DIR = BENCHMARKS_DIR / "fixtures"
+APP_DIR = BENCHMARKS_DIR.parent.parent
+LAMBDAS_DIR = APP_DIR / "lambdas"
+LAYER_SRC_DIR = APP_DIR / "layers" / "pieriandx_tools_layer" / "src"
+CGW_SIMULATOR_DIR = BENCHMARKS_DIR.parent / "cgw_simulator"
+
+BENCHMARK_NAMES = [
+    "generate_pieriandx_objects",
+    "generate_case_metadata",
+    "get_data_files_from_tso500_workflow_run",
+    "upload_pieriandx_sample_data_to_s3",
+    "get_informaticsjob_and_report_status",
+]
+
+# Fixture values
+LIBRARY_ID = "L2301368"
+PORTAL_RUN_ID = "20240910d260200d"
+OUTPUT_PREFIX = f"s3://pipeline-cache/analysis/cttsov2/{PORTAL_RUN_ID}"
+PIERIANDX_PREFIX = "s3://pdx-cgwxfer-test/melbournetest"
+SPECIMEN_CODE = 122561005
+DISEASE_CODE = 55342001
+SNOMED_SPECIMEN_TYPE_URI = "s3://lookup-bucket/snomed/specimen_type.json.gz"
+SNOMED_DISEASE_TREE_URI = "s3://lookup-bucket/snomed/disease_tree.json.gz"
+SSM_PARAMETERS = {
+    "/benchmark/snomed/specimenType": SNOMED_SPECIMEN_TYPE_URI,
+    "/benchmark/snomed/diseaseTree": SNOMED_DISEASE_TREE_URI,
+}
+
+DATA_FILE_SUFFIXES = {
+    "microsatOutputUri": f"Logs_Intermediates/DragenCaller/{LIBRARY_ID}/{LIBRARY_ID}.microsat_output.json",
+    "tmbMetricsUri": f"Logs_Intermediates/Tmb/{LIBRARY_ID}/{LIBRARY_ID}.tmb.metrics.csv",
+    "cnvVcfUri": f"Results/{LIBRARY_ID}/{LIBRARY_ID}.cnv.vcf.gz",
+    "hardFilteredVcfUri": f"Results/{LIBRARY_ID}/{LIBRARY_ID}.hard-filtered.vcf.gz",
+    "fusionsUri": f"Results/{LIBRARY_ID}/{LIBRARY_ID}_Fusions.csv",
+    "metricsOutputUri": f"Results/{LIBRARY_ID}/{LIBRARY_ID}_MetricsOutput.tsv",
+    "samplesheetUri": "Logs_Intermediates/SampleSheetValidation/SampleSheet_Intermediate.csv",
+}
+
+
+class BenchmarkContext:
+    def __init__(self, args):
+        self.args = args
+        self.counter = CallCounter()
+        self.store = LocalObjectStore()
+        self.simulator = None
+
+    def get_cgw_client(self):
+        sys.path.insert(0, str(CGW_SIMULATOR_DIR))
+        from cgw_simulator import CgwSimulator, CgwSimulatorClient, CgwSimulatorConfig, SimulatedClock
+
+        if self.simulator is None:
+            self.simulator = CgwSimulator(
+                config=CgwSimulatorConfig(latency_seconds=self.args.cgw_latency_ms / 1000, seed=0),
+                clock=SimulatedClock(time_scale=0),
+            )
+        return CgwSimulatorClient(self.simulator)
+
+    def call_counts(self) -> Dict[str, int]:
+        counts = self.counter.counts()
+        if self.simulator is not None:
+            counts.update({
+                f"cgw.{endpoint}": count
+                for endpoint, count in self.simulator.stats.request_count_by_endpoint.items()
+            })
+        return counts
+
+
+def add_data_file_fixtures(ctx: BenchmarkContext):
+    for data_file_key, data_file_suffix in DATA_FILE_SUFFIXES.items():
+        uri = f"{OUTPUT_PREFIX}/{data_file_suffix}"
+        if data_file_key == "samplesheetUri":
+            body = (FIXTURES_DIR / "SampleSheet_Intermediate.csv").read_bytes()
+        elif uri.endswith(".gz"):
+            body = gzip.compress(get_filler_bytes(ctx.args.data_file_mb * 1024 * 1024), compresslevel=1)
+        else:
+            body = get_filler_bytes(64 * 1024)
+        ctx.store.put_object(uri, body)
+
+
+def apply_layer_stand_ins(ctx: BenchmarkContext):
+    """
+    Point the layer's SSM, S3 and file manager calls at the local stand-ins
+    """
+    from pieriandx_tools.aws_helpers import s3_helpers
+    from pieriandx_tools.pieriandx_lookup import specimen_helpers, disease_helpers
+    from pieriandx_tools.utils import samplesheet_helpers
+
+    environ[specimen_helpers.SNOMED_CT_SPECIMEN_TYPE_S3_PATH_SSM_ENV_VAR] = "/benchmark/snomed/specimenType"
+    environ[disease_helpers.SNOMED_CT_DISEASE_TREE_S3_PATH_SSM_ENV_VAR] = "/benchmark/snomed/diseaseTree"
+    get_ssm_value = ctx.counter.wrap("ssm.get_parameter", lambda parameter_name: SSM_PARAMETERS[parameter_name])
+    specimen_helpers.get_ssm_value = get_ssm_value
+    disease_helpers.get_ssm_value = get_ssm_value
+
+    ctx.store.put_object(
+        SNOMED_SPECIMEN_TYPE_URI,
+        get_gzipped_json_bytes(get_snomed_tree_records([SPECIMEN_CODE], "CodeLabel", ctx.args.snomed_padding_records))
+    )
+    ctx.store.put_object(
+        SNOMED_DISEASE_TREE_URI,
+        get_gzipped_json_bytes(get_snomed_tree_records([DISEASE_CODE], "Label", ctx.args.snomed_padding_records))
+    )
+    s3_helpers.download_file = ctx.counter.wrap("s3.download_file", ctx.store.download_file)
+
+    samplesheet_helpers.get_presigned_url = ctx.counter.wrap(
+        "filemanager.get_presigned_url", ctx.store.get_presigned_url
+    )
+    samplesheet_helpers.get_s3_object_id_from_s3_uri = ctx.counter.wrap(
+        "filemanager.get_s3_object_id_from_s3_uri", ctx.store.get_s3_object_id_from_s3_uri
+    )
+
+
+def setup_generate_pieriandx_objects(ctx: BenchmarkContext, module) -> Callable[[int], Dict]:
+    add_data_file_fixtures(ctx)
+    event = {
+        "dag": {
+            "name": "cromwell_tso500_ctdna_workflow_1.0.4",
+            "description": "tso500_ctdna_workflow"
+        },
+        "panelId": "tso500_DRAGEN_ctDNA_v2_1_Universityofmelbourne",  # pragma: allowlist secret
+        "instrumentRunId": "231116_A01052_0172_BHVLM5DSX7",
+        "sequencerrunS3PathRoot": PIERIANDX_PREFIX,
+        "dataFiles": {
+            data_file_key: f"{OUTPUT_PREFIX}/{data_file_suffix}"
+            for data_file_key, data_file_suffix in DATA_FILE_SUFFIXES.items()
+        },
+        "caseMetadata": {
+            "isIdentified": False,
+            "caseAccessionNumber": f"{LIBRARY_ID}_001",
+            "externalSpecimenId": "PRJ230001",
+            "sampleType": "patientcare",
+            "specimenLabel": "primarySpecimen",
+            "indication": "NA",
+            "diseaseCode": DISEASE_CODE,
+            "specimenCode": SPECIMEN_CODE,
+            "sampleReception": {
+                "dateAccessioned": "2024-01-01T00:00:00+11:00",
+                "dateCollected": "2024-02-20T20:17:00+11:00",
+                "dateReceived": "2024-01-01T00:00:00+11:00"
+            },
+            "study": {
+                "id": "PO",
+                "subjectIdentifier": "SBJ04407"
+            }
+        },
+    }
+    # The handler pops keys from the event
+    return lambda iteration: deepcopy(event)
+
+
+def setup_generate_case_metadata(ctx: BenchmarkContext, module) -> Callable[[int], Dict]:
+    environ.pop("PIERIANDX_STATE_TABLE_NAME", None)
+    cgw_client = ctx.get_cgw_client()
+    module.get_pieriandx_client = lambda *args, **kwargs: cgw_client
+    module.get_library_from_library_id = ctx.counter.wrap(
+        "metadata.get_library_from_library_id",
+        lambda library_id: {
+            "libraryId": library_id,
+            "sample": {"externalSampleId": "PRJ230001"},
+            "subject": {"subjectId": "SBJ04407"},
+            "projectSet": [{"projectId": "PO"}],
+        }
+    )
+
+    # Existing cases, so that the handler has to probe for the next free accession number
+    for counter in range(1, ctx.args.existing_accession_count + 1):
+        ctx.simulator.handle_request(
+            "POST", "/case",
+            body={"specimens": [{"accessionNumber": f"{LIBRARY_ID}_{str(counter).zfill(3)}"}]}
+        )
+    ctx.simulator.stats.request_count_by_endpoint.clear()
+
+    return lambda iteration: {
+        "libraryId": LIBRARY_ID,
+        # Otherwise every warm iteration returns the memoised lookups
+        "forceRefresh": not ctx.args.allow_memo_hits,
+        "isIdentified": False,
+        "defaultSnomedDiseaseCode": DISEASE_CODE,
+        "redcapData": {
+            "dateAccessioned": "2024-01-01T00:00:00+11:00",
+            "dateCollected": "2024-02-20T20:17:00+11:00",
+            "dateReceived": "2024-01-01T00:00:00+11:00",
+        },
+    }
+
+
+def setup_get_data_files_from_tso500_workflow_run(ctx: BenchmarkContext, module) -> Callable[[int], Dict]:
+    environ.pop("PIERIANDX_STATE_TABLE_NAME", None)
+    add_data_file_fixtures(ctx)
+    # A realistically sized output directory
+    for index in range(ctx.args.output_directory_padding_files):
+        ctx.store.put_object(f"{OUTPUT_PREFIX}/Logs_Intermediates/Padding/file_{index:06d}.txt", b"")
+
+    module.get_latest_payload_from_portal_run_id = ctx.counter.wrap(
+        "workflow.get_latest_payload_from_portal_run_id",
+        lambda portal_run_id: {"data": {"inputs": {"sampleName": LIBRARY_ID}}}
+    )
+    module.list_files_from_portal_run_id = ctx.counter.wrap(
+        "filemanager.list_files_from_portal_run_id", ctx.store.list_files_from_portal_run_id
+    )
+
+    return lambda iteration: {
+        "portalRunId": PORTAL_RUN_ID,
+        # Otherwise every warm iteration returns the memoised data files
+        "forceRefresh": not ctx.args.allow_memo_hits,
+    }
+
+
+def setup_upload_pieriandx_sample_data_to_s3(ctx: BenchmarkContext, module) -> Callable[[int], Dict]:
+    add_data_file_fixtures(ctx)
+    module.get_presigned_url = ctx.counter.wrap("filemanager.get_presigned_url", ctx.store.get_presigned_url)
+    module.get_s3_object_id_from_s3_uri = ctx.counter.wrap(
+        "filemanager.get_s3_object_id_from_s3_uri", ctx.store.get_s3_object_id_from_s3_uri
+    )
+    module.upload_fileobj = ctx.counter.wrap("s3.upload_fileobj", ctx.store.upload_fileobj)
+    # The pieriandx s3 client is only created here, every call made with it is stood in below
+    module.get_pieriandx_s3_client = lambda: None
+    module.get_pieriandx_object_metadata = ctx.counter.wrap("s3.head_object", ctx.store.get_object_metadata)
+    module.head_object_with_pieriandx_client = ctx.counter.wrap("s3.head_object", ctx.store.head_object)
+    module.copy_object_into_pieriandx_bucket = ctx.counter.wrap("s3.copy_object", ctx.store.copy_object)
+
+    dest_prefix = f"{PIERIANDX_PREFIX}/231116_A01052_0172_BHVLM5DSX7__{LIBRARY_ID}_001/Data/Intensities/BaseCalls"
+    data_files_list = [
+        {
+            "srcUri": f"{OUTPUT_PREFIX}/{data_file_suffix}",
+            "destUri": f"{dest_prefix}/{Path(data_file_suffix).name.removesuffix('.gz')}",
+            "needsDecompression": data_file_suffix.endswith(".gz"),
+            "contents": None,
+        }
+        for data_file_key, data_file_suffix in DATA_FILE_SUFFIXES.items()
+        if data_file_key != "samplesheetUri"
+    ]
+    data_files_list.append({
+        "srcUri": None,
+        "destUri": f"{PIERIANDX_PREFIX}/231116_A01052_0172_BHVLM5DSX7__{LIBRARY_ID}_001/SampleSheet.csv",
+        "needsDecompression": False,
+        "contents": (FIXTURES_DIR / "SampleSheet_Intermediate.csv").read_text(),
+    })
+
+    return lambda iteration: {
+        "dataFiles": deepcopy(data_files_list),
+        # Otherwise every warm iteration is skipped as up to date
+        "forceUpload": not ctx.args.allow_skipped_uploads,
+    }
+
+
+def setup_get_informaticsjob_and_report_status(ctx: BenchmarkContext, module) -> Callable[[int], Dict]:
+    environ.pop("PIERIANDX_STATE_TABLE_NAME", None)
+    cgw_client = ctx.get_cgw_client()
+    module.get_pieriandx_client = lambda *args, **kwargs: cgw_client
+
+    _, case_obj = ctx.simulator.handle_request(
+        "POST", "/case", body={"specimens": [{"accessionNumber": f"{LIBRARY_ID}_001"}]}
+    )
+    ctx.simulator.handle_request("POST", "/sequencerRun", body={
+        "runId": "231116_A01052_0172_BHVLM5DSX7",
+        "specimens": [{
+            "accessionNumber": f"{LIBRARY_ID}_001", "barcode": "CCATCATTAG-AGAGGCAACC",
+            "lane": "1", "sampleId": LIBRARY_ID, "sampleType": "DNA"
+        }]
+    })
+    ctx.simulator.handle_request("POST", f"/case/{case_obj['id']}/informaticsJobs", body={
+        "input": [{
+            "accessionNumber": f"{LIBRARY_ID}_001",
+            "sequencerRunInfos": [{"runId": "231116_A01052_0172_BHVLM5DSX7"}]
+        }]
+    })
+    ctx.simulator.stats.request_count_by_endpoint.clear()
+
+    return lambda iteration: {
+        "caseId": case_obj['id'],
+        "panelName": "main",
+        "forcePoll": True,
+    }
+
+
+BENCHMARK_SETUP_FUNCTIONS: Dict[str, Callable] = {
+    "generate_pieriandx_objects": setup_generate_pieriandx_objects,
+    "generate_case_metadata": setup_generate_case_metadata,
+    "get_data_files_from_tso500_workflow_run": setup_get_data_files_from_tso500_workflow_run,
+    "upload_pieriandx_sample_data_to_s3": setup_upload_pieriandx_sample_data_to_s3,
+    "get_informaticsjob_and_report_status": setup_get_informaticsjob_and_report_status,
+}
+
+
+def get_latency_summary(latencies_list: List[float]) -> Dict[str, float]:
+    if len(latencies_list) < 2:
+        return {"meanMs": round(mean(latencies_list) * 1000, 3)}
+    percentiles = quantiles(latencies_list, n=100)
+    return {
+        "meanMs": round(mean(latencies_list) * 1000, 3),
+        "p50Ms": round(percentiles[49] * 1000, 3),
+        "p95Ms": round(percentiles[94] * 1000, 3),
+    }
+
+
+def run_single_benchmark(args, benchmark_name: str) -> Dict:
+    sys.path.insert(0, str(LAYER_SRC_DIR))
+    sys.path.insert(0, str(LAMBDAS_DIR / f"{benchmark_name}_py"))
+
+    ctx = BenchmarkContext(args)
+    ctx.store.start()
+
+    try:
+        import_start_time = time.perf_counter()
+        module = importlib.import_module(benchmark_name)
+        import_seconds = time.perf_counter() - import_start_time
+
+        apply_layer_stand_ins(ctx)
+        get_event = BENCHMARK_SETUP_FUNCTIONS[benchmark_name](ctx, module)
+
+        # Cold invocation
+        start_time = time.perf_counter()
+        module.handler(get_event(0), None)
+        first_invocation_seconds = time.perf_counter() - start_time
+
+        # Warm invocations
+        ctx.counter.reset()
+        if ctx.simulator is not None:
+            ctx.simulator.stats.request_count_by_endpoint.clear()
+        latencies_list = []
+        for iteration in range(1, args.iterations + 1):
+            event = get_event(iteration)
+            start_time = time.perf_counter()
+            module.handler(event, None)
+            latencies_list.append(time.perf_counter() - start_time)
+    finally:
+        ctx.store.stop()
+
+    return {
+        "importSeconds": round(import_seconds, 4),
+        "firstInvocationMs": round(first_invocation_seconds * 1000, 3),
+        "warm": get_latency_summary(latencies_list),
+        # ru_maxrss is in kilobytes on linux
+        "peakRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "callsPerInvocation": {
+            call_name: round(count / args.iterations, 3)
+            for call_name, count in sorted(ctx.call_counts().items())
+        },
+    }
+
+
+def run_benchmark_in_subprocess(args, benchmark_name: str) -> Dict:
+    with NamedTemporaryFile(suffix=".json") as result_file:
+        command = [
+            sys.executable, __file__,
+            "--single", benchmark_name,
+            "--result-path", result_file.name,
+            "--iterations", str(args.iterations),
+            "--data-file-mb", str(args.data_file_mb),
+            "--snomed-padding-records", str(args.snomed_padding_records),
+            "--output-directory-padding-files", str(args.output_directory_padding_files),
+            "--existing-accession-count", str(args.existing_accession_count),
+            "--cgw-latency-ms", str(args.cgw_latency_ms),
+        ]
+        if args.allow_skipped_uploads:
+            command.append("--allow-skipped-uploads")
+        if args.allow_memo_hits:
+            command.append("--allow-memo-hits")
+
+        process = subprocess.run(command, cwd=BENCHMARKS_DIR)
+        if process.returncode != 0:
+            return {"error": f"Benchmark exited with code {process.returncode}"}
+
+        return json.loads(Path(result_file.name).read_text())
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Return a list of regressions, empty if there are none
+    """
+    regressions_list = []
+    for benchmark_name, result in results.items():
+        baseline_result = baseline.get(benchmark_name, None)
+        if baseline_result is None or "error" in baseline_result:
+            continue
+        if "error" in result:
+            regressions_list.append(f"{benchmark_name}: {result['error']}")
+            continue
+
+        for metric_name, current_value, baseline_value in [
+            ("warm p50", result["warm"].get("p50Ms"), baseline_result["warm"].get("p50Ms")),
+            ("first invocation", result["firstInvocationMs"], baseline_result["firstInvocationMs"]),
+            ("import time", result["importSeconds"], baseline_result["importSeconds"]),
+            ("peak rss", result["peakRssMb"], baseline_result["peakRssMb"]),
+        ]:
+            if current_value is None or baseline_value is None:
+                continue
+            if current_value > baseline_value * (1 + tolerance):
+                regressions_list.append(
+                    f"{benchmark_name}: {metric_name} {current_value} exceeds baseline {baseline_value} "
+                    f"by more than {int(tolerance * 100)}%"
+                )
+
+        # Call counts should never go up
+        for call_name, count in result["callsPerInvocation"].items():
+            baseline_count = baseline_result["callsPerInvocation"].get(call_name, 0)
+            if count > baseline_count:
+                regressions_list.append(
+                    f"{benchmark_name}: {call_name} calls per invocation {count} exceeds baseline {baseline_count}"
+                )
+
+    return regressions_list
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark the launch pipeline lambdas against local stand-ins")
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARK_NAMES, default=BENCHMARK_NAMES)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--data-file-mb", type=int, default=8, help="Decompressed size of each vcf.gz data file")
+    parser.add_argument("--snomed-padding-records", type=int, default=10000)
+    parser.add_argument("--output-directory-padding-files", type=int, default=2000)
+    parser.add_argument("--existing-accession-count", type=int, default=2)
+    parser.add_argument("--cgw-latency-ms", type=float, default=0.0)
+    parser.add_argument("--allow-skipped-uploads", action="store_true")
+    parser.add_argument("--allow-memo-hits", action="store_true")
+    parser.add_argument("--output", type=Path, default=None, help="Write the results to this json file")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare the results to this json file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    # Internal, used to run a single benchmark in a subprocess
+    parser.add_argument("--single", choices=BENCHMARK_NAMES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result-path", type=Path, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    if args.single is not None:
+        args.result_path.write_text(json.dumps(run_single_benchmark(args, args.single)))
+        return
+
+    results = {}
+    for benchmark_name in args.benchmarks:
+        logger.warning(f"Running benchmark {benchmark_name}")
+        results[benchmark_name] = run_benchmark_in_subprocess(args, benchmark_name)
+
+    print(json.dumps(results, indent=2))
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.baseline is not None:
+        regressions_list = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions_list:
+            logger.error(regression)
+        if len(regressions_list) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+
+"""
+PierianDx CGW API simulator
+
+A local stand-in for the subset of the Clinical Genomics Workspace API that this service uses:
+
+* GET  /case?accessionNumber=<accession_number>   # 404 if no case has this accession number
+* POST /case                                      # Returns the case object (with its id)
+* GET  /case/<case_id>                            # Returns the case with its sequencer runs, jobs and reports
+* GET  /sequencerRun?runId=<run_id>               # 404 if no sequencer run has this run id
+* POST /sequencerRun                              # Returns the sequencer run id
+* POST /case/<case_id>/informaticsJobs            # Returns {"jobId": <job_id>}
+
+Informatics jobs progress through waiting -> ready -> running -> complete (or failed),
+once the job is complete a report is generated, progressing through running -> report_generation_complete.
+Each job's state durations are drawn when the job is created, so the progression is deterministic for a given seed.
+
+The simulator can be used in-process (CgwSimulatorClient, a drop-in for the pyriandx client)
+or over http (serve_cgw_simulator, point the pyriandx client's base url at the server).
+
+Job progression is driven by a SimulatedClock so that a load test can step through hours of
+job runtime in seconds, while request latency is real (wall-clock) sleep so that throughput
+under concurrency is measured faithfully.
+
+Usage:
+
+  python cgw_simulator.py --port 8080 --latency-ms 200 --failure-rate 0.01 --time-scale 600
+"""
+
+# Standard imports
+import argparse
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+import logging
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+CASE_ENDPOINT_REGEX = re.compile(r"^/case/(\d+)$")
+INFORMATICS_JOBS_ENDPOINT_REGEX = re.compile(r"^/case/(\d+)/informaticsJobs$")
+
+JOB_STATUS_PROGRESSION = ["waiting", "ready", "running"]
+
+
+def get_endpoint_name(method: str, path: str) -> str:
+    """
+    Collapse case ids so that requests can be counted per endpoint
+    """
+    path = INFORMATICS_JOBS_ENDPOINT_REGEX.sub("/case/{id}/informaticsJobs", path)
+    path = CASE_ENDPOINT_REGEX.sub("/case/{id}", path)
+    return f"{method} {path}"
+
+
+@dataclass
+class CgwSimulatorConfig:
+    # Real (wall-clock) latency added to every request
+    latency_seconds: float = 0.0
+    latency_jitter_seconds: float = 0.0
+    # Probability that a request fails with a 503
+    failure_rate: float = 0.0
+    # Simulated durations of each job state, jittered by +/- job_duration_jitter_fraction
+    job_state_durations_seconds: Dict[str, float] = field(default_factory=lambda: {
+        "waiting": 10 * 60,
+        "ready": 5 * 60,
+        "running": 5 * 60 * 60,
+    })
+    job_duration_jitter_fraction: float = 0.2
+    # Probability that a job fails at the end of its running state
+    job_failure_rate: float = 0.0
+    report_generation_seconds: float = 20 * 60
+    seed: Optional[int] = None
+
+
+class SimulatedClock:
+    """
+    A clock that runs time_scale times faster than the wall clock, and can also be advanced manually
+    """
+    def __init__(self, time_scale: float = 1.0, start_time: Optional[datetime] = None):
+        self._time_scale = time_scale
+        self._start_time = start_time if start_time is not None else datetime.now(timezone.utc)
+        self._start_monotonic = time.monotonic()
+        self._offset = timedelta(0)
+        self._lock = Lock()
+
+    def now(self) -> datetime:
+        with self._lock:
+            elapsed_seconds = (time.monotonic() - self._start_monotonic) * self._time_scale
+            return self._start_time + timedelta(seconds=elapsed_seconds) + self._offset
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._offset += timedelta(seconds=seconds)
+
+
+@dataclass
+class SimulatedJob:
+    id: int
+    created_time: datetime
+    state_durations_seconds: Dict[str, float]
+    fails: bool
+    report_id: Optional[int] = None
+
+    def get_status(self, now: datetime) -> Tuple[str, float]:
+        """
+        Get the job status and the number of seconds since the job finished (negative if not yet finished)
+        """
+        elapsed_seconds = (now - self.created_time).total_seconds()
+        for status in JOB_STATUS_PROGRESSION:
+            elapsed_seconds -= self.state_durations_seconds[status]
+            if elapsed_seconds < 0:
+                return status, elapsed_seconds
+        return ("failed" if self.fails else "complete"), elapsed_seconds
+
+
+@dataclass
+class SimulatorStats:
+    request_count: int = 0
+    failed_request_count: int = 0
+    request_count_by_endpoint: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requestCount": self.request_count,
+            "failedRequestCount": self.failed_request_count,
+            "requestCountByEndpoint": dict(self.request_count_by_endpoint),
+        }
+
+
+class CgwSimulator:
+    """
+    In-memory CGW state, thread-safe.
+    handle_request returns a (status_code, json_body) tuple
+    """
+    def __init__(self, config: Optional[CgwSimulatorConfig] = None, clock: Optional[SimulatedClock] = None):
+        self.config = config if config is not None else CgwSimulatorConfig()
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.stats = SimulatorStats()
+        self._random = random.Random(self.config.seed)
+        self._lock = Lock()
+        self._id_counter = 0
+        self._cases: Dict[int, Dict[str, Any]] = {}
+        self._case_jobs: Dict[int, List[SimulatedJob]] = {}
+        self._sequencer_runs: Dict[str, Dict[str, Any]] = {}
+
+    def _next_id(self) -> int:
+        self._id_counter += 1
+        return self._id_counter
+
+    def _count_request(self, endpoint_name: str):
+        with self._lock:
+            self.stats.request_count += 1
+            self.stats.request_count_by_endpoint[endpoint_name] = (
+                self.stats.request_count_by_endpoint.get(endpoint_name, 0) + 1
+            )
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            fails = self._random.random() < self.config.failure_rate
+            if fails:
+                self.stats.failed_request_count += 1
+            return fails
+
+    def _sleep_latency(self):
+        if self.config.latency_seconds <= 0:
+            return
+        with self._lock:
+            jitter = self._random.uniform(-1, 1) * self.config.latency_jitter_seconds
+        time.sleep(max(self.config.latency_seconds + jitter, 0))
+
+    def handle_request(
+            self,
+            method: str,
+            path: str,
+            params: Optional[Dict[str, str]] = None,
+            body: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Any]:
+        if params is None:
+            params = {}
+
+        self._count_request(get_endpoint_name(method, path))
+        self._sleep_latency()
+
+        if self._should_fail():
+            return 503, {"message": "Service Unavailable (simulated)"}
+
+        if method == "GET" and path == "/case":
+            return self._list_cases(params.get("accessionNumber", None))
+        if method == "POST" and path == "/case":
+            return self._create_case(body)
+        if method == "GET" and CASE_ENDPOINT_REGEX.match(path):
+            return self._get_case(int(CASE_ENDPOINT_REGEX.match(path).group(1)))
+        if method == "GET" and path == "/sequencerRun":
+            return self._list_sequencer_runs(params.get("runId", None))
+        if method == "POST" and path == "/sequencerRun":
+            return self._create_sequencer_run(body)
+        if method == "POST" and INFORMATICS_JOBS_ENDPOINT_REGEX.match(path):
+            return self._create_informatics_job(int(INFORMATICS_JOBS_ENDPOINT_REGEX.match(path).group(1)), body)
+
+        return 404, {"message": f"No such endpoint {method} {path}"}
+
+    def _list_cases(self, accession_number: Optional[str]) -> Tuple[int, Any]:
+        with self._lock:
+            case_list = [
+                case_obj for case_obj in self._cases.values()
+                if accession_number is None or any(
+                    specimen.get("accessionNumber") == accession_number
+                    for specimen in case_obj.get("specimens", [])
+                )
+            ]
+        if len(case_list) == 0:
+            return 404, {"message": "No cases found"}
+        return 200, case_list
+
+    def _create_case(self, case_creation_obj: Optional[Dict]) -> Tuple[int, Any]:
+        if not case_creation_obj or not case_creation_obj.get("specimens"):
+            return 400, {"message": "Case must have at least one specimen"}
+
+        with self._lock:
+            case_id = self._next_id()
+            case_obj = {
+                **case_creation_obj,
+                "id": str(case_id),
+                "dateCreated": self.clock.now().isoformat(),
+            }
+            self._cases[case_id] = case_obj
+            self._case_jobs[case_id] = []
+
+        return 200, case_obj
+
+    def _list_sequencer_runs(self, run_id: Optional[str]) -> Tuple[int, Any]:
+        with self._lock:
+            sequencerrun_list = [
+                sequencerrun_obj for sequencerrun_obj in self._sequencer_runs.values()
+                if run_id is None or sequencerrun_obj["runId"] == run_id
+            ]
+        if len(sequencerrun_list) == 0:
+            return 404, {"message": "No sequencer runs found"}
+        return 200, sequencerrun_list
+
+    def _create_sequencer_run(self, sequencerrun_creation_obj: Optional[Dict]) -> Tuple[int, Any]:
+        if not sequencerrun_creation_obj or not sequencerrun_creation_obj.get("runId"):
+            return 400, {"message": "Sequencer run must have a runId"}
+
+        with self._lock:
+            sequencerrun_id = self._next_id()
+            self._sequencer_runs[sequencerrun_creation_obj["runId"]] = {
+                **sequencerrun_creation_obj,
+                "id": sequencerrun_id,
+            }
+
+        return 200, sequencerrun_id
+
+    def _create_informatics_job(self, case_id: int, informaticsjob_creation_obj: Optional[Dict]) -> Tuple[int, Any]:
+        with self._lock:
+            if case_id not in self._cases:
+                return 404, {"message": f"No such case {case_id}"}
+
+            run_ids = [
+                sequencer_run_info["runId"]
+                for input_obj in (informaticsjob_creation_obj or {}).get("input", [])
+                for sequencer_run_info in input_obj.get("sequencerRunInfos", [])
+                if "runId" in sequencer_run_info
+            ]
+            missing_run_ids = [run_id for run_id in run_ids if run_id not in self._sequencer_runs]
+            if len(missing_run_ids) > 0:
+                return 400, {"message": f"No such sequencer runs {missing_run_ids}"}
+
+            # Attach the sequencer runs to the case, the job status lambda uses them to rerun failed jobs
+            case_obj = self._cases[case_id]
+            for run_id in run_ids:
+                if run_id not in [sequencer_run.get("runId") for sequencer_run in case_obj.get("sequencerRuns", [])]:
+                    case_obj.setdefault("sequencerRuns", []).append(self._sequencer_runs[run_id])
+
+            job = SimulatedJob(
+                id=self._next_id(),
+                created_time=self.clock.now(),
+                state_durations_seconds={
+                    status: duration_seconds * (
+                        1 + self._random.uniform(-1, 1) * self.config.job_duration_jitter_fraction
+                    )
+                    for status, duration_seconds in self.config.job_state_durations_seconds.items()
+                },
+                fails=self._random.random() < self.config.job_failure_rate,
+            )
+            self._case_jobs[case_id].append(job)
+
+        return 200, {"jobId": str(job.id)}
+
+    def _get_case(self, case_id: int) -> Tuple[int, Any]:
+        now = self.clock.now()
+
+        with self._lock:
+            if case_id not in self._cases:
+                return 404, {"message": f"No such case {case_id}"}
+
+            informatics_jobs_list = []
+            reports_list = []
+            for job in self._case_jobs[case_id]:
+                job_status, seconds_since_finished = job.get_status(now)
+                informatics_jobs_list.append({
+                    "id": str(job.id),
+                    "status": job_status,
+                })
+                if job_status != "complete":
+                    continue
+                if job.report_id is None:
+                    job.report_id = self._next_id()
+                reports_list.append({
+                    "id": str(job.report_id),
+                    "status": (
+                        "report_generation_complete"
+                        if seconds_since_finished >= self.config.report_generation_seconds
+                        else "running"
+                    ),
+                })
+
+            return 200, {
+                **self._cases[case_id],
+                "informaticsJobs": informatics_jobs_list,
+                "reports": reports_list,
+            }
+
+
+    def get_report_completion_time(self, case_id: int) -> Optional[datetime]:
+        """
+        The simulated time at which the report of the most recent job of the case completed (or will complete),
+        None if the most recent job fails. Used by the load harness to measure time-to-detection
+        """
+        with self._lock:
+            if len(self._case_jobs.get(case_id, [])) == 0:
+                return None
+            job = self._case_jobs[case_id][-1]
+        if job.fails:
+            return None
+        return job.created_time + timedelta(
+            seconds=sum(job.state_durations_seconds.values()) + self.config.report_generation_seconds
+        )
+
+
+class CgwSimulatorClient:
+    """
+    Drop-in replacement for the pyriandx client, only implements the private methods the lambdas use.
+    Like pyriandx, _get_api returns the json body or None if the request was unsuccessful,
+    and _post_api returns a requests Response object.
+    """
+    def __init__(self, simulator: CgwSimulator):
+        self.simulator = simulator
+
+    def _get_api(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Any]:
+        status_code, body = self.simulator.handle_request("GET", endpoint, params=params)
+        if status_code != 200:
+            return None
+        return body
+
+    def _post_api(self, endpoint: str, data: Optional[Dict] = None):
+        from requests import Response
+
+        status_code, body = self.simulator.handle_request("POST", endpoint, body=data)
+
+        response = Response()
+        response.status_code = status_code
+        response.url = endpoint
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(body).encode()
+        return response
+
+
+def get_cgw_simulator_request_handler(simulator: CgwSimulator):
+    class CgwSimulatorRequestHandler(BaseHTTPRequestHandler):
+        def _handle(self, method: str):
+            url = urlparse(self.path)
+            params = {key: value_list[0] for key, value_list in parse_qs(url.query).items()}
+            body = None
+            if method == "POST":
+                content_length = int(self.headers.get("Content-Length", 0))
+                if content_length > 0:
+                    body = json.loads(self.rfile.read(content_length))
+
+            status_code, response_body = simulator.handle_request(method, url.path, params=params, body=body)
+
+            response_bytes = json.dumps(response_body).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response_bytes)))
+            self.end_headers()
+            self.wfile.write(response_bytes)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def log_message(self, format, *args):
+            # Too noisy under load
+            pass
+
+    return CgwSimulatorRequestHandler
+
+
+def serve_cgw_simulator(simulator: CgwSimulator, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the simulator http server in a background thread, use port 0 to pick a free port.
+    Call shutdown() on the returned server to stop it.
+    The api is served at the root, so the base url is http://<host>:<server.server_port>
+    """
+    server = ThreadingHTTPServer((host, port), get_cgw_simulator_request_handler(simulator))
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Run a local PierianDx CGW API simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--job-failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0,
+        help="How many simulated seconds of job runtime pass per wall-clock second"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    simulator = CgwSimulator(
+        config=CgwSimulatorConfig(
+            latency_seconds=args.latency_ms / 1000,
+            latency_jitter_seconds=args.latency_jitter_ms / 1000,
+            failure_rate=args.failure_rate,
+            job_failure_rate=args.job_failure_rate,
+            seed=args.seed,
+        ),
+        clock=SimulatedClock(time_scale=args.time_scale),
+    )
+    server = ThreadingHTTPServer((args.host, args.port), get_cgw_simulator_request_handler(simulator))
+    logger.info(f"Serving the CGW simulator at http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Simulator stats: {json.dumps(simulator.stats.to_dict())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+"""
+Load harness for the launch and monitor paths against the CGW simulator
+
+Launch path, per case (concurrently):
+  launch_pieriandx_case (case and sequencer run, then the informatics job),
+  without a sequencer run s3 path, so no marker files are uploaded
+
+Monitor path, per tick of the monitor schedule:
+  advance the simulated clock by the schedule interval,
+  then run get_informaticsjob_and_report_status for every active case (concurrently),
+  and save_case_status_digest for each case whose status changed (as the monitor does once it has emitted the update),
+  until every case has succeeded or failed.
+
+The lambda handlers are imported from app/lambdas and run unmodified.
+The simulator is served over http, and the lambdas use the layer's get_pieriandx_client
+pointed at the simulator's base url (rather than the SSM parameters and auth token lambda),
+so calls go through the same timeouts, rate limiting, retries and circuit breaking as in production.
+The poll scheduler's clock is pointed at the simulated clock.
+State table items (including the rate limit bucket and circuits) are held in memory
+(PIERIANDX_STATE_TABLE_NAME is unset), so the rate limit applies across the harness's threads.
+
+Requires the lambda and layer dependencies (pyriandx, requests, pandas, pydantic etc) to be installed.
+
+Usage:
+
+  python load_harness.py --cases 1000 --concurrency 32 --latency-ms 150 --failure-rate 0.0
+
+Set --cases to 10x-100x the number of cases active at once in production.
+Set --rate-limit-per-second 0 to turn off the PierianDx API rate limit (it paces calls in real time).
+"""
+
+# Standard imports
+import argparse
+import importlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from os import environ
+from pathlib import Path
+from statistics import mean, quantiles
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+# Local imports
+from cgw_simulator import (
+    CgwSimulator, CgwSimulatorConfig, SimulatedClock, serve_cgw_simulator
+)
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+APP_DIR = Path(__file__).absolute().parent.parent.parent
+LAMBDAS_DIR = APP_DIR / "lambdas"
+LAYER_SRC_DIR = APP_DIR / "layers" / "pieriandx_tools_layer" / "src"
+
+LAUNCH_LAMBDA_NAMES = [
+    "launch_pieriandx_case",
+]
+MONITOR_LAMBDA_NAMES = [
+    "get_informaticsjob_and_report_status",
+    "save_case_status_digest",
+]
+
+# Should match MONITOR_RUNS_FREQUENCY in infrastructure/stage/constants.ts
+DEFAULT_MONITOR_INTERVAL_SECONDS = 5 * 60
+# Should match PIERIANDX_API_RATE_LIMIT_PER_SECOND and PIERIANDX_API_RATE_LIMIT_BURST in infrastructure/stage/constants.ts
+DEFAULT_RATE_LIMIT_PER_SECOND = 5.0
+DEFAULT_RATE_LIMIT_BURST = 10.0
+# Give up on the monitor phase after this much simulated time
+MAX_MONITOR_SIMULATED_SECONDS = 7 * 24 * 60 * 60
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self._latencies: Dict[str, List[float]] = {}
+        self._errors: Dict[str, List[str]] = {}
+        self._lock = Lock()
+
+    def run(self, name: str, func: Callable, *args, **kwargs) -> Optional[Any]:
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self._errors.setdefault(name, []).append(f"{type(e).__name__}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._latencies.setdefault(name, []).append(time.perf_counter() - start_time)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "count": len(latencies_list),
+                "errorCount": len(self._errors.get(name, [])),
+                **get_latency_percentiles(latencies_list),
+            }
+            for name, latencies_list in self._latencies.items()
+        }
+
+    def errors(self) -> Dict[str, List[str]]:
+        return self._errors
+
+
+def get_latency_percentiles(latencies_list: List[float]) -> Dict[str, float]:
+    if len(latencies_list) < 2:
+        return {
+            "meanMs": round(mean(latencies_list) * 1000, 2) if latencies_list else 0.0,
+        }
+    percentiles = quantiles(latencies_list, n=100)
+    return {
+        "meanMs": round(mean(latencies_list) * 1000, 2),
+        "p50Ms": round(percentiles[49] * 1000, 2),
+        "p95Ms": round(percentiles[94] * 1000, 2),
+        "p99Ms": round(percentiles[98] * 1000, 2),
+    }
+
+
+def import_lambda_module(lambda_name: str):
+    sys.path.insert(0, str(LAMBDAS_DIR / f"{lambda_name}_py"))
+    return importlib.import_module(lambda_name)
+
+
+def get_case_creation_obj(case_index: int) -> Dict:
+    accession_number = f"L{str(case_index).zfill(7)}_001"
+    return {
+        "identified": False,
+        "indication": "NA",
+        "panelName": "tso500_DRAGEN_ctDNA_v2_1_Universityofmelbourne",  # pragma: allowlist secret
+        "sampleType": "patientcare",
+        "specimens": [
+            {
+                "accessionNumber": accession_number,
+                "externalSpecimenId": f"PRJ{str(case_index).zfill(6)}",
+                "name": "primarySpecimen",
+                "type": {
+                    "code": "122561005",
+                    "label": "Tissue specimen from patient"
+                },
+            }
+        ],
+        "dagDescription": "tso500_ctdna_workflow",
+        "dagName": "cromwell_tso500_ctdna_workflow_1.0.4",
+        "disease": {
+            "code": "55342001",
+            "label": "Neoplastic disease"
+        },
+    }
+
+
+def launch_case(recorder: LatencyRecorder, lambda_modules: Dict, case_index: int) -> Optional[str]:
+    case_creation_obj = get_case_creation_obj(case_index)
+    accession_number = case_creation_obj["specimens"][0]["accessionNumber"]
+    run_id = f"20260101_A00130_{str(case_index).zfill(4)}_BHSIMULATE__{accession_number}"
+    specimen_obj = {
+        "accessionNumber": accession_number,
+        "barcode": "GACTGAGTAG+CACTATCAAC",
+        "lane": "1",
+        "sampleId": f"L{str(case_index).zfill(7)}",
+        "sampleType": "DNA"
+    }
+
+    launch_response = recorder.run(
+        "launch_pieriandx_case", lambda_modules["launch_pieriandx_case"].handler,
+        {
+            "caseCreationObj": case_creation_obj,
+            "sequencerrunCreationObj": {
+                "runId": run_id,
+                "specimens": [specimen_obj],
+                "type": "pairedEnd"
+            },
+            "informaticsjobCreationObj": {
+                "input": [
+                    {
+                        "accessionNumber": accession_number,
+                        "sequencerRunInfos": [{**specimen_obj, "runId": run_id}]
+                    }
+                ]
+            }
+        },
+        None
+    )
+    if launch_response is None:
+        return None
+
+    return launch_response["caseObj"]["id"]
+
+
+def run_launch_phase(args, recorder: LatencyRecorder, lambda_modules: Dict) -> Dict:
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        case_id_list = list(executor.map(
+            lambda case_index: launch_case(recorder, lambda_modules, case_index),
+            range(args.cases)
+        ))
+    duration_seconds = time.perf_counter() - start_time
+
+    launched_case_id_list = [case_id for case_id in case_id_list if case_id is not None]
+    return {
+        "launchedCaseIdList": launched_case_id_list,
+        "summary": {
+            "casesLaunched": len(launched_case_id_list),
+            "casesFailedToLaunch": args.cases - len(launched_case_id_list),
+            "durationSeconds": round(duration_seconds, 3),
+            "casesPerSecond": round(len(launched_case_id_list) / duration_seconds, 2) if duration_seconds else None,
+        }
+    }
+
+
+def run_monitor_phase(
+        args,
+        simulator: CgwSimulator,
+        recorder: LatencyRecorder,
+        lambda_modules: Dict,
+        case_id_list: List[str]
+) -> Dict:
+    status_handler = lambda_modules["get_informaticsjob_and_report_status"].handler
+    save_digest_handler = lambda_modules["save_case_status_digest"].handler
+    active_case_id_set = set(case_id_list)
+    detection_delays_seconds = []
+    poll_count = 0
+    skipped_poll_count = 0
+    tick_count = 0
+    final_status_counts: Dict[str, int] = {}
+    requests_before = simulator.stats.request_count
+
+    start_time = time.perf_counter()
+    simulated_start_time = simulator.clock.now()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        while (
+                len(active_case_id_set) > 0 and
+                (simulator.clock.now() - simulated_start_time).total_seconds() < MAX_MONITOR_SIMULATED_SECONDS
+        ):
+            simulator.clock.advance(args.monitor_interval_seconds)
+            tick_count += 1
+            tick_case_id_list = sorted(active_case_id_set)
+            responses_list = list(executor.map(
+                lambda case_id_iter: recorder.run(
+                    "get_informaticsjob_and_report_status", status_handler,
+                    {"caseId": case_id_iter, "panelName": "main"}, None
+                ),
+                tick_case_id_list
+            ))
+
+            now = simulator.clock.now()
+            for case_id, response in zip(tick_case_id_list, responses_list):
+                if response is None:
+                    continue
+                if response.get("pollSkipped", False):
+                    skipped_poll_count += 1
+                    continue
+                poll_count += 1
+                if response["statusChanged"]:
+                    recorder.run(
+                        "save_case_status_digest", save_digest_handler,
+                        {"caseId": case_id, "caseStatus": response}, None
+                    )
+                if response["status"] not in ["SUCCEEDED", "FAILED"]:
+                    continue
+                active_case_id_set.remove(case_id)
+                final_status_counts[response["status"]] = final_status_counts.get(response["status"], 0) + 1
+                report_completion_time = simulator.get_report_completion_time(int(case_id))
+                if response["status"] == "SUCCEEDED" and report_completion_time is not None:
+                    detection_delays_seconds.append((now - report_completion_time).total_seconds())
+
+    duration_seconds = time.perf_counter() - start_time
+
+    return {
+        "ticks": tick_count,
+        "simulatedDuration": str(timedelta(seconds=tick_count * args.monitor_interval_seconds)),
+        "durationSeconds": round(duration_seconds, 3),
+        "polls": poll_count,
+        "skippedPolls": skipped_poll_count,
+        "cgwRequests": simulator.stats.request_count - requests_before,
+        "cgwRequestsPerCase": round((simulator.stats.request_count - requests_before) / max(len(case_id_list), 1), 2),
+        "casesStillActive": len(active_case_id_set),
+        "finalStatusCounts": final_status_counts,
+        "detectionDelayMinutes": {
+            key.replace("Ms", "Minutes"): round(value / 1000 / 60, 2)
+            for key, value in get_latency_percentiles(detection_delays_seconds).items()
+        },
+    }
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Load test the launch and monitor lambdas against the CGW simulator")
+    parser.add_argument("--cases", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--job-failure-rate", type=float, default=0.0)
+    parser.add_argument("--monitor-interval-seconds", type=int, default=DEFAULT_MONITOR_INTERVAL_SECONDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--rate-limit-per-second", type=float, default=DEFAULT_RATE_LIMIT_PER_SECOND,
+        help="PierianDx API rate limit shared by all invocations, 0 to turn it off"
+    )
+    parser.add_argument("--rate-limit-burst", type=float, default=DEFAULT_RATE_LIMIT_BURST)
+    parser.add_argument("--skip-monitor", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    # Keep all state in memory
+    environ.pop("PIERIANDX_STATE_TABLE_NAME", None)
+    environ["PIERIANDX_API_RATE_LIMIT_PER_SECOND"] = str(args.rate_limit_per_second)
+    environ["PIERIANDX_API_RATE_LIMIT_BURST"] = str(args.rate_limit_burst)
+    sys.path.insert(0, str(LAYER_SRC_DIR))
+
+    # Job progression only moves when the monitor phase advances the clock
+    clock = SimulatedClock(time_scale=0)
+    simulator = CgwSimulator(
+        config=CgwSimulatorConfig(
+            latency_seconds=args.latency_ms / 1000,
+            latency_jitter_seconds=args.latency_jitter_ms / 1000,
+            failure_rate=args.failure_rate,
+            job_failure_rate=args.job_failure_rate,
+            seed=args.seed,
+        ),
+        clock=clock,
+    )
+
+    server = serve_cgw_simulator(simulator)
+
+    # Point the lambdas at the simulator, the simulator does not check credentials
+    from pieriandx_tools.pieriandx_helpers import get_pieriandx_client, poll_schedule_helpers
+    simulator_pieriandx_client = partial(
+        get_pieriandx_client,
+        email="load-harness@example.com",
+        token="load-harness-token",
+        institution="load-harness",
+        base_url=f"http://127.0.0.1:{server.server_port}",
+    )
+    lambda_modules = {}
+    for lambda_name in LAUNCH_LAMBDA_NAMES + MONITOR_LAMBDA_NAMES:
+        lambda_modules[lambda_name] = import_lambda_module(lambda_name)
+        if hasattr(lambda_modules[lambda_name], "get_pieriandx_client"):
+            lambda_modules[lambda_name].get_pieriandx_client = simulator_pieriandx_client
+
+    poll_schedule_helpers.get_now = clock.now
+
+    recorder = LatencyRecorder()
+    try:
+        launch_results = run_launch_phase(args, recorder, lambda_modules)
+        monitor_summary = None
+        if not args.skip_monitor:
+            monitor_summary = run_monitor_phase(
+                args, simulator, recorder, lambda_modules, launch_results["launchedCaseIdList"]
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(json.dumps(
+        {
+            "launch": launch_results["summary"],
+            "monitor": monitor_summary,
+            "handlers": recorder.summary(),
+            "cgw": simulator.stats.to_dict(),
+            "sampleErrors": {
+                name: errors_list[:5]
+                for name, errors_list in recorder.errors().items()
+            },
+        },
+        indent=2
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+"""
+Cold start profiler for the lambdas
+
+For every handler module under app/lambdas/*_py, in a fresh python process:
+
+* Import the module under `-X importtime`, and collect the import cost of each top-level package
+* Record the init-phase duration (the time taken to import the handler module)
+* Optionally invoke the handler once with an event from --events-dir/<lambda_name>.json
+  and record the first-invocation latency
+
+The lambdas are then ranked by init duration, alongside their most expensive imports,
+and the most expensive packages across all lambdas are summed, so that we know which lazy imports
+would save the most cold start time.
+
+Each process compiles every module it imports from source (with an empty bytecode cache, see PYTHONPYCACHEPREFIX),
+so that bytecode from earlier runs or __pycache__ directories in the repo does not make imports look cheaper.
+
+Requires the lambda and layer dependencies to be installed.
+Lambdas that fail to import are reported as errors, left out of the ranking and the package totals
+(their import times are partial), and the profiler exits non-zero.
+
+Usage:
+
+  python profile_cold_starts.py
+  python profile_cold_starts.py --events-dir events/ --top 5 --output cold_starts.json
+"""
+
+# Standard imports
+import argparse
+import json
+import subprocess
+import sys
+from os import environ, pathsep
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Optional
+import logging
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+APP_DIR = Path(__file__).absolute().parent.parent.parent
+LAMBDAS_DIR = APP_DIR / "lambdas"
+LAYER_SRC_DIR = APP_DIR / "layers" / "pieriandx_tools_layer" / "src"
+
+IMPORT_START_MARKER = "__cold_start_profiler_import_start__"
+
+# Run in the child process, prints a json result as the last line of stdout
+PROFILE_SCRIPT = """
+import json, sys, time
+result = {{}}
+# Everything imported at interpreter startup is reported above this marker
+print("{marker}", file=sys.stderr, flush=True)
+start_time = time.perf_counter()
+try:
+    import {module_name} as handler_module
+except Exception as e:
+    result["importError"] = f"{{type(e).__name__}}: {{e}}"
+result["initSeconds"] = time.perf_counter() - start_time
+event_path = {event_path!r}
+if event_path is not None and "importError" not in result:
+    with open(event_path) as event_file:
+        event = json.load(event_file)
+    start_time = time.perf_counter()
+    try:
+        handler_module.handler(event, None)
+    except Exception as e:
+        result["invocationError"] = f"{{type(e).__name__}}: {{e}}"
+    result["firstInvocationSeconds"] = time.perf_counter() - start_time
+print(json.dumps(result))
+"""
+
+
+def get_lambda_names() -> List[str]:
+    return sorted(
+        lambda_dir.name.removesuffix("_py")
+        for lambda_dir in LAMBDAS_DIR.glob("*_py")
+        if (lambda_dir / f"{lambda_dir.name.removesuffix('_py')}.py").is_file()
+    )
+
+
+def parse_importtime_output(importtime_output: str) -> Dict[str, float]:
+    """
+    Parse the stderr of `python -X importtime` (after the import start marker), returning the import time in seconds of each top-level package.
+
+    We sum the 'self' time of every module in the package, so a package's cost excludes the other packages it imports,
+    i.e. the cost of pandas is attributed to pandas and numpy rather than to the layer module that imported pandas.
+
+    Lines look like:
+    import time: self [us] | cumulative | imported package
+    import time:       412 |       1234 |   pandas.core
+    :param importtime_output:
+    :return:
+    """
+    self_seconds_by_package: Dict[str, float] = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, package_name = line.removeprefix("import time:").split("|", 2)
+        top_level_package = package_name.strip().split(".")[0]
+        self_seconds_by_package[top_level_package] = (
+            self_seconds_by_package.get(top_level_package, 0.0) + int(self_us) / 1_000_000
+        )
+    return self_seconds_by_package
+
+
+def profile_lambda(lambda_name: str, events_dir: Optional[Path]) -> Dict:
+    event_path = None
+    if events_dir is not None and (events_dir / f"{lambda_name}.json").is_file():
+        event_path = str(events_dir / f"{lambda_name}.json")
+
+    # A fresh bytecode cache per run, so bytecode from a previous run (or in the repo) is never read
+    with TemporaryDirectory(prefix="cold_start_profiler_pycache_") as pycache_prefix:
+        process = subprocess.run(
+            [
+                sys.executable, "-X", "importtime", "-c",
+                PROFILE_SCRIPT.format(module_name=lambda_name, event_path=event_path, marker=IMPORT_START_MARKER)
+            ],
+            capture_output=True,
+            text=True,
+            env={
+                **environ,
+                "PYTHONPATH": pathsep.join([
+                    str(LAMBDAS_DIR / f"{lambda_name}_py"),
+                    str(LAYER_SRC_DIR),
+                    environ.get("PYTHONPATH", ""),
+                ]),
+                "PYTHONPYCACHEPREFIX": pycache_prefix,
+                "PYTHONDONTWRITEBYTECODE": "1",
+            },
+        )
+
+    stdout_lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or len(stdout_lines) == 0:
+        return {
+            "lambdaName": lambda_name,
+            "importError": f"Profiler exited with code {process.returncode}: {process.stderr.strip()[-500:]}",
+        }
+
+    result = json.loads(stdout_lines[-1])
+    self_seconds_by_package = parse_importtime_output(process.stderr.split(IMPORT_START_MARKER, 1)[-1])
+
+    return {
+        "lambdaName": lambda_name,
+        **result,
+        "importsByCost": dict(sorted(
+            self_seconds_by_package.items(),
+            key=lambda kv_iter_: kv_iter_[1],
+            reverse=True
+        )),
+    }
+
+
+def get_report(profiles_list: List[Dict], top: int) -> Dict:
+    # A lambda that failed to import stopped part way, so its init time and imports are not comparable
+    imported_profiles_list = [profile for profile in profiles_list if "importError" not in profile]
+    ranked_profiles_list = sorted(
+        imported_profiles_list,
+        key=lambda profile_iter_: profile_iter_["initSeconds"],
+        reverse=True
+    )
+
+    # Sum package costs across all lambdas, the packages worth making lazy are at the top
+    total_seconds_by_package: Dict[str, float] = {}
+    lambda_count_by_package: Dict[str, int] = {}
+    for profile in imported_profiles_list:
+        for package_name, package_seconds in profile.get("importsByCost", {}).items():
+            total_seconds_by_package[package_name] = total_seconds_by_package.get(package_name, 0) + package_seconds
+            lambda_count_by_package[package_name] = lambda_count_by_package.get(package_name, 0) + 1
+
+    return {
+        "lambdas": [
+            {
+                "lambdaName": profile["lambdaName"],
+                **({"invocationError": profile["invocationError"]} if "invocationError" in profile else {}),
+                "initMs": round(profile["initSeconds"] * 1000, 1),
+                **(
+                    {"firstInvocationMs": round(profile["firstInvocationSeconds"] * 1000, 1)}
+                    if "firstInvocationSeconds" in profile
+                    else {}
+                ),
+                "topImportsMs": {
+                    package_name: round(package_seconds * 1000, 1)
+                    for package_name, package_seconds in list(profile["importsByCost"].items())[:top]
+                },
+            }
+            for profile in ranked_profiles_list
+        ],
+        "importErrors": [
+            {
+                "lambdaName": profile["lambdaName"],
+                "importError": profile["importError"],
+            }
+            for profile in profiles_list
+            if "importError" in profile
+        ],
+        "packages": [
+            {
+                "packageName": package_name,
+                "totalMs": round(total_seconds * 1000, 1),
+                "lambdaCount": lambda_count_by_package[package_name],
+            }
+            for package_name, total_seconds in sorted(
+                total_seconds_by_package.items(),
+                key=lambda kv_iter_: kv_iter_[1],
+                reverse=True
+            )[:top * 4]
+        ],
+    }
+
+
+def print_report(report: Dict):
+    print(f"{'lambda':<50} {'init ms':>10} {'1st call ms':>12}  top imports (ms)")
+    for lambda_report in report["lambdas"]:
+        print(
+            f"{lambda_report['lambdaName']:<50} "
+            f"{lambda_report['initMs']:>10} "
+            f"{lambda_report.get('firstInvocationMs', '-'):>12}  "
+            + ", ".join(f"{name}={ms}" for name, ms in lambda_report["topImportsMs"].items())
+        )
+    print()
+    print(f"{'package':<30} {'total ms':>10} {'lambdas':>8}")
+    for package_report in report["packages"]:
+        print(f"{package_report['packageName']:<30} {package_report['totalMs']:>10} {package_report['lambdaCount']:>8}")
+
+    if len(report["importErrors"]) > 0:
+        print()
+        print("Lambdas that failed to import (not ranked):")
+        for import_error_report in report["importErrors"]:
+            print(f"{import_error_report['lambdaName']:<50} {import_error_report['importError'][-200:]}")
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Profile the cold start (import and first invocation) of each lambda")
+    parser.add_argument("--lambdas", nargs="+", default=None, help="Defaults to every lambda under app/lambdas")
+    parser.add_argument("--events-dir", type=Path, default=None, help="Directory of <lambda_name>.json events")
+    parser.add_argument("--top", type=int, default=5, help="Number of imports to show per lambda")
+    parser.add_argument("--output", type=Path, default=None, help="Write the json report to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    lambda_names = args.lambdas if args.lambdas is not None else get_lambda_names()
+
+    profiles_list = []
+    for lambda_name in lambda_names:
+        logger.info(f"Profiling {lambda_name}")
+        profiles_list.append(profile_lambda(lambda_name, args.events_dir))
+
+    report = get_report(profiles_list, args.top)
+    print_report(report)
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if len(report["importErrors"]) > 0:
+        logger.error(f"{len(report['importErrors'])} lambdas failed to import")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
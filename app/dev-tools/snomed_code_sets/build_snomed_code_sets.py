@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Build the SNOMED code set artifacts used by the post schema validation lambda
+
+Reads the specimen type and disease trees (gzipped json, local paths or s3 uris),
+and writes a code set artifact for each tree (see pieriandx_tools.pieriandx_lookup.code_set_helpers).
+
+Only codes that appear exactly once in a tree are included,
+since the label lookups in generate_pieriandx_objects fail for duplicated codes.
+
+The code sets are rebuilt on every deployment by the build_snomed_code_sets lambda,
+run this to rebuild them by hand (i.e. after updating the trees in the lookup bucket between deployments), i.e.
+
+  python build_snomed_code_sets.py \
+    --specimen-type-tree s3://pdx-lookup-bucket-.../snomed/tso500_ctdna_snomed_ct_specimen_type_map.json.gz \
+    --specimen-type-code-set s3://pdx-lookup-bucket-.../snomed/tso500_ctdna_snomed_ct_specimen_type_codes.bin \
+    --disease-tree s3://pdx-lookup-bucket-.../snomed/tso500_ctdna_snomed_ct_disease_tree.json.gz \
+    --disease-code-set s3://pdx-lookup-bucket-.../snomed/tso500_ctdna_snomed_ct_disease_codes.bin
+
+Writing to s3 requires boto3 and credentials for the lookup bucket.
+"""
+
+# Standard imports
+import argparse
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+import logging
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+APP_DIR = Path(__file__).absolute().parent.parent.parent
+LAYER_SRC_DIR = APP_DIR / "layers" / "pieriandx_tools_layer" / "src"
+
+sys.path.insert(0, str(LAYER_SRC_DIR))
+
+# Layer imports
+from pieriandx_tools.pieriandx_lookup.code_set_helpers import (  # noqa: E402
+    get_code_set_bytes,
+    get_unique_codes_from_tree_bytes,
+    read_code_set_bytes,
+)
+
+
+def read_bytes(path_or_uri: str) -> bytes:
+    if not path_or_uri.startswith("s3://"):
+        return Path(path_or_uri).read_bytes()
+
+    import boto3
+
+    s3_obj = urlparse(path_or_uri)
+    return boto3.client("s3").get_object(Bucket=s3_obj.netloc, Key=s3_obj.path.lstrip("/"))["Body"].read()
+
+
+def write_bytes(path_or_uri: str, body: bytes):
+    if not path_or_uri.startswith("s3://"):
+        Path(path_or_uri).write_bytes(body)
+        return
+
+    import boto3
+
+    s3_obj = urlparse(path_or_uri)
+    boto3.client("s3").put_object(
+        Bucket=s3_obj.netloc,
+        Key=s3_obj.path.lstrip("/"),
+        Body=body,
+        ContentType="application/octet-stream",
+        ServerSideEncryption="AES256",
+    )
+
+
+def build_code_set(tree_path_or_uri: str, code_set_path_or_uri: str):
+    codes = get_unique_codes_from_tree_bytes(read_bytes(tree_path_or_uri), tree_path_or_uri)
+    code_set_bytes = get_code_set_bytes(codes)
+
+    # Check the artifact reads back before we write it
+    assert list(read_code_set_bytes(code_set_bytes)) == sorted(codes)
+
+    write_bytes(code_set_path_or_uri, code_set_bytes)
+    logger.info(f"Wrote {len(codes)} codes ({len(code_set_bytes)} bytes) to {code_set_path_or_uri}")
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Build the SNOMED code set artifacts from the SNOMED trees")
+    parser.add_argument("--specimen-type-tree", default=None, help="Path or s3 uri of the specimen type tree")
+    parser.add_argument("--specimen-type-code-set", default=None, help="Output path or s3 uri")
+    parser.add_argument("--disease-tree", default=None, help="Path or s3 uri of the disease tree")
+    parser.add_argument("--disease-code-set", default=None, help="Output path or s3 uri")
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    for tree_path_or_uri, code_set_path_or_uri in [
+        (args.specimen_type_tree, args.specimen_type_code_set),
+        (args.disease_tree, args.disease_code_set),
+    ]:
+        if tree_path_or_uri is None and code_set_path_or_uri is None:
+            continue
+        if tree_path_or_uri is None or code_set_path_or_uri is None:
+            raise ValueError("Both a tree and a code set output must be given")
+        build_code_set(tree_path_or_uri, code_set_path_or_uri)
+
+
+if __name__ == "__main__":
+    main()
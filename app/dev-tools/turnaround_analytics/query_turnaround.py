@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+"""
+Query informatics job turnaround times from the turnaround store
+
+Reads the job status transitions recorded by the monitor (see pieriandx_tools.pieriandx_helpers.turnaround_helpers),
+and prints the p50 / p95 job, report and total turnaround times per panel and hour of day the job started, i.e.
+
+  python query_turnaround.py \
+    --store-uri s3://pdx-lookup-bucket-.../analytics/turnaround/ \
+    --start-date 2026-09-01 \
+    --end-date 2026-09-30 \
+    --timezone Australia/Melbourne
+
+Use --group-by panelName to get the turnaround per panel only,
+and --output-csv to write the percentiles to a file rather than printing them.
+Use --output-parquet to also export the transition records of the date range as a single Parquet file,
+i.e. to load them into Athena or a notebook.
+
+If --store-uri is not given, PIERIANDX_TURNAROUND_STORE_URI (or the local stand-in store) is used.
+Requires pandas (and pyarrow for --output-parquet), reading from s3 requires boto3 and credentials for the lookup bucket.
+pyarrow is deliberately not a runtime dependency of the layer, the monitor writes the store as gzipped json lines.
+"""
+
+# Standard imports
+import argparse
+import gzip
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+from os import environ
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+import logging
+
+import pandas as pd
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+APP_DIR = Path(__file__).absolute().parent.parent.parent
+LAYER_SRC_DIR = APP_DIR / "layers" / "pieriandx_tools_layer" / "src"
+
+sys.path.insert(0, str(LAYER_SRC_DIR))
+
+# Layer imports
+from pieriandx_tools.aws_helpers.s3_helpers import get_s3_client  # noqa: E402
+from pieriandx_tools.pieriandx_helpers.turnaround_helpers import (  # noqa: E402
+    TRANSITION_RECORDS_FILE_SUFFIX,
+    TURNAROUND_STORE_URI_ENV_VAR,
+    get_date_partition,
+    get_turnaround_store_uri,
+    is_s3_uri,
+)
+
+DEFAULT_QUERY_DAYS = 30
+
+# The job status once the informatics job is done, and the workflow status once the report is done
+JOB_COMPLETE_STATUS = "complete"
+REPORT_COMPLETE_STATUS = "SUCCEEDED"
+
+DEFAULT_PERCENTILES = [0.5, 0.95]
+TRANSITION_RECORD_COLUMNS = [
+    "caseId",
+    "jobId",
+    "panelName",
+    "jobStatus",
+    "status",
+    "timestamp",
+]
+TURNAROUND_COLUMNS = [
+    "jobTurnaroundSeconds",
+    "reportTurnaroundSeconds",
+    "totalTurnaroundSeconds",
+]
+
+
+def get_partition_dates(start_date: date, end_date: date) -> List[date]:
+    return [
+        start_date + timedelta(days=day_offset)
+        for day_offset in range((end_date - start_date).days + 1)
+    ]
+
+
+def parse_transition_records(records_bytes: bytes) -> List[Dict]:
+    return [
+        json.loads(line)
+        for line in gzip.decompress(records_bytes).decode().splitlines()
+        if line.strip()
+    ]
+
+
+def _read_s3_partition_records(store_uri: str, partition_dates: Iterable[date]) -> List[Dict]:
+    store_obj = urlparse(store_uri)
+    s3 = get_s3_client()
+    paginator = s3.get_paginator("list_objects_v2")
+
+    records_list = []
+    for partition_date in partition_dates:
+        prefix = f"{store_obj.path.strip('/')}/{get_date_partition(partition_date)}/".lstrip("/")
+        for page in paginator.paginate(Bucket=store_obj.netloc, Prefix=prefix):
+            for s3_obj in page.get("Contents", []):
+                if not s3_obj["Key"].endswith(TRANSITION_RECORDS_FILE_SUFFIX):
+                    continue
+                response = s3.get_object(Bucket=store_obj.netloc, Key=s3_obj["Key"])
+                records_list.extend(parse_transition_records(response["Body"].read()))
+
+    return records_list
+
+
+def _read_local_partition_records(store_uri: str, partition_dates: Iterable[date]) -> List[Dict]:
+    records_list = []
+    for partition_date in partition_dates:
+        partition_path = Path(store_uri) / get_date_partition(partition_date)
+        for records_path in sorted(partition_path.glob(f"*{TRANSITION_RECORDS_FILE_SUFFIX}")):
+            records_list.extend(parse_transition_records(records_path.read_bytes()))
+
+    return records_list
+
+
+def read_transition_records(start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    Read the transition records of a date range (inclusive) from the turnaround store
+    :param start_date:
+    :param end_date:
+    :return: A dataframe with a column per transition record field
+    """
+    store_uri = get_turnaround_store_uri()
+    partition_dates = get_partition_dates(start_date, end_date)
+
+    if is_s3_uri(store_uri):
+        records_list = _read_s3_partition_records(store_uri, partition_dates)
+    else:
+        records_list = _read_local_partition_records(store_uri, partition_dates)
+
+    transitions_df = pd.DataFrame(records_list, columns=TRANSITION_RECORD_COLUMNS)
+    transitions_df["timestamp"] = pd.to_datetime(transitions_df["timestamp"], utc=True, format="ISO8601")
+    return transitions_df
+
+
+def get_turnaround_df(transitions_df: pd.DataFrame, timezone_name: str = "UTC") -> pd.DataFrame:
+    """
+    Get the turnaround of each informatics job from its transition records.
+
+    A job starts when the monitor first sees it, its informatics turnaround ends when its status is first 'complete',
+    and its report turnaround ends when the case is first SUCCEEDED.
+    Jobs that have not reached a status have a null turnaround for that status.
+
+    :param transitions_df: From read_transition_records
+    :param timezone_name: The timezone of the start hour, i.e. Australia/Melbourne
+    :return: A dataframe with a row per (caseId, jobId)
+    """
+    job_keys = ["caseId", "jobId"]
+
+    if transitions_df.empty:
+        return pd.DataFrame(
+            columns=[*job_keys, "panelName", "startTime", "startHour", *TURNAROUND_COLUMNS]
+        ).astype(dict.fromkeys(TURNAROUND_COLUMNS, "float64"))
+
+    # A status may be recorded more than once (i.e. after the monitor's status digest expires), take the first
+    first_times_df = transitions_df.groupby(job_keys).agg(
+        panelName=("panelName", "first"),
+        startTime=("timestamp", "min"),
+    )
+    job_complete_times = transitions_df.loc[
+        transitions_df["jobStatus"] == JOB_COMPLETE_STATUS
+    ].groupby(job_keys)["timestamp"].min()
+    report_complete_times = transitions_df.loc[
+        transitions_df["status"] == REPORT_COMPLETE_STATUS
+    ].groupby(job_keys)["timestamp"].min()
+
+    turnaround_df = first_times_df.assign(
+        jobCompleteTime=job_complete_times,
+        reportCompleteTime=report_complete_times,
+    )
+
+    turnaround_df["startHour"] = turnaround_df["startTime"].dt.tz_convert(timezone_name).dt.hour
+    turnaround_df["jobTurnaroundSeconds"] = (
+        turnaround_df["jobCompleteTime"] - turnaround_df["startTime"]
+    ).dt.total_seconds()
+    turnaround_df["reportTurnaroundSeconds"] = (
+        turnaround_df["reportCompleteTime"] - turnaround_df["jobCompleteTime"]
+    ).dt.total_seconds()
+    turnaround_df["totalTurnaroundSeconds"] = (
+        turnaround_df["reportCompleteTime"] - turnaround_df["startTime"]
+    ).dt.total_seconds()
+
+    return turnaround_df.reset_index()[
+        [*job_keys, "panelName", "startTime", "startHour", *TURNAROUND_COLUMNS]
+    ]
+
+
+def get_turnaround_percentiles(
+        turnaround_df: pd.DataFrame,
+        group_by: Optional[List[str]] = None,
+        percentiles: Optional[List[float]] = None,
+) -> pd.DataFrame:
+    """
+    Get the turnaround percentiles of each group of jobs, i.e. per panel and start hour
+    :param turnaround_df: From get_turnaround_df
+    :param group_by: Columns of turnaround_df to group by, defaults to panelName and startHour
+    :param percentiles: Defaults to p50 and p95
+    :return: A dataframe with a row per group, a jobCount column and a column per turnaround and percentile,
+      i.e. jobTurnaroundSecondsP50
+    """
+    if group_by is None:
+        group_by = ["panelName", "startHour"]
+    if percentiles is None:
+        percentiles = DEFAULT_PERCENTILES
+
+    # Keep jobs with no panel name in a group of their own
+    grouped_df = turnaround_df.fillna({"panelName": "default"}).groupby(group_by)
+
+    percentile_columns: Dict[str, pd.Series] = {
+        "jobCount": grouped_df.size(),
+    }
+    for turnaround_column in TURNAROUND_COLUMNS:
+        for percentile in percentiles:
+            percentile_columns[f"{turnaround_column}P{round(percentile * 100)}"] = (
+                grouped_df[turnaround_column].quantile(percentile)
+            )
+
+    return pd.DataFrame(percentile_columns).reset_index()
+
+
+def get_args():
+    today = datetime.now(timezone.utc).date()
+
+    parser = argparse.ArgumentParser(description="Get turnaround percentiles from the turnaround store")
+    parser.add_argument("--store-uri", default=None, help="Path or s3 uri of the turnaround store")
+    parser.add_argument(
+        "--start-date", type=date.fromisoformat, default=today - timedelta(days=DEFAULT_QUERY_DAYS),
+        help=f"First date of transitions to read (UTC), defaults to {DEFAULT_QUERY_DAYS} days ago"
+    )
+    parser.add_argument(
+        "--end-date", type=date.fromisoformat, default=today,
+        help="Last date of transitions to read (UTC), defaults to today"
+    )
+    parser.add_argument(
+        "--group-by", nargs="+", default=["panelName", "startHour"],
+        help="Columns to group jobs by, any of panelName and startHour"
+    )
+    parser.add_argument(
+        "--percentiles", nargs="+", type=float, default=[0.5, 0.95],
+        help="Percentiles between 0 and 1"
+    )
+    parser.add_argument("--timezone", default="UTC", help="Timezone of the start hour, i.e. Australia/Melbourne")
+    parser.add_argument("--output-csv", default=None, help="Write the percentiles to this path")
+    parser.add_argument(
+        "--output-parquet", default=None,
+        help="Also write the transition records of the date range to this Parquet file (requires pyarrow)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    if args.store_uri is not None:
+        environ[TURNAROUND_STORE_URI_ENV_VAR] = args.store_uri
+
+    transitions_df = read_transition_records(args.start_date, args.end_date)
+
+    if args.output_parquet is not None:
+        transitions_df.to_parquet(args.output_parquet, index=False)
+        logger.info(f"Wrote {len(transitions_df)} transition records to {args.output_parquet}")
+
+    percentiles_df = get_turnaround_percentiles(
+        get_turnaround_df(transitions_df, timezone_name=args.timezone),
+        group_by=args.group_by,
+        percentiles=args.percentiles,
+    )
+
+    if args.output_csv is not None:
+        percentiles_df.to_csv(args.output_csv, index=False)
+        logger.info(f"Wrote {len(percentiles_df)} groups to {args.output_csv}")
+        return
+
+    print(percentiles_df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+Build the SNOMED code set artifacts from the SNOMED trees in the lookup bucket
+
+Run as a CloudFormation custom resource on every deployment, so the code sets checked by
+post schema validation are always built from the current trees
+(see pieriandx_tools.pieriandx_lookup.code_set_helpers).
+Can also be invoked directly (with any event) after the trees are updated between deployments.
+
+If a tree does not exist, its code set is not built and an error is logged,
+we don't fail the deployment over it, post schema validation fails until the code set is built.
+
+Environment variables
+SNOMED_CT_SPECIMEN_TYPE_TREE_S3_URI: The specimen type tree
+SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI: The specimen type code set to write
+SNOMED_CT_DISEASE_TREE_S3_URI: The disease tree
+SNOMED_CT_DISEASE_CODE_SET_S3_URI: The disease code set to write
+"""
+
+# Standard imports
+from os import environ
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import logging
+
+from botocore.exceptions import ClientError
+
+# Layer imports
+from pieriandx_tools.aws_helpers.s3_helpers import get_s3_client
+from pieriandx_tools.pieriandx_lookup.code_set_helpers import (
+    SNOMED_CT_DISEASE_CODE_SET_S3_URI_ENV_VAR,
+    SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI_ENV_VAR,
+    get_code_set_bytes,
+    get_unique_codes_from_tree_bytes,
+    read_code_set_bytes,
+)
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Globals
+SNOMED_CT_SPECIMEN_TYPE_TREE_S3_URI_ENV_VAR = "SNOMED_CT_SPECIMEN_TYPE_TREE_S3_URI"
+SNOMED_CT_DISEASE_TREE_S3_URI_ENV_VAR = "SNOMED_CT_DISEASE_TREE_S3_URI"
+
+CODE_SET_PHYSICAL_RESOURCE_ID = "snomed-code-sets"
+
+
+def build_code_set(tree_s3_uri: str, code_set_s3_uri: str) -> Optional[int]:
+    """
+    Build a code set from a tree, returns the number of codes in the code set, None if the tree does not exist
+    :param tree_s3_uri:
+    :param code_set_s3_uri:
+    :return:
+    """
+    tree_s3_obj = urlparse(tree_s3_uri)
+    try:
+        tree_bytes = get_s3_client().get_object(
+            Bucket=tree_s3_obj.netloc,
+            Key=tree_s3_obj.path.lstrip("/")
+        )['Body'].read()
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ['404', 'NoSuchKey', 'NotFound']:
+            raise
+        logger.error(f"SNOMED tree {tree_s3_uri} does not exist, could not build the code set {code_set_s3_uri}")
+        return None
+
+    codes = get_unique_codes_from_tree_bytes(tree_bytes, tree_s3_uri)
+    code_set_bytes = get_code_set_bytes(codes)
+
+    # Check the artifact reads back before we write it
+    if list(read_code_set_bytes(code_set_bytes)) != sorted(codes):
+        raise ValueError(f"Code set built from {tree_s3_uri} does not read back")
+
+    code_set_s3_obj = urlparse(code_set_s3_uri)
+    get_s3_client().put_object(
+        Bucket=code_set_s3_obj.netloc,
+        Key=code_set_s3_obj.path.lstrip("/"),
+        Body=code_set_bytes,
+        ContentType="application/octet-stream",
+        ServerSideEncryption="AES256",
+    )
+
+    logger.info(f"Wrote {len(codes)} codes ({len(code_set_bytes)} bytes) to {code_set_s3_uri}")
+
+    return len(codes)
+
+
+def handler(event, context) -> Dict:
+    """
+    Build the SNOMED code sets
+
+    Output:
+      {
+        "PhysicalResourceId": "snomed-code-sets",
+        "Data": {
+          "specimenTypeCodeCount": 1234,  # Left out if the tree does not exist
+          "diseaseCodeCount": 5678
+        }
+      }
+
+    :param event:
+    :param context:
+    :return:
+    """
+    # Nothing to clean up, the code sets are kept alongside the trees
+    if event.get("RequestType", None) == "Delete":
+        return {
+            "PhysicalResourceId": event.get("PhysicalResourceId", CODE_SET_PHYSICAL_RESOURCE_ID),
+        }
+
+    code_counts = {
+        code_count_key: build_code_set(environ[tree_env_var], environ[code_set_env_var])
+        for code_count_key, tree_env_var, code_set_env_var in [
+            (
+                "specimenTypeCodeCount",
+                SNOMED_CT_SPECIMEN_TYPE_TREE_S3_URI_ENV_VAR,
+                SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI_ENV_VAR
+            ),
+            (
+                "diseaseCodeCount",
+                SNOMED_CT_DISEASE_TREE_S3_URI_ENV_VAR,
+                SNOMED_CT_DISEASE_CODE_SET_S3_URI_ENV_VAR
+            ),
+        ]
+    }
+
+    return {
+        "PhysicalResourceId": CODE_SET_PHYSICAL_RESOURCE_ID,
+        "Data": dict(filter(
+            lambda kv_iter_: kv_iter_[1] is not None,
+            code_counts.items()
+        )),
+    }
@@ -5,10 +5,57 @@ Compare the payload of the original portal run id and that of the new object
 
 We dont want to accidentally end up in an infinite loop, so we only want to push a WRU / WRSC event if
 the payload has changed
+
+Payloads are compared by the hash of their canonical json (sorted keys, whole floats written as ints),
+so key order and 1 vs 1.0 do not count as changes.
+If 'includeDiff' is set in the event and the payloads differ, a detailed diff is also returned (this imports DeepDiff)
 """
 
 # Standard library imports
-from deepdiff import DeepDiff
+import hashlib
+import json
+from typing import Any, Dict
+
+
+def get_normalised_json_value(value: Any) -> Any:
+    """
+    Normalise numbers so that equal numbers are written the same way, i.e 1.0 is written as 1
+    :param value:
+    :return:
+    """
+    if isinstance(value, dict):
+        return {
+            key: get_normalised_json_value(dict_value)
+            for key, dict_value in value.items()
+        }
+    if isinstance(value, list):
+        return [get_normalised_json_value(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def get_canonical_payload_hash(payload: Any) -> str:
+    """
+    Get the sha256 of the canonical json of the payload
+    :param payload:
+    :return:
+    """
+    return hashlib.sha256(
+        json.dumps(
+            get_normalised_json_value(payload),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
+    ).hexdigest()
+
+
+def get_payload_diff(old_payload: Any, new_payload: Any) -> Dict:
+    from deepdiff import DeepDiff
+
+    return json.loads(DeepDiff(old_payload, new_payload, ignore_numeric_type_changes=True).to_json())
+
 
 def handler(event, context):
     """
@@ -20,10 +67,17 @@ def handler(event, context):
     old_payload = event['oldPayload']
     new_payload = event['newPayload']
 
-    if not DeepDiff(old_payload, new_payload):
+    if get_canonical_payload_hash(old_payload) == get_canonical_payload_hash(new_payload):
         return {
             "hasChanged": False
         }
+
+    if event.get('includeDiff', False):
+        return {
+            "hasChanged": True,
+            "diff": get_payload_diff(old_payload, new_payload)
+        }
+
     return {
         "hasChanged": True
     }
@@ -8,9 +8,19 @@ Used by:
 - glueSucceededEventsToDraftUpdate: finding existing DRAFT runs for this service to update
 - populateDraftData: finding upstream SUCCEEDED workflows to collect outputs as inputs
 
+Queries for a single library (with no analysisRunId, version or rgid filters) are answered from the
+workflow run index (see pieriandx_tools.utils.workflow_run_index_helpers), which is kept up to date by the
+update_workflow_run_index lambda. If the library has not been indexed, its seed is older than
+WORKFLOW_RUN_INDEX_RESEED_SECONDS, or the index cannot be read, we query the Workflow Manager API
+and (re-)seed the index with the result.
+Runs from the index hold a subset of the workflow run detail
+(orcabusId, portalRunId, workflowRunName, workflow, analysisRun, libraries, currentState).
 """
 # Standard imports
-from typing import List
+from typing import List, Dict, Optional
+import logging
+
+from botocore.exceptions import BotoCoreError, ClientError
 
 # Local imports
 from orcabus_api_tools.workflow import (
@@ -18,13 +28,80 @@ from orcabus_api_tools.workflow import (
 )
 from orcabus_api_tools.workflow.models import WorkflowRunDetail
 
-# Globals
-# Terminal states that indicate a run has been superseded or is no longer relevant
-NON_SUCCEEDED_TERMINATED_STATUS_LIST = [
-    'FAILED',
-    'ABORTED',
-    'RESOLVED'
-]
+# Layer imports
+from pieriandx_tools.aws_helpers.dynamodb_helpers import StateItemConditionFailedError
+from pieriandx_tools.utils.workflow_run_index_helpers import (
+    NON_SUCCEEDED_TERMINATED_STATUS_LIST,
+    get_workflow_run_index,
+    update_workflow_run_index,
+    get_indexed_workflow_runs_by_status,
+    get_most_recently_changed_active_run,
+)
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def is_index_query(
+        library_id_list: List[str],
+        analysis_run_id: Optional[str],
+        workflow_version: Optional[str],
+        rgid_list: Optional[List[str]]
+) -> bool:
+    return (
+        len(library_id_list) == 1 and
+        analysis_run_id is None and
+        workflow_version is None and
+        not rgid_list
+    )
+
+
+def is_superseded_by_active_run(recent_run_status: str, workflow_status: str) -> bool:
+    return (
+        # Not the status we're looking for (SUCCEEDED) AND
+        recent_run_status != workflow_status and
+        # Not in a terminal state — meaning it's still in-progress
+        recent_run_status not in NON_SUCCEEDED_TERMINATED_STATUS_LIST
+    )
+
+
+def get_workflow_run_list_from_index(index_data: Dict, workflow_status: Optional[str]) -> List[Dict]:
+    """
+    Get the matching runs from the workflow run index, with the same DRAFT deduplication as the api query
+    :param index_data:
+    :param workflow_status:
+    :return:
+    """
+    if (
+        workflow_status == 'SUCCEEDED' and
+        len(index_data['runs']) > 1
+    ):
+        recent_run = get_most_recently_changed_active_run(index_data)
+        if (
+            recent_run is not None and
+            is_superseded_by_active_run(recent_run['currentState']['status'], workflow_status)
+        ):
+            return []
+
+    return get_indexed_workflow_runs_by_status(index_data, workflow_status)
+
+
+def seed_workflow_run_index(workflow_name: str, library_id: str, workflows_list: List[WorkflowRunDetail]):
+    # The index is an optimisation, we can always fall back to the api
+    try:
+        update_workflow_run_index(workflow_name, library_id, workflows_list, is_complete=True)
+    except (ClientError, BotoCoreError, StateItemConditionFailedError) as e:
+        logger.warning(f"Could not seed the workflow run index for {workflow_name} / {library_id}: {e}")
+
+
+def get_workflow_run_index_or_none(workflow_name: str, library_id: str) -> Optional[Dict]:
+    # The index is an optimisation, we can always fall back to the api
+    try:
+        return get_workflow_run_index(workflow_name, library_id)
+    except (ClientError, BotoCoreError) as e:
+        logger.warning(f"Could not read the workflow run index for {workflow_name} / {library_id}: {e}")
+        return None
 
 
 def handler(event, context):
@@ -79,6 +156,15 @@ def handler(event, context):
         libraries
     )) if libraries else []
 
+    # Check the workflow run index first
+    use_index = is_index_query(library_id_list, analysis_run_id, workflow_version, rgid_list)
+    if use_index:
+        index_data = get_workflow_run_index_or_none(workflow_name, library_id_list[0])
+        if index_data is not None:
+            return {
+                "workflowRunList": get_workflow_run_list_from_index(index_data, workflow_status)
+            }
+
     # Query the Workflow Manager API for matching workflow runs
     workflows_list: List[WorkflowRunDetail]
     workflows_list = get_workflow_runs_from_metadata(
@@ -89,6 +175,9 @@ def handler(event, context):
         rgid_list=rgid_list
     )
 
+    if use_index:
+        seed_workflow_run_index(workflow_name, library_id_list[0], workflows_list)
+
     # Filter to workflow state if provided
     if workflow_status is not None:
         # DRAFT deduplication: when looking for SUCCEEDED runs,
@@ -112,12 +201,7 @@ def handler(event, context):
                     reverse=True
                 )[0]['currentState']['status']
 
-                if (
-                    # Not the status we're looking for (SUCCEEDED) AND
-                    recent_run_status != workflow_status and
-                    # Not in a terminal state — meaning it's still in-progress
-                    recent_run_status not in NON_SUCCEEDED_TERMINATED_STATUS_LIST
-                ):
+                if is_superseded_by_active_run(recent_run_status, workflow_status):
                     # A newer run is still in-progress, superseding the succeeded one
                     return {
                         "workflowRunList": []
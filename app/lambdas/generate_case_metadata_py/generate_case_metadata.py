@@ -25,6 +25,9 @@ Payload will look a bit like this:
   }
 }
 
+The library, REDCap and default lookups are memoised for MEMO_TTL_SECONDS,
+the case accession number is allocated on every call, since each draft needs a number that is not yet used.
+
 """
 
 # Standard Imports
@@ -39,12 +42,18 @@ import pandas as pd
 from orcabus_api_tools.metadata import get_library_from_library_id
 from orcabus_api_tools.metadata.models import Library
 from pieriandx_tools.pieriandx_helpers import get_pieriandx_client
+from pieriandx_tools.pieriandx_helpers.resilience_helpers import deadline_handler
+from pieriandx_tools.utils.tracing_helpers import trace_call
+from pieriandx_tools.utils.memo_helpers import memoised_handler
+from pieriandx_tools.utils.case_ledger_helpers import allocate_case_accession_number
 
 # Set logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Globals
+MEMO_TTL_SECONDS = 60 * 60
+
 AUS_TIMEZONE = pytz.timezone("Australia/Melbourne")
 AUS_TIME = datetime.now(AUS_TIMEZONE)
 AUS_TIME_AS_STR = f"{AUS_TIME.date().isoformat()}T{AUS_TIME.time().isoformat(timespec='seconds')}{AUS_TIME.strftime('%z')}"
@@ -59,8 +68,26 @@ DEFAULT_SPECIMEN_CODE = 122561005
 DEFAULT_SPECIMEN_LABEL = 'primarySpecimen'
 
 
-def handler(event, context) -> Dict:
-    # Return payload of case metadata
+def is_case_accession_number_used(case_accession_number: str) -> bool:
+    # Check if the case accession number exists in PierianDx
+    response = get_pieriandx_client()._get_api(
+        endpoint=f"/case",
+        params={
+            "accessionNumber": case_accession_number,
+        }
+    )
+
+    return response is not None
+
+
+@memoised_handler("generateCaseMetadataLookups", ttl_seconds=MEMO_TTL_SECONDS)
+def get_case_metadata_lookups(event, context) -> Dict:
+    """
+    Get the case metadata, without the case accession number
+    :param event:
+    :param context:
+    :return:
+    """
     library_id = event["libraryId"]
 
     # Get redcap information from the event
@@ -69,24 +96,9 @@ def handler(event, context) -> Dict:
     if redcap_dict is None:
         redcap_dict = {}
 
-    # Generate the case accession number
-    counter = 1
-    while True:
-        case_accession_number = f"{library_id}_{str(counter).zfill(3)}"
-        # Check if the case accession number exists in PierianDx
-        response = get_pieriandx_client()._get_api(
-            endpoint=f"/case",
-            params={
-                "accessionNumber": case_accession_number,
-            }
-        )
-
-        if response is None:
-            break
-        counter += 1
-
     # Get the external specimen id from the event
-    library_obj: Library = get_library_from_library_id(library_id)
+    with trace_call("metadata", "get_library_from_library_id"):
+        library_obj: Library = get_library_from_library_id(library_id)
     external_sample_id = library_obj['sample']['externalSampleId']
     external_subject_id = library_obj['subject']['subjectId']
 
@@ -140,7 +152,6 @@ def handler(event, context) -> Dict:
         return {
             "caseMetadata": {
                 "isIdentified": False,
-                "caseAccessionNumber": case_accession_number,
                 "externalSpecimenId": external_sample_id,
                 "sampleType": sample_type,
                 "specimenLabel": specimen_label,
@@ -196,7 +207,6 @@ def handler(event, context) -> Dict:
     return {
         "caseMetadata": {
             "isIdentified": True,
-            "caseAccessionNumber": case_accession_number,
             "externalSpecimenId": external_sample_id,
             "sampleType": sample_type,
             "specimenLabel": specimen_label,
@@ -209,3 +219,21 @@ def handler(event, context) -> Dict:
             "requestingPhysician": requesting_physician
         }
     }
+
+
+@deadline_handler()
+def handler(event, context) -> Dict:
+    # Return payload of case metadata
+    case_metadata = get_case_metadata_lookups(event, context)['caseMetadata']
+
+    # Generate the case accession number, the ledger tracks the accession numbers used by this library
+    # Not memoised, a memoised number may have been used by a case launched since
+    case_accession_number = allocate_case_accession_number(event["libraryId"], is_case_accession_number_used)
+
+    return {
+        "caseMetadata": {
+            "isIdentified": case_metadata['isIdentified'],
+            "caseAccessionNumber": case_accession_number,
+            **case_metadata,
+        }
+    }
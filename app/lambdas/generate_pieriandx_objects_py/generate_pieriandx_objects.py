@@ -69,9 +69,21 @@ We then use pydantic to validate the input and generate the following outputs
 * data_files: List of DataFile objects (each containing a src_uri, dest_uri and file_type)
 * sequencerrun_s3_path_root: The root s3 path we will upload data to.
 * This is the same as the input sequencerrun_s3_path but we will extend the run id to it
+
+Batch mode:
+
+READY events are queued and launched in batches (see launch_pieriandx_from_ready_event_sfn_template),
+the launch state machine calls this lambda once per batch with an 'eventList' key.
+If the event contains an 'eventList' key, each item in the list is treated as a standalone event (as above).
+The SNOMED lookups (cached at the module level) and samplesheet parses (cached by uri) are shared across all items.
+The output is a 'resultsList' with one item per input event, in order, each item being either
+* {"result": <output object as above>}  or
+* {"error": <error message>}
 """
 
 # Standard imports
+from copy import deepcopy
+from typing import Callable, Dict, List
 import logging
 import pandas as pd
 from v2_samplesheet_maker.functions.v2_samplesheet_writer import v2_samplesheet_writer
@@ -115,13 +127,62 @@ def edit_samplesheet_contents(samplesheet_str: str) -> str:
     return samplesheet_str.replace(',Index', ',index')
 
 
-def handler(event, context):
-    # Basic housekeeping
-    if event is None:
-        raise ValueError("Event is required")
-    if not isinstance(event, dict):
-        raise ValueError("Event must be a dictionary")
+def batch_handler(event, context) -> Dict[str, List[Dict]]:
+    """
+    Generate the pieriandx objects for a list of events,
+    sharing the lookup trees and samplesheet parses across all events in the list
+    :param event:
+    :param context:
+    :return:
+    """
+    event_list = event.get("eventList")
+    if not isinstance(event_list, list):
+        raise ValueError("eventList must be a list")
+
+    # Samplesheets are only read once per uri for the lifetime of the batch
+    # We return a copy of the samplesheet dict in case the caller modifies it
+    samplesheet_cache: Dict[str, Dict] = {}
+
+    def _read_v2_samplesheet_cached(samplesheet_uri: str) -> Dict:
+        if samplesheet_uri not in samplesheet_cache:
+            samplesheet_cache[samplesheet_uri] = read_v2_samplesheet(samplesheet_uri)
+        return deepcopy(samplesheet_cache[samplesheet_uri])
+
+    results_list: List[Dict] = []
+    for idx, event_iter in enumerate(event_list):
+        try:
+            if not isinstance(event_iter, dict):
+                raise ValueError("Event must be a dictionary")
+            results_list.append({
+                "result": generate_pieriandx_objects(
+                    # Copy the event as we pop items out of the data files
+                    deepcopy(event_iter),
+                    _read_v2_samplesheet_cached
+                )
+            })
+        except Exception as e:
+            logger.error(f"Failed to generate pieriandx objects for event {idx}: {e}")
+            results_list.append({
+                "error": f"{type(e).__name__}: {e}"
+            })
+
+    logger.info(
+        f"Generated pieriandx objects for {len(event_list)} events "
+        f"with {len(samplesheet_cache)} samplesheet read(s)"
+    )
+
+    return {
+        "resultsList": results_list
+    }
+
 
+def generate_pieriandx_objects(event: Dict, samplesheet_reader: Callable[[str], Dict]) -> Dict:
+    """
+    Generate the pieriandx objects for a single event
+    :param event: The (single) event
+    :param samplesheet_reader: Function that takes a samplesheet uri and returns the v2 samplesheet dict
+    :return:
+    """
     # Check for top level keys
     if not all([key in event for key in TOP_LEVEL_KEYS]):
         logger.error(f"Could not find keys {' '.join([key for key in TOP_LEVEL_KEYS if key not in event])}")
@@ -134,7 +195,7 @@ def handler(event, context):
     data_files = event.get("dataFiles", {})
 
     # Read samplesheet - we need this for the sequencer run infos
-    v2_samplesheet_dict = read_v2_samplesheet(data_files['samplesheetUri'])
+    v2_samplesheet_dict = samplesheet_reader(data_files['samplesheetUri'])
 
     # Collect the tso500l_data section
     if not len(v2_samplesheet_dict.get("tso500l_data")) == 1:
@@ -305,6 +366,20 @@ def handler(event, context):
     }
 
 
+def handler(event, context):
+    # Basic housekeeping
+    if event is None:
+        raise ValueError("Event is required")
+    if not isinstance(event, dict):
+        raise ValueError("Event must be a dictionary")
+
+    # Batch mode
+    if "eventList" in event:
+        return batch_handler(event, context)
+
+    return generate_pieriandx_objects(event, read_v2_samplesheet)
+
+
 #  # Idenitified Patient
 # if __name__ == "__main__":
 #     import json
@@ -3,73 +3,117 @@
 """
 Generate a workflow run update object - using a combination of
 
-1. Portal run id
+1. Portal run id (or the workflow run itself)
 2. Libraries
 3. Payload
 4. Upstream data (optional)
-"""
 
-# Layer imports
-from orcabus_api_tools.workflow import get_workflow_run_from_portal_run_id
+If the caller already holds the workflow run (i.e. the detail of the state change event that started the
+state machine), it can be passed in as 'workflowRun' and we skip fetching it from the workflow manager.
+Only the workflow run keys in WORKFLOW_RUN_UPDATE_KEYS are carried over into the update,
+so the keys of a state change event (i.e. id, version, timestamp) are never passed on,
+callers that pass in a state change event detail should also set the status.
 
+The update is built as a patch over the workflow run and payload,
+only the dicts along the patched paths are copied, and the inputs are never modified.
+"""
 
-def handler(event, context):
-    # Get the event inputs
-    # Get the event inputs
-    portal_run_id = event.get("portalRunId", None)
-    libraries = event.get("libraries", None)
-    payload = event.get("payload", None)
-    upstream_data = event.get("upstreamData", {})
-    status = event.get("status", None)
-    engine_parameters = event.get("engineParameters", None)
-
-    # Get the upstream stuff
-    data_files = upstream_data.get('dataFiles', None)
-
-    # Create a copy of the pieriandx draft workflow run object to update
-    draft_workflow_run = get_workflow_run_from_portal_run_id(
-        portal_run_id=portal_run_id
-    )
-
-    # Make a copy
-    draft_workflow_update = draft_workflow_run.copy()
+# Standard imports
+from typing import Any, Dict, List, Optional
 
-    # Remove 'currentState' and replace with 'status'
-    draft_workflow_update['status'] = draft_workflow_update.pop('currentState')['status']
+# Layer imports
+from orcabus_api_tools.workflow import get_workflow_run_from_portal_run_id
 
-    # If the data files already exist in the payload (and not in the upstream data)
-    if (
-            payload.get("data", {}).get("inputs", {}).get("dataFiles", None) is not None and
-            data_files is None
-    ):
-        data_files = payload["data"]["inputs"]["dataFiles"]
+# Globals
+# Workflow run keys carried over into the update, the status and payload are set separately
+WORKFLOW_RUN_UPDATE_KEYS = [
+    "orcabusId",
+    "portalRunId",
+    "executionId",
+    "workflowRunName",
+    "comment",
+    "workflow",
+    "analysisRun",
+    "libraries",
+]
+
+
+def get_patched_dict(dict_obj: Optional[Dict], key_path: List[str], value: Any) -> Dict:
+    """
+    Get a copy of the dict with the value set at the key path,
+    only the dicts along the key path are copied, all other branches are shared with the original
+    :param dict_obj:
+    :param key_path:
+    :param value:
+    :return:
+    """
+    patched_dict = dict(dict_obj or {})
+
+    if len(key_path) == 1:
+        patched_dict[key_path[0]] = value
+    else:
+        patched_dict[key_path[0]] = get_patched_dict(patched_dict.get(key_path[0], None), key_path[1:], value)
+
+    return patched_dict
+
+
+def get_workflow_run_status(workflow_run: Dict) -> str:
+    # Workflow runs from the workflow manager have a currentState, state change event details have a status
+    if 'currentState' in workflow_run:
+        return workflow_run['currentState']['status']
+    return workflow_run['status']
+
+
+def build_workflow_run_update(
+        workflow_run: Dict,
+        payload: Dict,
+        status: Optional[str] = None,
+        data_files: Optional[Any] = None,
+        engine_parameters: Optional[Dict] = None,
+        libraries: Optional[List[Dict]] = None,
+) -> Dict:
+    """
+    Build a workflow run update from a workflow run and a payload
+    :param workflow_run: A workflow run from the workflow manager, or a workflow run state change event detail
+    :param payload:
+    :param status: Defaults to the current status of the workflow run
+    :param data_files: Replaces payload.data.inputs.dataFiles if set
+    :param engine_parameters: Merged into payload.data.engineParameters if set
+    :param libraries: Replaces the workflow run libraries if set
+    :return:
+    """
+    workflow_run_update = dict(filter(
+        lambda kv_iter_: kv_iter_[0] in WORKFLOW_RUN_UPDATE_KEYS,
+        workflow_run.items()
+    ))
+
+    # Set the status
+    workflow_run_update['status'] = status if status is not None else get_workflow_run_status(workflow_run)
+
+    # Patch the payload data
+    payload_data = payload.get("data", {})
 
-    # Add in data files to the payload
     if data_files is not None:
-        payload["data"] = payload.get("data", {})
-        payload["data"]["inputs"] = payload["data"].get("inputs", {})
-        payload["data"]["inputs"]["dataFiles"] = data_files
-
-    # Get status
-    if status is not None:
-        draft_workflow_update['status'] = status
+        payload_data = get_patched_dict(payload_data, ["inputs", "dataFiles"], data_files)
 
-    # Set the payload in the draft workflow run update object
-    draft_workflow_update["payload"] = {
+    if engine_parameters is not None:
+        payload_data = get_patched_dict(
+            payload_data,
+            ["engineParameters"],
+            {
+                **(payload_data.get("engineParameters", None) or {}),
+                **engine_parameters
+            }
+        )
+
+    workflow_run_update["payload"] = {
         "version": payload["version"],
-        "data": payload.get("data", {})
+        "data": payload_data
     }
 
-    # Set the engine parameters if provided
-    if engine_parameters is not None:
-        if draft_workflow_update["payload"]["data"].get("engineParameters", None) is None:
-            draft_workflow_update["payload"]["data"]["engineParameters"] = {}
-        draft_workflow_update["payload"]["data"]["engineParameters"].update(engine_parameters)
-
     # Set out the libraries
-    # Add in the libraries if provided
     if libraries is not None:
-        draft_workflow_update["libraries"] = list(map(
+        workflow_run_update["libraries"] = list(map(
             lambda library_iter: {
                 "libraryId": library_iter['libraryId'],
                 "orcabusId": library_iter['orcabusId'],
@@ -78,7 +122,33 @@ def handler(event, context):
             libraries
         ))
 
+    return workflow_run_update
+
+
+def handler(event, context):
+    # Get the event inputs
+    portal_run_id = event.get("portalRunId", None)
+    workflow_run = event.get("workflowRun", None)
+    libraries = event.get("libraries", None)
+    payload = event.get("payload", None)
+    upstream_data = event.get("upstreamData", {})
+    status = event.get("status", None)
+    engine_parameters = event.get("engineParameters", None)
+
+    # Get the workflow run if the caller does not hold it
+    if workflow_run is None:
+        workflow_run = get_workflow_run_from_portal_run_id(
+            portal_run_id=portal_run_id
+        )
+
     # Return the draft workflow run update object
     return {
-        "workflowRunUpdate": draft_workflow_update
+        "workflowRunUpdate": build_workflow_run_update(
+            workflow_run=workflow_run,
+            payload=payload,
+            status=status,
+            data_files=upstream_data.get('dataFiles', None),
+            engine_parameters=engine_parameters,
+            libraries=libraries,
+        )
     }
@@ -20,6 +20,9 @@ import json
 import pytz
 from datetime import datetime
 
+# Layer imports
+from pieriandx_tools.utils.memo_helpers import memoised_handler
+
 if typing.TYPE_CHECKING:
     from mypy_boto3_lambda import LambdaClient
 
@@ -29,6 +32,9 @@ logger = logging.getLogger()
 logger.setLevel(level=logging.INFO)
 
 # Globals
+# REDCap records may be edited without the event changing, so only reuse records for a short while
+MEMO_TTL_SECONDS = 15 * 60
+
 AUS_TIMEZONE = pytz.timezone("Australia/Melbourne")
 AUS_TIME = datetime.now(AUS_TIMEZONE)
 AUS_TIME_CURRENT_DEFAULT_DICT = {
@@ -309,6 +315,7 @@ def get_and_merge_raw_and_label_data(library_id: str) -> Dict:
     return redcap_df.to_dict(orient='records')[0]
 
 
+@memoised_handler("getCaseMetadataFromRedcap", ttl_seconds=MEMO_TTL_SECONDS)
 def handler(event, context) -> Dict:
     """
     Handler for the lambda function
@@ -37,8 +37,12 @@ from urllib.parse import urlunparse
 from orcabus_api_tools.filemanager import list_files_from_portal_run_id
 from orcabus_api_tools.filemanager.models import FileObject
 from orcabus_api_tools.workflow import get_latest_payload_from_portal_run_id
+from pieriandx_tools.utils.memo_helpers import memoised_handler
 
 # Globals / Type hints
+# The outputs of a completed workflow run do not change
+MEMO_TTL_SECONDS = 6 * 60 * 60
+
 OutputKeysType = Literal[
     "microsatOutputUri",
     "tmbMetricsUri",
@@ -98,6 +102,7 @@ def get_data_file_output_uri(
     )))
 
 
+@memoised_handler("getDataFilesFromTso500WorkflowRun", ttl_seconds=MEMO_TTL_SECONDS)
 def handler(event, context) -> Dict[str, Dict[str, str]]:
     """
     Firse we need to set the icav2 env vars
@@ -11,6 +11,10 @@ Rgids are returned in the format '<index>+<index2>.<lane>.<instrument_run_id>'
 # Layer imports
 from orcabus_api_tools.fastq import get_fastq_sets, get_fastq_list_rows_in_fastq_set
 from orcabus_api_tools.fastq.models import Fastq
+from pieriandx_tools.utils.memo_helpers import memoised_handler
+
+# Globals
+MEMO_TTL_SECONDS = 60 * 60
 
 
 def get_rgid_from_fastq_obj(fastq_obj: Fastq):
@@ -21,6 +25,7 @@ def get_rgid_from_fastq_obj(fastq_obj: Fastq):
     ])
 
 
+@memoised_handler("getFastqRgidsFromLibraryId", ttl_seconds=MEMO_TTL_SECONDS)
 def handler(event, context):
     """
     Given a library id, get the fastq rgids associated with the library.
@@ -27,13 +27,36 @@ job_status_changed: BOOL VALUE OF WHETHER THE JOB STATUS HAS CHANGED TRUE OR FAL
 expression_attribute_values_dict: DICT OF THE EXPRESSION ATTRIBUTE VALUES FOR DYNAMODB UPDATE EXPRESSION
 update_expression_str: STR OF THE UPDATE EXPRESSION FOR DYNAMODB
 
+Polls are adaptively scheduled per case (see pieriandx_tools.pieriandx_helpers.poll_schedule_helpers),
+if the next poll for this case is not yet due, we return pollSkipped as true without calling the PierianDx API.
+Set forcePoll to true in the event to always poll.
+If portalRunId is set in the event, the next poll time is also kept against the run
+(see record_run_next_poll_time), so the monitor can skip the run before fetching its payload.
+
+We also keep a digest of the job and report ids and statuses of each case
+(see pieriandx_tools.pieriandx_helpers.status_digest_helpers),
+if the digest is unchanged since the last poll, we return the previous result with statusChanged as false,
+so that the monitor can skip generating and comparing the workflow run update.
+When the status has changed, the new digest is returned as statusDigest,
+the monitor saves it with save_case_status_digest once the workflow run update has been emitted.
+
+When the status has changed, we append a transition record to the turnaround store
+(see pieriandx_tools.pieriandx_helpers.turnaround_helpers), so we can report on job and report turnaround times.
+
 """
 
 # Standard imports
+from typing import Dict, Optional
 import logging
 
 # Layer imports
 from pieriandx_tools.pieriandx_helpers import get_pieriandx_client
+from pieriandx_tools.pieriandx_helpers.resilience_helpers import deadline_handler
+from pieriandx_tools.pieriandx_helpers.poll_schedule_helpers import (
+    is_poll_due, record_case_poll, get_now, get_case_next_poll_time, record_run_next_poll_time
+)
+from pieriandx_tools.pieriandx_helpers.turnaround_helpers import get_transition_record, write_transition_records
+from pieriandx_tools.pieriandx_helpers.status_digest_helpers import get_case_status_digest, get_cached_case_status
 
 # Set logger
 logging.basicConfig(level=logging.INFO)
@@ -60,35 +83,72 @@ REPORT_STATUS_BOOL = {
     "canceled": False
 }
 
+def record_case_status_transition(case_id: str, panel_name: Optional[str], case_status: Dict):
+    try:
+        _ = write_transition_records([
+            get_transition_record(
+                case_id=case_id,
+                job_id=case_status['informaticsjobId'],
+                panel_name=panel_name,
+                job_status=case_status['jobStatus'],
+                status=case_status['status'],
+                timestamp=get_now(),
+            )
+        ])
+    except Exception as e:
+        # Not worth failing the poll over
+        logger.warning(f"Could not record the status transition of case {case_id}: {e}")
 
-def handler(event, context):
-    """
-    Get informatics job status
-    Args:
-        event:
-        context:
-
-    Returns:
 
+def get_case_status(case_id: str, max_retries: int) -> Dict:
+    """
+    Get the status of the case, short-circuits to the previous result if the case status digest is unchanged,
+    otherwise the new digest is returned as statusDigest (it is saved by the monitor once the status is handled)
+    :param case_id:
+    :param max_retries:
+    :return:
     """
     # Setup
     pyriandx_client = get_pieriandx_client()
 
-    # Get event values
-    case_id = event.get("caseId", None)
-    max_retries = event.get("maxRetries", 1)
-
     # Get the case data
     case_data = pyriandx_client._get_api(
         endpoint=f"/case/{case_id}",
     )
 
+    # Check if anything has changed since the last poll
+    digest = get_case_status_digest(case_data)
+    cached_case_status = get_cached_case_status(case_id, digest)
+    if cached_case_status is not None:
+        return {
+            **cached_case_status,
+            "statusChanged": False,
+        }
+
+    case_status = get_case_status_from_case_data(pyriandx_client, case_id, case_data, max_retries)
+
+    return {
+        **case_status,
+        "statusChanged": True,
+        "statusDigest": digest,
+    }
+
+
+def get_case_status_from_case_data(pyriandx_client, case_id: str, case_data: Dict, max_retries: int) -> Dict:
+    """
+    Get the status of the most recent informatics job (and report) of the case,
+    the raw pieriandx job status is returned under jobStatus
+    :param pyriandx_client:
+    :param case_id:
+    :param case_data:
+    :param max_retries:
+    :return:
+    """
     # Get the most recent job object in the case
-    informatics_job_obj = sorted(
+    informatics_job_obj = max(
         case_data.get("informaticsJobs"),
         key=lambda x: int(x.get("id")),
-        reverse=True
-    )[0]
+    )
 
     # Get the job id
     job_id = informatics_job_obj.get("id")
@@ -98,12 +158,14 @@ def handler(event, context):
     if job_status in ['waiting', 'ready']:
         return {
             "informaticsjobId": job_id,
+            "jobStatus": job_status,
             "status": "RUNNABLE",
             "reportId": -1,
         }
     if job_status in ['running', 'completed']:
         return {
             "informaticsjobId": job_id,
+            "jobStatus": job_status,
             "status": "RUNNING",
             "reportId": -1,
         }
@@ -137,6 +199,7 @@ def handler(event, context):
 
             return {
                 "informaticsjobId": job_id,
+                "jobStatus": "waiting",
                 "status": "RUNNABLE",
                 "reportId": -1,
             }
@@ -144,35 +207,32 @@ def handler(event, context):
         else:
             return {
                 "informaticsjobId": job_id,
+                "jobStatus": job_status,
                 "status": "FAILED",
                 "reportId": -1,
             }
 
     # If the job is complete, check the reports
-    reports_list = sorted(
-        (
-            case_data.get("reports", None)
-            if case_data.get("reports", None) is not None
-            else []
-        ),
-        key=lambda x: int(x.get("id")),
-        reverse=True
+    reports_list = (
+        case_data.get("reports", None)
+        if case_data.get("reports", None) is not None
+        else []
     )
 
     # No report generated yet
     if len(reports_list) == 0:
         return {
             "informaticsjobId": job_id,
+            "jobStatus": job_status,
             "status": "RUNNING",
             "reportId": -1,
         }
 
-    # Get the most recent job object in the case
-    reports_obj = sorted(
-        case_data.get("reports"),
+    # Get the most recent report object in the case
+    reports_obj = max(
+        reports_list,
         key=lambda x: int(x.get("id")),
-        reverse=True
-    )[0]
+    )
 
     # Reassign - a new report may have been kicked off.
     report_id = reports_obj.get("id")
@@ -180,12 +240,68 @@ def handler(event, context):
     if REPORT_STATUS_BOOL[reports_obj.get("status")]:
         return {
             "informaticsjobId": job_id,
+            "jobStatus": job_status,
             "status": "SUCCEEDED",
             "reportId": report_id,
         }
 
     return {
         "informaticsjobId": job_id,
+        "jobStatus": job_status,
         "status": "RUNNING",
         "reportId": report_id,
     }
+
+
+@deadline_handler()
+def handler(event, context):
+    """
+    Get informatics job status
+    Args:
+        event:
+        context:
+
+    Returns:
+
+    """
+    # Get event values
+    case_id = event.get("caseId", None)
+    panel_name = event.get("panelName", None)
+    max_retries = event.get("maxRetries", 1)
+    force_poll = event.get("forcePoll", False)
+    portal_run_id = event.get("portalRunId", None)
+
+    # Check if this case is due a poll
+    if not force_poll and not is_poll_due(case_id):
+        if portal_run_id is not None:
+            record_run_next_poll_time(portal_run_id, get_case_next_poll_time(case_id))
+        # Keep the keys of a poll, the monitor assigns them whether or not the poll was skipped
+        return {
+            "pollSkipped": True,
+            "statusChanged": False,
+            "status": None,
+            "reportId": None,
+            "informaticsjobId": None,
+        }
+
+    case_status = get_case_status(case_id, max_retries)
+
+    if case_status['statusChanged']:
+        record_case_status_transition(case_id, panel_name, case_status)
+
+    # Schedule the next poll
+    next_poll_time = record_case_poll(
+        case_id=case_id,
+        panel_name=panel_name,
+        job_id=case_status['informaticsjobId'],
+        job_status=case_status['jobStatus'],
+        status=case_status['status'],
+    )
+    if portal_run_id is not None:
+        record_run_next_poll_time(portal_run_id, next_poll_time)
+
+    return {
+        **case_status,
+        "pollSkipped": False,
+        "nextPollTime": next_poll_time.isoformat() if next_poll_time is not None else None,
+    }
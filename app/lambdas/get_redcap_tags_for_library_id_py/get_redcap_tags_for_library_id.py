@@ -19,8 +19,12 @@ from typing import Literal, List, Dict
 # Layer imports
 from orcabus_api_tools.metadata import get_library_from_library_id
 from orcabus_api_tools.utils.aws_helpers import get_ssm_value
+from pieriandx_tools.utils.memo_helpers import memoised_handler
 
 # Globals
+# REDCap records may be edited without the event changing, so only reuse tags for a short while
+MEMO_TTL_SECONDS = 15 * 60
+
 PROJECT_INFO_SSM_ENV_VAR_PREFIX_ENV_VAR = "PROJECT_INFO_SSM_PARAMETER_PREFIX"
 PROJECT_INFO_DEFAULT_SSM_ENV_VAR = "PROJECT_INFO_DEFAULT_SSM_PARAMETER_NAME"
 
@@ -55,6 +59,7 @@ def get_match_from_pieriandx_project_info(project_id) -> Dict[ProjectInfoKeysTyp
         return get_default_project_info(project_id)
 
 
+@memoised_handler("getRedcapTagsForLibraryId", ttl_seconds=MEMO_TTL_SECONDS)
 def handler(event, context):
     """
     Get redcap tags for a given library id
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+
+"""
+Launch a PierianDx case, create the case, the sequencer run and the informatics job over a single PierianDx session
+
+The sequencer run does not depend on the case, so the case and sequencer run are created concurrently,
+once the sequencer run is created we add the VcfWorkflow.txt and done.txt marker files to the sequencer run directory.
+The informatics job needs both the case id and the sequencer run, so is created last.
+
+The sample data files must already be uploaded to the sequencer run directory (see upload_pieriandx_sample_data_to_s3).
+
+Each step records its result in the case ledger (see pieriandx_tools.utils.case_ledger_helpers),
+keyed by the case accession number. If the launch is retried, recorded steps return their recorded result
+rather than calling PierianDx again. If a case or informatics job POST may have been sent without its result being
+recorded, we look for the case / sequencer run / job in PierianDx before creating it again,
+sequencer runs are looked up by their run name (runId).
+
+Environment variables
+PIERIANDX_COLLECT_AUTH_TOKEN_LAMBDA_NAME: The lambda used to collect the auth token
+PIERIANDX_S3_ACCESS_CREDENTIALS_SECRET_ID: The secret id for the pieriandx s3 access credentials
+
+Input will look like this
+
+{
+  "caseCreationObj": {
+    "identified": true,
+    "indication": "indication",
+    "panelName": "panelname",
+    "sampleType": "patientcare",
+    "specimens": [...],
+    "dagDescription": "dagdescription",
+    "dagName": "dagname",
+    "disease": {
+      "code": "diseasecode",
+      "label": "diseaselabel"
+    },
+    ...
+  },
+  "sequencerrunCreationObj": {
+    "runId": "20201203_A00123_0001_BHJGJFDS__caseaccessionnumber__20240411235959",
+    "specimens": [
+      {
+        "accessionNumber": "caseaccessionnumber",
+        "barcode": "GACTGAGTAG+CACTATCAAC",
+        "lane": "1",
+        "sampleId": "L2301368",
+        "sampleType": "DNA"
+      }
+    ],
+    "type": "pairedEnd"
+  },
+  "informaticsjobCreationObj": {
+    "input": [
+      {
+        "accessionNumber": "caseaccessionnumber",
+        "sequencerRunInfos": [...]
+      }
+    ]
+  },
+  "sequencerrunS3Path": "s3://pieriandx/melbourne/20201203_A00123_0001_BHJGJFDS__caseaccessionnumber__20240411235959"
+}
+
+Output will look like this
+
+{
+  "caseObj": {"id": "12345", ...},
+  "sequencerrunId": {"id": "38862"},
+  "informaticsjobObj": {"jobId": "67890", ...},
+  "stepTimings": {
+    "getPieriandxClientMs": 812,
+    "createCaseMs": 1530,
+    "createSequencerrunMs": 980,
+    "uploadSequencerrunMarkersMs": 210,
+    "createInformaticsjobMs": 1104,
+    "totalMs": 3456
+  }
+}
+"""
+
+# Standard imports
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+import logging
+
+from pyriandx.client import Client
+from requests import Response, HTTPError
+
+# Layer imports
+from pieriandx_tools.aws_helpers.s3_helpers import get_pieriandx_s3_client, upload_fileobj
+from pieriandx_tools.pieriandx_helpers import get_pieriandx_client
+from pieriandx_tools.pieriandx_helpers.resilience_helpers import deadline_handler
+from pieriandx_tools.pieriandx_models.case_creation import CaseCreationDictType
+from pieriandx_tools.utils.case_ledger_helpers import (
+    LaunchStepType,
+    get_case_ledger_entry,
+    mark_launch_step_pending,
+    record_launch_step,
+)
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Globals
+# Empty marker files, PierianDx starts processing a sequencer run once done.txt exists
+SEQUENCERRUN_MARKER_FILE_NAMES = [
+    "VcfWorkflow.txt",
+    "done.txt",
+]
+
+
+@contextmanager
+def time_step(step_timings: Dict[str, int], step_name: str):
+    start_time = perf_counter()
+    try:
+        yield
+    finally:
+        step_timings[f"{step_name}Ms"] = round((perf_counter() - start_time) * 1000)
+
+
+def create_case(pyriandx_client: Client, case_creation_obj: CaseCreationDictType) -> Dict:
+    try:
+        response: Response = pyriandx_client._post_api(
+            endpoint="/case",
+            data=case_creation_obj
+        )
+        response.raise_for_status()
+    except HTTPError as e:
+        logger.error(f"Failed to create case: {e}")
+        raise Exception(f"Failed to create case: {e}") from e
+
+    if response.status_code != 200:
+        logger.error(f"Failed to create case: {response.json()}")
+        raise Exception(f"Failed to create case: {response.json()}")
+
+    return response.json()
+
+
+def create_sequencerrun(pyriandx_client: Client, sequencerrun_creation_obj: Dict) -> Dict:
+    response: Response = pyriandx_client._post_api(
+        endpoint="/sequencerRun",
+        data=sequencerrun_creation_obj
+    )
+
+    if not response.status_code == 200:
+        logger.error(f"Failed to create sequencerrun: {response.json()}")
+        raise Exception(f"Failed to create sequencerrun: {response.json()}")
+
+    return response.json()
+
+
+def upload_sequencerrun_markers(sequencerrun_s3_path: str):
+    sequencerrun_s3_obj = urlparse(sequencerrun_s3_path)
+
+    for marker_file_name in SEQUENCERRUN_MARKER_FILE_NAMES:
+        upload_fileobj(
+            sequencerrun_s3_obj.netloc,
+            f"{sequencerrun_s3_obj.path.rstrip('/')}/{marker_file_name}",
+            BytesIO(b"")
+        )
+
+
+def create_informaticsjob(pyriandx_client: Client, case_id: str, informaticsjob_creation_obj: Dict) -> Dict:
+    response: Response = pyriandx_client._post_api(
+        endpoint=f"/case/{case_id}/informaticsJobs",
+        data=informaticsjob_creation_obj
+    )
+
+    if response.status_code != 200:
+        logger.error(f"Failed to create informaticsjob: {response.json()}")
+        raise Exception(f"Failed to create informaticsjob: {response.json()}")
+
+    return response.json()
+
+
+def find_case(pyriandx_client: Client, accession_number: str) -> Optional[Dict]:
+    case_list = pyriandx_client._get_api(
+        endpoint="/case",
+        params={
+            "accessionNumber": accession_number,
+        }
+    )
+
+    if not case_list:
+        return None
+
+    return max(case_list, key=lambda case_iter_: int(case_iter_['id']))
+
+
+def find_sequencerrun(pyriandx_client: Client, run_id: str) -> Optional[Any]:
+    sequencerrun_list = pyriandx_client._get_api(
+        endpoint="/sequencerRun",
+        params={
+            "runId": run_id,
+        }
+    )
+
+    if not sequencerrun_list:
+        return None
+
+    # Match the shape of the sequencer run creation response
+    return max(sequencerrun_list, key=lambda sequencerrun_iter_: int(sequencerrun_iter_['id']))['id']
+
+
+def find_informaticsjob(pyriandx_client: Client, case_id: str) -> Optional[Dict]:
+    case_data = pyriandx_client._get_api(
+        endpoint=f"/case/{case_id}",
+    )
+
+    if case_data is None or not case_data.get("informaticsJobs"):
+        return None
+
+    # Match the shape of the informatics job creation response
+    return {
+        "jobId": max(case_data["informaticsJobs"], key=lambda job_iter_: int(job_iter_['id']))['id']
+    }
+
+
+def run_launch_step(
+        accession_number: str,
+        ledger_entry: Dict,
+        launch_step: LaunchStepType,
+        create_fn: Callable[[], Any],
+        find_fn: Optional[Callable[[], Any]] = None,
+) -> Any:
+    """
+    Run a launch step at most once per accession number
+    :param accession_number:
+    :param ledger_entry: The ledger entry of the case, read at the start of the launch
+    :param launch_step:
+    :param create_fn: Creates the object in PierianDx
+    :param find_fn: Finds the object in PierianDx, returns None if it does not exist
+    :return:
+    """
+    if launch_step in ledger_entry['results']:
+        logger.info(f"Launch step {launch_step} of {accession_number} is already recorded")
+        return ledger_entry['results'][launch_step]
+
+    # A previous attempt may have sent the POST without recording the result
+    if launch_step in ledger_entry['pending'] and find_fn is not None:
+        found_result = find_fn()
+        if found_result is not None:
+            logger.info(f"Found the result of launch step {launch_step} of {accession_number} in PierianDx")
+            return record_launch_step(accession_number, launch_step, found_result)
+
+    mark_launch_step_pending(accession_number, launch_step)
+
+    return record_launch_step(accession_number, launch_step, create_fn())
+
+
+def create_case_step(
+        pyriandx_client: Client,
+        accession_number: str,
+        ledger_entry: Dict,
+        case_creation_obj: CaseCreationDictType,
+        step_timings: Dict[str, int]
+) -> Dict:
+    with time_step(step_timings, "createCase"):
+        return run_launch_step(
+            accession_number, ledger_entry, 'case',
+            create_fn=lambda: create_case(pyriandx_client, case_creation_obj),
+            find_fn=lambda: find_case(pyriandx_client, accession_number),
+        )
+
+
+def create_sequencerrun_step(
+        pyriandx_client: Client,
+        accession_number: str,
+        ledger_entry: Dict,
+        sequencerrun_creation_obj: Dict,
+        sequencerrun_s3_path: Optional[str],
+        step_timings: Dict[str, int]
+) -> Dict:
+    with time_step(step_timings, "createSequencerrun"):
+        sequencerrun_id = run_launch_step(
+            accession_number, ledger_entry, 'sequencerrun',
+            create_fn=lambda: create_sequencerrun(pyriandx_client, sequencerrun_creation_obj),
+            find_fn=lambda: find_sequencerrun(pyriandx_client, sequencerrun_creation_obj['runId']),
+        )
+
+    if sequencerrun_s3_path is not None:
+        with time_step(step_timings, "uploadSequencerrunMarkers"):
+            upload_sequencerrun_markers(sequencerrun_s3_path)
+
+    return sequencerrun_id
+
+
+@deadline_handler()
+def handler(event, context):
+    """
+    Create the case, sequencer run and informatics job
+    :param event:
+    :param context:
+    :return:
+    """
+    # Get inputs
+    case_creation_obj: CaseCreationDictType = event.get("caseCreationObj", {})
+    sequencerrun_creation_obj = event.get("sequencerrunCreationObj", {})
+    informaticsjob_creation_obj = event.get("informaticsjobCreationObj", {})
+    sequencerrun_s3_path = event.get("sequencerrunS3Path", None)
+
+    accession_number = case_creation_obj['specimens'][0]['accessionNumber']
+    ledger_entry = get_case_ledger_entry(accession_number)
+
+    step_timings: Dict[str, int] = {}
+
+    with time_step(step_timings, "total"):
+        # Collect the auth token (and the pieriandx s3 credentials) once, before we start any threads
+        with time_step(step_timings, "getPieriandxClient"):
+            pyriandx_client = get_pieriandx_client()
+            if sequencerrun_s3_path is not None:
+                _ = get_pieriandx_s3_client()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            case_future = executor.submit(
+                create_case_step,
+                pyriandx_client, accession_number, ledger_entry, case_creation_obj, step_timings
+            )
+            sequencerrun_future = executor.submit(
+                create_sequencerrun_step,
+                pyriandx_client, accession_number, ledger_entry, sequencerrun_creation_obj, sequencerrun_s3_path,
+                step_timings
+            )
+
+        # Raise the errors of both steps together
+        failures_list = list(filter(
+            lambda exception_iter_: exception_iter_ is not None,
+            [case_future.exception(), sequencerrun_future.exception()]
+        ))
+        if failures_list:
+            raise Exception(f"Failed to launch case: {'; '.join(map(str, failures_list))}") from failures_list[0]
+
+        case_obj = case_future.result()
+        sequencerrun_id = sequencerrun_future.result()
+
+        with time_step(step_timings, "createInformaticsjob"):
+            informaticsjob_obj = run_launch_step(
+                accession_number, ledger_entry, 'informaticsjob',
+                create_fn=lambda: create_informaticsjob(pyriandx_client, case_obj['id'], informaticsjob_creation_obj),
+                find_fn=lambda: find_informaticsjob(pyriandx_client, case_obj['id']),
+            )
+
+    logger.info(f"Launched case {case_obj['id']}, step timings: {step_timings}")
+
+    return {
+        "caseObj": case_obj,
+        "sequencerrunId": sequencerrun_id,
+        "informaticsjobObj": informaticsjob_obj,
+        "stepTimings": step_timings,
+    }
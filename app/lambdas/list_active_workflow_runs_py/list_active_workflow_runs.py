@@ -2,17 +2,28 @@
 
 """
 Get a list of active workflow runs in the workflow run manager
+
+We ask the workflow manager for the runs in each running state rather than listing every run of the workflow,
+so the cost of each monitor tick scales with the number of active runs rather than with the run history.
+
+Each case is polled on its own adaptive schedule (see pieriandx_tools.pieriandx_helpers.poll_schedule_helpers),
+we also return the active runs that are due a poll as dueWorkflowRunsList,
+so the monitor does not fetch the payload of a run that is not due a poll.
+Set forcePoll to true in the event to return every active run as due.
 """
 
 # Standard imports
-from typing import Literal, List, Dict
+from typing import Literal, List, Dict, Iterator, Set
+import logging
 
 # Layer imports
-from orcabus_api_tools.workflow import (
-    get_workflow_by_workflow_name,
-    get_workflow_request_response_results
-)
+from orcabus_api_tools.workflow import get_workflow_request_response_results
 from orcabus_api_tools.workflow.globals import WORKFLOW_RUN_ENDPOINT
+from pieriandx_tools.pieriandx_helpers.poll_schedule_helpers import is_run_poll_due, get_now
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
 
 # Globals
 WORKFLOW_NAME = "pieriandx-tso500-ctdna"
@@ -22,42 +33,84 @@ RunningTypes = Literal[
     'RUNNABLE',
     'RUNNING'
 ]
+# Runs only move forward through these states,
+# so querying in this order means a run that changes state between queries is still listed
 RUNNING_TYPES_LIST: List[RunningTypes] = [
     "RUNNABLE",
     "RUNNING"
 ]
 
 
+def iter_workflow_runs_by_status(status: RunningTypes) -> Iterator[Dict]:
+    """
+    Iterate over the workflow runs of this workflow whose current state is the given status
+    :param status:
+    :return:
+    """
+    yield from get_workflow_request_response_results(
+        WORKFLOW_RUN_ENDPOINT,
+        params={
+            "workflow__workflowName": WORKFLOW_NAME,
+            "status": status,
+        }
+    )
+
+
+def iter_active_workflow_runs() -> Iterator[Dict]:
+    """
+    Iterate over the active (RUNNABLE / RUNNING) workflow runs of this workflow, each run is yielded once.
+
+    If the workflow manager ignores the status filter, the first query returns every run of the workflow,
+    in which case we filter those client-side and skip the remaining queries
+    :return:
+    """
+    portal_run_id_set: Set[str] = set()
+
+    for status in RUNNING_TYPES_LIST:
+        status_filter_ignored = False
+        for workflow_run in iter_workflow_runs_by_status(status):
+            workflow_run_status = workflow_run["currentState"]["status"]
+            if workflow_run_status != status:
+                status_filter_ignored = True
+            if (
+                workflow_run_status not in RUNNING_TYPES_LIST or
+                workflow_run["portalRunId"] in portal_run_id_set
+            ):
+                continue
+            portal_run_id_set.add(workflow_run["portalRunId"])
+            yield workflow_run
+
+        if status_filter_ignored:
+            logger.warning("Workflow run status filter was not applied, filtered all runs client-side")
+            break
+
+
 def handler(event, context) -> Dict[str, List[Dict[str, str]]]:
     """
-    Get a list of active workflow runs in the workflow run manager
+    Get a list of active workflow runs in the workflow run manager,
+    and the list of those that are due a poll
     :param event:
     :param context:
     :return:
     """
-
-    # Get all workflows
-    workflows = get_workflow_by_workflow_name(WORKFLOW_NAME)
-
-    if len(workflows) == 0:
-        workflows = get_workflow_request_response_results(
-            WORKFLOW_RUN_ENDPOINT,
-            params={
-                "workflow__workflowName": WORKFLOW_NAME
-            }
-        )
+    force_poll = event.get("forcePoll", False)
 
     # Get active workflow runs
     active_workflow_runs = list(map(
         lambda workflow_iter_: {
           "portalRunId": workflow_iter_['portalRunId'],
         },
-        list(filter(
-            lambda workflow: workflow["currentState"]["status"] in RUNNING_TYPES_LIST,
-            workflows
-        ))
+        iter_active_workflow_runs()
+    ))
+
+    # Get the active workflow runs that are due a poll
+    now = get_now()
+    due_workflow_runs = list(filter(
+        lambda workflow_iter_: force_poll or is_run_poll_due(workflow_iter_['portalRunId'], now),
+        active_workflow_runs
     ))
 
     return {
-        "workflowRunsList": active_workflow_runs
+        "workflowRunsList": active_workflow_runs,
+        "dueWorkflowRunsList": due_workflow_runs,
     }
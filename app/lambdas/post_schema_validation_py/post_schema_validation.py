@@ -10,18 +10,26 @@ execution backend.
 This Lambda validates PierianDx-specific requirements:
   - Validates that data.tags has required fields (libraryId, sampleType, panelVersion, etc.)
   - Validates that data.inputs.caseMetadata is well-formed when present
+  - Validates that the caseMetadata diseaseCode / specimenCode exist in the SNOMED code sets
   - Validates that data.inputs.dataFiles contains expected file keys when present
-  - Writes descriptive failure comments via the OrcaBus API on failure
+  - Writes descriptive failure comments via the OrcaBus API on failure,
+    failures are packed into as few comments as fit the comment length limit
   - Returns {"isValid": true} when all checks pass, {"isValid": false} otherwise
 """
 
 # Imports
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 import logging
 from os import environ
 
 # Layer imports
 from orcabus_api_tools.workflow import add_comment_to_workflow_run
+from pieriandx_tools.pieriandx_lookup.code_set_helpers import (
+    get_disease_code_set,
+    get_specimen_type_code_set,
+    is_code_in_code_set,
+)
 
 # Globals
 WORKFLOW_NAME_ENV_VAR = "WORKFLOW_NAME"
@@ -85,6 +93,9 @@ REQUIRED_IDENTIFIED_CASE_METADATA_FIELDS = [
 MAX_COMMENT_LENGTH = 1024
 TRUNCATION_SUFFIX = "\n... [truncated, see execution ARN for full detail]"
 
+# Number of comments posted at once, packed comments are few so this also bounds the load on the workflow manager
+MAX_COMMENT_CONCURRENCY = 4
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -103,6 +114,92 @@ def _format_comment_with_arn(body: str, execution_arn: str) -> str:
     return full_comment
 
 
+def _get_failure_comment_bodies(all_failures: List[str], execution_arn: str) -> List[str]:
+    """
+    Pack the failures into the fewest comment bodies that fit within MAX_COMMENT_LENGTH once the footer is added.
+    The first body starts with the summary line, a failure too long for a comment of its own is truncated.
+
+    :param all_failures: The list of failure reasons
+    :param execution_arn: The execution ARN, used to size the footer
+    :return: List of comment bodies
+    """
+    if len(all_failures) == 1:
+        return [f"Post schema validation failed: {all_failures[0]}"]
+
+    # Leave room for the newline between the body and the footer
+    max_body_length = MAX_COMMENT_LENGTH - len(f"\n---\nStep Functions Execution: {execution_arn}")
+
+    comment_bodies: List[str] = []
+    current_lines: List[str] = [f"Post schema validation failed for {len(all_failures)} reasons"]
+    current_length = len(current_lines[0])
+
+    for idx, failure in enumerate(all_failures, start=1):
+        reason_line = f"Reason {idx} of {len(all_failures)}: {failure}"
+        if current_length + 1 + len(reason_line) > max_body_length:
+            # Start a new comment
+            comment_bodies.append("\n".join(current_lines))
+            current_lines = [reason_line]
+            current_length = len(reason_line)
+            continue
+        current_lines.append(reason_line)
+        current_length += 1 + len(reason_line)
+
+    comment_bodies.append("\n".join(current_lines))
+
+    return comment_bodies
+
+
+def _post_failure_comments(workflow_run_id: str, all_failures: List[str], execution_arn: str) -> Dict[str, int]:
+    """
+    Post the failure comments, the first comment (with the summary) is posted before the rest,
+    so that it is always the first in the workflow run's comment history.
+    The remaining comments are posted concurrently, each is numbered so the order is still clear.
+
+    :param workflow_run_id: The workflow run orcabus id
+    :param all_failures: The list of failure reasons
+    :param execution_arn: The execution ARN
+    :return: The number of comments posted and the number of calls saved versus one comment per failure
+    """
+    comments_list = list(map(
+        lambda comment_body_iter_: _format_comment_with_arn(comment_body_iter_, execution_arn),
+        _get_failure_comment_bodies(all_failures, execution_arn)
+    ))
+
+    def post_comment(comment: str):
+        add_comment_to_workflow_run(
+            workflow_run_orcabus_id=workflow_run_id,
+            comment=comment,
+            author=COMMENT_AUTHOR,
+        )
+
+    post_comment(comments_list[0])
+
+    if len(comments_list) > 1:
+        with ThreadPoolExecutor(max_workers=min(MAX_COMMENT_CONCURRENCY, len(comments_list) - 1)) as executor:
+            futures_list = list(map(
+                lambda comment_iter_: executor.submit(post_comment, comment_iter_),
+                comments_list[1:]
+            ))
+
+        failed_futures_list = list(filter(
+            lambda future_iter_: future_iter_.exception() is not None,
+            futures_list
+        ))
+        if failed_futures_list:
+            raise Exception(
+                f"Failed to post {len(failed_futures_list)} of {len(comments_list)} comment(s): "
+                f"{failed_futures_list[0].exception()}"
+            )
+
+    # Previously we posted a summary comment plus one comment per failure
+    unpacked_comment_count = 1 if len(all_failures) == 1 else len(all_failures) + 1
+
+    return {
+        "commentCount": len(comments_list),
+        "commentCallsSaved": unpacked_comment_count - len(comments_list),
+    }
+
+
 def validate_tags(tags: Dict) -> Tuple[bool, List[str]]:
     """
     Validate that data.tags has all required fields and correct types.
@@ -220,6 +317,39 @@ def validate_case_metadata(case_metadata: Dict, is_identified: bool) -> Tuple[bo
     return is_valid, failures
 
 
+def validate_snomed_codes(case_metadata: Dict) -> Tuple[bool, List[str]]:
+    """
+    Validate that the diseaseCode and specimenCode exist in the SNOMED code sets,
+    so that unknown codes are rejected here rather than when the PierianDx objects are generated.
+
+    Codes that are missing or not numbers are reported by validate_case_metadata.
+    If a code set artifact does not exist, a CodeSetNotFoundError is raised and the validation fails,
+    the code sets are rebuilt on every deployment (see the build_snomed_code_sets lambda).
+
+    :param case_metadata: The caseMetadata dictionary from the event payload
+    :return: Tuple of (is_valid, list of failure reasons)
+    """
+    failures: List[str] = []
+
+    for field, get_code_set in [
+        ("diseaseCode", get_disease_code_set),
+        ("specimenCode", get_specimen_type_code_set),
+    ]:
+        code = case_metadata.get(field)
+        if code is None or isinstance(code, bool) or not isinstance(code, (int, float)):
+            continue
+
+        code_set = get_code_set()
+        if code_set is None:
+            continue
+
+        if not is_code_in_code_set(code_set, code):
+            failures.append(f"data.inputs.caseMetadata.{field} '{code}' is not a known SNOMED CT code")
+
+    is_valid = len(failures) == 0
+    return is_valid, failures
+
+
 def validate_data_files(data_files: Dict) -> Tuple[bool, List[str]]:
     """
     Validate that data.inputs.dataFiles contains the expected file keys and
@@ -255,7 +385,7 @@ def handler(event, context) -> Dict[str, bool]:
 
     Validates:
       1. data.tags has required fields with correct types
-      2. data.inputs.caseMetadata is well-formed (when present)
+      2. data.inputs.caseMetadata is well-formed, with known SNOMED codes (when present)
       3. data.inputs.dataFiles contains expected file keys with valid S3 URIs (when present)
 
     Input event:
@@ -274,7 +404,7 @@ def handler(event, context) -> Dict[str, bool]:
 
     Output:
       {"isValid": true}  — all checks pass
-      {"isValid": false}  — at least one check failed (comments written)
+      {"isValid": false, "commentCount": n, "commentCallsSaved": m}  — at least one check failed (comments written)
     """
     # Get the event data
     payload_data = event.get("data", {})
@@ -300,6 +430,10 @@ def handler(event, context) -> Dict[str, bool]:
         if not case_valid:
             all_failures.extend(case_failures)
 
+        codes_valid, codes_failures = validate_snomed_codes(case_metadata)
+        if not codes_valid:
+            all_failures.extend(codes_failures)
+
     # 3. Validate dataFiles (when present in inputs)
     data_files = inputs.get("dataFiles")
     if data_files is not None:
@@ -311,37 +445,16 @@ def handler(event, context) -> Dict[str, bool]:
     if all_failures:
         logger.info(f"Post-schema validation failed with {len(all_failures)} issue(s)")
 
-        if len(all_failures) == 1:
-            add_comment_to_workflow_run(
-                workflow_run_orcabus_id=workflow_run_id,
-                comment=_format_comment_with_arn(
-                    f"Post schema validation failed: {all_failures[0]}",
-                    execution_arn,
-                ),
-                author=COMMENT_AUTHOR,
-            )
-        else:
-            # Write summary comment
-            add_comment_to_workflow_run(
-                workflow_run_orcabus_id=workflow_run_id,
-                comment=_format_comment_with_arn(
-                    f"Post schema validation failed for {len(all_failures)} reasons",
-                    execution_arn,
-                ),
-                author=COMMENT_AUTHOR,
-            )
-            # Write each failure as a separate numbered comment
-            for idx, failure in enumerate(all_failures, start=1):
-                add_comment_to_workflow_run(
-                    workflow_run_orcabus_id=workflow_run_id,
-                    comment=_format_comment_with_arn(
-                        f"Reason {idx} of {len(all_failures)}: {failure}",
-                        execution_arn,
-                    ),
-                    author=COMMENT_AUTHOR,
-                )
+        comment_stats = _post_failure_comments(workflow_run_id, all_failures, execution_arn)
+        logger.info(
+            f"Posted {comment_stats['commentCount']} comment(s), "
+            f"saving {comment_stats['commentCallsSaved']} call(s)"
+        )
 
-        return {"isValid": False}
+        return {
+            "isValid": False,
+            **comment_stats,
+        }
 
     logger.info("Post-schema validation passed")
     return {"isValid": True}
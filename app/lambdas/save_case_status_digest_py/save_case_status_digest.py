@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Save the status digest of a case
+
+Run by the monitor once it has handled a changed case status (i.e. emitted the workflow run update),
+so that the next poll of the case can skip the update if nothing has changed since
+(see pieriandx_tools.pieriandx_helpers.status_digest_helpers).
+
+If the monitor fails before this step, the digest is not saved and the next poll handles the status again.
+"""
+
+# Standard imports
+from typing import Dict
+import logging
+
+# Layer imports
+from pieriandx_tools.pieriandx_helpers.status_digest_helpers import save_case_status_digest
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def handler(event, context) -> Dict:
+    """
+    Save the status digest of a case
+
+    Input:
+      {
+        "caseId": "12345",
+        "caseStatus": {
+          # The output of get_informaticsjob_and_report_status
+          "statusDigest": "...",
+          "informaticsjobId": "...",
+          "jobStatus": "complete",
+          "status": "SUCCEEDED",
+          "reportId": "..."
+        }
+      }
+
+    Output:
+      {}
+
+    :param event:
+    :param context:
+    :return:
+    """
+    case_id = event['caseId']
+    case_status = event['caseStatus']
+
+    save_case_status_digest(case_id, case_status['statusDigest'], case_status)
+
+    return {}
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""
+Update the workflow run index from a workflow run state change event
+
+The index is used by find_latest_workflow to find the latest run of a workflow for a library
+without listing every run from the workflow manager (see pieriandx_tools.utils.workflow_run_index_helpers).
+
+The event detail is added to the index of each of the run's libraries.
+"""
+
+# Standard imports
+from typing import Dict
+import logging
+
+# Layer imports
+from pieriandx_tools.utils.workflow_run_index_helpers import update_workflow_run_index
+
+# Set logger
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def handler(event, context) -> Dict[str, int]:
+    """
+    Update the workflow run index from a workflow run state change event
+
+    Input: the detail of a WorkflowRunStateChange event
+
+    Output:
+      {"indexedLibraryCount": 1}
+
+    :param event:
+    :param context:
+    :return:
+    """
+    workflow_name = event['workflow']['name']
+    libraries = event.get('libraries', None) or []
+
+    if len(libraries) == 0:
+        logger.info(f"Workflow run {event['portalRunId']} has no libraries, nothing to index")
+
+    for library in libraries:
+        update_workflow_run_index(workflow_name, library['libraryId'], [event])
+
+    return {
+        "indexedLibraryCount": len(libraries)
+    }
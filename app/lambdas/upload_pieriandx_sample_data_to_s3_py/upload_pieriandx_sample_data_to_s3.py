@@ -21,78 +21,393 @@ Input will look like this
   "contents": null
 }
 
+Multi-file mode:
+
+If the event contains a 'dataFiles' list (each item matching the input above),
+all files are transferred concurrently over a single pieriandx s3 client.
+The number of concurrent transfers can be set with 'maxConcurrency' (defaults to 8)
+
+Skip if unchanged:
+
+Uploaded objects are tagged with the etag of the source object (or the md5sum of the contents).
+Before transferring, the destination is checked with a HEAD request, if the destination object
+was uploaded from an identical source, the transfer is skipped.
+Set 'forceUpload' to true to always upload.
+
+Server-side copy:
+
+Files that do not need decompression are copied server-side (CopyObject / UploadPartCopy)
+from the source bucket into the pieriandx bucket, so no bytes pass through the lambda.
+The etag of the source object is only its md5sum for single part uploads that are not encrypted with SSE-KMS / SSE-C,
+otherwise the md5sum is taken from the 'md5sum' metadata of the source object,
+or computed by reading the source object (through the pieriandx s3 client) if it has none.
+The md5sum is attached to the destination object, so skipped copies report it too.
+This requires the pieriandx credentials to have read access on the source bucket,
+if they do not (access is denied), we fall back to streaming the file through the lambda
+(and remember not to try that bucket again).
+If the copy fails on the client side (i.e. a connection error), that file falls back to streaming,
+any other error of the copy is raised.
+
+{
+  "dataFiles": [
+    {
+      "srcUri": "s3://path/to/sample-microsat_output.json",
+      "destUri": "s3://pieriandx/melbourne/.../L2301368.microsat_output.json",
+      "needsDecompression": false,
+      "contents": null
+    },
+    ...
+  ],
+  "maxConcurrency": 8,
+  "forceUpload": false
+}
+
+Both modes return transfer statistics, the multi-file mode returns one item per data file (in the input order)
+
+{
+  "uploadResultsList": [
+    {
+      "destUri": "s3://pieriandx/melbourne/.../L2301368.microsat_output.json",
+      "bytesTransferred": 1234,
+      "durationSeconds": 0.123,
+      "md5sum": "d41d8cd98f00b204e9800998ecf8427e",
+      "skipped": false,
+      "transferMode": "stream"  # One of stream, copy or none (skipped)
+    },
+    ...
+  ],
+  "uploadedCount": 1,
+  "skippedCount": 0,
+  "totalBytesTransferred": 1234,
+  "durationSeconds": 0.123
+}
+
 """
 
 # Standard imports
-from tempfile import TemporaryDirectory
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from time import time
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
+import gzip
+import hashlib
 import logging
 import requests
 
 # Layer imports
 from orcabus_api_tools.filemanager import get_presigned_url, get_s3_object_id_from_s3_uri
-from pieriandx_tools.aws_helpers.s3_helpers import upload_file
-from pieriandx_tools.utils.compression_helpers import decompress_file
+from botocore.exceptions import BotoCoreError, ClientError
+from pieriandx_tools.aws_helpers.s3_helpers import (
+    get_pieriandx_s3_client,
+    get_pieriandx_object_metadata,
+    get_object_md5sum_with_pieriandx_client,
+    head_object_with_pieriandx_client,
+    copy_object_into_pieriandx_bucket,
+    upload_fileobj
+)
+from pieriandx_tools.utils.stream_helpers import ChecksumReader
+from pieriandx_tools.utils.tracing_helpers import trace_call
 
 # Logger
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Globals
+DEFAULT_MAX_CONCURRENCY = 8
 
-def handler(event, context):
+# Object metadata keys used to determine if the destination object is already up to date
+SRC_ETAG_METADATA_KEY = "src-etag"
+MD5SUM_METADATA_KEY = "md5sum"
+
+# Source buckets the pieriandx credentials cannot read from, so we don't keep trying a server-side copy
+SERVER_SIDE_COPY_DENIED_BUCKETS = set()
+
+# HeadObject has no response body, so its error code is the http status code
+ACCESS_DENIED_ERROR_CODES = ['403', 'AccessDenied', 'Forbidden']
+
+
+def is_access_denied_error(error: ClientError) -> bool:
+    return error.response.get('Error', {}).get('Code') in ACCESS_DENIED_ERROR_CODES
+
+
+def get_skipped_result(dest_uri: str, md5sum: Optional[str], start_time: float) -> Dict:
+    logger.info(f"Destination {dest_uri} is already up to date, skipping upload")
+    return {
+        "destUri": dest_uri,
+        "bytesTransferred": 0,
+        "durationSeconds": round(time() - start_time, 3),
+        "md5sum": md5sum,
+        "skipped": True,
+        "transferMode": "none",
+    }
+
+
+def get_src_md5sum(src_bucket: str, src_key: str, src_head: Dict) -> str:
     """
-    Upload pieriandx sample data to s3 bucket
-    Args:
-        event:
-        context:
+    Get the md5sum of a source object for a server-side copy.
+    The etag is the md5sum only for single part uploads that are not encrypted with SSE-KMS or SSE-C,
+    otherwise we use the md5sum metadata of the source object, or compute it by reading the object
+    :param src_bucket:
+    :param src_key:
+    :param src_head:
+    :return:
+    """
+    if src_head.get('Metadata', {}).get(MD5SUM_METADATA_KEY, None) is not None:
+        return src_head['Metadata'][MD5SUM_METADATA_KEY]
+
+    src_etag = src_head['ETag'].strip('"')
+    if (
+            '-' not in src_etag and
+            not src_head.get('ServerSideEncryption', '').startswith('aws:kms') and
+            src_head.get('SSECustomerAlgorithm', None) is None
+    ):
+        return src_etag
+
+    logger.info(f"The etag of s3://{src_bucket}/{src_key.lstrip('/')} is not an md5sum, computing the md5sum")
+    return get_object_md5sum_with_pieriandx_client(src_bucket, src_key)
 
-    Returns:
 
+def copy_data_file(
+        src_uri: str,
+        dest_uri: str,
+        dest_metadata: Optional[Dict[str, str]],
+        start_time: float
+) -> Optional[Dict]:
     """
+    Try a server-side copy of the source object into the pieriandx bucket.
+    Returns None if the pieriandx credentials are not permitted to read the source object,
+    or the copy failed on the client side, in which case the caller should fall back to streaming the file.
+    Other errors are raised.
+    :param src_uri:
+    :param dest_uri:
+    :param dest_metadata: The metadata of the existing destination object (if any)
+    :param start_time:
+    :return:
+    """
+    src_bucket = urlparse(src_uri).netloc
+    src_key = urlparse(src_uri).path
+
+    if src_bucket in SERVER_SIDE_COPY_DENIED_BUCKETS:
+        return None
+
+    try:
+        src_head = head_object_with_pieriandx_client(src_bucket, src_key)
+        if src_head is None:
+            # Let the streaming path raise the error for the missing object
+            return None
+
+        # Skip if the destination was uploaded from the same source object
+        src_etag = src_head['ETag'].strip('"')
+        if (
+                dest_metadata is not None and
+                dest_metadata.get(SRC_ETAG_METADATA_KEY) == src_etag
+        ):
+            return get_skipped_result(dest_uri, dest_metadata.get(MD5SUM_METADATA_KEY), start_time)
+
+        src_md5sum = get_src_md5sum(src_bucket, src_key, src_head)
+
+        copy_object_into_pieriandx_bucket(
+            src_bucket, src_key,
+            urlparse(dest_uri).netloc, urlparse(dest_uri).path,
+            metadata={
+                SRC_ETAG_METADATA_KEY: src_etag,
+                MD5SUM_METADATA_KEY: src_md5sum,
+            }
+        )
+    except ClientError as e:
+        if not is_access_denied_error(e):
+            raise
+        logger.info(
+            f"Server-side copy from s3://{src_bucket} is not permitted ({e}), "
+            f"falling back to streaming"
+        )
+        SERVER_SIDE_COPY_DENIED_BUCKETS.add(src_bucket)
+        return None
+    except BotoCoreError as e:
+        # Not a problem with the bucket, so try a server-side copy again for the next file
+        logger.warning(f"Server-side copy of {src_uri} failed ({e}), falling back to streaming")
+        return None
+
+    return {
+        "destUri": dest_uri,
+        "bytesTransferred": src_head['ContentLength'],
+        "durationSeconds": round(time() - start_time, 3),
+        "md5sum": src_md5sum,
+        "skipped": False,
+        "transferMode": "copy",
+    }
+
+
+def upload_data_file(data_file: Dict, force_upload: bool = False) -> Dict:
+    """
+    Stream a single data file into the pieriandx bucket, decompressing on the fly if required
+    :param data_file:
+    :param force_upload: Upload even if the destination object was uploaded from an identical source
+    :return: The transfer statistics for this data file
+    """
+    start_time = time()
 
     # Get uris
-    needs_decompression = event.get("needsDecompression", False)
-    dest_uri = event.get("destUri")
+    needs_decompression = data_file.get("needsDecompression", False)
+    dest_uri = data_file.get("destUri")
     dest_bucket = urlparse(dest_uri).netloc
     dest_key = urlparse(dest_uri).path
-    src_uri = event.get("srcUri", None)
-    contents = event.get("contents", None)
+    src_uri = data_file.get("srcUri", None)
+    contents = data_file.get("contents", None)
+
+    # Get the metadata of the existing destination object (if any)
+    dest_metadata = (
+        get_pieriandx_object_metadata(dest_bucket, dest_key)
+        if not force_upload
+        else None
+    )
+
+    # Plain copies can be done server-side
+    if (
+            src_uri is not None and
+            src_uri.startswith("s3://") and
+            not needs_decompression
+    ):
+        copy_result = copy_data_file(src_uri, dest_uri, dest_metadata, start_time)
+        if copy_result is not None:
+            return copy_result
 
     if src_uri is not None:
-        with TemporaryDirectory() as temp_dir:
-            # Download the samplesheet to the temp file
+        # Stream the source file through the lambda rather than writing it to disk first
+        with trace_call("filemanager", "get_presigned_url"):
             presigned_url = get_presigned_url(get_s3_object_id_from_s3_uri(src_uri))
 
-            src_uri_obj = urlparse(src_uri)
+        with requests.get(presigned_url, stream=True) as response:
+            response.raise_for_status()
 
-            # Set output path
-            output_path = Path(temp_dir) / Path(src_uri_obj.path).name
+            # We have only read the headers at this point,
+            # if the source etag matches that of the destination we can close the stream without reading the body
+            src_etag = response.headers.get("ETag", "").strip('"')
+            if (
+                    dest_metadata is not None and
+                    len(src_etag) > 0 and
+                    dest_metadata.get(SRC_ETAG_METADATA_KEY) == src_etag
+            ):
+                return get_skipped_result(dest_uri, dest_metadata.get(MD5SUM_METADATA_KEY), start_time)
 
             if needs_decompression:
-                with open(output_path, 'wb') as temp_file:
-                    # Write the content to the temp file
-                    temp_file.write(
-                        requests.get(presigned_url).content
-                    )
-
-                decompress_file(output_path, output_path.parent / output_path.name.replace(".gz", ""))
-                output_path = output_path.parent / output_path.name.replace(".gz", "")
+                src_reader = ChecksumReader(gzip.GzipFile(fileobj=response.raw, mode='rb'))
             else:
-                with open(output_path, 'w') as temp_file:
-                    # Write the content to the temp file
-                    temp_file.write(
-                        requests.get(presigned_url).text
-                    )
-
-            # Upload to s3
-            upload_file(dest_bucket, dest_key, output_path)
+                src_reader = ChecksumReader(response.raw)
+
+            upload_fileobj(
+                dest_bucket, dest_key, src_reader,
+                metadata=(
+                    {SRC_ETAG_METADATA_KEY: src_etag}
+                    if len(src_etag) > 0
+                    else None
+                )
+            )
     else:
-        with TemporaryDirectory() as temp_dir:
-            output_path = Path(temp_dir) / Path(dest_key).name
-            output_path.write_text(contents)
+        contents_bytes = contents.encode('utf-8')
+        contents_md5sum = hashlib.md5(contents_bytes).hexdigest()
+        if (
+                dest_metadata is not None and
+                dest_metadata.get(MD5SUM_METADATA_KEY) == contents_md5sum
+        ):
+            return get_skipped_result(dest_uri, contents_md5sum, start_time)
+
+        src_reader = ChecksumReader(BytesIO(contents_bytes))
+        upload_fileobj(
+            dest_bucket, dest_key, src_reader,
+            metadata={MD5SUM_METADATA_KEY: contents_md5sum}
+        )
+
+    return {
+        "destUri": dest_uri,
+        "bytesTransferred": src_reader.bytes_read,
+        "durationSeconds": round(time() - start_time, 3),
+        "md5sum": src_reader.hexdigest(),
+        "skipped": False,
+        "transferMode": "stream",
+    }
+
+
+def upload_data_files(
+        data_files_list: List[Dict],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        force_upload: bool = False
+) -> Dict:
+    """
+    Upload a list of data files concurrently, all threads share the same pieriandx s3 client
+    :param data_files_list:
+    :param max_concurrency:
+    :param force_upload:
+    :return:
+    """
+    start_time = time()
+
+    # Initialise the client (and collect the credentials) once, before we start any threads
+    _ = get_pieriandx_s3_client()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(data_files_list)))) as executor:
+        futures_list = list(map(
+            lambda data_file_iter_: executor.submit(upload_data_file, data_file_iter_, force_upload),
+            data_files_list
+        ))
+
+    # Collect the results in the input order
+    upload_results_list: List[Dict] = []
+    failures_list: List[str] = []
+    for data_file, future in zip(data_files_list, futures_list):
+        if future.exception() is not None:
+            logger.error(f"Failed to upload {data_file.get('destUri')}: {future.exception()}")
+            failures_list.append(f"{data_file.get('destUri')}: {future.exception()}")
+            continue
+        upload_results_list.append(future.result())
 
-            upload_file(dest_bucket, dest_key, output_path)
+    if failures_list:
+        raise Exception(f"Failed to upload {len(failures_list)} data file(s): {'; '.join(failures_list)}")
+
+    skipped_count = len(list(filter(
+        lambda upload_result_iter_: upload_result_iter_['skipped'],
+        upload_results_list
+    )))
+
+    logger.info(f"Uploaded {len(upload_results_list) - skipped_count} data file(s), skipped {skipped_count}")
+
+    return {
+        "uploadResultsList": upload_results_list,
+        "uploadedCount": len(upload_results_list) - skipped_count,
+        "skippedCount": skipped_count,
+        "totalBytesTransferred": sum(map(
+            lambda upload_result_iter_: upload_result_iter_['bytesTransferred'],
+            upload_results_list
+        )),
+        "durationSeconds": round(time() - start_time, 3),
+    }
+
+
+def handler(event, context):
+    """
+    Upload pieriandx sample data to s3 bucket
+    Args:
+        event:
+        context:
+
+    Returns:
+
+    """
+    # Multi-file mode
+    if event.get("dataFiles", None) is not None:
+        return upload_data_files(
+            event.get("dataFiles"),
+            max_concurrency=event.get("maxConcurrency", DEFAULT_MAX_CONCURRENCY),
+            force_upload=event.get("forceUpload", False)
+        )
+
+    # Single file mode
+    return upload_data_files(
+        [event],
+        max_concurrency=1,
+        force_upload=event.get("forceUpload", False)
+    )
 
 
 if __name__ == "__main__":
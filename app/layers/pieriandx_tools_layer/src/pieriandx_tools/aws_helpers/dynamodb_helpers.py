@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+"""
+Key-value state helpers
+
+Small items of bookkeeping state (poll schedules, caches, ledgers) are stored in the
+PierianDx state table, each item is keyed by a partition key (pk) and sort key (sk)
+and holds a json-serialisable data dict, a version number and an optional expiry time.
+
+If the PIERIANDX_STATE_TABLE_NAME environment variable is not set,
+items are held in a process-local dictionary instead,
+this is useful when running the lambdas locally or against the CGW simulator.
+"""
+
+# Standard imports
+import json
+import typing
+from os import environ
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypedDict
+import logging
+
+import boto3
+from botocore.exceptions import ClientError
+
+from ..utils.tracing_helpers import trace_boto3_client
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+DYNAMODB_CLIENT: Optional['DynamoDBClient'] = None
+DEFAULT_MAX_UPDATE_ATTEMPTS = 5
+
+# Local stand-in for the state table, keyed by (pk, sk)
+LOCAL_STATE_TABLE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+LOCAL_STATE_TABLE_LOCK = Lock()
+
+
+class StateItem(TypedDict):
+    data: Dict[str, Any]
+    version: int
+    expiresAt: Optional[int]
+
+
+class StateItemConditionFailedError(Exception):
+    """
+    Raised when a conditional put fails, either because the item already exists
+    or because the item has been updated since it was last read
+    """
+    pass
+
+
+def get_state_table_name() -> Optional[str]:
+    return environ.get("PIERIANDX_STATE_TABLE_NAME", None)
+
+
+def get_dynamodb_client() -> 'DynamoDBClient':
+    global DYNAMODB_CLIENT
+
+    if DYNAMODB_CLIENT is None:
+        DYNAMODB_CLIENT = trace_boto3_client(boto3.client('dynamodb'))
+
+    return DYNAMODB_CLIENT
+
+
+def _is_expired(expires_at: Optional[int], now: int) -> bool:
+    # DynamoDB only removes expired items eventually, so we always check the expiry ourselves
+    return expires_at is not None and expires_at <= now
+
+
+def get_state_item(pk: str, sk: str) -> Optional[StateItem]:
+    """
+    Get an item from the state table, returns None if the item does not exist or has expired
+    :param pk:
+    :param sk:
+    :return:
+    """
+    now = int(time())
+    table_name = get_state_table_name()
+
+    if table_name is None:
+        with LOCAL_STATE_TABLE_LOCK:
+            item = LOCAL_STATE_TABLE.get((pk, sk), None)
+        if item is None or _is_expired(item['expiresAt'], now):
+            return None
+        return {
+            'data': json.loads(item['data']),
+            'version': item['version'],
+            'expiresAt': item['expiresAt'],
+        }
+
+    response = get_dynamodb_client().get_item(
+        TableName=table_name,
+        Key={
+            'pk': {'S': pk},
+            'sk': {'S': sk},
+        },
+        ConsistentRead=True
+    )
+
+    if 'Item' not in response:
+        return None
+
+    item = response['Item']
+    expires_at = int(item['expiresAt']['N']) if 'expiresAt' in item else None
+    if _is_expired(expires_at, now):
+        return None
+
+    return {
+        'data': json.loads(item['data']['S']),
+        'version': int(item['version']['N']),
+        'expiresAt': expires_at,
+    }
+
+
+def put_state_item(
+        pk: str,
+        sk: str,
+        data: Dict[str, Any],
+        ttl_seconds: Optional[int] = None,
+        if_not_exists: bool = False,
+        expected_version: Optional[int] = None,
+) -> int:
+    """
+    Put an item into the state table, returns the new version of the item.
+    Unconditional puts always reset the version to 1,
+    read-modify-write callers should pass the version they read as expected_version.
+
+    :param pk:
+    :param sk:
+    :param data: A json-serialisable dict
+    :param ttl_seconds: If set, the item expires this many seconds from now
+    :param if_not_exists: Only write the item if it does not exist (or has expired)
+    :param expected_version: Only write the item if its current version matches (optimistic locking)
+    :raises StateItemConditionFailedError: If either condition is not met
+    :return:
+    """
+    now = int(time())
+    expires_at = now + ttl_seconds if ttl_seconds is not None else None
+    new_version = (expected_version or 0) + 1
+    table_name = get_state_table_name()
+
+    if table_name is None:
+        with LOCAL_STATE_TABLE_LOCK:
+            current_item = LOCAL_STATE_TABLE.get((pk, sk), None)
+            if current_item is not None and _is_expired(current_item['expiresAt'], now):
+                current_item = None
+            if if_not_exists and current_item is not None:
+                raise StateItemConditionFailedError(f"Item {pk}/{sk} already exists")
+            if expected_version is not None and (
+                    current_item is None or current_item['version'] != expected_version
+            ):
+                raise StateItemConditionFailedError(f"Item {pk}/{sk} is not at version {expected_version}")
+            LOCAL_STATE_TABLE[(pk, sk)] = {
+                'data': json.dumps(data),
+                'version': new_version,
+                'expiresAt': expires_at,
+            }
+        return new_version
+
+    item = {
+        'pk': {'S': pk},
+        'sk': {'S': sk},
+        'data': {'S': json.dumps(data)},
+        'version': {'N': str(new_version)},
+    }
+    if expires_at is not None:
+        item['expiresAt'] = {'N': str(expires_at)}
+
+    condition_kwargs = {}
+    if if_not_exists:
+        condition_kwargs = {
+            'ConditionExpression': 'attribute_not_exists(pk) OR expiresAt <= :now',
+            'ExpressionAttributeValues': {':now': {'N': str(now)}},
+        }
+    elif expected_version is not None:
+        condition_kwargs = {
+            'ConditionExpression': 'version = :expected_version',
+            'ExpressionAttributeValues': {':expected_version': {'N': str(expected_version)}},
+        }
+
+    try:
+        get_dynamodb_client().put_item(
+            TableName=table_name,
+            Item=item,
+            **condition_kwargs
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            raise StateItemConditionFailedError(f"Conditional put failed for item {pk}/{sk}") from e
+        raise
+
+    return new_version
+
+
+def update_state_item(
+        pk: str,
+        sk: str,
+        update_fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]],
+        ttl_seconds: Optional[int] = None,
+        max_attempts: int = DEFAULT_MAX_UPDATE_ATTEMPTS,
+) -> Optional[Dict[str, Any]]:
+    """
+    Read-modify-write an item in the state table, retrying if the item is updated concurrently.
+    update_fn is given a copy of the current data (None if the item does not exist)
+    and returns the new data, or None to leave the item as it is.
+    update_fn may be called more than once, so should not have side effects.
+
+    :param pk:
+    :param sk:
+    :param update_fn:
+    :param ttl_seconds: If set, the updated item expires this many seconds from now
+    :param max_attempts:
+    :raises StateItemConditionFailedError: If the item could not be updated in max_attempts attempts
+    :return: The data of the item after the update
+    """
+    for _ in range(max_attempts):
+        state_item = get_state_item(pk, sk)
+        current_data = state_item['data'] if state_item is not None else None
+
+        new_data = update_fn(json.loads(json.dumps(current_data)))
+        if new_data is None:
+            return current_data
+
+        try:
+            _ = put_state_item(
+                pk,
+                sk,
+                new_data,
+                ttl_seconds=ttl_seconds,
+                if_not_exists=state_item is None,
+                expected_version=state_item['version'] if state_item is not None else None,
+            )
+            return new_data
+        except StateItemConditionFailedError:
+            logger.info(f"Item {pk}/{sk} was updated concurrently, retrying")
+
+    raise StateItemConditionFailedError(f"Could not update item {pk}/{sk} after {max_attempts} attempts")
+
+
+def delete_state_item(pk: str, sk: str) -> None:
+    """
+    Delete an item from the state table, no error is raised if the item does not exist
+    :param pk:
+    :param sk:
+    :return:
+    """
+    table_name = get_state_table_name()
+
+    if table_name is None:
+        with LOCAL_STATE_TABLE_LOCK:
+            LOCAL_STATE_TABLE.pop((pk, sk), None)
+        return
+
+    get_dynamodb_client().delete_item(
+        TableName=table_name,
+        Key={
+            'pk': {'S': pk},
+            'sk': {'S': sk},
+        }
+    )
@@ -8,13 +8,15 @@ Lambda
 import boto3
 import typing
 
+from ..utils.tracing_helpers import trace_boto3_client
+
 if typing.TYPE_CHECKING:
     from mypy_boto3_lambda import LambdaClient
     from mypy_boto3_lambda.type_defs import InvocationResponseTypeDef
 
 
 def get_aws_lambda_client() -> 'LambdaClient':
-    return boto3.client('lambda')
+    return trace_boto3_client(boto3.client('lambda'))
 
 
 def run_lambda_function(function_name: str, payload: str) -> str:
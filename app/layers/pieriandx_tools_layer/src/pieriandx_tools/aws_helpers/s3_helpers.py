@@ -6,21 +6,59 @@ Download file from s3
 
 # Standard Imports
 import typing
+from typing import BinaryIO, Dict, Optional
 from pathlib import Path
+import logging
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 
+# Local imports
+from ..utils.stream_helpers import ChecksumReader
+from ..utils.tracing_helpers import trace_boto3_client
 
 if typing.TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
+    from mypy_boto3_s3.type_defs import HeadObjectOutputTypeDef
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+PIERIANDX_S3_CLIENT: Optional['S3Client'] = None
+
+# Bound the number of multipart threads per file, since we may be uploading several files at once
+PIERIANDX_S3_TRANSFER_CONFIG = TransferConfig(max_concurrency=4)
+
+PIERIANDX_S3_UPLOAD_EXTRA_ARGS = {
+    'ServerSideEncryption': 'AES256'
+}
+
+# Read size when computing the md5sum of an object
+MD5SUM_READ_CHUNK_SIZE = 8 * 1024 * 1024
 
 
 def get_pieriandx_s3_client() -> 'S3Client':
+    """
+    Get the s3 client for the pieriandx bucket.
+    The client is cached, boto3 clients are thread-safe so this may be shared between threads
+    :return:
+    """
     from ..pieriandx_helpers import get_pieriandx_s3_access_credentials
-    return boto3.client(
-        's3',
-        aws_access_key_id=get_pieriandx_s3_access_credentials()['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=get_pieriandx_s3_access_credentials()['AWS_SECRET_ACCESS_KEY']
-    )
+
+    global PIERIANDX_S3_CLIENT
+
+    if PIERIANDX_S3_CLIENT is None:
+        access_credentials = get_pieriandx_s3_access_credentials()
+        PIERIANDX_S3_CLIENT = trace_boto3_client(
+            boto3.client(
+                's3',
+                aws_access_key_id=access_credentials['AWS_ACCESS_KEY_ID'],
+                aws_secret_access_key=access_credentials['AWS_SECRET_ACCESS_KEY']
+            )
+        )
+
+    return PIERIANDX_S3_CLIENT
 
 
 def upload_file(bucket: str, key: str, input_file_path: Path) -> None:
@@ -29,14 +67,136 @@ def upload_file(bucket: str, key: str, input_file_path: Path) -> None:
         str(input_file_path),
         bucket,
         key.lstrip("/"),
+        ExtraArgs=PIERIANDX_S3_UPLOAD_EXTRA_ARGS
+    )
+
+
+def upload_fileobj(
+        bucket: str,
+        key: str,
+        fileobj: BinaryIO,
+        metadata: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Stream a readable file-like object into the pieriandx bucket,
+    the file-like object does not need to be seekable.
+    :param bucket:
+    :param key:
+    :param fileobj:
+    :param metadata: Optional user metadata to attach to the object
+    :return:
+    """
+    s3 = get_pieriandx_s3_client()
+    s3.upload_fileobj(
+        fileobj,
+        bucket,
+        key.lstrip("/"),
+        ExtraArgs={
+            **PIERIANDX_S3_UPLOAD_EXTRA_ARGS,
+            **({'Metadata': metadata} if metadata else {})
+        },
+        Config=PIERIANDX_S3_TRANSFER_CONFIG
+    )
+
+
+def head_object_with_pieriandx_client(bucket: str, key: str) -> Optional['HeadObjectOutputTypeDef']:
+    """
+    Head an object using the pieriandx s3 client.
+    Returns None if the object does not exist, raises a ClientError for any other error (i.e access denied)
+    :param bucket:
+    :param key:
+    :return:
+    """
+    s3 = get_pieriandx_s3_client()
+    try:
+        return s3.head_object(
+            Bucket=bucket,
+            Key=key.lstrip("/")
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ['404', 'NoSuchKey', 'NotFound']:
+            return None
+        raise
+
+
+def get_object_md5sum_with_pieriandx_client(bucket: str, key: str) -> str:
+    """
+    Compute the md5sum of an object by streaming it through the pieriandx s3 client,
+    the object is never held in memory in full.
+    :param bucket:
+    :param key:
+    :return:
+    """
+    s3 = get_pieriandx_s3_client()
+    object_reader = ChecksumReader(
+        s3.get_object(
+            Bucket=bucket,
+            Key=key.lstrip("/")
+        )['Body']
+    )
+    while len(object_reader.read(MD5SUM_READ_CHUNK_SIZE)) > 0:
+        pass
+    return object_reader.hexdigest()
+
+
+def get_pieriandx_object_metadata(bucket: str, key: str) -> Optional[Dict[str, str]]:
+    """
+    Get the user metadata of an object in the pieriandx bucket.
+    Returns None if the object does not exist (or we are not permitted to head it)
+    :param bucket:
+    :param key:
+    :return:
+    """
+    try:
+        response = head_object_with_pieriandx_client(bucket, key)
+    except ClientError as e:
+        logger.warning(f"Could not head s3://{bucket}/{key.lstrip('/')}: {e}")
+        return None
+
+    if response is None:
+        return None
+
+    return response.get('Metadata', {})
+
+
+def copy_object_into_pieriandx_bucket(
+        src_bucket: str,
+        src_key: str,
+        dest_bucket: str,
+        dest_key: str,
+        metadata: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    Server-side copy of an object into the pieriandx bucket, no bytes pass through the caller.
+    Larger objects are copied in parts (UploadPartCopy) by the managed transfer.
+
+    Requires the pieriandx credentials to have read access on the source object,
+    a ClientError is raised otherwise.
+    :param src_bucket:
+    :param src_key:
+    :param dest_bucket:
+    :param dest_key:
+    :param metadata: Optional user metadata to attach to the destination object
+    :return:
+    """
+    s3 = get_pieriandx_s3_client()
+    s3.copy(
+        CopySource={
+            'Bucket': src_bucket,
+            'Key': src_key.lstrip("/")
+        },
+        Bucket=dest_bucket,
+        Key=dest_key.lstrip("/"),
         ExtraArgs={
-            'ServerSideEncryption': 'AES256'
-        }
+            **PIERIANDX_S3_UPLOAD_EXTRA_ARGS,
+            **({'Metadata': metadata, 'MetadataDirective': 'REPLACE'} if metadata else {})
+        },
+        Config=PIERIANDX_S3_TRANSFER_CONFIG
     )
 
 
 def get_s3_client() -> 'S3Client':
-    return boto3.client('s3')
+    return trace_boto3_client(boto3.client('s3'))
 
 
 def download_file(
@@ -18,6 +18,11 @@ from pyriandx.client import Client
 # Other layers
 from orcabus_api_tools.utils.aws_helpers import get_ssm_value, get_secret_value
 
+# Local imports
+from ..utils.tracing_helpers import trace_call
+from .client_helpers import PieriandxClient
+from .resilience_helpers import get_backoff_seconds, has_time_for
+
 # Set logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,11 +33,24 @@ PIERIANDX_TOKEN = None
 PIERIANDX_INSTITUTION = None
 PIERIANDX_BASE_URL = None
 
+# The auth token lambda returns a null token while it is refreshing the token
+AUTH_TOKEN_MAX_ATTEMPTS = 6
+AUTH_TOKEN_BASE_BACKOFF_SECONDS = 1.0
+AUTH_TOKEN_MAX_BACKOFF_SECONDS = 10.0
+
+
+class PieriandxAuthTokenError(Exception):
+    """
+    Raised when the auth token lambda does not return a token
+    """
+    pass
+
 
 def get_pieriandx_email():
     global PIERIANDX_EMAIL
     if PIERIANDX_EMAIL is None:
-        PIERIANDX_EMAIL = get_ssm_value(environ.get("PIERIANDX_USER_EMAIL_SSM_PARAMETER_NAME", None))
+        with trace_call("ssm", "GetParameter"):
+            PIERIANDX_EMAIL = get_ssm_value(environ.get("PIERIANDX_USER_EMAIL_SSM_PARAMETER_NAME", None))
     return PIERIANDX_EMAIL
 
 
@@ -46,14 +64,16 @@ def get_token():
 def get_institution():
     global PIERIANDX_INSTITUTION
     if PIERIANDX_INSTITUTION is None:
-        PIERIANDX_INSTITUTION = get_ssm_value(environ.get("PIERIANDX_INSTITUTION_SSM_PARAMETER_NAME", None))
+        with trace_call("ssm", "GetParameter"):
+            PIERIANDX_INSTITUTION = get_ssm_value(environ.get("PIERIANDX_INSTITUTION_SSM_PARAMETER_NAME", None))
     return PIERIANDX_INSTITUTION
 
 
 def get_base_url():
     global PIERIANDX_BASE_URL
     if PIERIANDX_BASE_URL is None:
-        PIERIANDX_BASE_URL = get_ssm_value(environ.get("PIERIANDX_BASE_URL_SSM_PARAMETER_NAME", None))
+        with trace_call("ssm", "GetParameter"):
+            PIERIANDX_BASE_URL = get_ssm_value(environ.get("PIERIANDX_BASE_URL_SSM_PARAMETER_NAME", None))
     return PIERIANDX_BASE_URL
 
 
@@ -64,24 +84,36 @@ def get_pieriandx_auth_token() -> str:
     # Collect token
     collection_token_lambda = environ.get("PIERIANDX_COLLECT_AUTH_TOKEN_LAMBDA_NAME")
 
-    # Run lambda to get token
-    auth_token = run_lambda_function(collection_token_lambda, "")
-
-    while (
-            auth_token is None or
-            auth_token == 'null' or
-            json.loads(auth_token).get("auth_token") is None
-    ):
-        sleep(5)
+    # Run lambda to get token, backing off while the token is not available
+    for attempt in range(AUTH_TOKEN_MAX_ATTEMPTS):
         auth_token = run_lambda_function(collection_token_lambda, "")
 
-    return json.loads(auth_token).get("auth_token")
+        if (
+                auth_token is not None and
+                auth_token != 'null' and
+                json.loads(auth_token).get("auth_token") is not None
+        ):
+            return json.loads(auth_token).get("auth_token")
+
+        wait_seconds = get_backoff_seconds(
+            attempt,
+            base_backoff_seconds=AUTH_TOKEN_BASE_BACKOFF_SECONDS,
+            max_backoff_seconds=AUTH_TOKEN_MAX_BACKOFF_SECONDS,
+        )
+        if attempt + 1 == AUTH_TOKEN_MAX_ATTEMPTS or not has_time_for(wait_seconds):
+            break
+        sleep(wait_seconds)
+
+    raise PieriandxAuthTokenError(
+        f"Could not get a PierianDx auth token from {collection_token_lambda} after {attempt + 1} attempts"
+    )
 
 
 def get_pieriandx_s3_access_credentials() -> Dict:
     secret_id = environ.get("PIERIANDX_S3_ACCESS_CREDENTIALS_SECRET_ID")
 
-    access_credentials = get_secret_value(secret_id)
+    with trace_call("secretsmanager", "GetSecretValue"):
+        access_credentials = get_secret_value(secret_id)
 
     access_credentials_dict = json.loads(access_credentials)
 
@@ -103,6 +135,9 @@ def get_pieriandx_client(
     PIERIANDX_INSTITUTION
     PIERIANDX_USER_EMAIL
     PIERIANDX_USER_AUTH_TOKEN
+
+    API calls are sent with timeouts (see client_helpers), rate limited across all lambdas (see rate_limit_helpers),
+    and retried and circuit broken per endpoint (see resilience_helpers)
     :return:
     """
 
@@ -119,7 +154,7 @@ def get_pieriandx_client(
     if base_url is None:
         base_url = get_base_url()
 
-    return Client(
+    return PieriandxClient(
         email=email,
         key=token,
         institution=institution,
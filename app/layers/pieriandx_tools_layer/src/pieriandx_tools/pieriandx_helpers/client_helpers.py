@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""
+The PierianDx API client
+
+pyriandx sends each request through a session that retries every method (POST included) four times
+on 500 / 502 / 504 responses and connection errors, has no timeout, and swallows any exception into a None.
+So a create call could be sent more than once, a hung connection held the lambda until it timed out,
+and the retries and circuit breaker of resilience_helpers never saw a failure.
+
+PieriandxClient keeps the pyriandx client interface, but sends each attempt itself, with
+  * a session that does not retry (Retry(total=0, read=False)), so each attempt is a single request
+  * explicit connect and read timeouts, the read timeout is capped by the call deadline
+  * a token from the shared rate limit bucket (see rate_limit_helpers)
+  * a trace span (see tracing_helpers)
+and leaves retries and circuit breaking to resilience_helpers, which classify the real responses and exceptions.
+
+_get_api returns the json body of a 200 response, and None for a 404 (the expected result of a search with no match)
+or any other 4xx response, as pyriandx did. A 5xx or 429 response that is still failing once retries are exhausted
+raises an HTTPError rather than returning None, so that an outage is not mistaken for a missing object.
+_post_api returns the response, connection errors and timeouts that are still failing once retries are exhausted
+are raised rather than returned as None.
+"""
+
+# Standard imports
+import json
+from threading import local
+from typing import Any, Dict, Optional
+import logging
+
+from pyriandx.client import Client
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Local imports
+from ..utils.tracing_helpers import trace_call, get_pieriandx_operation, is_tracing_enabled
+from .rate_limit_helpers import wait_for_token
+from .resilience_helpers import call_with_retries, get_remaining_call_seconds
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+CONNECT_TIMEOUT_SECONDS = 5.0
+READ_TIMEOUT_SECONDS = 30.0
+MIN_READ_TIMEOUT_SECONDS = 1.0
+
+# requests sessions are not guaranteed to be thread-safe, the launch lambda calls PierianDx from two threads
+SESSION_LOCAL = local()
+
+
+def get_pieriandx_session() -> Session:
+    """
+    Get the session of this thread, connections are reused across calls and invocations
+    :return:
+    """
+    if getattr(SESSION_LOCAL, "session", None) is None:
+        session = Session()
+        # read=False re-raises read timeouts as they are, rather than as a connection error after 'max retries'
+        adapter = HTTPAdapter(max_retries=Retry(total=0, read=False))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        SESSION_LOCAL.session = session
+    return SESSION_LOCAL.session
+
+
+def get_read_timeout_seconds() -> float:
+    remaining_call_seconds = get_remaining_call_seconds()
+    if remaining_call_seconds is None:
+        return READ_TIMEOUT_SECONDS
+    return max(MIN_READ_TIMEOUT_SECONDS, min(READ_TIMEOUT_SECONDS, remaining_call_seconds))
+
+
+class PieriandxClient(Client):
+    """
+    A pyriandx client that sends single attempts with timeouts, and retries them with resilience_helpers
+    """
+    def _send(
+            self,
+            method: str,
+            endpoint: str,
+            params: Optional[Dict] = None,
+            data: Optional[Any] = None,
+            files: Optional[Dict] = None,
+    ) -> Response:
+        """
+        Send a single attempt of a call
+        :param method:
+        :param endpoint:
+        :param params:
+        :param data:
+        :param files:
+        :raises requests.exceptions.RequestException: On timeouts and connection errors
+        :return:
+        """
+        headers = self.headers.copy()
+        if data is not None:
+            headers['Content-Type'] = "application/json"
+            headers['Accept-Encoding'] = "*"
+
+        wait_for_token()
+
+        with trace_call("pieriandx", get_pieriandx_operation(method, endpoint)) as span:
+            if data is not None and is_tracing_enabled():
+                span.bytes_sent = len(json.dumps(data, default=str))
+            response = get_pieriandx_session().request(
+                method,
+                self.baseURL + endpoint,
+                params=params,
+                json=data,
+                files=files,
+                headers=headers,
+                timeout=(CONNECT_TIMEOUT_SECONDS, get_read_timeout_seconds()),
+            )
+            span.bytes_received = len(response.content)
+            # A 404 is the expected result of a search with no match
+            if not response.ok and not (method == "GET" and response.status_code == 404):
+                span.error = f"HTTP{response.status_code}"
+
+        return response
+
+    def _get_api(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Any]:
+        response = call_with_retries("GET", self._send, endpoint, params=params)
+
+        if response.status_code == 200:
+            return response.json()
+
+        if response.status_code == 429 or response.status_code >= 500:
+            logger.error(f"PierianDx GET {endpoint} failed with HTTP {response.status_code}: {response.text}")
+            response.raise_for_status()
+
+        if response.status_code != 404:
+            logger.warning(f"PierianDx GET {endpoint} returned HTTP {response.status_code}: {response.text}")
+
+        return None
+
+    def _post_api(self, endpoint: str, data: Optional[Any] = None, files: Optional[Dict] = None) -> Response:
+        response = call_with_retries("POST", self._send, endpoint, data=data, files=files)
+
+        if not response.ok:
+            logger.error(f"PierianDx POST {endpoint} failed with HTTP {response.status_code}: {response.text}")
+
+        return response
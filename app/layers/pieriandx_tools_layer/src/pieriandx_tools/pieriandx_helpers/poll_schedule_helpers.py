@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+"""
+Adaptive poll scheduling for informatics jobs
+
+The monitor state machine is triggered on a short fixed interval,
+but each case is only polled once its own next-poll time has passed.
+
+The case id of a run is only known once its payload has been fetched from the workflow manager,
+so the next-poll time is also kept against the portal run id of the run,
+this lets the monitor skip runs that are not due before fetching their payloads (see list_active_workflow_runs).
+
+For each case we keep the status history of its current informatics job,
+for each panel we keep the durations of the most recent successful jobs.
+
+The next poll for a case is scheduled at half of the estimated remaining time of the job,
+clamped between MIN_POLL_INTERVAL_SECONDS and MAX_POLL_INTERVAL_SECONDS, so that
+jobs that have just started are polled rarely and jobs that are about to finish are polled often.
+
+Once a job has run past its estimated duration we poll at the minimum interval,
+backing off slowly in case the job is stuck.
+Once the job is complete and we are waiting on the report, we always poll at the minimum interval.
+"""
+
+# Standard imports
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Dict, List, Optional
+import logging
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import (
+    get_state_item, put_state_item, delete_state_item, StateItemConditionFailedError
+)
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+# Cases are never polled more often than this, whatever the monitor runs schedule frequency
+MIN_POLL_INTERVAL_SECONDS = 15 * 60
+MAX_POLL_INTERVAL_SECONDS = 60 * 60
+OVERDUE_BACKOFF_RATE = 1.5
+REMAINING_TIME_POLL_FRACTION = 0.5
+
+# Used until we have collected some job durations for a panel
+DEFAULT_JOB_DURATION_SECONDS = 6 * 60 * 60
+MAX_JOB_DURATIONS_PER_PANEL = 50
+MAX_STATUS_HISTORY_LENGTH = 100
+
+# Don't hold onto case state for abandoned runs forever
+CASE_POLL_STATE_TTL_SECONDS = 30 * 24 * 60 * 60
+
+DEFAULT_PANEL_NAME = "default"
+CASE_POLL_STATE_SK = "pollSchedule"
+RUN_NEXT_POLL_SK = "nextPoll"
+PANEL_JOB_DURATIONS_SK = "jobDurations"
+
+TERMINAL_STATUSES = ["SUCCEEDED", "FAILED"]
+REPORT_PENDING_JOB_STATUSES = ["complete"]
+
+
+def get_case_pk(case_id: str) -> str:
+    return f"case#{case_id}"
+
+
+def get_run_pk(portal_run_id: str) -> str:
+    return f"run#{portal_run_id}"
+
+
+def get_panel_pk(panel_name: Optional[str]) -> str:
+    return f"panel#{panel_name if panel_name else DEFAULT_PANEL_NAME}"
+
+
+def get_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_panel_job_durations(panel_name: Optional[str]) -> List[float]:
+    durations_item = get_state_item(get_panel_pk(panel_name), PANEL_JOB_DURATIONS_SK)
+    if durations_item is None:
+        return []
+    return durations_item['data']['durationsSeconds']
+
+
+def record_panel_job_duration(panel_name: Optional[str], duration_seconds: float, max_attempts: int = 3) -> None:
+    """
+    Append a job duration to the panel's duration history, keeping the most recent MAX_JOB_DURATIONS_PER_PANEL.
+    Several cases may complete in the same monitor run, so we use optimistic locking and retry on conflict
+    :param panel_name:
+    :param duration_seconds:
+    :param max_attempts:
+    :return:
+    """
+    pk = get_panel_pk(panel_name)
+    for _ in range(max_attempts):
+        durations_item = get_state_item(pk, PANEL_JOB_DURATIONS_SK)
+        durations_list = durations_item['data']['durationsSeconds'] if durations_item is not None else []
+        try:
+            put_state_item(
+                pk, PANEL_JOB_DURATIONS_SK,
+                data={
+                    "durationsSeconds": (durations_list + [duration_seconds])[-MAX_JOB_DURATIONS_PER_PANEL:]
+                },
+                if_not_exists=durations_item is None,
+                expected_version=durations_item['version'] if durations_item is not None else None,
+            )
+            return
+        except StateItemConditionFailedError:
+            continue
+    # Not worth failing the poll over
+    logger.warning(f"Could not record job duration for panel {panel_name} after {max_attempts} attempts")
+
+
+def estimate_job_duration_seconds(panel_name: Optional[str]) -> float:
+    durations_list = get_panel_job_durations(panel_name)
+    if len(durations_list) == 0:
+        return DEFAULT_JOB_DURATION_SECONDS
+    return median(durations_list)
+
+
+def get_case_poll_state(case_id: str) -> Optional[Dict]:
+    case_item = get_state_item(get_case_pk(case_id), CASE_POLL_STATE_SK)
+    if case_item is None:
+        return None
+    return case_item['data']
+
+
+def is_poll_due(case_id: str, now: Optional[datetime] = None) -> bool:
+    """
+    Cases we have never polled are always due
+    :param case_id:
+    :param now:
+    :return:
+    """
+    if now is None:
+        now = get_now()
+
+    case_poll_state = get_case_poll_state(case_id)
+    if case_poll_state is None:
+        return True
+
+    return datetime.fromisoformat(case_poll_state['nextPollTime']) <= now
+
+
+def get_case_next_poll_time(case_id: str) -> Optional[datetime]:
+    case_poll_state = get_case_poll_state(case_id)
+    if case_poll_state is None:
+        return None
+    return datetime.fromisoformat(case_poll_state['nextPollTime'])
+
+
+def is_run_poll_due(portal_run_id: str, now: Optional[datetime] = None) -> bool:
+    """
+    Check the next-poll time kept against the portal run id, without needing the case id of the run.
+    Runs we have never polled are always due
+    :param portal_run_id:
+    :param now:
+    :return:
+    """
+    if now is None:
+        now = get_now()
+
+    run_item = get_state_item(get_run_pk(portal_run_id), RUN_NEXT_POLL_SK)
+    if run_item is None:
+        return True
+
+    return datetime.fromisoformat(run_item['data']['nextPollTime']) <= now
+
+
+def record_run_next_poll_time(portal_run_id: str, next_poll_time: Optional[datetime]) -> None:
+    """
+    Keep the next-poll time of the case of a run against the portal run id,
+    the run is always due once its case has reached a terminal status (next_poll_time is None)
+    :param portal_run_id:
+    :param next_poll_time:
+    :return:
+    """
+    if next_poll_time is None:
+        delete_state_item(get_run_pk(portal_run_id), RUN_NEXT_POLL_SK)
+        return
+
+    put_state_item(
+        get_run_pk(portal_run_id), RUN_NEXT_POLL_SK,
+        data={
+            "nextPollTime": next_poll_time.isoformat(),
+        },
+        ttl_seconds=CASE_POLL_STATE_TTL_SECONDS,
+    )
+
+
+def get_next_poll_delay_seconds(
+        job_status: str,
+        elapsed_seconds: float,
+        expected_duration_seconds: float,
+        overdue_poll_count: int
+) -> float:
+    """
+    Get the number of seconds until we should next poll a case
+    :param job_status: The raw pieriandx job status
+    :param elapsed_seconds: The time since we first saw the job
+    :param expected_duration_seconds: The expected duration of the job for this panel
+    :param overdue_poll_count: The number of polls since the job ran past its expected duration
+    :return:
+    """
+    if job_status in REPORT_PENDING_JOB_STATUSES:
+        return MIN_POLL_INTERVAL_SECONDS
+
+    remaining_seconds = expected_duration_seconds - elapsed_seconds
+    if remaining_seconds > 0:
+        delay_seconds = remaining_seconds * REMAINING_TIME_POLL_FRACTION
+    else:
+        delay_seconds = MIN_POLL_INTERVAL_SECONDS * (OVERDUE_BACKOFF_RATE ** overdue_poll_count)
+
+    return min(max(delay_seconds, MIN_POLL_INTERVAL_SECONDS), MAX_POLL_INTERVAL_SECONDS)
+
+
+def record_case_poll(
+        case_id: str,
+        panel_name: Optional[str],
+        job_id: str,
+        job_status: str,
+        status: str,
+        now: Optional[datetime] = None
+) -> Optional[datetime]:
+    """
+    Record the result of a poll and schedule the next poll for this case.
+
+    If the job id has changed (i.e. the job was rerun) the status history is reset.
+    Once the case has reached a terminal status, the job duration is recorded against the panel
+    and the case state is removed, None is returned.
+
+    :param case_id:
+    :param panel_name:
+    :param job_id: The id of the most recent informatics job
+    :param job_status: The raw pieriandx job status, i.e waiting, ready, running, complete, failed
+    :param status: The workflow status we returned, i.e RUNNABLE, RUNNING, SUCCEEDED, FAILED
+    :param now:
+    :return: The time of the next poll
+    """
+    if now is None:
+        now = get_now()
+
+    case_poll_state = get_case_poll_state(case_id)
+    if case_poll_state is None or case_poll_state['jobId'] != str(job_id):
+        case_poll_state = {
+            "jobId": str(job_id),
+            "panelName": panel_name,
+            "firstSeenTime": now.isoformat(),
+            "overduePollCount": 0,
+            "statusHistory": [],
+        }
+
+    if (
+            len(case_poll_state['statusHistory']) == 0 or
+            case_poll_state['statusHistory'][-1]['jobStatus'] != job_status
+    ):
+        case_poll_state['statusHistory'].append({
+            "jobStatus": job_status,
+            "status": status,
+            "time": now.isoformat(),
+        })
+        case_poll_state['statusHistory'] = case_poll_state['statusHistory'][-MAX_STATUS_HISTORY_LENGTH:]
+
+    elapsed_seconds = (now - datetime.fromisoformat(case_poll_state['firstSeenTime'])).total_seconds()
+
+    if status in TERMINAL_STATUSES:
+        if status == "SUCCEEDED":
+            record_panel_job_duration(panel_name, elapsed_seconds)
+        delete_state_item(get_case_pk(case_id), CASE_POLL_STATE_SK)
+        return None
+
+    expected_duration_seconds = estimate_job_duration_seconds(panel_name)
+    if elapsed_seconds > expected_duration_seconds:
+        case_poll_state['overduePollCount'] += 1
+
+    next_poll_time = now + timedelta(
+        seconds=get_next_poll_delay_seconds(
+            job_status=job_status,
+            elapsed_seconds=elapsed_seconds,
+            expected_duration_seconds=expected_duration_seconds,
+            overdue_poll_count=max(case_poll_state['overduePollCount'] - 1, 0)
+        )
+    )
+    case_poll_state['nextPollTime'] = next_poll_time.isoformat()
+
+    put_state_item(
+        get_case_pk(case_id), CASE_POLL_STATE_SK,
+        data=case_poll_state,
+        ttl_seconds=CASE_POLL_STATE_TTL_SECONDS,
+    )
+
+    return next_poll_time
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+Shared rate limiting of PierianDx API calls
+
+A burst of READY events fans out into concurrent lambdas (case launches, monitor Map iterations),
+each calling the CGW API without knowing about the others, which ends in a storm of 429s.
+
+All PierianDx API calls take a token from a single token bucket in the state table before they are sent.
+The bucket holds up to PIERIANDX_API_RATE_LIMIT_BURST tokens and is refilled at
+PIERIANDX_API_RATE_LIMIT_PER_SECOND tokens per second.
+
+Rather than polling the bucket until a token is available, a call always takes a token,
+letting the bucket go into debt, and then sleeps until the token it took would have been refilled.
+So each call is one conditional write, and waiting calls are sent in the order they took their tokens.
+A call that would have to wait longer than PIERIANDX_API_RATE_LIMIT_MAX_WAIT_SECONDS
+(or past the call deadline, see resilience_helpers) does not take a token, and raises a RateLimitExceededError instead.
+
+The rate limit protects PierianDx, it must not take our calls down with it, so if the bucket cannot be
+updated (contention on the bucket, or the state table is throttled or unreachable) the call is sent anyway.
+
+If PIERIANDX_STATE_TABLE_NAME is not set, the bucket is held in the process-local state table,
+so calls are only rate limited within the process (i.e. when running locally or in tests),
+we log an error (once per process) if this happens in a lambda.
+Set PIERIANDX_API_RATE_LIMIT_PER_SECOND to 0 to disable rate limiting.
+"""
+
+# Standard imports
+from os import environ
+from time import sleep, time
+from typing import Any, Dict, Optional
+import logging
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_table_name, update_state_item, StateItemConditionFailedError
+from .resilience_helpers import get_remaining_call_seconds
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+RATE_LIMIT_PER_SECOND_ENV_VAR = "PIERIANDX_API_RATE_LIMIT_PER_SECOND"
+RATE_LIMIT_BURST_ENV_VAR = "PIERIANDX_API_RATE_LIMIT_BURST"
+RATE_LIMIT_MAX_WAIT_SECONDS_ENV_VAR = "PIERIANDX_API_RATE_LIMIT_MAX_WAIT_SECONDS"
+
+DEFAULT_RATE_LIMIT_PER_SECOND = 5.0
+DEFAULT_RATE_LIMIT_BURST = 10.0
+DEFAULT_RATE_LIMIT_MAX_WAIT_SECONDS = 60.0
+
+RATE_LIMIT_BUCKET_PK = "ratelimit#pieriandx"
+RATE_LIMIT_BUCKET_SK = "bucket"
+
+# Many lambdas take tokens at once, so allow for more conflicts than other state items
+MAX_TOKEN_BUCKET_UPDATE_ATTEMPTS = 10
+
+# An idle bucket is full, so there is no need to keep it around
+RATE_LIMIT_BUCKET_TTL_SECONDS = 60 * 60
+
+# Whether we have logged that the bucket of this lambda is process-local
+LOCAL_BUCKET_LOGGED = False
+
+
+class RateLimitExceededError(Exception):
+    """
+    Raised when a PierianDx API call would have to wait longer than the max wait time for a token
+    """
+    pass
+
+
+def _get_float_env_var(env_var: str, default: float) -> float:
+    try:
+        return float(environ.get(env_var, default))
+    except ValueError:
+        logger.warning(f"Could not parse {env_var} as a number, using {default}")
+        return default
+
+
+def get_rate_limit_per_second() -> float:
+    return _get_float_env_var(RATE_LIMIT_PER_SECOND_ENV_VAR, DEFAULT_RATE_LIMIT_PER_SECOND)
+
+
+def get_rate_limit_burst() -> float:
+    return _get_float_env_var(RATE_LIMIT_BURST_ENV_VAR, DEFAULT_RATE_LIMIT_BURST)
+
+
+def get_rate_limit_max_wait_seconds() -> float:
+    return _get_float_env_var(RATE_LIMIT_MAX_WAIT_SECONDS_ENV_VAR, DEFAULT_RATE_LIMIT_MAX_WAIT_SECONDS)
+
+
+def check_bucket_is_shared():
+    """
+    Log an error if a lambda is rate limited by the process-local bucket,
+    i.e. the lambda was deployed without access to the state table
+    :return:
+    """
+    global LOCAL_BUCKET_LOGGED
+
+    if LOCAL_BUCKET_LOGGED or get_state_table_name() is not None or "AWS_LAMBDA_FUNCTION_NAME" not in environ:
+        return
+
+    LOCAL_BUCKET_LOGGED = True
+    logger.error(
+        f"PIERIANDX_STATE_TABLE_NAME is not set for lambda {environ['AWS_LAMBDA_FUNCTION_NAME']}, "
+        f"PierianDx API calls are only rate limited within this lambda instance"
+    )
+
+
+def take_token(
+        rate_per_second: float,
+        burst: float,
+        max_wait_seconds: float,
+) -> float:
+    """
+    Take a token from the bucket, returns the number of seconds to wait before the call can be sent
+    :param rate_per_second:
+    :param burst:
+    :param max_wait_seconds:
+    :raises RateLimitExceededError: If the call would have to wait longer than max_wait_seconds
+    :return:
+    """
+    wait_seconds: Optional[float] = None
+
+    def update_bucket(bucket_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        nonlocal wait_seconds
+
+        now = time()
+        if bucket_data is None:
+            tokens = burst
+        else:
+            # Refill the bucket for the time since it was last updated
+            tokens = min(burst, bucket_data['tokens'] + (now - bucket_data['updatedAt']) * rate_per_second)
+
+        # Tokens are refilled in order, so a negative balance is the queue of calls waiting ahead of us
+        tokens -= 1
+        wait_seconds = max(0.0, -tokens / rate_per_second)
+
+        if wait_seconds > max_wait_seconds:
+            return None
+
+        return {
+            "tokens": tokens,
+            "updatedAt": now,
+        }
+
+    _ = update_state_item(
+        RATE_LIMIT_BUCKET_PK,
+        RATE_LIMIT_BUCKET_SK,
+        update_bucket,
+        ttl_seconds=RATE_LIMIT_BUCKET_TTL_SECONDS,
+        max_attempts=MAX_TOKEN_BUCKET_UPDATE_ATTEMPTS,
+    )
+
+    if wait_seconds > max_wait_seconds:
+        raise RateLimitExceededError(
+            f"PierianDx API calls are rate limited, "
+            f"the next call could not be sent for another {round(wait_seconds, 1)} seconds"
+        )
+
+    return wait_seconds
+
+
+def wait_for_token():
+    """
+    Wait until a PierianDx API call can be sent
+    :raises RateLimitExceededError: If the call would have to wait longer than the max wait time
+    :return:
+    """
+    rate_per_second = get_rate_limit_per_second()
+    if rate_per_second <= 0:
+        return
+
+    check_bucket_is_shared()
+
+    max_wait_seconds = get_rate_limit_max_wait_seconds()
+    remaining_call_seconds = get_remaining_call_seconds()
+    if remaining_call_seconds is not None:
+        max_wait_seconds = min(max_wait_seconds, remaining_call_seconds)
+
+    try:
+        wait_seconds = take_token(
+            rate_per_second,
+            max(1.0, get_rate_limit_burst()),
+            max_wait_seconds,
+        )
+    except (StateItemConditionFailedError, ClientError, BotoCoreError) as e:
+        # Don't hold up the call because of contention on, or an outage of, the bucket itself
+        logger.warning(
+            f"Could not take a token from the PierianDx API rate limit bucket, sending the call anyway: {e}"
+        )
+        return
+
+    if wait_seconds > 0:
+        logger.info(f"PierianDx API calls are rate limited, waiting {round(wait_seconds, 2)} seconds")
+        sleep(wait_seconds)
+
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+"""
+Retries, circuit breaking and deadlines for PierianDx API calls
+
+Without these, a CGW outage either fails a step on its first non-200 response,
+or (for the auth token) hangs the lambda until it times out.
+
+Retries
+Each attempt is a single request sent by the PieriandxClient (see client_helpers), with timeouts and no retries of its own.
+Each failed attempt of a call is classified by whether it is safe to send again.
+  GET calls are idempotent, so are retried on timeouts, connection errors and 5xx responses.
+  POST calls create objects, so are only retried if PierianDx cannot have processed them,
+  that is a connect timeout, a refused connection, or a 429 / 503 response.
+  Other failed POSTs are returned to (or raised in) the caller after a single attempt.
+An attempt that returns no response at all is a failure.
+4xx responses (i.e. the expected 404 of a search with no match) are not failures and are not retried.
+Retries wait a full-jitter exponential backoff, or the Retry-After header of a 429 / 503 if it has one.
+
+Circuit breaker
+Failures (timeouts, connection errors and 5xx responses) are counted per endpoint (i.e. 'GET /case/{id}')
+in the state table, so the count is shared by all lambdas.
+After CIRCUIT_FAILURE_THRESHOLD consecutive failures the circuit opens, and calls to the endpoint raise a
+CircuitOpenError without being sent. Once the circuit has been open for its cool down, calls are sent again,
+the first success closes the circuit, and a failure re-opens it with a longer cool down.
+If the state table cannot be read or updated, calls are sent as if the circuit were closed.
+
+Deadline
+Handlers decorated with deadline_handler set a deadline from the lambda context's remaining time,
+less a safety margin so the handler can still record its results.
+Retries (and rate limit waits) that would end after the deadline are not attempted,
+the last failure is returned / raised instead.
+"""
+
+# Standard imports
+import random
+from functools import wraps
+from time import monotonic, sleep, time
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from botocore.exceptions import BotoCoreError, ClientError
+from requests import Response
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout, Timeout
+from urllib3.exceptions import NewConnectionError
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_item, update_state_item, StateItemConditionFailedError
+from ..utils.tracing_helpers import get_pieriandx_operation
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+MAX_CALL_ATTEMPTS = 4
+BASE_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+
+# Responses that PierianDx returns before processing a request, so are safe to retry for any call
+RETRYABLE_STATUS_CODES = [429, 503]
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_BASE_OPEN_SECONDS = 30
+CIRCUIT_MAX_OPEN_SECONDS = 5 * 60
+CIRCUIT_PK = "circuit#pieriandx"
+CIRCUIT_TTL_SECONDS = 60 * 60
+
+# Leave enough time after the last call for the handler to record its results
+DEFAULT_DEADLINE_SAFETY_MARGIN_SECONDS = 10
+
+# Monotonic time after which no more attempts are started, None if there is no deadline
+CALL_DEADLINE: Optional[float] = None
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a PierianDx API call is not sent because the circuit of its endpoint is open
+    """
+    pass
+
+
+def set_call_deadline(remaining_seconds: Optional[float]):
+    global CALL_DEADLINE
+    CALL_DEADLINE = monotonic() + remaining_seconds if remaining_seconds is not None else None
+
+
+def get_remaining_call_seconds() -> Optional[float]:
+    """
+    Get the number of seconds until the call deadline, None if there is no deadline
+    :return:
+    """
+    if CALL_DEADLINE is None:
+        return None
+    return max(0.0, CALL_DEADLINE - monotonic())
+
+
+def has_time_for(wait_seconds: float) -> bool:
+    remaining_seconds = get_remaining_call_seconds()
+    return remaining_seconds is None or wait_seconds < remaining_seconds
+
+
+def deadline_handler(safety_margin_seconds: float = DEFAULT_DEADLINE_SAFETY_MARGIN_SECONDS) -> Callable:
+    """
+    Decorate a lambda handler so that PierianDx API retries stop before the lambda times out
+    :param safety_margin_seconds:
+    :return:
+    """
+    def decorator(handler: Callable[[Dict, Any], Any]) -> Callable[[Dict, Any], Any]:
+        @wraps(handler)
+        def wrapper(event: Dict, context: Optional[Any]):
+            # The context is None when handlers are run locally
+            if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+                set_call_deadline(max(0.0, context.get_remaining_time_in_millis() / 1000 - safety_margin_seconds))
+            try:
+                return handler(event, context)
+            finally:
+                set_call_deadline(None)
+        return wrapper
+    return decorator
+
+
+def get_backoff_seconds(
+        attempt: int,
+        base_backoff_seconds: float = BASE_BACKOFF_SECONDS,
+        max_backoff_seconds: float = MAX_BACKOFF_SECONDS,
+) -> float:
+    """
+    Full-jitter exponential backoff, attempt is zero-based
+    :param attempt:
+    :param base_backoff_seconds:
+    :param max_backoff_seconds:
+    :return:
+    """
+    return random.uniform(0, min(max_backoff_seconds, base_backoff_seconds * (2 ** attempt)))
+
+
+def get_retry_after_seconds(response: Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        # Not set, or set as an http date, which PierianDx does not use
+        return None
+
+
+def check_circuit(operation: str) -> bool:
+    """
+    Check the circuit of an endpoint, returns True if the endpoint has recorded failures
+    :param operation:
+    :raises CircuitOpenError: If the circuit is open
+    :return:
+    """
+    try:
+        circuit_item = get_state_item(CIRCUIT_PK, operation)
+    except (ClientError, BotoCoreError) as e:
+        # The circuit breaker protects PierianDx, it should not stop calls if the state table is unavailable
+        logger.warning(f"Could not read the circuit of {operation}: {e}")
+        return False
+
+    if circuit_item is None:
+        return False
+
+    circuit_data = circuit_item['data']
+    if circuit_data['openUntil'] is not None and time() < circuit_data['openUntil']:
+        raise CircuitOpenError(
+            f"The circuit for PierianDx {operation} is open after {circuit_data['consecutiveFailures']} "
+            f"consecutive failures, not calling PierianDx for another "
+            f"{round(circuit_data['openUntil'] - time())} seconds"
+        )
+
+    return circuit_data['consecutiveFailures'] > 0
+
+
+def record_circuit_result(operation: str, is_failure: bool):
+    """
+    Record the result of a call in the circuit of its endpoint
+    :param operation:
+    :param is_failure:
+    :return:
+    """
+    def update_circuit(circuit_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if circuit_data is None:
+            circuit_data = {
+                "consecutiveFailures": 0,
+                "openCount": 0,
+                "openUntil": None,
+            }
+
+        if not is_failure:
+            if circuit_data['consecutiveFailures'] == 0:
+                return None
+            if circuit_data['openCount'] > 0:
+                logger.info(f"Closing the circuit for PierianDx {operation}")
+            return {
+                "consecutiveFailures": 0,
+                "openCount": 0,
+                "openUntil": None,
+            }
+
+        circuit_data['consecutiveFailures'] += 1
+        if circuit_data['consecutiveFailures'] >= CIRCUIT_FAILURE_THRESHOLD:
+            open_seconds = min(
+                CIRCUIT_MAX_OPEN_SECONDS,
+                CIRCUIT_BASE_OPEN_SECONDS * (2 ** circuit_data['openCount'])
+            )
+            logger.warning(f"Opening the circuit for PierianDx {operation} for {open_seconds} seconds")
+            circuit_data['openCount'] += 1
+            circuit_data['openUntil'] = time() + open_seconds
+
+        return circuit_data
+
+    try:
+        _ = update_state_item(CIRCUIT_PK, operation, update_circuit, ttl_seconds=CIRCUIT_TTL_SECONDS)
+    except (ClientError, BotoCoreError, StateItemConditionFailedError) as e:
+        logger.warning(f"Could not record the result of PierianDx {operation} in its circuit: {e}")
+
+
+def is_connection_refused(exception: Exception) -> bool:
+    """
+    Whether the connection could not be made at all, in which case the request was never sent
+    :param exception:
+    :return:
+    """
+    reason = getattr(exception.args[0], "reason", None) if len(exception.args) > 0 else None
+    return isinstance(reason, NewConnectionError)
+
+
+def classify_attempt(
+        is_idempotent: bool,
+        result: Any,
+        exception: Optional[Exception],
+) -> Tuple[bool, bool]:
+    """
+    Classify an attempt of a call
+    :param is_idempotent:
+    :param result:
+    :param exception:
+    :return: Whether the attempt is a failure (for the circuit breaker), and whether it can be retried
+    """
+    if exception is not None:
+        if isinstance(exception, ConnectTimeout) or (
+                isinstance(exception, RequestsConnectionError) and is_connection_refused(exception)
+        ):
+            # The request was never sent
+            return True, True
+        if isinstance(exception, (Timeout, RequestsConnectionError)):
+            return True, is_idempotent
+        # Not an error of the PierianDx service, i.e. a bug in the caller
+        return False, False
+
+    if result is None:
+        # No response at all, we cannot tell whether a POST was processed
+        return True, is_idempotent
+
+    if isinstance(result, Response):
+        if result.status_code in RETRYABLE_STATUS_CODES:
+            # A 429 is our own doing, not a failure of the service
+            return result.status_code != 429, True
+        if result.status_code >= 500:
+            return True, is_idempotent
+
+    return False, False
+
+
+def get_attempt_description(result: Any, exception: Optional[Exception]) -> str:
+    if exception is not None:
+        return f"{type(exception).__name__}: {exception}"
+    if isinstance(result, Response):
+        return f"HTTP {result.status_code}"
+    return "no response"
+
+
+def call_with_retries(method: str, call: Callable[..., Any], endpoint: str, *args, **kwargs) -> Any:
+    """
+    Call a PierianDx API method with retries and circuit breaking
+    :param method: GET or POST
+    :param call: Sends a single attempt of the call, i.e. PieriandxClient._send
+    :param endpoint:
+    :return: The result of the last attempt
+    :raises: The exception of the last attempt
+    """
+    operation = get_pieriandx_operation(method, endpoint)
+    is_idempotent = method == "GET"
+
+    attempt = 0
+    while True:
+        has_failures = check_circuit(operation)
+
+        result, exception = None, None
+        try:
+            result = call(method, endpoint, *args, **kwargs)
+        except Exception as e:
+            exception = e
+
+        is_failure, is_retryable = classify_attempt(is_idempotent, result, exception)
+        if is_failure or has_failures:
+            record_circuit_result(operation, is_failure)
+
+        attempt += 1
+        if is_retryable and attempt < MAX_CALL_ATTEMPTS:
+            wait_seconds = None
+            if isinstance(result, Response):
+                wait_seconds = get_retry_after_seconds(result)
+            if wait_seconds is None:
+                wait_seconds = get_backoff_seconds(attempt - 1)
+
+            if has_time_for(wait_seconds):
+                logger.info(
+                    f"PierianDx {operation} attempt {attempt} failed "
+                    f"({get_attempt_description(result, exception)}), "
+                    f"retrying in {round(wait_seconds, 2)} seconds"
+                )
+                sleep(wait_seconds)
+                continue
+
+            logger.warning(f"Not retrying PierianDx {operation}, the lambda is running out of time")
+
+        if exception is not None:
+            raise exception
+        return result
+
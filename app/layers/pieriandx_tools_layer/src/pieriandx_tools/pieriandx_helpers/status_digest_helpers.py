@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+Case status digests
+
+We keep a digest of the job and report ids and statuses of each case,
+if the digest is unchanged since the last poll, the monitor skips generating and comparing the workflow run update.
+
+The digest of a poll is only saved once the monitor has handled the new status of the case,
+i.e. after the workflow run update has been emitted (see save_case_status_digest).
+If the monitor fails in between, no digest is saved, so the next poll sees the status as changed and tries again.
+"""
+
+# Standard imports
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_item, put_state_item
+from .poll_schedule_helpers import get_case_pk, CASE_POLL_STATE_TTL_SECONDS
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+STATUS_DIGEST_SK = "statusDigest"
+# Keep the digest for the lifetime of the run, an expired digest is seen as a status change,
+# and each status change appends a transition record to the turnaround store
+STATUS_DIGEST_TTL_SECONDS = CASE_POLL_STATE_TTL_SECONDS
+
+# The keys of the case status held with the digest
+CASE_STATUS_KEYS = [
+    "informaticsjobId",
+    "jobStatus",
+    "status",
+    "reportId",
+]
+
+
+def get_case_status_digest(case_data: Dict) -> str:
+    """
+    Hash the ids and statuses of the jobs and reports of the case,
+    everything else in the case (specimens, sequencer runs etc) is irrelevant to the status
+    :param case_data:
+    :return:
+    """
+    status_subset = {
+        "informaticsJobs": sorted(
+            [str(job_obj.get("id")), job_obj.get("status")]
+            for job_obj in (case_data.get("informaticsJobs") or [])
+        ),
+        "reports": sorted(
+            [str(report_obj.get("id")), report_obj.get("status")]
+            for report_obj in (case_data.get("reports") or [])
+        ),
+    }
+    return hashlib.sha256(
+        json.dumps(status_subset, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def get_cached_case_status(case_id: str, digest: str) -> Optional[Dict]:
+    """
+    Get the case status saved with the digest, returns None if the digest of the case has changed
+    :param case_id:
+    :param digest:
+    :return:
+    """
+    digest_item = get_state_item(get_case_pk(case_id), STATUS_DIGEST_SK)
+    if digest_item is None or digest_item['data']['digest'] != digest:
+        return None
+    return digest_item['data']['caseStatus']
+
+
+def save_case_status_digest(case_id: str, digest: str, case_status: Dict):
+    """
+    Save the digest of a case once its status has been handled
+    :param case_id:
+    :param digest:
+    :param case_status: The case status returned by the poll, only the CASE_STATUS_KEYS are saved
+    :return:
+    """
+    put_state_item(
+        get_case_pk(case_id), STATUS_DIGEST_SK,
+        data={
+            "digest": digest,
+            "caseStatus": {
+                key: case_status.get(key, None)
+                for key in CASE_STATUS_KEYS
+            },
+        },
+        ttl_seconds=STATUS_DIGEST_TTL_SECONDS,
+    )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+Informatics job turnaround analytics
+
+Each time the monitor sees the jobs or reports of a case change (see get_informaticsjob_and_report_status),
+it appends a transition record (case id, job id, panel name, job status, workflow status, timestamp)
+to the turnaround store, so that we know how long informatics jobs and report generation take.
+
+The store is a set of gzipped json lines files, partitioned by the date of the transition, i.e.
+
+  <store uri>/date=2026-10-19/<uuid>.jsonl.gz
+
+PIERIANDX_TURNAROUND_STORE_URI is either an s3 uri or a local directory,
+if it is not set, the store is a directory in the system temp directory.
+
+A case has a handful of transitions over the day or so of its job, so each write is a single small file.
+Records are written with the standard library and boto3 only, so that the layer stays within the lambda size limit,
+the store is read (and can be exported to Parquet) by app/dev-tools/turnaround_analytics/query_turnaround.py.
+"""
+
+# Standard imports
+import gzip
+import json
+from datetime import date, datetime
+from os import environ
+from pathlib import Path
+from tempfile import gettempdir
+from typing import List, Optional, TypedDict
+from urllib.parse import urlparse
+from uuid import uuid4
+import logging
+
+# Local imports
+from ..aws_helpers.s3_helpers import get_s3_client
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+TURNAROUND_STORE_URI_ENV_VAR = "PIERIANDX_TURNAROUND_STORE_URI"
+DEFAULT_LOCAL_TURNAROUND_STORE_DIR = Path(gettempdir()) / "pieriandx_turnaround"
+
+DATE_PARTITION_PREFIX = "date="
+TRANSITION_RECORDS_FILE_SUFFIX = ".jsonl.gz"
+
+
+class TransitionRecord(TypedDict):
+    caseId: str
+    jobId: str
+    panelName: Optional[str]
+    jobStatus: str
+    status: str
+    timestamp: datetime
+
+
+def get_turnaround_store_uri() -> str:
+    return environ.get(TURNAROUND_STORE_URI_ENV_VAR, None) or str(DEFAULT_LOCAL_TURNAROUND_STORE_DIR)
+
+
+def is_s3_uri(uri: str) -> bool:
+    return urlparse(uri).scheme == "s3"
+
+
+def get_date_partition(partition_date: date) -> str:
+    return f"{DATE_PARTITION_PREFIX}{partition_date.isoformat()}"
+
+
+def get_transition_record(
+        case_id: str,
+        job_id: str,
+        panel_name: Optional[str],
+        job_status: str,
+        status: str,
+        timestamp: datetime,
+) -> TransitionRecord:
+    return {
+        "caseId": str(case_id),
+        "jobId": str(job_id),
+        "panelName": panel_name,
+        "jobStatus": job_status,
+        "status": status,
+        "timestamp": timestamp,
+    }
+
+
+def get_transition_records_bytes(transition_records: List[TransitionRecord]) -> bytes:
+    """
+    Serialise transition records as gzipped json lines, timestamps are written as iso format strings
+    :param transition_records:
+    :return:
+    """
+    return gzip.compress(
+        "".join(
+            json.dumps({**transition_record, "timestamp": transition_record['timestamp'].isoformat()}) + "\n"
+            for transition_record in transition_records
+        ).encode()
+    )
+
+
+def write_transition_records(transition_records: List[TransitionRecord]) -> Optional[str]:
+    """
+    Write transition records to the turnaround store, as a single file in the date partition of the first record
+    :param transition_records:
+    :return: The uri of the file written, None if there are no records
+    """
+    if len(transition_records) == 0:
+        return None
+
+    file_name = (
+        f"{get_date_partition(transition_records[0]['timestamp'].date())}/"
+        f"{uuid4().hex}{TRANSITION_RECORDS_FILE_SUFFIX}"
+    )
+    store_uri = get_turnaround_store_uri()
+
+    if not is_s3_uri(store_uri):
+        output_path = Path(store_uri) / file_name
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(get_transition_records_bytes(transition_records))
+        return str(output_path)
+
+    store_obj = urlparse(store_uri)
+    key = f"{store_obj.path.strip('/')}/{file_name}".lstrip("/")
+    get_s3_client().put_object(
+        Bucket=store_obj.netloc,
+        Key=key,
+        Body=get_transition_records_bytes(transition_records),
+        ContentType="application/x-ndjson",
+    )
+    return f"s3://{store_obj.netloc}/{key}"
@@ -1,5 +1,28 @@
 #!/usr/bin/env python3
 
 """
-
+SNOMED CT lookups
 """
+
+# Standard imports
+from typing import Any, Dict, List
+
+
+def get_records_from_json(json_obj: Any) -> List[Dict[str, Any]]:
+    """
+    The tree may be stored as a list of records, or column-oriented ({column: {row_index: value}}),
+    both of which pandas' read_json accepts
+    :param json_obj:
+    :return:
+    """
+    if isinstance(json_obj, list):
+        return json_obj
+
+    row_indexes = list(next(iter(json_obj.values()), {}).keys())
+    return [
+        {
+            column_name: column_values.get(row_index, None)
+            for column_name, column_values in json_obj.items()
+        }
+        for row_index in row_indexes
+    ]
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+Compact SNOMED code sets
+
+The specimen type and disease trees are large json documents, that take a while to download and parse.
+To check that a code exists we only need the codes themselves, so each tree has a precomputed code set artifact,
+stored alongside the tree in the lookup bucket.
+
+A code set artifact is the CODE_SET_MAGIC header followed by the sorted unique codes as little-endian uint64 values.
+It is loaded straight into an array with no parsing, and codes are found by binary search.
+
+The artifacts are rebuilt from the trees on every deployment by the build_snomed_code_sets lambda,
+use app/dev-tools/snomed_code_sets/build_snomed_code_sets.py to rebuild them by hand.
+If an artifact does not exist, a CodeSetNotFoundError is raised rather than skipping the check.
+"""
+
+# Standard imports
+import gzip
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from os import environ
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import urlparse
+import logging
+
+# Local imports
+from . import get_records_from_json
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+CODE_SET_MAGIC = b"PDXCODES"
+CODE_SET_TYPECODE = "Q"
+
+SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI_ENV_VAR = "SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI"
+SNOMED_CT_DISEASE_CODE_SET_S3_URI_ENV_VAR = "SNOMED_CT_DISEASE_CODE_SET_S3_URI"
+
+# Code sets by s3 uri
+CODE_SETS: Dict[str, array] = {}
+
+
+class CodeSetNotFoundError(Exception):
+    """
+    Raised when a code set artifact does not exist, i.e. the code sets have not been built
+    """
+    pass
+
+
+def get_unique_codes_from_tree_bytes(tree_bytes: bytes, tree_name: str) -> List[int]:
+    """
+    Get the codes of a SNOMED tree (json, optionally gzipped).
+    Only codes that appear exactly once in the tree are returned,
+    since the label lookups in generate_pieriandx_objects fail for duplicated codes
+    :param tree_bytes:
+    :param tree_name: Used in log messages
+    :return:
+    """
+    if tree_bytes[:2] == b"\x1f\x8b":
+        tree_bytes = gzip.decompress(tree_bytes)
+
+    code_counts = Counter(
+        int(record["Code"])
+        for record in get_records_from_json(json.loads(tree_bytes))
+        if record.get("Code", None) is not None
+    )
+
+    duplicate_codes = [code for code, count in code_counts.items() if count > 1]
+    if len(duplicate_codes) > 0:
+        logger.warning(
+            f"Skipping {len(duplicate_codes)} codes that appear more than once in {tree_name}: "
+            f"{', '.join(map(str, sorted(duplicate_codes)[:10]))}"
+        )
+
+    return [code for code, count in code_counts.items() if count == 1]
+
+
+def get_code_set_bytes(codes: Iterable[int]) -> bytes:
+    """
+    Build a code set artifact from an iterable of codes
+    :param codes:
+    :return:
+    """
+    code_set = array(CODE_SET_TYPECODE, sorted(set(int(code) for code in codes)))
+    if sys.byteorder == "big":
+        code_set.byteswap()
+    return CODE_SET_MAGIC + code_set.tobytes()
+
+
+def read_code_set_bytes(code_set_bytes: bytes) -> array:
+    """
+    Read a code set artifact into a sorted array of codes
+    :param code_set_bytes:
+    :return:
+    """
+    if not code_set_bytes.startswith(CODE_SET_MAGIC):
+        raise ValueError("Not a code set artifact, missing the code set header")
+
+    code_set = array(CODE_SET_TYPECODE)
+    code_set.frombytes(code_set_bytes[len(CODE_SET_MAGIC):])
+    if sys.byteorder == "big":
+        code_set.byteswap()
+    return code_set
+
+
+def is_code_in_code_set(code_set: array, code: Union[int, float]) -> bool:
+    # Codes may arrive as floats from json, only whole non-negative numbers can be codes
+    if code < 0 or int(code) != code:
+        return False
+    code = int(code)
+    code_idx = bisect_left(code_set, code)
+    return code_idx < len(code_set) and code_set[code_idx] == code
+
+
+def get_code_set_from_s3_uri(s3_uri: str) -> array:
+    """
+    Get a code set from s3, the code set is cached for the lifetime of the container
+    :param s3_uri:
+    :raises CodeSetNotFoundError: If the artifact does not exist
+    :return:
+    """
+    from botocore.exceptions import ClientError
+    from ..aws_helpers.s3_helpers import get_s3_client
+
+    if s3_uri in CODE_SETS:
+        return CODE_SETS[s3_uri]
+
+    s3_obj = urlparse(s3_uri)
+    try:
+        response = get_s3_client().get_object(
+            Bucket=s3_obj.netloc,
+            Key=s3_obj.path.lstrip("/")
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') not in ['404', 'NoSuchKey', 'NotFound']:
+            raise
+        logger.error(f"Code set {s3_uri} does not exist, the SNOMED code sets have not been built")
+        raise CodeSetNotFoundError(
+            f"Code set {s3_uri} does not exist, run the build_snomed_code_sets lambda to build it"
+        ) from e
+
+    CODE_SETS[s3_uri] = read_code_set_bytes(response['Body'].read())
+
+    return CODE_SETS[s3_uri]
+
+
+def get_code_set_from_env_var(env_var: str) -> Optional[array]:
+    """
+    Get the code set at the s3 uri in the environment variable,
+    None if the environment variable is not set (i.e. when running locally)
+    :param env_var:
+    :return:
+    """
+    s3_uri = environ.get(env_var, None)
+    if s3_uri is None:
+        logger.warning(f"{env_var} is not set, codes will not be checked against its code set")
+        return None
+    return get_code_set_from_s3_uri(s3_uri)
+
+
+def get_specimen_type_code_set() -> Optional[array]:
+    return get_code_set_from_env_var(SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI_ENV_VAR)
+
+
+def get_disease_code_set() -> Optional[array]:
+    return get_code_set_from_env_var(SNOMED_CT_DISEASE_CODE_SET_S3_URI_ENV_VAR)
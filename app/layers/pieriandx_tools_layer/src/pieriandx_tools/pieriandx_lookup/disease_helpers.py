@@ -13,6 +13,7 @@ from tempfile import NamedTemporaryFile
 
 from orcabus_api_tools.utils.aws_helpers import get_ssm_value
 from ..utils.compression_helpers import decompress_file
+from ..utils.tracing_helpers import trace_call
 
 # Compressed version of
 # https://velserapm.atlassian.net/wiki/download/attachments/86704490/SNOMED_CT%20Disease_trees.xlsx?version=1&modificationDate=1561395438000&api=v2
@@ -41,7 +42,8 @@ def get_disease_tree() -> pd.DataFrame:
         NamedTemporaryFile(suffix='json') as snomed_ct_disease_tree_file_decompressed,
     ):
         # Get the s3 uri path
-        s3_obj = urlparse(get_ssm_value(environ[SNOMED_CT_DISEASE_TREE_S3_PATH_SSM_ENV_VAR]))
+        with trace_call("ssm", "GetParameter"):
+            s3_obj = urlparse(get_ssm_value(environ[SNOMED_CT_DISEASE_TREE_S3_PATH_SSM_ENV_VAR]))
 
         # Download the file from S3
         download_file(
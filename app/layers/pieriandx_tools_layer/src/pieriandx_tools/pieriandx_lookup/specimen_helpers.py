@@ -2,38 +2,55 @@
 
 """
 Given a specimen code, get the specimen label
+
+The specimen type tree is downloaded once per container and indexed by code,
+so each lookup is a dictionary lookup.
+The index is built with the standard json library, pandas is only imported if the dataframe is requested.
 """
+import json
+import typing
 from os import environ
 # Imports
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
+import logging
 
-import pandas as pd
 from tempfile import NamedTemporaryFile
 
 from orcabus_api_tools.utils.aws_helpers import get_ssm_value
+from . import get_records_from_json
 from ..utils.compression_helpers import decompress_file
+from ..utils.tracing_helpers import trace_call
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+# Set logger
+logger = logging.getLogger(__name__)
 
 # Compressed version of
 # https://velserapm.atlassian.net/wiki/download/attachments/86704490/SnomedCT-Term_For_SpecimenType.xls?version=1&modificationDate=1561395451000&api=v2
 SNOMED_CT_SPECIMEN_TYPE_S3_PATH_SSM_ENV_VAR = "SNOMED_CT_SPECIMEN_TYPE_SSM_PARAMETER_NAME"
+SNOMED_CT_SPECIMEN_TYPE_RECORDS: Optional[List[Dict[str, Any]]] = None
 SNOMED_CT_SPECIMEN_TYPE_DF = None
+SNOMED_CT_SPECIMEN_TYPE_INDEX: Optional[Dict[int, str]] = None
 
 
-def get_specimen_tree() -> pd.DataFrame:
+def get_specimen_tree_records() -> List[Dict[str, Any]]:
     """
-    Returns a dataframe with the following columns
+    Returns a list of records with the following keys
     * Code
     * CodeSystem
-    * Label
+    * CodeLabel
     :return:
     """
     from ..aws_helpers.s3_helpers import download_file
 
-    global SNOMED_CT_SPECIMEN_TYPE_DF
+    global SNOMED_CT_SPECIMEN_TYPE_RECORDS
 
-    if SNOMED_CT_SPECIMEN_TYPE_DF is not None:
-        return SNOMED_CT_SPECIMEN_TYPE_DF
+    if SNOMED_CT_SPECIMEN_TYPE_RECORDS is not None:
+        return SNOMED_CT_SPECIMEN_TYPE_RECORDS
 
     # Download the file from S3
     with (
@@ -41,7 +58,8 @@ def get_specimen_tree() -> pd.DataFrame:
         NamedTemporaryFile(suffix='json') as snomed_ct_specimen_tree_file_decompressed,
     ):
         # Get the s3 uri path
-        s3_obj = urlparse(get_ssm_value(environ[SNOMED_CT_SPECIMEN_TYPE_S3_PATH_SSM_ENV_VAR]))
+        with trace_call("ssm", "GetParameter"):
+            s3_obj = urlparse(get_ssm_value(environ[SNOMED_CT_SPECIMEN_TYPE_S3_PATH_SSM_ENV_VAR]))
 
         # Download the file from S3
         download_file(
@@ -62,28 +80,70 @@ def get_specimen_tree() -> pd.DataFrame:
         # Flush to ensure all data is written
         snomed_ct_specimen_tree_file_decompressed.flush()
 
-        # Read the decompressed file into a dataframe
-        SNOMED_CT_SPECIMEN_TYPE_DF = pd.read_json(snomed_ct_specimen_tree_file_decompressed.name)
+        # Read the decompressed file into a list of records
+        with open(snomed_ct_specimen_tree_file_decompressed.name) as snomed_ct_specimen_tree_file_h:
+            SNOMED_CT_SPECIMEN_TYPE_RECORDS = get_records_from_json(json.load(snomed_ct_specimen_tree_file_h))
+
+    return SNOMED_CT_SPECIMEN_TYPE_RECORDS
+
+
+def get_specimen_tree() -> 'pd.DataFrame':
+    """
+    Returns a dataframe with the following columns
+    * Code
+    * CodeSystem
+    * CodeLabel
+    :return:
+    """
+    import pandas as pd
+
+    global SNOMED_CT_SPECIMEN_TYPE_DF
+
+    if SNOMED_CT_SPECIMEN_TYPE_DF is None:
+        SNOMED_CT_SPECIMEN_TYPE_DF = pd.DataFrame(get_specimen_tree_records())
 
     return SNOMED_CT_SPECIMEN_TYPE_DF
 
 
+def get_specimen_type_index() -> Dict[int, str]:
+    """
+    Get the specimen label by specimen code.
+    Codes that appear more than once in the tree are ambiguous, and are left out of the index
+    :return:
+    """
+    global SNOMED_CT_SPECIMEN_TYPE_INDEX
+
+    if SNOMED_CT_SPECIMEN_TYPE_INDEX is not None:
+        return SNOMED_CT_SPECIMEN_TYPE_INDEX
+
+    specimen_type_index: Dict[int, str] = {}
+    duplicate_codes = set()
+    for record in get_specimen_tree_records():
+        if record.get('Code', None) is None:
+            continue
+        code = int(record['Code'])
+        if code in specimen_type_index:
+            duplicate_codes.add(code)
+        specimen_type_index[code] = record['CodeLabel']
+
+    for code in duplicate_codes:
+        logger.warning(f"Specimen code {code} appears more than once in the specimen tree, skipping")
+        _ = specimen_type_index.pop(code)
+
+    SNOMED_CT_SPECIMEN_TYPE_INDEX = specimen_type_index
+
+    return SNOMED_CT_SPECIMEN_TYPE_INDEX
+
+
 def get_specimen_label_from_specimen_code(specimen_code: int) -> str:
     """
     Given the specimen code, get the specimen label
     :param specimen_code:
     :return:
     """
-    # Get the specimen tree
-    specimen_tree_df = get_specimen_tree()
-
-    # Query specimen code
-    query_df = specimen_tree_df.query(
-        f"Code=={specimen_code}"
-    )
+    specimen_type_index = get_specimen_type_index()
 
-    # Assert that the query df is of length 1
-    assert query_df.shape[0] == 1, f"Failed to get specimen code {specimen_code}"
+    if int(specimen_code) not in specimen_type_index:
+        raise ValueError(f"Failed to get specimen code {specimen_code}")
 
-    # Return the label
-    return query_df['CodeLabel'].item()
+    return specimen_type_index[int(specimen_code)]
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
-from typing import List, Self
+from enum import Enum
+from typing import Any, List, Self
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timezone
 
 
 def to_utc_date(datetime_obj: datetime) -> str:
@@ -16,6 +16,57 @@ def to_utc_date(datetime_obj: datetime) -> str:
     )
 
 
+def to_pieriandx_timestamp(datetime_obj: datetime) -> str:
+    """
+    Format a datetime in the PierianDx timestamp format, i.e 2024-11-05T16:11:36+1100
+
+    Equivalent to running the isoformat output through the ([+-])HH:MM$ -> \\1HHMM substitution
+    but without re-parsing the string or running a regex.
+    Naive datetimes (and offsets with a seconds component) are returned without modification to the suffix.
+    """
+    timestamp_str = datetime_obj.isoformat(timespec="seconds")
+
+    # Collapse the trailing +HH:MM offset into +HHMM
+    if timestamp_str[-6] in "+-" and timestamp_str[-3] == ":":
+        return timestamp_str[:-3] + timestamp_str[-2:]
+
+    return timestamp_str
+
+
+def to_pieriandx_date(datetime_obj: datetime) -> str:
+    """
+    Format a datetime as a PierianDx date, i.e 1970-01-01
+    """
+    return datetime_obj.date().isoformat()
+
+
+def to_json_compatible(value: Any) -> Any:
+    """
+    Convert the output of model_dump into json-compatible types.
+
+    Covers the field types used by our models (strings, numbers, booleans, literals, datetimes,
+    nested models and lists) with the same output as fastapi's jsonable_encoder,
+    without importing fastapi / starlette or walking each value through its generic encoder chain.
+    """
+    # Enums first, since str enums would otherwise be returned as is
+    if isinstance(value, Enum):
+        return to_json_compatible(value.value)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {
+            key: to_json_compatible(dict_value)
+            for key, dict_value in value.items()
+        }
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_json_compatible(item) for item in value]
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return to_json_compatible(value.model_dump(by_alias=True))
+    raise TypeError(f"Cannot convert value of type {type(value).__name__} to a json-compatible type")
+
+
 class PierianDxBaseModel(BaseModel):
     # Set the model config to use camelCase for JSON serialization
     model_config = ConfigDict(
@@ -47,4 +98,4 @@ class PierianDxBaseModel(BaseModel):
         # Remove 'null' values by default
         kwargs['exclude_none'] = True
 
-        return jsonable_encoder(self.model_dump(**kwargs))
+        return to_json_compatible(self.model_dump(**kwargs))
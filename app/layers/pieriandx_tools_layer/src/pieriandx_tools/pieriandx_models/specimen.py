@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
-import re
+
 # Standard imports
 import typing
 from typing import Optional, Union, TypedDict, NotRequired, cast
 from datetime import datetime
-import pandas as pd
 
 # Local imported attributes
-from . import PierianDxBaseModel
+from . import PierianDxBaseModel, to_pieriandx_timestamp, to_pieriandx_date
 
 # PierianDx literals imports
 from ..pieriandx_literals import (
@@ -22,9 +21,6 @@ if typing.TYPE_CHECKING:
     from .specimen_type import SpecimenTypeDict
 
 
-# Globals
-ISOFORMAT_SUFFIX = re.compile(r'([+-])(\d{2}):(\d{2})$')
-
 class SpecimenDict(TypedDict):
     accessionNumber: str
     dateAccessioned: str
@@ -74,19 +70,14 @@ class Specimen(PierianDxBaseModel):
         data['accessionNumber'] = data.pop('caseAccessionNumber')
 
         # Fix formats
-        data['dateAccessioned'] = ISOFORMAT_SUFFIX.sub(
-            r'\1\2\3',
-            pd.to_datetime(data.pop('dateAccessioned')).isoformat(timespec='seconds'),
-        )
-        data['dateReceived'] = ISOFORMAT_SUFFIX.sub(
-            r'\1\2\3',
-            pd.to_datetime(data.pop('dateReceived')).isoformat(timespec='seconds')
-        )
+        # Format directly from the datetime attributes rather than re-parsing the serialised strings
+        _ = data.pop('dateAccessioned')
+        _ = data.pop('dateReceived')
+        _ = data.pop('dateCollected')
+        data['dateAccessioned'] = to_pieriandx_timestamp(self.date_accessioned)
+        data['dateReceived'] = to_pieriandx_timestamp(self.date_received)
         # Note the typo here is intentional
-        data['datecollected'] = ISOFORMAT_SUFFIX.sub(
-            r'\1\2\3',
-            pd.to_datetime(data.pop('dateCollected')).isoformat(timespec='seconds')
-        )
+        data['datecollected'] = to_pieriandx_timestamp(self.date_collected)
 
         # Fix specimen type
         _ = data.pop('specimenType')
@@ -110,7 +101,7 @@ class IdentifiedSpecimen(Specimen):
         data: Union[SpecimenDict, IdentifiedSpecimenDict] = super().to_dict(**kwargs)
 
         # Update some of the keys to match the expected output type
-        data['dateOfBirth'] = self.date_of_birth.date().isoformat()
+        data['dateOfBirth'] = to_pieriandx_date(self.date_of_birth)
         _ = data.pop("medicalRecordNumber")
         data['medicalRecordNumbers'] = [self.medical_record_number.to_dict()]
         return cast(
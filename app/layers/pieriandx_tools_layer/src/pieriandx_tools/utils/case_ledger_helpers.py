@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""
+Idempotency ledger for PierianDx case launches
+
+PierianDx has no idempotency keys, so if a launch step times out after its POST succeeded,
+a retry of the step creates a duplicate case / sequencer run / informatics job.
+
+Each launch step records its result in the ledger, keyed by the case accession number,
+before the step returns. A retry of the launch finds the recorded results and returns them without calling PierianDx.
+A step is marked as pending before its POST, so a retry can tell that a POST may have been sent
+without a result being recorded (i.e. the lambda timed out mid-call), and check PierianDx before creating it again.
+
+The ledger also records the accession numbers used for each library (accession numbers are {library_id}_{NNN}),
+so the next free accession number can be allocated without probing PierianDx for each candidate.
+The used accession numbers of a library are seeded by probing PierianDx the first time they are needed,
+after that only the allocated accession number is checked.
+
+Ledger items are stored in the state table (with no expiry),
+or in a process-local dictionary if PIERIANDX_STATE_TABLE_NAME is not set.
+"""
+
+# Standard imports
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Tuple
+import logging
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_item, update_state_item
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+CASE_LEDGER_SK = "case"
+ACCESSION_LEDGER_SK = "accessions"
+ACCESSION_COUNTER_WIDTH = 3
+
+LaunchStepType = Literal[
+    'case',
+    'sequencerrun',
+    'informaticsjob',
+]
+
+
+def get_case_ledger_pk(accession_number: str) -> str:
+    return f"ledger#case#{accession_number}"
+
+
+def get_accession_ledger_pk(library_id: str) -> str:
+    return f"ledger#accession#{library_id}"
+
+
+def get_case_accession_number(library_id: str, counter: int) -> str:
+    return f"{library_id}_{str(counter).zfill(ACCESSION_COUNTER_WIDTH)}"
+
+
+def split_case_accession_number(accession_number: str) -> Optional[Tuple[str, int]]:
+    """
+    Split an accession number into its library id and counter,
+    returns None if the accession number was not allocated by get_case_accession_number
+    :param accession_number:
+    :return:
+    """
+    library_id, _, counter = accession_number.rpartition("_")
+    if not library_id or not counter.isdigit():
+        return None
+    return library_id, int(counter)
+
+
+def _get_new_case_ledger_entry(accession_number: str) -> Dict[str, Any]:
+    return {
+        "accessionNumber": accession_number,
+        "results": {},
+        "pending": {},
+    }
+
+
+def get_case_ledger_entry(accession_number: str) -> Dict[str, Any]:
+    """
+    Get the ledger entry of a case, the 'results' of each recorded launch step,
+    and the time each unrecorded step was marked 'pending'
+    :param accession_number:
+    :return:
+    """
+    state_item = get_state_item(get_case_ledger_pk(accession_number), CASE_LEDGER_SK)
+
+    if state_item is None:
+        return _get_new_case_ledger_entry(accession_number)
+
+    return state_item['data']
+
+
+def mark_launch_step_pending(accession_number: str, launch_step: LaunchStepType):
+    """
+    Mark a launch step as pending, call this before the POST of the step
+    :param accession_number:
+    :param launch_step:
+    :return:
+    """
+    def update_entry(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            entry = _get_new_case_ledger_entry(accession_number)
+        if launch_step in entry['results']:
+            return None
+        entry['pending'][launch_step] = int(time())
+        return entry
+
+    _ = update_state_item(get_case_ledger_pk(accession_number), CASE_LEDGER_SK, update_entry)
+
+
+def record_launch_step(accession_number: str, launch_step: LaunchStepType, result: Any) -> Any:
+    """
+    Record the result of a launch step.
+    If the step has already been recorded (i.e. by a concurrent launch), the recorded result is kept,
+    and returned so that the caller continues with the same case
+    :param accession_number:
+    :param launch_step:
+    :param result:
+    :return: The recorded result
+    """
+    def update_entry(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            entry = _get_new_case_ledger_entry(accession_number)
+        if launch_step in entry['results']:
+            return None
+        entry['results'][launch_step] = result
+        entry['pending'].pop(launch_step, None)
+        return entry
+
+    entry = update_state_item(get_case_ledger_pk(accession_number), CASE_LEDGER_SK, update_entry)
+
+    if entry['results'][launch_step] != result:
+        logger.warning(f"Launch step {launch_step} of {accession_number} was already recorded, keeping that result")
+
+    # Cases take up their accession number for good
+    if launch_step == 'case':
+        add_used_case_accession_number(accession_number)
+
+    return entry['results'][launch_step]
+
+
+def get_used_case_accession_counters(library_id: str) -> Optional[List[int]]:
+    """
+    Get the accession counters used by the cases of a library,
+    returns None if the used accession numbers of the library have not been seeded
+    :param library_id:
+    :return:
+    """
+    state_item = get_state_item(get_accession_ledger_pk(library_id), ACCESSION_LEDGER_SK)
+
+    if state_item is None or not state_item['data']['isComplete']:
+        return None
+
+    return state_item['data']['usedCounters']
+
+
+def add_used_case_accession_counters(library_id: str, counters: Iterable[int], is_complete: bool = False):
+    """
+    Add accession counters to the used accession counters of a library.
+    Set is_complete if the counters are all of the used accession counters of the library (i.e. from a probe)
+    :param library_id:
+    :param counters:
+    :param is_complete:
+    :return:
+    """
+    counters = list(counters)
+
+    def update_used_counters(used_counters_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if used_counters_data is None:
+            used_counters_data = {
+                "isComplete": False,
+                "usedCounters": [],
+            }
+        used_counters = sorted(set(used_counters_data['usedCounters']).union(counters))
+        if (
+                used_counters == used_counters_data['usedCounters'] and
+                (used_counters_data['isComplete'] or not is_complete)
+        ):
+            return None
+        return {
+            "isComplete": used_counters_data['isComplete'] or is_complete,
+            "usedCounters": used_counters,
+        }
+
+    _ = update_state_item(get_accession_ledger_pk(library_id), ACCESSION_LEDGER_SK, update_used_counters)
+
+
+def add_used_case_accession_number(accession_number: str):
+    split_accession_number = split_case_accession_number(accession_number)
+    if split_accession_number is None:
+        # Not allocated by allocate_case_accession_number, so does not need to be tracked
+        return
+    library_id, counter = split_accession_number
+    add_used_case_accession_counters(library_id, [counter])
+
+
+def get_next_case_accession_number(library_id: str, used_counters: Iterable[int]) -> str:
+    used_counters = set(used_counters)
+    counter = 1
+    while counter in used_counters:
+        counter += 1
+    return get_case_accession_number(library_id, counter)
+
+
+def allocate_case_accession_number(library_id: str, is_accession_number_used: Callable[[str], bool]) -> str:
+    """
+    Get the first accession number of a library that is not used by a case.
+
+    If the used accession numbers of the library have not been seeded,
+    we probe each accession number in turn (as is_accession_number_used) and seed them from the probes.
+    Otherwise we take the first accession number the ledger does not know of, and probe only that one,
+    in case it has been used by a case created outside of this service.
+
+    An accession number is not reserved until its case is recorded,
+    so we return the same accession number until then.
+    :param library_id:
+    :param is_accession_number_used:
+    :return:
+    """
+    used_counters = get_used_case_accession_counters(library_id)
+
+    if used_counters is None:
+        counter = 1
+        while is_accession_number_used(get_case_accession_number(library_id, counter)):
+            counter += 1
+        add_used_case_accession_counters(library_id, range(1, counter), is_complete=True)
+        return get_case_accession_number(library_id, counter)
+
+    while True:
+        accession_number = get_next_case_accession_number(library_id, used_counters)
+        if not is_accession_number_used(accession_number):
+            return accession_number
+        logger.info(f"Accession number {accession_number} is used by a case not in the ledger, adding it")
+        add_used_case_accession_number(accession_number)
+        used_counters = [*used_counters, split_case_accession_number(accession_number)[1]]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Memoise the outputs of lambda handlers by a hash of their inputs
+
+The populate draft data state machine re-runs its upstream lookups (REDCap, case metadata, fastq rgids, data files)
+on every draft refresh, even if nothing has changed. Handlers wrapped with memoised_handler store their output
+in the state table, keyed by the step name and the hash of the canonical json of the event,
+and return the stored output until it expires or the event changes.
+
+Upstream data may change without the event changing (i.e. a REDCap record is edited),
+so each step's ttl is the longest we are happy to serve a stale output for.
+Set 'forceRefresh' in the event to skip the stored output (the new output is still stored).
+
+Uses the state table helpers, so outputs are held in a process-local dictionary
+if PIERIANDX_STATE_TABLE_NAME is not set.
+"""
+
+# Standard imports
+import hashlib
+import json
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_item, put_state_item
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+MEMO_ITEM_SK = "output"
+DEFAULT_MEMO_TTL_SECONDS = 60 * 60
+
+# Errors of the memo store itself, rather than the step:
+# service errors, client errors (i.e. timeouts, no credentials), and outputs / items that are not valid json
+MEMO_STORE_ERRORS = (ClientError, BotoCoreError, TypeError, ValueError)
+
+# Event keys that control memoisation, rather than being inputs to the step
+FORCE_REFRESH_EVENT_KEY = "forceRefresh"
+
+
+def get_canonical_json_hash(value: Any) -> str:
+    """
+    Get the sha256 of the canonical json (sorted keys, compact separators) of a value
+    :param value:
+    :return:
+    """
+    return hashlib.sha256(
+        json.dumps(
+            value,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str
+        ).encode()
+    ).hexdigest()
+
+
+def get_memo_pk(step_name: str, inputs: Dict[str, Any]) -> str:
+    return f"memo#{step_name}#{get_canonical_json_hash(inputs)}"
+
+
+def get_memoised_output(step_name: str, inputs: Dict[str, Any]) -> Tuple[bool, Any]:
+    """
+    Get the stored output of a step for the given inputs
+    :param step_name:
+    :param inputs:
+    :return: A tuple of (found, output), since None is a valid output
+    """
+    state_item = get_state_item(get_memo_pk(step_name, inputs), MEMO_ITEM_SK)
+
+    if state_item is None:
+        return False, None
+
+    return True, state_item['data']['output']
+
+
+def put_memoised_output(step_name: str, inputs: Dict[str, Any], output: Any, ttl_seconds: int):
+    _ = put_state_item(
+        get_memo_pk(step_name, inputs),
+        MEMO_ITEM_SK,
+        {
+            "stepName": step_name,
+            "output": output,
+        },
+        ttl_seconds=ttl_seconds
+    )
+
+
+def memoised_handler(step_name: str, ttl_seconds: int = DEFAULT_MEMO_TTL_SECONDS) -> Callable:
+    """
+    Decorate a lambda handler so that its output is memoised by a hash of its event.
+    The memo store is an optimisation, so errors reading from or writing to it are logged
+    and the handler is run as normal
+    :param step_name:
+    :param ttl_seconds:
+    :return:
+    """
+    def decorator(handler: Callable[[Dict, Any], Any]) -> Callable[[Dict, Any], Any]:
+        @wraps(handler)
+        def wrapper(event: Dict, context: Optional[Any]):
+            inputs = dict(filter(
+                lambda kv_iter_: kv_iter_[0] != FORCE_REFRESH_EVENT_KEY,
+                event.items()
+            ))
+
+            if not event.get(FORCE_REFRESH_EVENT_KEY, False):
+                try:
+                    is_found, output = get_memoised_output(step_name, inputs)
+                except MEMO_STORE_ERRORS as e:
+                    logger.warning(f"Could not read memoised output for {step_name}: {e}")
+                    is_found, output = False, None
+                if is_found:
+                    logger.info(f"Returning memoised output for {step_name}")
+                    return output
+
+            output = handler(event, context)
+
+            try:
+                put_memoised_output(step_name, inputs, output, ttl_seconds)
+            except MEMO_STORE_ERRORS as e:
+                # i.e. the output is larger than the maximum item size, or is not json serialisable
+                logger.warning(f"Could not store memoised output for {step_name}: {e}")
+
+            return output
+        return wrapper
+    return decorator
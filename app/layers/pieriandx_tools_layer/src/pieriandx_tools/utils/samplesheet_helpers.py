@@ -9,6 +9,9 @@ import requests
 # Layer imports
 from orcabus_api_tools.filemanager import get_presigned_url, get_s3_object_id_from_s3_uri
 
+# Local imports
+from .tracing_helpers import trace_call
+
 # Custom imports
 from v2_samplesheet_maker.functions.v2_samplesheet_reader import v2_samplesheet_reader
 
@@ -25,12 +28,17 @@ def read_v2_samplesheet(samplesheet_uri: str) -> Dict:
     """
 
     # Download the samplesheet to the temp file
-    presigned_url = get_presigned_url(get_s3_object_id_from_s3_uri(samplesheet_uri))
+    with trace_call("filemanager", "get_presigned_url"):
+        presigned_url = get_presigned_url(get_s3_object_id_from_s3_uri(samplesheet_uri))
+
+    with trace_call("s3", "GetPresignedObject") as span:
+        samplesheet_content = requests.get(presigned_url).content
+        span.bytes_received = len(samplesheet_content)
 
     with NamedTemporaryFile(suffix=".csv") as temp_file:
         # Write the content to the temp file
         temp_file.write(
-            requests.get(presigned_url).content
+            samplesheet_content
         )
         # Ensure the content is written to disk
         temp_file.flush()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+"""
+Miscellaneous utilities for streaming file-like objects
+"""
+
+# Standard imports
+import hashlib
+from typing import BinaryIO
+
+
+class ChecksumReader:
+    """
+    Wrap a readable file-like object, keeping count of the number of bytes read
+    and the md5sum of the bytes read so far.
+
+    Useful for collecting transfer statistics when streaming a file into boto3's upload_fileobj
+    """
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self._md5 = hashlib.md5()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        self._md5.update(chunk)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._md5.hexdigest()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+"""
+Per-call latency tracing for external dependencies
+(PierianDx, the OrcaBus APIs, S3, SSM, Secrets Manager, DynamoDB and other lambdas)
+
+Each call is recorded as a trace span with its latency, bytes sent / received and retry count.
+
+Spans are emitted as CloudWatch embedded metric format (EMF) log lines,
+or as plain structured json logs if PIERIANDX_TRACE_OUTPUT is set to 'log'.
+
+Only a sample of successful spans are emitted, set by PIERIANDX_TRACE_SAMPLE_RATE (0.0 - 1.0, defaults to 0),
+failed calls are always emitted while the sample rate is above 0.
+
+Trace hooks receive every span regardless of the sample rate, use collect_trace_spans() when profiling locally, i.e.
+
+with collect_trace_spans() as spans_list:
+    handler(event, None)
+print(sorted(spans_list, key=lambda span_iter_: span_iter_['latencyMs'], reverse=True)[:10])
+"""
+
+# Standard imports
+import json
+import random
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from os import environ
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import logging
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+TRACE_SAMPLE_RATE_ENV_VAR = "PIERIANDX_TRACE_SAMPLE_RATE"
+TRACE_OUTPUT_ENV_VAR = "PIERIANDX_TRACE_OUTPUT"
+TRACE_METRICS_NAMESPACE = "OrcaBus/PierianDxTso500Ctdna"
+
+TRACE_SPAN_CONTEXT_KEY = "pieriandx_trace_span"
+
+TRACE_HOOKS: List[Callable[[Dict[str, Any]], None]] = []
+TRACE_HOOKS_LOCK = Lock()
+
+# PierianDx endpoints contain case / job ids, which would make for a metric dimension per case
+PIERIANDX_ENDPOINT_ID_REGEX = re.compile(r"/\d+")
+
+
+@dataclass
+class TraceSpan:
+    dependency: str
+    operation: str
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    retries: int = 0
+    error: Optional[str] = None
+    start_time: float = field(default_factory=perf_counter)
+    latency_ms: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dependency": self.dependency,
+            "operation": self.operation,
+            "latencyMs": self.latency_ms,
+            "bytesSent": self.bytes_sent,
+            "bytesReceived": self.bytes_received,
+            "retries": self.retries,
+            "error": self.error,
+        }
+
+
+def get_trace_sample_rate() -> float:
+    try:
+        return min(max(float(environ.get(TRACE_SAMPLE_RATE_ENV_VAR, 0)), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+def is_tracing_enabled() -> bool:
+    """
+    Spans are only worth measuring in detail (i.e payload sizes) if they will be emitted or collected
+    """
+    return get_trace_sample_rate() > 0 or len(TRACE_HOOKS) > 0
+
+
+def add_trace_hook(hook: Callable[[Dict[str, Any]], None]):
+    with TRACE_HOOKS_LOCK:
+        TRACE_HOOKS.append(hook)
+
+
+def remove_trace_hook(hook: Callable[[Dict[str, Any]], None]):
+    with TRACE_HOOKS_LOCK:
+        if hook in TRACE_HOOKS:
+            TRACE_HOOKS.remove(hook)
+
+
+@contextmanager
+def collect_trace_spans() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Collect every span finished within the context, regardless of the sample rate
+    :return:
+    """
+    spans_list: List[Dict[str, Any]] = []
+    add_trace_hook(spans_list.append)
+    try:
+        yield spans_list
+    finally:
+        remove_trace_hook(spans_list.append)
+
+
+def get_emf_log(span_dict: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "_aws": {
+            "Timestamp": int(time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": TRACE_METRICS_NAMESPACE,
+                    "Dimensions": [["dependency", "operation"]],
+                    "Metrics": [
+                        {"Name": "latencyMs", "Unit": "Milliseconds"},
+                        {"Name": "bytesSent", "Unit": "Bytes"},
+                        {"Name": "bytesReceived", "Unit": "Bytes"},
+                        {"Name": "retries", "Unit": "Count"},
+                        {"Name": "errors", "Unit": "Count"},
+                    ]
+                }
+            ]
+        },
+        **span_dict,
+        "errors": 0 if span_dict["error"] is None else 1,
+        "functionName": environ.get("AWS_LAMBDA_FUNCTION_NAME", None),
+    }
+
+
+def finish_trace_span(span: TraceSpan):
+    """
+    Record the latency of the span, pass it to any trace hooks and emit it if sampled
+    :param span:
+    :return:
+    """
+    span.latency_ms = round((perf_counter() - span.start_time) * 1000, 3)
+    span_dict = span.to_dict()
+
+    for hook in list(TRACE_HOOKS):
+        try:
+            hook(span_dict)
+        except Exception as e:
+            logger.warning(f"Trace hook {hook} failed: {e}")
+
+    sample_rate = get_trace_sample_rate()
+    if sample_rate == 0 or (span.error is None and random.random() >= sample_rate):
+        return
+
+    if environ.get(TRACE_OUTPUT_ENV_VAR, "emf").lower() == "log":
+        logger.info(json.dumps({"trace": span_dict}))
+    else:
+        # EMF logs must be written as a raw json line, not wrapped by the log formatter
+        print(json.dumps(get_emf_log(span_dict)), flush=True)
+
+
+@contextmanager
+def trace_call(dependency: str, operation: str) -> Iterator[TraceSpan]:
+    """
+    Trace a call to an external dependency, i.e.
+
+    with trace_call("ssm", "GetParameter") as span:
+        value = get_ssm_value(parameter_name)
+        span.bytes_received = len(value)
+
+    :param dependency:
+    :param operation:
+    :return:
+    """
+    span = TraceSpan(dependency=dependency, operation=operation)
+    try:
+        yield span
+    except Exception as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        finish_trace_span(span)
+
+
+def traced(dependency: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator form of trace_call, the operation defaults to the function name
+    :param dependency:
+    :param operation:
+    :return:
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_call(dependency, operation if operation is not None else func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _get_body_length(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0
+
+
+def _before_boto3_call(model, params, context, **kwargs):
+    span = TraceSpan(dependency=model.service_model.service_name, operation=model.name)
+    span.bytes_sent = int(
+        params.get('headers', {}).get('Content-Length', 0) or _get_body_length(params.get('body', None))
+    )
+    context[TRACE_SPAN_CONTEXT_KEY] = span
+
+
+def _after_boto3_call(http_response, parsed, context, **kwargs):
+    span: Optional[TraceSpan] = context.pop(TRACE_SPAN_CONTEXT_KEY, None)
+    if span is None:
+        return
+    span.bytes_received = int(http_response.headers.get('content-length', 0) or 0)
+    span.retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    if 'Error' in parsed:
+        span.error = parsed['Error'].get('Code', 'Error')
+    finish_trace_span(span)
+
+
+def _after_boto3_call_error(exception, context, **kwargs):
+    # Raised when no response was received at all, i.e. connection errors after all retries
+    span: Optional[TraceSpan] = context.pop(TRACE_SPAN_CONTEXT_KEY, None)
+    if span is None:
+        return
+    span.error = type(exception).__name__
+    finish_trace_span(span)
+
+
+def trace_boto3_client(client):
+    """
+    Trace every api call made by a boto3 client,
+    including the individual part requests made by managed transfers (upload_fileobj, download_file, copy).
+    Retries are counted by botocore, so a span covers all attempts of a call.
+    :param client:
+    :return: The same client
+    """
+    client.meta.events.register('before-call', _before_boto3_call, unique_id='pieriandx-trace-before-call')
+    client.meta.events.register('after-call', _after_boto3_call, unique_id='pieriandx-trace-after-call')
+    client.meta.events.register(
+        'after-call-error', _after_boto3_call_error, unique_id='pieriandx-trace-after-call-error'
+    )
+    return client
+
+
+def get_pieriandx_operation(method: str, endpoint: str) -> str:
+    return f"{method} {PIERIANDX_ENDPOINT_ID_REGEX.sub('/{id}', endpoint.split('?', 1)[0])}"
+
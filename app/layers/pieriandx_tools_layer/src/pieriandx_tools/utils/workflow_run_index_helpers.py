@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+Index of workflow runs by workflow name and library id
+
+The glue and populate draft data state machines look up the latest DRAFT / SUCCEEDED run for a library
+on every event, listing every run of the workflow for the library from the workflow manager each time.
+
+Instead, we keep an index item per (workflow name, library id) in the state table, updated from the
+workflow run state change events as they arrive. Each index item holds
+
+  runs: the indexed runs by workflow run orcabus id
+  statusIndex: for each status, the orcabus ids of the runs currently in that status, in ascending order
+  activeStateChanges: [timestamp, orcabus id] pairs of the runs not in a terminated state, in ascending order
+
+so the latest run in a status, or the most recently changed active run,
+is the last element of a sorted list, and each update is a binary search and an insert.
+
+Events for a library that has not been indexed yet create an unseeded index item,
+the index is only used once it has been seeded with the full listing from the workflow manager
+(see find_latest_workflow), so runs created before the index existed are not missed.
+
+A state change event that never reaches the index (i.e. the update lambda failed on all of its retries)
+would leave the index out of date, so a seed is only trusted for WORKFLOW_RUN_INDEX_RESEED_SECONDS,
+the next lookup after that re-seeds the index from the workflow manager.
+Index items expire if they are not updated for WORKFLOW_RUN_INDEX_TTL_SECONDS.
+"""
+
+# Standard imports
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, TypedDict
+import logging
+
+# Local imports
+from ..aws_helpers.dynamodb_helpers import get_state_item, update_state_item
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+# Globals
+WORKFLOW_RUN_INDEX_SK = "runs"
+WORKFLOW_RUN_INDEX_TTL_SECONDS = 7 * 24 * 60 * 60
+WORKFLOW_RUN_INDEX_RESEED_SECONDS = 24 * 60 * 60
+
+# Terminal states that indicate a run has been superseded or is no longer relevant
+NON_SUCCEEDED_TERMINATED_STATUS_LIST = [
+    'FAILED',
+    'ABORTED',
+    'RESOLVED'
+]
+
+
+class IndexedWorkflowRunState(TypedDict):
+    status: str
+    timestamp: str
+
+
+class IndexedWorkflowRun(TypedDict):
+    orcabusId: str
+    portalRunId: str
+    workflowRunName: Optional[str]
+    workflow: Dict[str, Any]
+    analysisRun: Optional[Dict[str, Any]]
+    libraries: List[Dict[str, Any]]
+    currentState: IndexedWorkflowRunState
+
+
+def get_workflow_run_index_pk(workflow_name: str, library_id: str) -> str:
+    return f"wfrindex#{workflow_name}#{library_id}"
+
+
+def get_normalised_timestamp(timestamp: str) -> str:
+    """
+    Write timestamps in UTC with microseconds, so that timestamps sort as strings
+    :param timestamp:
+    :return:
+    """
+    return datetime.fromisoformat(
+        timestamp.replace("Z", "+00:00")
+    ).astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def get_indexed_workflow_run(workflow_run: Dict[str, Any]) -> IndexedWorkflowRun:
+    """
+    Get the indexed form of a workflow run,
+    from either a workflow run detail (workflow manager api) or a workflow run state change event detail
+    :param workflow_run:
+    :return:
+    """
+    if 'currentState' in workflow_run:
+        status = workflow_run['currentState']['status']
+        timestamp = workflow_run['currentState']['timestamp']
+    else:
+        status = workflow_run['status']
+        timestamp = workflow_run['timestamp']
+
+    return {
+        "orcabusId": workflow_run['orcabusId'],
+        "portalRunId": workflow_run['portalRunId'],
+        "workflowRunName": workflow_run.get('workflowRunName', None),
+        "workflow": {
+            "name": workflow_run['workflow']['name'],
+            "version": workflow_run['workflow'].get('version', None),
+        },
+        "analysisRun": workflow_run.get('analysisRun', None),
+        "libraries": list(map(
+            lambda library_iter_: {
+                "orcabusId": library_iter_.get('orcabusId', None),
+                "libraryId": library_iter_['libraryId'],
+            },
+            workflow_run.get('libraries', None) or []
+        )),
+        "currentState": {
+            "status": status,
+            "timestamp": get_normalised_timestamp(timestamp),
+        }
+    }
+
+
+def _remove_from_sorted_list(sorted_list: List, value: Any):
+    value_idx = bisect_left(sorted_list, value)
+    if value_idx < len(sorted_list) and sorted_list[value_idx] == value:
+        del sorted_list[value_idx]
+
+
+def _add_run_to_index(index_data: Dict[str, Any], indexed_workflow_run: IndexedWorkflowRun) -> bool:
+    """
+    Add or update a run in the index, returns False if the index already holds a newer state of the run
+    :param index_data:
+    :param indexed_workflow_run:
+    :return:
+    """
+    orcabus_id = indexed_workflow_run['orcabusId']
+    new_state = indexed_workflow_run['currentState']
+    current_run: Optional[IndexedWorkflowRun] = index_data['runs'].get(orcabus_id, None)
+
+    if current_run is not None:
+        current_state = current_run['currentState']
+        # State change events may arrive out of order
+        if current_state['timestamp'] > new_state['timestamp'] or current_state == new_state:
+            return False
+        _remove_from_sorted_list(index_data['statusIndex'][current_state['status']], orcabus_id)
+        _remove_from_sorted_list(index_data['activeStateChanges'], [current_state['timestamp'], orcabus_id])
+
+    index_data['runs'][orcabus_id] = indexed_workflow_run
+    insort(index_data['statusIndex'].setdefault(new_state['status'], []), orcabus_id)
+    if new_state['status'] not in NON_SUCCEEDED_TERMINATED_STATUS_LIST:
+        insort(index_data['activeStateChanges'], [new_state['timestamp'], orcabus_id])
+
+    return True
+
+
+def update_workflow_run_index(
+        workflow_name: str,
+        library_id: str,
+        workflow_runs: Iterable[Dict[str, Any]],
+        is_complete: bool = False
+):
+    """
+    Add workflow runs to the index of a library.
+    Set is_complete if the workflow runs are the full listing of the library's runs from the workflow manager,
+    the index is then trusted for WORKFLOW_RUN_INDEX_RESEED_SECONDS.
+    Concurrent updates are retried (see update_state_item),
+    since the state change events of a library often arrive together
+    :param workflow_name:
+    :param library_id:
+    :param workflow_runs:
+    :param is_complete:
+    :return:
+    """
+    indexed_workflow_runs = list(map(get_indexed_workflow_run, workflow_runs))
+
+    def update_index_data(index_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if index_data is None:
+            index_data = {
+                "seededAt": None,
+                "runs": {},
+                "statusIndex": {},
+                "activeStateChanges": [],
+            }
+
+        has_changed = False
+        for indexed_workflow_run in indexed_workflow_runs:
+            has_changed = _add_run_to_index(index_data, indexed_workflow_run) or has_changed
+        if is_complete:
+            index_data['seededAt'] = int(time())
+            has_changed = True
+
+        return index_data if has_changed else None
+
+    _ = update_state_item(
+        get_workflow_run_index_pk(workflow_name, library_id),
+        WORKFLOW_RUN_INDEX_SK,
+        update_index_data,
+        ttl_seconds=WORKFLOW_RUN_INDEX_TTL_SECONDS,
+    )
+
+
+def get_workflow_run_index(workflow_name: str, library_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the index of a library, returns None if the library has not been indexed
+    or the index has not been seeded with the full listing from the workflow manager
+    in the last WORKFLOW_RUN_INDEX_RESEED_SECONDS
+    :param workflow_name:
+    :param library_id:
+    :return:
+    """
+    state_item = get_state_item(get_workflow_run_index_pk(workflow_name, library_id), WORKFLOW_RUN_INDEX_SK)
+
+    if state_item is None:
+        return None
+
+    # Items written before seededAt was added hold an isComplete flag instead, and are re-seeded
+    seeded_at = state_item['data'].get('seededAt', None)
+    if seeded_at is None or time() - seeded_at > WORKFLOW_RUN_INDEX_RESEED_SECONDS:
+        return None
+
+    return state_item['data']
+
+
+def get_indexed_workflow_runs_by_status(
+        index_data: Dict[str, Any],
+        status: Optional[str] = None
+) -> List[IndexedWorkflowRun]:
+    """
+    Get the indexed runs in a status (or all indexed runs), sorted by orcabus id descending (most recent first)
+    :param index_data:
+    :param status:
+    :return:
+    """
+    if status is None:
+        orcabus_id_list = sorted(index_data['runs'].keys())
+    else:
+        orcabus_id_list = index_data['statusIndex'].get(status, [])
+
+    return list(map(
+        lambda orcabus_id_iter_: index_data['runs'][orcabus_id_iter_],
+        reversed(orcabus_id_list)
+    ))
+
+
+def get_most_recently_changed_active_run(index_data: Dict[str, Any]) -> Optional[IndexedWorkflowRun]:
+    """
+    Get the run not in a terminated state with the most recent state change
+    :param index_data:
+    :return:
+    """
+    if len(index_data['activeStateChanges']) == 0:
+        return None
+
+    return index_data['runs'][index_data['activeStateChanges'][-1][1]]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+"""
+Shared fixtures for the pieriandx_tools layer tests
+
+Tests run against the process-local state table (PIERIANDX_STATE_TABLE_NAME is unset),
+and PierianDx API calls are sent over http to the CGW simulator in app/dev-tools/cgw_simulator.
+
+Run from the layer directory with the layer and lambda dependencies installed, i.e.
+
+  pytest tests
+"""
+
+# Standard imports
+import sys
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pytest
+
+# Globals
+LAYER_DIR = Path(__file__).absolute().parent.parent
+APP_DIR = LAYER_DIR.parent.parent
+CGW_SIMULATOR_DIR = APP_DIR / "dev-tools" / "cgw_simulator"
+
+sys.path.insert(0, str(LAYER_DIR / "src"))
+sys.path.insert(0, str(CGW_SIMULATOR_DIR))
+
+# Local imports
+from cgw_simulator import CgwSimulator, CgwSimulatorConfig, serve_cgw_simulator  # noqa: E402
+from pieriandx_tools.aws_helpers import dynamodb_helpers  # noqa: E402
+from pieriandx_tools.pieriandx_helpers import resilience_helpers  # noqa: E402
+from pieriandx_tools.pieriandx_helpers.client_helpers import PieriandxClient  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def local_state_table(monkeypatch) -> Iterator[dict]:
+    """
+    Keep state items in memory, and start each test with an empty state table and no call deadline
+    """
+    monkeypatch.delenv("PIERIANDX_STATE_TABLE_NAME", raising=False)
+    with dynamodb_helpers.LOCAL_STATE_TABLE_LOCK:
+        dynamodb_helpers.LOCAL_STATE_TABLE.clear()
+    resilience_helpers.set_call_deadline(None)
+    yield dynamodb_helpers.LOCAL_STATE_TABLE
+    resilience_helpers.set_call_deadline(None)
+
+
+@pytest.fixture
+def retry_waits(monkeypatch) -> List[float]:
+    """
+    Record retry backoffs rather than sleeping through them
+    """
+    waits_list: List[float] = []
+    monkeypatch.setattr(resilience_helpers, "sleep", waits_list.append)
+    return waits_list
+
+
+@pytest.fixture
+def cgw_simulator() -> Iterator[Tuple[CgwSimulator, str]]:
+    """
+    Serve a CGW simulator over http, yields the simulator and its base url
+    """
+    simulator = CgwSimulator(config=CgwSimulatorConfig(seed=0))
+    server = serve_cgw_simulator(simulator)
+    try:
+        yield simulator, f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def pieriandx_client(monkeypatch, cgw_simulator, retry_waits) -> PieriandxClient:
+    """
+    A client of the CGW simulator, without rate limiting
+    """
+    monkeypatch.setenv("PIERIANDX_API_RATE_LIMIT_PER_SECOND", "0")
+    _, base_url = cgw_simulator
+    return PieriandxClient(
+        email="tests@example.com",
+        key="tests-token",
+        institution="tests",
+        base_url=base_url,
+        key_is_auth_token=True
+    )
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the case launch ledger and accession number allocation
+"""
+
+# Local imports
+from pieriandx_tools.utils.case_ledger_helpers import (
+    allocate_case_accession_number,
+    get_case_ledger_entry,
+    get_used_case_accession_counters,
+    mark_launch_step_pending,
+    record_launch_step,
+)
+
+LIBRARY_ID = "L2400001"
+
+
+def get_probe(used_accession_number_list):
+    """
+    Stand in for a search of PierianDx for a case with the accession number, records the accession numbers probed
+    """
+    probes_list = []
+
+    def is_accession_number_used(accession_number: str) -> bool:
+        probes_list.append(accession_number)
+        return accession_number in used_accession_number_list
+
+    return is_accession_number_used, probes_list
+
+
+def test_first_recorded_result_wins():
+    assert record_launch_step("L2400001_001", "case", {"id": 1}) == {"id": 1}
+
+    # i.e. a concurrent launch of the same case
+    assert record_launch_step("L2400001_001", "case", {"id": 2}) == {"id": 1}
+
+    assert get_case_ledger_entry("L2400001_001")["results"] == {"case": {"id": 1}}
+
+
+def test_pending_step_is_found_on_retry():
+    mark_launch_step_pending("L2400001_001", "case")
+
+    # The lambda timed out before the result was recorded, the retry finds the step pending
+    entry = get_case_ledger_entry("L2400001_001")
+    assert "case" in entry["pending"]
+    assert "case" not in entry["results"]
+
+    record_launch_step("L2400001_001", "case", {"id": 1})
+
+    entry = get_case_ledger_entry("L2400001_001")
+    assert entry["pending"] == {}
+    assert entry["results"] == {"case": {"id": 1}}
+
+
+def test_recorded_step_is_not_marked_pending_again():
+    record_launch_step("L2400001_001", "case", {"id": 1})
+
+    mark_launch_step_pending("L2400001_001", "case")
+
+    assert get_case_ledger_entry("L2400001_001")["pending"] == {}
+
+
+def test_unknown_case_has_an_empty_entry():
+    assert get_case_ledger_entry("L2400001_001") == {
+        "accessionNumber": "L2400001_001",
+        "results": {},
+        "pending": {},
+    }
+
+
+def test_first_allocation_probes_and_seeds_the_used_accession_numbers():
+    is_accession_number_used, probes_list = get_probe(["L2400001_001", "L2400001_002"])
+
+    assert allocate_case_accession_number(LIBRARY_ID, is_accession_number_used) == "L2400001_003"
+
+    assert probes_list == ["L2400001_001", "L2400001_002", "L2400001_003"]
+    assert get_used_case_accession_counters(LIBRARY_ID) == [1, 2]
+
+
+def test_allocation_is_not_reserved_until_the_case_is_recorded():
+    is_accession_number_used, probes_list = get_probe([])
+
+    assert allocate_case_accession_number(LIBRARY_ID, is_accession_number_used) == "L2400001_001"
+    assert allocate_case_accession_number(LIBRARY_ID, is_accession_number_used) == "L2400001_001"
+
+    record_launch_step("L2400001_001", "case", {"id": 1})
+    probes_list.clear()
+
+    assert allocate_case_accession_number(LIBRARY_ID, is_accession_number_used) == "L2400001_002"
+    # Once seeded, only the allocated accession number is probed
+    assert probes_list == ["L2400001_002"]
+
+
+def test_allocation_after_an_out_of_band_case():
+    is_accession_number_used, _ = get_probe([])
+    allocate_case_accession_number(LIBRARY_ID, is_accession_number_used)
+    record_launch_step("L2400001_001", "case", {"id": 1})
+
+    # A case was created in PierianDx outside of this service
+    is_accession_number_used, probes_list = get_probe(["L2400001_001", "L2400001_002"])
+
+    assert allocate_case_accession_number(LIBRARY_ID, is_accession_number_used) == "L2400001_003"
+    assert probes_list == ["L2400001_002", "L2400001_003"]
+    assert get_used_case_accession_counters(LIBRARY_ID) == [1, 2]
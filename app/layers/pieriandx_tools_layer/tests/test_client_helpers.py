@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the PierianDx client (client_helpers) and its retries and circuit breaking (resilience_helpers),
+against the CGW simulator served over http
+"""
+
+# Standard imports
+import socket
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from requests import HTTPError
+from requests.exceptions import ConnectionError as RequestsConnectionError, ReadTimeout
+
+# Local imports
+from pieriandx_tools.pieriandx_helpers import client_helpers, resilience_helpers
+from pieriandx_tools.pieriandx_helpers.client_helpers import PieriandxClient
+from pieriandx_tools.pieriandx_helpers.resilience_helpers import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_PK,
+    MAX_CALL_ATTEMPTS,
+    CircuitOpenError,
+    classify_attempt,
+)
+from pieriandx_tools.aws_helpers.dynamodb_helpers import get_state_item
+
+CASE_CREATION_OBJ = {
+    "panelName": "main",
+    "specimens": [
+        {
+            "accessionNumber": "L2400001_001",
+            "name": "primarySpecimen",
+        }
+    ],
+}
+
+
+def fail_next_requests(simulator, request_count: int):
+    """
+    Make the simulator respond with a 503 to the next request_count requests
+    """
+    remaining = {"count": request_count}
+
+    def should_fail() -> bool:
+        if remaining["count"] <= 0:
+            return False
+        remaining["count"] -= 1
+        return True
+
+    simulator._should_fail = should_fail
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_get_returns_json_body(pieriandx_client):
+    case_obj = pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ).json()
+
+    case_data = pieriandx_client._get_api(f"/case/{case_obj['id']}")
+
+    assert case_data["id"] == case_obj["id"]
+    assert case_data["specimens"] == CASE_CREATION_OBJ["specimens"]
+
+
+def test_get_search_with_no_match_is_not_retried(cgw_simulator, pieriandx_client, local_state_table):
+    simulator, _ = cgw_simulator
+
+    assert pieriandx_client._get_api("/case", params={"accessionNumber": "L0000000_001"}) is None
+    assert simulator.stats.request_count == 1
+    # A 404 is not a failure of the service
+    assert len(local_state_table) == 0
+
+
+def test_get_is_retried_on_503(cgw_simulator, pieriandx_client, retry_waits):
+    simulator, _ = cgw_simulator
+    case_obj = pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ).json()
+    fail_next_requests(simulator, 2)
+
+    case_data = pieriandx_client._get_api(f"/case/{case_obj['id']}")
+
+    assert case_data["id"] == case_obj["id"]
+    assert simulator.stats.request_count_by_endpoint["GET /case/{id}"] == 3
+    assert len(retry_waits) == 2
+
+
+def test_get_raises_once_retries_are_exhausted(cgw_simulator, pieriandx_client):
+    simulator, _ = cgw_simulator
+    fail_next_requests(simulator, MAX_CALL_ATTEMPTS)
+
+    # An outage must not look like a search with no match
+    with pytest.raises(HTTPError):
+        pieriandx_client._get_api("/case", params={"accessionNumber": "L2400001_001"})
+
+    assert simulator.stats.request_count == MAX_CALL_ATTEMPTS
+    circuit_item = get_state_item(CIRCUIT_PK, "GET /case")
+    assert circuit_item["data"]["consecutiveFailures"] == MAX_CALL_ATTEMPTS
+
+
+def test_post_is_retried_on_503_without_duplicates(cgw_simulator, pieriandx_client):
+    simulator, _ = cgw_simulator
+    fail_next_requests(simulator, 1)
+
+    response = pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ)
+
+    assert response.status_code == 200
+    assert simulator.stats.request_count_by_endpoint["POST /case"] == 2
+    assert len(pieriandx_client._get_api("/case", params={"accessionNumber": "L2400001_001"})) == 1
+
+
+def test_read_timeout_retries_get_but_not_post(monkeypatch, cgw_simulator, pieriandx_client):
+    simulator, _ = cgw_simulator
+    monkeypatch.setattr(client_helpers, "READ_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(client_helpers, "MIN_READ_TIMEOUT_SECONDS", 0.1)
+    simulator.config.latency_seconds = 0.5
+
+    # PierianDx may have created the case, so the POST must not be sent again
+    with pytest.raises(ReadTimeout):
+        pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ)
+    assert simulator.stats.request_count_by_endpoint["POST /case"] == 1
+
+    with pytest.raises(ReadTimeout):
+        pieriandx_client._get_api("/case", params={"accessionNumber": "L2400001_001"})
+    assert simulator.stats.request_count_by_endpoint["GET /case"] == MAX_CALL_ATTEMPTS
+
+
+def test_read_timeout_is_capped_by_the_call_deadline(monkeypatch):
+    resilience_helpers.set_call_deadline(2.0)
+
+    assert client_helpers.get_read_timeout_seconds() <= 2.0
+
+    resilience_helpers.set_call_deadline(0.0)
+
+    assert client_helpers.get_read_timeout_seconds() == client_helpers.MIN_READ_TIMEOUT_SECONDS
+
+
+def test_refused_connection_retries_post(monkeypatch, retry_waits):
+    monkeypatch.setenv("PIERIANDX_API_RATE_LIMIT_PER_SECOND", "0")
+    pieriandx_client = PieriandxClient(
+        email="tests@example.com",
+        key="tests-token",
+        institution="tests",
+        base_url=f"http://127.0.0.1:{get_free_port()}",
+        key_is_auth_token=True
+    )
+
+    # The request was never sent, so it is safe to send a POST again
+    with pytest.raises(RequestsConnectionError):
+        pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ)
+
+    assert len(retry_waits) == MAX_CALL_ATTEMPTS - 1
+
+
+def test_circuit_opens_after_consecutive_failures(cgw_simulator, pieriandx_client):
+    simulator, _ = cgw_simulator
+    fail_next_requests(simulator, CIRCUIT_FAILURE_THRESHOLD * MAX_CALL_ATTEMPTS)
+
+    with pytest.raises(HTTPError):
+        pieriandx_client._get_api("/case/1")
+    # Both case ids count against the same endpoint, the circuit opens on the fifth failure
+    with pytest.raises(CircuitOpenError):
+        pieriandx_client._get_api("/case/2")
+    assert simulator.stats.request_count == CIRCUIT_FAILURE_THRESHOLD
+
+    with pytest.raises(CircuitOpenError):
+        pieriandx_client._get_api("/case/3")
+    assert simulator.stats.request_count == CIRCUIT_FAILURE_THRESHOLD
+
+
+@pytest.mark.parametrize("state_table_error", [
+    ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "GetItem"),
+    EndpointConnectionError(endpoint_url="https://dynamodb.ap-southeast-2.amazonaws.com"),
+])
+def test_calls_are_sent_when_the_circuit_cannot_be_read_or_recorded(
+        monkeypatch, cgw_simulator, pieriandx_client, state_table_error
+):
+    simulator, _ = cgw_simulator
+
+    def raise_state_table_error(*args, **kwargs):
+        raise state_table_error
+
+    monkeypatch.setattr(resilience_helpers, "get_state_item", raise_state_table_error)
+    monkeypatch.setattr(resilience_helpers, "update_state_item", raise_state_table_error)
+
+    fail_next_requests(simulator, 1)
+
+    case_obj = pieriandx_client._post_api("/case", data=CASE_CREATION_OBJ).json()
+    assert pieriandx_client._get_api(f"/case/{case_obj['id']}")["id"] == case_obj["id"]
+
+
+def test_no_response_is_a_failure():
+    assert classify_attempt(is_idempotent=True, result=None, exception=None) == (True, True)
+    assert classify_attempt(is_idempotent=False, result=None, exception=None) == (True, False)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the compact SNOMED code sets
+"""
+
+# Standard imports
+import gzip
+import json
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import boto3
+import pandas as pd
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+# Local imports
+from pieriandx_tools.aws_helpers import s3_helpers
+from pieriandx_tools.pieriandx_lookup import code_set_helpers
+from pieriandx_tools.pieriandx_lookup.code_set_helpers import (
+    CODE_SET_MAGIC,
+    CodeSetNotFoundError,
+    get_code_set_bytes,
+    get_code_set_from_env_var,
+    get_code_set_from_s3_uri,
+    get_unique_codes_from_tree_bytes,
+    is_code_in_code_set,
+    read_code_set_bytes,
+)
+
+# Globals
+LAMBDA_DIR = Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "build_snomed_code_sets_py"
+
+sys.path.insert(0, str(LAMBDA_DIR))
+
+import build_snomed_code_sets  # noqa: E402
+
+BUCKET = "lookup-bucket"
+CODE_SET_KEY = "snomed/tso500_ctdna_snomed_ct_disease_codes.bin"
+CODE_SET_S3_URI = f"s3://{BUCKET}/{CODE_SET_KEY}"
+TREE_KEY = "snomed/tso500_ctdna_snomed_ct_disease_tree.json.gz"
+TREE_S3_URI = f"s3://{BUCKET}/{TREE_KEY}"
+
+TREE_RECORDS = [
+    {"Code": 363346000, "CodeSystem": "SNOMEDCT", "CodeLabel": "Malignant neoplastic disease"},
+    {"Code": 254637007, "CodeSystem": "SNOMEDCT", "CodeLabel": "Non-small cell lung cancer"},
+    # Duplicated
+    {"Code": 93761005, "CodeSystem": "SNOMEDCT", "CodeLabel": "Primary malignant neoplasm of colon"},
+    {"Code": 93761005, "CodeSystem": "SNOMEDCT", "CodeLabel": "Colon cancer"},
+    # Not a code
+    {"Code": None, "CodeSystem": "SNOMEDCT", "CodeLabel": "Disease"},
+]
+
+
+def get_streaming_body(body_bytes: bytes) -> StreamingBody:
+    return StreamingBody(BytesIO(body_bytes), len(body_bytes))
+
+
+@pytest.fixture(autouse=True)
+def code_sets(monkeypatch):
+    """
+    Start each test without any cached code sets
+    """
+    monkeypatch.setattr(code_set_helpers, "CODE_SETS", {})
+
+
+@pytest.fixture
+def s3_stubber(monkeypatch):
+    """
+    Stub the s3 client used by the code set helpers and the build_snomed_code_sets lambda
+    """
+    s3_client = boto3.client(
+        "s3", region_name="ap-southeast-2",
+        aws_access_key_id="testing", aws_secret_access_key="testing"
+    )
+    monkeypatch.setattr(s3_helpers, "get_s3_client", lambda: s3_client)
+    monkeypatch.setattr(build_snomed_code_sets, "get_s3_client", lambda: s3_client)
+    with Stubber(s3_client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize("codes", [
+    [],
+    [0],
+    [363346000, 254637007, 93761005],
+    # Largest uint64
+    [1, 2 ** 64 - 1],
+    # Unsorted, duplicated and as floats from json
+    [3.0, 1, 2, 3, 1.0],
+])
+def test_code_set_round_trip(codes):
+    code_set_bytes = get_code_set_bytes(codes)
+
+    assert code_set_bytes.startswith(CODE_SET_MAGIC)
+    assert len(code_set_bytes) == len(CODE_SET_MAGIC) + 8 * len(set(codes))
+    assert list(read_code_set_bytes(code_set_bytes)) == sorted(set(int(code) for code in codes))
+
+
+def test_code_set_is_little_endian():
+    assert get_code_set_bytes([1]) == CODE_SET_MAGIC + b"\x01" + b"\x00" * 7
+
+
+@pytest.mark.parametrize("code_set_bytes", [
+    b"",
+    b"\x01" + b"\x00" * 7,
+    gzip.compress(get_code_set_bytes([1])),
+])
+def test_bytes_without_the_header_are_rejected(code_set_bytes):
+    with pytest.raises(ValueError):
+        read_code_set_bytes(code_set_bytes)
+
+
+@pytest.mark.parametrize("code,expected", [
+    (254637007, True),
+    (254637007.0, True),
+    (93761005, True),
+    (1, False),
+    (2 ** 64 - 1, False),
+    (-254637007, False),
+    (254637007.5, False),
+])
+def test_code_is_in_code_set(code, expected):
+    code_set = read_code_set_bytes(get_code_set_bytes([363346000, 254637007, 93761005]))
+
+    assert is_code_in_code_set(code_set, code) is expected
+
+
+def test_empty_code_set_has_no_codes():
+    assert not is_code_in_code_set(read_code_set_bytes(get_code_set_bytes([])), 0)
+
+
+@pytest.mark.parametrize("tree_bytes", [
+    json.dumps(TREE_RECORDS).encode(),
+    gzip.compress(json.dumps(TREE_RECORDS).encode()),
+    # As written by pandas' to_json
+    pd.DataFrame(TREE_RECORDS).to_json().encode(),
+], ids=["records", "gzipped", "column_oriented"])
+def test_tree_codes_leave_out_duplicated_codes(tree_bytes):
+    assert sorted(get_unique_codes_from_tree_bytes(tree_bytes, TREE_S3_URI)) == [254637007, 363346000]
+
+
+def test_code_set_is_read_from_s3_once(s3_stubber):
+    s3_stubber.add_response(
+        "get_object",
+        {"Body": get_streaming_body(get_code_set_bytes([254637007]))},
+        {"Bucket": BUCKET, "Key": CODE_SET_KEY},
+    )
+
+    code_set = get_code_set_from_s3_uri(CODE_SET_S3_URI)
+
+    assert list(code_set) == [254637007]
+    assert get_code_set_from_s3_uri(CODE_SET_S3_URI) is code_set
+
+
+def test_missing_code_set_raises_and_is_not_cached(s3_stubber):
+    for _ in range(2):
+        s3_stubber.add_client_error(
+            "get_object", service_error_code="NoSuchKey", http_status_code=404,
+            expected_params={"Bucket": BUCKET, "Key": CODE_SET_KEY},
+        )
+        with pytest.raises(CodeSetNotFoundError):
+            get_code_set_from_s3_uri(CODE_SET_S3_URI)
+
+
+def test_code_set_is_not_checked_when_its_env_var_is_unset(monkeypatch):
+    monkeypatch.delenv("SNOMED_CT_DISEASE_CODE_SET_S3_URI", raising=False)
+
+    assert get_code_set_from_env_var("SNOMED_CT_DISEASE_CODE_SET_S3_URI") is None
+
+
+def test_built_code_set_is_written_to_s3(s3_stubber):
+    s3_stubber.add_response(
+        "get_object",
+        {"Body": get_streaming_body(gzip.compress(json.dumps(TREE_RECORDS).encode()))},
+        {"Bucket": BUCKET, "Key": TREE_KEY},
+    )
+    s3_stubber.add_response(
+        "put_object", {},
+        {
+            "Bucket": BUCKET,
+            "Key": CODE_SET_KEY,
+            "Body": get_code_set_bytes([254637007, 363346000]),
+            "ContentType": "application/octet-stream",
+            "ServerSideEncryption": "AES256",
+        },
+    )
+
+    assert build_snomed_code_sets.build_code_set(TREE_S3_URI, CODE_SET_S3_URI) == 2
+
+
+def test_code_set_is_not_built_when_its_tree_is_missing(s3_stubber):
+    s3_stubber.add_client_error(
+        "get_object", service_error_code="NoSuchKey", http_status_code=404,
+        expected_params={"Bucket": BUCKET, "Key": TREE_KEY},
+    )
+
+    assert build_snomed_code_sets.build_code_set(TREE_S3_URI, CODE_SET_S3_URI) is None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the compare_payload lambda
+
+Payloads were previously compared with DeepDiff, the canonical hash must find the same changes,
+except that key order and 1 vs 1.0 no longer count as changes.
+"""
+
+# Standard imports
+import sys
+from copy import deepcopy
+from pathlib import Path
+
+import pytest
+
+# Globals
+LAMBDA_DIR = Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "compare_payload_py"
+
+sys.path.insert(0, str(LAMBDA_DIR))
+
+# Local imports
+from compare_payload import get_canonical_payload_hash, handler  # noqa: E402
+
+PAYLOAD = {
+    "version": "2024.07.01",
+    "data": {
+        "tags": {"libraryId": "L2400001", "fastqRgidList": ["GACTGAGTAG+CACTATCAAC.1"], "isIdentified": False},
+        "inputs": {
+            "caseMetadata": {"diseaseCode": 55342001, "specimenCode": 119297000, "indication": "Ménétrier"},
+            "dataFiles": {"microsatOutputUri": "s3://bucket/L2400001.microsat_output.json"},
+        },
+        "engineParameters": {"caseId": 1, "informaticsJobId": None},
+    },
+}
+
+# The same payload, with the keys in reverse order and whole numbers written as floats
+EQUIVALENT_PAYLOAD = {
+    "data": {
+        "engineParameters": {"informaticsJobId": None, "caseId": 1.0},
+        "inputs": {
+            "dataFiles": {"microsatOutputUri": "s3://bucket/L2400001.microsat_output.json"},
+            "caseMetadata": {"indication": "Ménétrier", "specimenCode": 119297000.0, "diseaseCode": 55342001},
+        },
+        "tags": {"isIdentified": False, "fastqRgidList": ["GACTGAGTAG+CACTATCAAC.1"], "libraryId": "L2400001"},
+    },
+    "version": "2024.07.01",
+}
+
+
+def get_changed_payload(path, value):
+    changed_payload = deepcopy(PAYLOAD)
+    parent = changed_payload
+    for key in path[:-1]:
+        parent = parent[key]
+    parent[path[-1]] = value
+    return changed_payload
+
+
+CHANGED_PAYLOADS_LIST = [
+    # Changed values
+    get_changed_payload(["data", "engineParameters", "caseId"], 2),
+    get_changed_payload(["data", "engineParameters", "caseId"], 1.5),
+    get_changed_payload(["data", "engineParameters", "informaticsJobId"], 3),
+    get_changed_payload(["data", "inputs", "caseMetadata", "indication"], "Menetrier"),
+    # Changed types
+    get_changed_payload(["data", "engineParameters", "caseId"], "1"),
+    get_changed_payload(["data", "tags", "isIdentified"], 0),
+    get_changed_payload(["data", "engineParameters", "caseId"], True),
+    # Added and removed keys
+    get_changed_payload(["data", "tags", "subjectId"], "SBJ00001"),
+    get_changed_payload(["data", "inputs"], {"caseMetadata": PAYLOAD["data"]["inputs"]["caseMetadata"]}),
+    get_changed_payload(["data", "engineParameters"], {"caseId": 1}),
+    # List order is kept
+    get_changed_payload(["data", "tags", "fastqRgidList"], ["GACTGAGTAG+CACTATCAAC.2", "GACTGAGTAG+CACTATCAAC.1"]),
+    get_changed_payload(["data", "tags", "fastqRgidList"], []),
+]
+
+
+def test_hash_ignores_key_order_and_whole_floats():
+    assert get_canonical_payload_hash(EQUIVALENT_PAYLOAD) == get_canonical_payload_hash(PAYLOAD)
+
+
+@pytest.mark.parametrize("old_value,new_value", [
+    (1, 1.0),
+    (-3, -3.0),
+    (0, -0.0),
+    (10 ** 20, 1e20),
+    ([1, {"a": 2}], [1.0, {"a": 2.0}]),
+])
+def test_whole_floats_are_not_changes(old_value, new_value):
+    assert handler({"oldPayload": {"value": old_value}, "newPayload": {"value": new_value}}, None) == {
+        "hasChanged": False
+    }
+
+
+def test_unchanged_payload_is_not_a_change():
+    assert handler({"oldPayload": PAYLOAD, "newPayload": deepcopy(EQUIVALENT_PAYLOAD)}, None) == {
+        "hasChanged": False
+    }
+
+
+@pytest.mark.parametrize("new_payload", CHANGED_PAYLOADS_LIST)
+def test_changed_payload_is_a_change(new_payload):
+    assert handler({"oldPayload": PAYLOAD, "newPayload": new_payload}, None) == {"hasChanged": True}
+
+
+@pytest.mark.parametrize("new_payload", CHANGED_PAYLOADS_LIST)
+def test_changes_are_found_by_the_old_deepdiff_comparison(new_payload):
+    deepdiff = pytest.importorskip("deepdiff")
+
+    # The previous comparison
+    assert deepdiff.DeepDiff(PAYLOAD, new_payload)
+
+
+def test_diff_is_only_returned_when_requested():
+    pytest.importorskip("deepdiff")
+
+    new_payload = get_changed_payload(["data", "engineParameters", "caseId"], 2)
+
+    assert "diff" not in handler({"oldPayload": PAYLOAD, "newPayload": new_payload}, None)
+    assert handler(
+        {"oldPayload": PAYLOAD, "newPayload": new_payload, "includeDiff": True}, None
+    )["diff"]["values_changed"]["root['data']['engineParameters']['caseId']"] == {"new_value": 2, "old_value": 1}
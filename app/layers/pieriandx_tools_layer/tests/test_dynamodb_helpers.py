@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the state table helpers, against the process-local state table
+"""
+
+import pytest
+
+# Local imports
+from pieriandx_tools.aws_helpers.dynamodb_helpers import (
+    StateItemConditionFailedError,
+    get_state_item,
+    put_state_item,
+    update_state_item,
+)
+
+PK = "tests#item"
+SK = "data"
+
+
+def add_one(data):
+    if data is None:
+        return {"count": 1}
+    return {"count": data["count"] + 1}
+
+
+def test_update_creates_then_updates_the_item():
+    assert update_state_item(PK, SK, add_one) == {"count": 1}
+    assert update_state_item(PK, SK, add_one) == {"count": 2}
+
+    state_item = get_state_item(PK, SK)
+    assert state_item["data"] == {"count": 2}
+    assert state_item["version"] == 2
+
+
+def test_update_returning_none_leaves_the_item():
+    put_state_item(PK, SK, {"count": 5})
+
+    assert update_state_item(PK, SK, lambda data: None) == {"count": 5}
+    assert get_state_item(PK, SK)["version"] == 1
+
+
+def test_update_fn_is_given_a_copy_of_the_data():
+    put_state_item(PK, SK, {"counts": [1]})
+
+    def update_fn(data):
+        data["counts"].append(2)
+        return None
+
+    update_state_item(PK, SK, update_fn)
+
+    assert get_state_item(PK, SK)["data"] == {"counts": [1]}
+
+
+def test_concurrent_update_is_retried():
+    put_state_item(PK, SK, {"count": 1})
+    attempts_list = []
+
+    def update_fn(data):
+        attempts_list.append(data)
+        if len(attempts_list) == 1:
+            # Another writer updates the item between our read and write
+            put_state_item(PK, SK, {"count": 10}, expected_version=1)
+        return add_one(data)
+
+    assert update_state_item(PK, SK, update_fn) == {"count": 11}
+    assert attempts_list == [{"count": 1}, {"count": 10}]
+
+
+def test_concurrent_create_is_retried():
+    attempts_list = []
+
+    def update_fn(data):
+        attempts_list.append(data)
+        if len(attempts_list) == 1:
+            put_state_item(PK, SK, {"count": 10})
+        return add_one(data)
+
+    assert update_state_item(PK, SK, update_fn) == {"count": 11}
+    assert attempts_list == [None, {"count": 10}]
+
+
+def test_update_raises_after_max_attempts():
+    put_state_item(PK, SK, {"count": 1})
+
+    def update_fn(data):
+        # Always lose the race
+        state_item = get_state_item(PK, SK)
+        put_state_item(PK, SK, state_item["data"], expected_version=state_item["version"])
+        return add_one(data)
+
+    with pytest.raises(StateItemConditionFailedError):
+        update_state_item(PK, SK, update_fn, max_attempts=3)
+
+
+def test_expired_item_is_not_returned_and_can_be_recreated():
+    put_state_item(PK, SK, {"count": 1}, ttl_seconds=0)
+
+    assert get_state_item(PK, SK) is None
+    assert update_state_item(PK, SK, add_one) == {"count": 1}
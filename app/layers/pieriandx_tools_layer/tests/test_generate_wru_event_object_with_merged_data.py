@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the generate_wru_event_object_with_merged_data lambda
+
+The workflow run update was previously built by copying the workflow run from the workflow manager
+and merging the payload into it in place, the update built from either the workflow manager run
+or the state change event detail of the same run must match that output.
+"""
+
+# Standard imports
+import sys
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+# Globals
+LAMBDA_DIR = (
+    Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "generate_wru_event_object_with_merged_data_py"
+)
+
+sys.path.insert(0, str(LAMBDA_DIR))
+
+# Local imports
+from generate_wru_event_object_with_merged_data import build_workflow_run_update  # noqa: E402
+
+LIBRARIES_LIST = [{"orcabusId": "lib.01J5M2J44HFJ9424G7074NKTGN", "libraryId": "L2400001"}]
+
+# A workflow run from the workflow manager
+WORKFLOW_RUN = {
+    "orcabusId": "wfr.01J5M2JFE1JPYV62RYQEG99CP5",
+    "portalRunId": "20241105abcd1234",
+    "executionId": None,
+    "workflowRunName": "umccr--automated--pieriandx-tso500-ctdna--2-1-0--20241105abcd1234",
+    "comment": None,
+    "workflow": {"orcabusId": "wfl.01J5M2J3WXT6KD4JZP0CRVZ4YS", "name": "pieriandx-tso500-ctdna", "version": "2.1.0"},
+    "analysisRun": None,
+    "libraries": LIBRARIES_LIST,
+    "currentState": {"status": "READY", "timestamp": "2024-11-05T16:11:36Z"},
+}
+
+# The state change event detail of the same run
+WORKFLOW_RUN_STATE_CHANGE = {
+    "id": "01J5M2JFE1JPYV62RYQEG99CP5",
+    "version": "0.1.0",
+    "timestamp": "2024-11-05T16:11:36Z",
+    "orcabusId": WORKFLOW_RUN["orcabusId"],
+    "portalRunId": WORKFLOW_RUN["portalRunId"],
+    "executionId": None,
+    "workflowRunName": WORKFLOW_RUN["workflowRunName"],
+    "comment": None,
+    "workflow": WORKFLOW_RUN["workflow"],
+    "analysisRun": None,
+    "libraries": LIBRARIES_LIST,
+    "status": "READY",
+    "payload": {"refId": "pld.01J5M2JFE1JPYV62RYQEG99CP5", "version": "2024.07.01", "data": {"tags": {}}},
+}
+
+PAYLOAD = {
+    "version": "2024.07.01",
+    "data": {
+        "tags": {"libraryId": "L2400001"},
+        "inputs": {"panelVersion": "main", "dataFiles": {"microsatOutputUri": "s3://bucket/old/"}},
+        "engineParameters": {"caseId": "1"},
+    },
+}
+
+
+def get_old_workflow_run_update(
+        workflow_run: Dict,
+        payload: Dict,
+        status: Optional[str] = None,
+        data_files: Optional[Any] = None,
+        engine_parameters: Optional[Dict] = None,
+        libraries: Optional[List[Dict]] = None,
+) -> Dict:
+    """
+    The previous workflow run update, built from the workflow manager run
+    """
+    draft_workflow_update = workflow_run.copy()
+    draft_workflow_update['status'] = draft_workflow_update.pop('currentState')['status']
+
+    if (
+            payload.get("data", {}).get("inputs", {}).get("dataFiles", None) is not None and
+            data_files is None
+    ):
+        data_files = payload["data"]["inputs"]["dataFiles"]
+
+    if data_files is not None:
+        payload["data"] = payload.get("data", {})
+        payload["data"]["inputs"] = payload["data"].get("inputs", {})
+        payload["data"]["inputs"]["dataFiles"] = data_files
+
+    if status is not None:
+        draft_workflow_update['status'] = status
+
+    draft_workflow_update["payload"] = {
+        "version": payload["version"],
+        "data": payload.get("data", {})
+    }
+
+    if engine_parameters is not None:
+        if draft_workflow_update["payload"]["data"].get("engineParameters", None) is None:
+            draft_workflow_update["payload"]["data"]["engineParameters"] = {}
+        draft_workflow_update["payload"]["data"]["engineParameters"].update(engine_parameters)
+
+    if libraries is not None:
+        draft_workflow_update["libraries"] = list(map(
+            lambda library_iter: {
+                "libraryId": library_iter['libraryId'],
+                "orcabusId": library_iter['orcabusId'],
+                "readsets": library_iter.get('readsets', [])
+            },
+            libraries
+        ))
+
+    return draft_workflow_update
+
+
+@pytest.mark.parametrize("update_kwargs", [
+    {},
+    {"status": "RUNNABLE"},
+    {"status": "DRAFT", "data_files": {"microsatOutputUri": "s3://bucket/new/"}},
+    {"status": "RUNNABLE", "engine_parameters": {"caseId": "2", "informaticsJobId": "3"}},
+    {"status": "DRAFT", "libraries": [{**LIBRARIES_LIST[0], "readsets": [{"rgid": "ACGT.1"}]}]},
+])
+@pytest.mark.parametrize("workflow_run", [WORKFLOW_RUN, WORKFLOW_RUN_STATE_CHANGE], ids=["run", "state_change"])
+def test_update_matches_the_old_merged_output(workflow_run, update_kwargs):
+    expected_workflow_run_update = get_old_workflow_run_update(
+        deepcopy(WORKFLOW_RUN), deepcopy(PAYLOAD), **deepcopy(update_kwargs)
+    )
+
+    workflow_run_copy = deepcopy(workflow_run)
+    payload_copy = deepcopy(PAYLOAD)
+
+    assert build_workflow_run_update(workflow_run, PAYLOAD, **update_kwargs) == expected_workflow_run_update
+
+    # The inputs are not modified
+    assert workflow_run == workflow_run_copy
+    assert PAYLOAD == payload_copy
+
+
+def test_state_change_event_keys_are_not_passed_on():
+    workflow_run_update = build_workflow_run_update(WORKFLOW_RUN_STATE_CHANGE, PAYLOAD, status="RUNNABLE")
+
+    assert "id" not in workflow_run_update
+    assert "timestamp" not in workflow_run_update
+    assert workflow_run_update["payload"] == {"version": PAYLOAD["version"], "data": PAYLOAD["data"]}
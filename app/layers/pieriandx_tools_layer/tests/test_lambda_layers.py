@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Import each lambda handler that uses the pieriandx_tools layer with only the layers attached to the lambda
+
+The layers attached to each lambda are read from the lambda requirements map in
+infrastructure/stage/lambda/interfaces.ts (see buildLambda in infrastructure/stage/lambda/index.ts),
+the packages of any other layer are blocked from being imported.
+"""
+
+# Standard imports
+import json
+import re
+import subprocess
+import sys
+from os import environ, pathsep
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+# Globals
+LAYER_DIR = Path(__file__).absolute().parent.parent
+APP_DIR = LAYER_DIR.parent.parent
+LAMBDA_DIR = APP_DIR / "lambdas"
+LAMBDA_INTERFACES_PATH = APP_DIR.parent / "infrastructure" / "stage" / "lambda" / "interfaces.ts"
+
+ORCABUS_API_TOOLS_PACKAGE = "orcabus_api_tools"
+PIERIANDX_TOOLS_PACKAGE = "pieriandx_tools"
+
+# Block imports of the given top level packages, then import the handler module
+IMPORT_HANDLER_SCRIPT = """
+import importlib
+import importlib.abc
+import json
+import sys
+
+blocked_packages_list = json.loads(sys.argv[1])
+
+
+class BlockedLayerFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname.split(".")[0] in blocked_packages_list:
+            raise ModuleNotFoundError(f"No module named '{fullname}' (layer not attached)", name=fullname)
+        return None
+
+
+sys.meta_path.insert(0, BlockedLayerFinder())
+for module_name in list(sys.modules):
+    if module_name.split(".")[0] in blocked_packages_list:
+        del sys.modules[module_name]
+sys.path.insert(0, sys.argv[2])
+
+try:
+    importlib.import_module(sys.argv[3])
+except ModuleNotFoundError as e:
+    print(json.dumps({"missingModule": e.name}))
+    sys.exit(3)
+"""
+
+
+def get_camel_case_to_snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def get_lambda_requirements_map() -> Dict[str, List[str]]:
+    """
+    Get the requirements of each lambda from the lambda requirements map,
+    i.e. {"saveCaseStatusDigest": ["needsOrcabusApiTools", "needsStateTableAccess"]}
+    """
+    interfaces_ts = LAMBDA_INTERFACES_PATH.read_text()
+    requirements_map_ts = interfaces_ts.split("lambdaRequirementsMap", 1)[1]
+    return {
+        lambda_name: re.findall(r"(needs\w+): true", requirements_ts)
+        for lambda_name, requirements_ts in re.findall(r"^  (\w+): \{([^}]*)\}", requirements_map_ts, re.MULTILINE)
+    }
+
+
+def get_attached_layer_packages(lambda_requirements: List[str]) -> List[str]:
+    attached_layer_packages_list = []
+    if "needsOrcabusApiTools" in lambda_requirements:
+        attached_layer_packages_list.append(ORCABUS_API_TOOLS_PACKAGE)
+    if any(
+        requirement in lambda_requirements
+        for requirement in [
+            "needsPieriandxLayerAccess",
+            "needsSnomedCodeSetAccess",
+            "needsSnomedCodeSetBuildAccess",
+            "needsStateTableAccess",
+        ]
+    ):
+        attached_layer_packages_list.append(PIERIANDX_TOOLS_PACKAGE)
+    return attached_layer_packages_list
+
+
+PIERIANDX_TOOLS_LAMBDA_NAMES_LIST = [
+    lambda_name
+    for lambda_name, lambda_requirements in get_lambda_requirements_map().items()
+    if PIERIANDX_TOOLS_PACKAGE in get_attached_layer_packages(lambda_requirements)
+]
+
+
+def test_requirements_map_is_read():
+    lambda_requirements_map = get_lambda_requirements_map()
+
+    assert lambda_requirements_map["comparePayload"] == []
+    assert "needsStateTableAccess" in lambda_requirements_map["saveCaseStatusDigest"]
+
+
+@pytest.mark.parametrize("lambda_name", PIERIANDX_TOOLS_LAMBDA_NAMES_LIST)
+def test_handler_imports_with_only_the_attached_layers(lambda_name):
+    attached_layer_packages_list = get_attached_layer_packages(get_lambda_requirements_map()[lambda_name])
+    blocked_packages_list = [
+        layer_package
+        for layer_package in [ORCABUS_API_TOOLS_PACKAGE, PIERIANDX_TOOLS_PACKAGE]
+        if layer_package not in attached_layer_packages_list
+    ]
+    lambda_name_snake_case = get_camel_case_to_snake_case(lambda_name)
+
+    import_process = subprocess.run(
+        [
+            sys.executable, "-c", IMPORT_HANDLER_SCRIPT,
+            json.dumps(blocked_packages_list),
+            str(LAMBDA_DIR / f"{lambda_name_snake_case}_py"),
+            lambda_name_snake_case,
+        ],
+        env={
+            **environ,
+            "PYTHONPATH": pathsep.join([str(LAYER_DIR / "src")] + environ.get("PYTHONPATH", "").split(pathsep)),
+            "AWS_DEFAULT_REGION": environ.get("AWS_DEFAULT_REGION", "ap-southeast-2"),
+            # Set for lambdas that need the workflow info
+            "WORKFLOW_NAME": "pieriandx-tso500-ctdna",
+        },
+        capture_output=True,
+        text=True,
+    )
+
+    if import_process.returncode == 3:
+        missing_module = json.loads(import_process.stdout.splitlines()[-1])["missingModule"]
+        assert missing_module.split(".")[0] not in blocked_packages_list, (
+            f"{lambda_name} imports {missing_module} but its layer is not attached to the lambda"
+        )
+        # A dependency of the lambda itself that is not installed here
+        pytest.skip(f"{missing_module} is not installed")
+
+    assert import_process.returncode == 0, import_process.stderr
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the launch_pieriandx_case lambda, run against the CGW simulator
+"""
+
+# Standard imports
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+# Globals
+LAMBDA_DIR = Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "launch_pieriandx_case_py"
+
+sys.path.insert(0, str(LAMBDA_DIR))
+
+# Local imports
+import launch_pieriandx_case  # noqa: E402
+from cgw_simulator import get_endpoint_name  # noqa: E402
+from pieriandx_tools.utils.case_ledger_helpers import get_case_ledger_entry, mark_launch_step_pending  # noqa: E402
+
+ACCESSION_NUMBER = "L2400001_001"
+RUN_ID = f"20240411_A00123_0001_BHJGJFDS__{ACCESSION_NUMBER}__20240411235959"
+SEQUENCER_RUN_INFO = {
+    "runId": RUN_ID,
+    "barcode": "GACTGAGTAG+CACTATCAAC",
+    "lane": "1",
+    "sampleId": "L2400001",
+    "sampleType": "DNA",
+}
+
+SEQUENCERRUN_S3_PATH = f"s3://pdx-xfer/melbourne/{RUN_ID}"
+INFORMATICSJOB_ENDPOINT = "POST /case/{id}/informaticsJobs"
+
+LAUNCH_EVENT = {
+    "caseCreationObj": {
+        "identified": True,
+        "panelName": "main",
+        "specimens": [{"accessionNumber": ACCESSION_NUMBER}],
+    },
+    "sequencerrunCreationObj": {
+        "runId": RUN_ID,
+        "specimens": [{"accessionNumber": ACCESSION_NUMBER, **SEQUENCER_RUN_INFO}],
+        "type": "pairedEnd",
+    },
+    "informaticsjobCreationObj": {
+        "input": [{"accessionNumber": ACCESSION_NUMBER, "sequencerRunInfos": [SEQUENCER_RUN_INFO]}],
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def launch_client(monkeypatch, pieriandx_client):
+    """
+    Launch against the CGW simulator
+    """
+    monkeypatch.setattr(launch_pieriandx_case, "get_pieriandx_client", lambda: pieriandx_client)
+    return pieriandx_client
+
+
+def test_retry_after_a_pending_sequencer_run_post_does_not_create_a_duplicate(cgw_simulator, launch_client):
+    simulator, _ = cgw_simulator
+
+    # A previous attempt sent the POST, then timed out before recording the result
+    mark_launch_step_pending(ACCESSION_NUMBER, "sequencerrun")
+    sequencerrun_id = launch_client._post_api("/sequencerRun", data=LAUNCH_EVENT["sequencerrunCreationObj"]).json()
+
+    launch_response = launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+
+    assert launch_response["sequencerrunId"] == sequencerrun_id
+    assert simulator.stats.request_count_by_endpoint["POST /sequencerRun"] == 1
+    assert get_case_ledger_entry(ACCESSION_NUMBER)["results"]["sequencerrun"] == sequencerrun_id
+
+
+def test_pending_sequencer_run_is_created_when_it_was_not_sent(cgw_simulator):
+    simulator, _ = cgw_simulator
+
+    # A previous attempt timed out before the POST was sent
+    mark_launch_step_pending(ACCESSION_NUMBER, "sequencerrun")
+
+    launch_response = launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+
+    assert launch_response["sequencerrunId"] is not None
+    assert simulator.stats.request_count_by_endpoint["POST /sequencerRun"] == 1
+
+
+class RequestLog:
+    """
+    The CGW requests and the marker file uploads in the order they are made,
+    requests to the failing endpoints fail with a 400
+    """
+    def __init__(self):
+        self.requests: List[str] = []
+        self.failing_endpoints: List[str] = []
+
+    def get_post_requests(self) -> List[str]:
+        return [
+            request_iter for request_iter in self.requests
+            if not request_iter.startswith("GET")
+        ]
+
+
+@pytest.fixture
+def request_log(monkeypatch, cgw_simulator) -> RequestLog:
+    simulator, _ = cgw_simulator
+    request_log = RequestLog()
+    handle_request = simulator.handle_request
+
+    def logged_handle_request(method, path, params=None, body=None):
+        endpoint_name = get_endpoint_name(method, path)
+        request_log.requests.append(endpoint_name)
+        if endpoint_name in request_log.failing_endpoints:
+            return 400, {"message": f"{endpoint_name} failed (simulated)"}
+        return handle_request(method, path, params=params, body=body)
+
+    def logged_upload_fileobj(bucket, key, fileobj, metadata=None):
+        request_log.requests.append(f"upload s3://{bucket}/{key.lstrip('/')}")
+
+    monkeypatch.setattr(simulator, "handle_request", logged_handle_request)
+    monkeypatch.setattr(launch_pieriandx_case, "upload_fileobj", logged_upload_fileobj)
+    monkeypatch.setattr(launch_pieriandx_case, "get_pieriandx_s3_client", lambda: None)
+    return request_log
+
+
+def test_informatics_job_is_created_after_the_case_and_sequencer_run(request_log):
+    launch_response = launch_pieriandx_case.handler({**LAUNCH_EVENT, "sequencerrunS3Path": SEQUENCERRUN_S3_PATH}, None)
+
+    post_requests = request_log.get_post_requests()
+    informaticsjob_idx = post_requests.index(INFORMATICSJOB_ENDPOINT)
+
+    # The case and sequencer run are created concurrently, in any order
+    assert sorted(post_requests[:2]) == ["POST /case", "POST /sequencerRun"]
+    assert informaticsjob_idx == len(post_requests) - 1
+
+    # The marker files are uploaded once the sequencer run is created, done.txt last
+    marker_uploads = [request_iter for request_iter in post_requests if request_iter.startswith("upload")]
+    assert marker_uploads == [
+        f"upload {SEQUENCERRUN_S3_PATH}/VcfWorkflow.txt",
+        f"upload {SEQUENCERRUN_S3_PATH}/done.txt",
+    ]
+    assert post_requests.index("POST /sequencerRun") < post_requests.index(marker_uploads[0])
+    assert post_requests.index(marker_uploads[-1]) < informaticsjob_idx
+
+    assert launch_response["informaticsjobObj"]["jobId"] is not None
+    assert set(launch_response["stepTimings"]) == {
+        "getPieriandxClientMs",
+        "createCaseMs",
+        "createSequencerrunMs",
+        "uploadSequencerrunMarkersMs",
+        "createInformaticsjobMs",
+        "totalMs",
+    }
+
+
+def test_relaunch_returns_the_recorded_results(request_log):
+    launch_response = launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+    request_log.requests.clear()
+
+    relaunch_response = launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+
+    assert request_log.get_post_requests() == []
+    for key in ["caseObj", "sequencerrunId", "informaticsjobObj"]:
+        assert relaunch_response[key] == launch_response[key]
+
+
+@pytest.mark.parametrize("failing_endpoint,launch_step,other_launch_step", [
+    ("POST /case", "case", "sequencerrun"),
+    ("POST /sequencerRun", "sequencerrun", "case"),
+])
+def test_failed_step_stops_the_launch_and_is_retried_alone(
+        request_log, failing_endpoint, launch_step, other_launch_step
+):
+    request_log.failing_endpoints.append(failing_endpoint)
+
+    with pytest.raises(Exception, match="Failed to launch case"):
+        launch_pieriandx_case.handler({**LAUNCH_EVENT, "sequencerrunS3Path": SEQUENCERRUN_S3_PATH}, None)
+
+    assert INFORMATICSJOB_ENDPOINT not in request_log.requests
+    if launch_step == "sequencerrun":
+        assert not any(request_iter.startswith("upload") for request_iter in request_log.requests)
+
+    # The step that succeeded is recorded
+    case_ledger_entry = get_case_ledger_entry(ACCESSION_NUMBER)
+    assert launch_step not in case_ledger_entry["results"]
+    assert other_launch_step in case_ledger_entry["results"]
+
+    request_log.failing_endpoints.clear()
+    request_log.requests.clear()
+
+    launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+
+    assert sorted(request_log.get_post_requests()) == sorted([failing_endpoint, INFORMATICSJOB_ENDPOINT])
+
+
+def test_failures_of_both_steps_are_raised_together(request_log):
+    request_log.failing_endpoints.extend(["POST /case", "POST /sequencerRun"])
+
+    with pytest.raises(Exception, match="Failed to launch case") as exc_info:
+        launch_pieriandx_case.handler(LAUNCH_EVENT, None)
+
+    assert "Failed to create case" in str(exc_info.value)
+    assert "Failed to create sequencerrun" in str(exc_info.value)
+    assert INFORMATICSJOB_ENDPOINT not in request_log.requests
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+"""
+Tests for memoising handler outputs in the state table
+"""
+
+# Standard imports
+from botocore.exceptions import EndpointConnectionError
+
+# Local imports
+from pieriandx_tools.utils import memo_helpers
+from pieriandx_tools.utils.memo_helpers import memoised_handler
+
+
+def test_output_is_memoised_until_forced():
+    calls_list = []
+
+    @memoised_handler("testStep")
+    def handler(event, context):
+        calls_list.append(event)
+        return {"callCount": len(calls_list)}
+
+    assert handler({"libraryId": "L2400001"}, None) == {"callCount": 1}
+    assert handler({"libraryId": "L2400001"}, None) == {"callCount": 1}
+    assert handler({"libraryId": "L2400002"}, None) == {"callCount": 2}
+    assert handler({"libraryId": "L2400001", "forceRefresh": True}, None) == {"callCount": 3}
+    assert handler({"libraryId": "L2400001"}, None) == {"callCount": 3}
+
+
+def test_memo_store_errors_do_not_fail_the_handler(monkeypatch):
+    def get_memoised_output(*args, **kwargs):
+        raise EndpointConnectionError(endpoint_url="https://dynamodb.ap-southeast-2.amazonaws.com")
+
+    monkeypatch.setattr(memo_helpers, "get_memoised_output", get_memoised_output)
+
+    @memoised_handler("testStep")
+    def handler(event, context):
+        # Not json serialisable, so cannot be stored
+        return {"libraryIds": {"L2400001"}}
+
+    assert handler({"libraryId": "L2400001"}, None) == {"libraryIds": {"L2400001"}}
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the serialisation of the PierianDx models
+
+The models were previously serialised by running model_dump output through fastapi's jsonable_encoder,
+the native encoder must give the same output for every model.
+Skipped if fastapi is not installed, it is not a dependency of the layer.
+"""
+
+# Standard imports
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
+
+import pytest
+
+# Local imports
+from pieriandx_tools import pieriandx_models
+from pieriandx_tools.pieriandx_lookup import disease_helpers, specimen_helpers
+from pieriandx_tools.pieriandx_models import PierianDxBaseModel, to_json_compatible
+from pieriandx_tools.pieriandx_models.case_creation import DeIdentifiedCaseCreation, IdentifiedCaseCreation
+from pieriandx_tools.pieriandx_models.dag import Dag
+from pieriandx_tools.pieriandx_models.data_file import DataFile
+from pieriandx_tools.pieriandx_models.disease import Disease
+from pieriandx_tools.pieriandx_models.informaticsjob_creation import InformaticsjobCreation
+from pieriandx_tools.pieriandx_models.medical_facility import MedicalFacility
+from pieriandx_tools.pieriandx_models.medical_record_number import MedicalRecordNumber
+from pieriandx_tools.pieriandx_models.physician import Physician
+from pieriandx_tools.pieriandx_models.sequencerrun_creation import SequencerrunCreation
+from pieriandx_tools.pieriandx_models.specimen import DeIdentifiedSpecimen, IdentifiedSpecimen
+from pieriandx_tools.pieriandx_models.specimen_sequencer_info import SpecimenSequencerInfo
+from pieriandx_tools.pieriandx_models.specimen_type import SpecimenType
+
+jsonable_encoder = pytest.importorskip("fastapi.encoders").jsonable_encoder
+
+SPECIMEN_KWARGS = {
+    "case_accession_number": "L2400001_001",
+    "date_accessioned": datetime(2024, 11, 5, 16, 11, 36, 123456, tzinfo=timezone(timedelta(hours=11))),
+    "date_received": datetime(2024, 11, 4, 9, 0, 0, tzinfo=timezone.utc),
+    "date_collected": datetime(2024, 11, 3, 23, 59, 59),
+    "external_specimen_id": "PRJ240001",
+    "specimen_label": "primarySpecimen",
+    "specimen_type": {"code": 119297000},
+    "gender": "female",
+    "ethnicity": "unknown",
+}
+
+IDENTIFIED_SPECIMEN_KWARGS = {
+    **SPECIMEN_KWARGS,
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "date_of_birth": datetime(1970, 1, 1, 9, 0, tzinfo=timezone(timedelta(hours=11))),
+    "medical_record_number": {
+        "mrn": "3069999",
+        "medical_facility": {"facility": "Hospital", "hospital_number": "99"},
+    },
+}
+
+DE_IDENTIFIED_SPECIMEN_KWARGS = {
+    **SPECIMEN_KWARGS,
+    "study_identifier": "Study",
+    "study_subject_identifier": "Subject",
+}
+
+CASE_CREATION_KWARGS = {
+    "dag": {"name": "cromwell_tso500_ctdna_workflow_1.0.4", "description": "tso500_ctdna_workflow"},
+    "disease": {"code": 55342001},
+    "indication": "Test",
+    "panel_name": "main",
+    "sample_type": "patientcare",
+}
+
+SPECIMEN_SEQUENCER_INFO_KWARGS = {
+    "run_id": "20240411_A00123_0001_BHJGJFDS__L2400001_001__20240411235959",
+    "case_accession_number": "L2400001_001",
+    "barcode": "GACTGAGTAG+CACTATCAAC",
+    "lane": 1,
+    "sample_id": "L2400001",
+    "sample_type": "DNA",
+}
+
+MODELS_LIST = [
+    Dag(**CASE_CREATION_KWARGS["dag"]),
+    Disease(code=55342001),
+    Physician(first_name="John", last_name="Doe"),
+    MedicalFacility(facility="Hospital", hospital_number=99),
+    MedicalFacility(),
+    MedicalRecordNumber(**IDENTIFIED_SPECIMEN_KWARGS["medical_record_number"]),
+    SpecimenType(code=119297000),
+    SpecimenSequencerInfo(**SPECIMEN_SEQUENCER_INFO_KWARGS),
+    IdentifiedSpecimen(**IDENTIFIED_SPECIMEN_KWARGS),
+    DeIdentifiedSpecimen(**DE_IDENTIFIED_SPECIMEN_KWARGS),
+    IdentifiedCaseCreation(
+        **CASE_CREATION_KWARGS,
+        specimen=IDENTIFIED_SPECIMEN_KWARGS,
+        requesting_physician={"first_name": "John", "last_name": "Doe"},
+    ),
+    DeIdentifiedCaseCreation(**CASE_CREATION_KWARGS, specimen=DE_IDENTIFIED_SPECIMEN_KWARGS),
+    SequencerrunCreation(
+        run_id=SPECIMEN_SEQUENCER_INFO_KWARGS["run_id"],
+        specimen_sequence_info=SPECIMEN_SEQUENCER_INFO_KWARGS,
+        sequencing_type="pairedEnd",
+    ),
+    InformaticsjobCreation(
+        case_accession_number="L2400001_001",
+        specimen_sequencer_run_info=SPECIMEN_SEQUENCER_INFO_KWARGS,
+    ),
+    DataFile(
+        sequencerrun_path_root="s3://pdx-xfer/melbourne/run/",
+        file_type="cnvVcfUri",
+        sample_id="L2400001",
+        src_uri="s3://pipeline-cache/Results/L2400001/L2400001.cnv.vcf.gz",
+        contents=None,
+    ),
+    DataFile(
+        sequencerrun_path_root="s3://pdx-xfer/melbourne/run/",
+        file_type="samplesheetContents",
+        sample_id="L2400001",
+        src_uri=None,
+        contents="[Header]\n",
+    ),
+]
+
+
+class Colour(str, Enum):
+    RED = "red"
+
+
+@pytest.fixture(autouse=True)
+def snomed_labels(monkeypatch):
+    monkeypatch.setattr(disease_helpers, "get_disease_label_from_disease_code", lambda code: "Disease")
+    monkeypatch.setattr(specimen_helpers, "get_specimen_label_from_specimen_code", lambda code: "Blood specimen")
+
+
+@pytest.mark.parametrize("exclude_none", [False, True])
+@pytest.mark.parametrize("model", MODELS_LIST, ids=lambda model: type(model).__name__)
+def test_model_dump_encoding_matches_jsonable_encoder(model: PierianDxBaseModel, exclude_none):
+    model_dump = model.model_dump(exclude_none=exclude_none)
+
+    assert to_json_compatible(model_dump) == jsonable_encoder(model_dump)
+
+
+@pytest.mark.parametrize("model", MODELS_LIST, ids=lambda model: type(model).__name__)
+def test_to_dict_matches_the_jsonable_encoder_output(model: PierianDxBaseModel, monkeypatch):
+    to_dict = model.to_dict()
+
+    monkeypatch.setattr(pieriandx_models, "to_json_compatible", jsonable_encoder)
+
+    assert to_dict == model.to_dict()
+
+
+@pytest.mark.parametrize("value", [
+    None,
+    "a",
+    1,
+    1.5,
+    True,
+    Colour.RED,
+    [1, (2, 3)],
+    {"a": {"b": [None]}},
+    datetime(2024, 11, 5, 16, 11, 36, 123456, tzinfo=timezone(timedelta(hours=11))),
+    datetime(2024, 11, 5, 16, 11, 36),
+    date(2024, 11, 5),
+    time(16, 11, 36),
+    Physician(first_name="John", last_name="Doe"),
+])
+def test_value_encoding_matches_jsonable_encoder(value):
+    assert to_json_compatible(value) == jsonable_encoder(value)
+
+
+def test_unsupported_types_are_rejected():
+    with pytest.raises(TypeError):
+        to_json_compatible(b"bytes")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the PierianDx timestamp and date formats of the specimen dates
+
+The dates were previously formatted by re-parsing their serialised strings with pandas
+and collapsing the offset with a regex, the new formatters must give byte-identical output.
+"""
+
+# Standard imports
+import random
+import re
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+# Local imports
+from pieriandx_tools.pieriandx_lookup import specimen_helpers
+from pieriandx_tools.pieriandx_models import to_pieriandx_date, to_pieriandx_timestamp
+from pieriandx_tools.pieriandx_models.specimen import IdentifiedSpecimen
+
+# Globals
+OLD_ISOFORMAT_SUFFIX = re.compile(r'([+-])(\d{2}):(\d{2})$')
+
+TIMEZONES_LIST = [
+    None,
+    timezone.utc,
+    timezone(timedelta(hours=11)),
+    timezone(timedelta(hours=-3, minutes=-30)),
+    timezone(timedelta(hours=5, minutes=45)),
+    timezone(timedelta(hours=-12)),
+    timezone(timedelta(hours=14)),
+]
+
+
+def get_old_pieriandx_timestamp(datetime_obj: datetime) -> str:
+    """
+    The previous formatting path, the model dump of the datetime (its isoformat)
+    re-parsed with pandas, then the offset collapsed with a regex
+    """
+    return OLD_ISOFORMAT_SUFFIX.sub(
+        r'\1\2\3',
+        pd.to_datetime(datetime_obj.isoformat()).isoformat(timespec='seconds'),
+    )
+
+
+def get_old_pieriandx_date(datetime_obj: datetime) -> str:
+    return datetime_obj.date().isoformat()
+
+
+def get_random_datetimes(count: int, seed: int = 0):
+    random_generator = random.Random(seed)
+    for _ in range(count):
+        yield datetime(
+            year=random_generator.randint(1900, 2100),
+            month=random_generator.randint(1, 12),
+            day=random_generator.randint(1, 28),
+            hour=random_generator.randint(0, 23),
+            minute=random_generator.randint(0, 59),
+            second=random_generator.randint(0, 59),
+            microsecond=random_generator.choice([0, random_generator.randint(1, 999999)]),
+            tzinfo=random_generator.choice(TIMEZONES_LIST),
+        )
+
+
+@pytest.mark.parametrize("datetime_obj,expected_timestamp", [
+    # Naive
+    (datetime(2024, 11, 5, 16, 11, 36), "2024-11-05T16:11:36"),
+    # Aware
+    (datetime(2024, 11, 5, 16, 11, 36, tzinfo=timezone.utc), "2024-11-05T16:11:36+0000"),
+    # Non-UTC
+    (datetime(2024, 11, 5, 16, 11, 36, tzinfo=timezone(timedelta(hours=11))), "2024-11-05T16:11:36+1100"),
+    (datetime(2024, 11, 5, 16, 11, 36, tzinfo=timezone(timedelta(hours=-3, minutes=-30))), "2024-11-05T16:11:36-0330"),
+    # Microseconds are truncated
+    (datetime(2024, 11, 5, 16, 11, 36, 999999, tzinfo=timezone(timedelta(hours=11))), "2024-11-05T16:11:36+1100"),
+    (datetime(2024, 11, 5, 16, 11, 36, 1), "2024-11-05T16:11:36"),
+])
+def test_timestamp_matches_the_old_format(datetime_obj, expected_timestamp):
+    assert to_pieriandx_timestamp(datetime_obj) == expected_timestamp
+    assert get_old_pieriandx_timestamp(datetime_obj) == expected_timestamp
+
+
+def test_random_timestamps_match_the_old_format():
+    for datetime_obj in get_random_datetimes(2000):
+        assert to_pieriandx_timestamp(datetime_obj) == get_old_pieriandx_timestamp(datetime_obj), datetime_obj
+
+
+def test_random_dates_match_the_old_format():
+    for datetime_obj in get_random_datetimes(2000, seed=1):
+        assert to_pieriandx_date(datetime_obj) == get_old_pieriandx_date(datetime_obj), datetime_obj
+
+
+def test_date_is_the_local_date_of_an_aware_datetime():
+    # i.e. not converted to UTC first
+    datetime_obj = datetime(1970, 1, 1, 9, 0, tzinfo=timezone(timedelta(hours=11)))
+
+    assert to_pieriandx_date(datetime_obj) == "1970-01-01"
+
+
+def test_specimen_dates_match_the_old_format(monkeypatch):
+    monkeypatch.setattr(specimen_helpers, "get_specimen_label_from_specimen_code", lambda code: "Blood specimen")
+
+    date_accessioned = datetime(2024, 11, 5, 16, 11, 36, 123456, tzinfo=timezone(timedelta(hours=11)))
+    date_received = datetime(2024, 11, 4, 9, 0, 0, tzinfo=timezone.utc)
+    date_collected = datetime(2024, 11, 3, 23, 59, 59)
+    date_of_birth = datetime(1970, 1, 1, 9, 0, tzinfo=timezone(timedelta(hours=11)))
+
+    specimen_dict = IdentifiedSpecimen(
+        case_accession_number="L2400001_001",
+        date_accessioned=date_accessioned,
+        date_received=date_received,
+        date_collected=date_collected,
+        external_specimen_id="PRJ240001",
+        specimen_label="primarySpecimen",
+        specimen_type={"code": 119297000},
+        first_name="John",
+        last_name="Doe",
+        date_of_birth=date_of_birth,
+        medical_record_number={
+            "mrn": "3069999",
+            "medical_facility": {"facility": "Hospital", "hospital_number": "99"},
+        },
+    ).to_dict()
+
+    assert specimen_dict['dateAccessioned'] == get_old_pieriandx_timestamp(date_accessioned)
+    assert specimen_dict['dateReceived'] == get_old_pieriandx_timestamp(date_received)
+    assert specimen_dict['datecollected'] == get_old_pieriandx_timestamp(date_collected)
+    assert specimen_dict['dateOfBirth'] == get_old_pieriandx_date(date_of_birth)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the adaptive poll schedule of informatics jobs
+"""
+
+# Standard imports
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Local imports
+from pieriandx_tools.pieriandx_helpers.poll_schedule_helpers import (
+    DEFAULT_JOB_DURATION_SECONDS,
+    MAX_POLL_INTERVAL_SECONDS,
+    MIN_POLL_INTERVAL_SECONDS,
+    get_case_poll_state,
+    get_next_poll_delay_seconds,
+    get_panel_job_durations,
+    is_poll_due,
+    is_run_poll_due,
+    record_case_poll,
+    record_run_next_poll_time,
+)
+
+CASE_ID = "12345"
+PANEL_NAME = "main"
+PORTAL_RUN_ID = "20261019abcd1234"
+NOW = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+
+
+def test_min_poll_interval_is_not_below_15_minutes():
+    assert MIN_POLL_INTERVAL_SECONDS >= 15 * 60
+
+
+@pytest.mark.parametrize("job_status,elapsed_seconds,overdue_poll_count,expected_delay_seconds", [
+    # Just started, half of the expected duration is past the max interval
+    ("running", 0, 0, MAX_POLL_INTERVAL_SECONDS),
+    # Half of the remaining time
+    ("running", 10800, 0, 1800),
+    # Nearly done, half of the remaining time is under the min interval
+    ("running", 13000, 0, MIN_POLL_INTERVAL_SECONDS),
+    # Overdue, back off slowly from the min interval
+    ("running", 15000, 0, MIN_POLL_INTERVAL_SECONDS),
+    ("running", 15000, 1, MIN_POLL_INTERVAL_SECONDS * 1.5),
+    ("running", 15000, 10, MAX_POLL_INTERVAL_SECONDS),
+    # Waiting on the report
+    ("complete", 0, 0, MIN_POLL_INTERVAL_SECONDS),
+    ("complete", 15000, 10, MIN_POLL_INTERVAL_SECONDS),
+])
+def test_next_poll_delay(job_status, elapsed_seconds, overdue_poll_count, expected_delay_seconds):
+    assert get_next_poll_delay_seconds(
+        job_status=job_status,
+        elapsed_seconds=elapsed_seconds,
+        expected_duration_seconds=4 * 60 * 60,
+        overdue_poll_count=overdue_poll_count,
+    ) == expected_delay_seconds
+
+
+def test_case_never_polled_is_due():
+    assert is_poll_due(CASE_ID, NOW)
+
+
+def test_case_is_not_due_until_its_next_poll_time():
+    next_poll_time = record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=NOW)
+
+    # No job durations recorded for the panel yet
+    assert next_poll_time == NOW + timedelta(seconds=MAX_POLL_INTERVAL_SECONDS)
+    assert not is_poll_due(CASE_ID, NOW)
+    assert not is_poll_due(CASE_ID, next_poll_time - timedelta(seconds=1))
+    assert is_poll_due(CASE_ID, next_poll_time)
+
+
+def test_report_pending_is_polled_at_the_min_interval():
+    next_poll_time = record_case_poll(CASE_ID, PANEL_NAME, "1", "complete", "RUNNING", now=NOW)
+
+    assert next_poll_time == NOW + timedelta(seconds=MIN_POLL_INTERVAL_SECONDS)
+
+
+def test_status_history_only_records_changes():
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "waiting", "RUNNABLE", now=NOW)
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "waiting", "RUNNABLE", now=NOW + timedelta(hours=1))
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=NOW + timedelta(hours=2))
+
+    assert [
+        status_iter['jobStatus']
+        for status_iter in get_case_poll_state(CASE_ID)['statusHistory']
+    ] == ["waiting", "running"]
+
+
+def test_job_rerun_resets_the_case_state():
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=NOW)
+    record_case_poll(CASE_ID, PANEL_NAME, "2", "waiting", "RUNNABLE", now=NOW + timedelta(hours=1))
+
+    case_poll_state = get_case_poll_state(CASE_ID)
+    assert case_poll_state['jobId'] == "2"
+    assert case_poll_state['firstSeenTime'] == (NOW + timedelta(hours=1)).isoformat()
+    assert len(case_poll_state['statusHistory']) == 1
+
+
+def test_overdue_polls_back_off():
+    poll_time = NOW
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=poll_time)
+
+    delays_list = []
+    poll_time = NOW + timedelta(seconds=DEFAULT_JOB_DURATION_SECONDS + 1)
+    for _ in range(3):
+        next_poll_time = record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=poll_time)
+        delays_list.append((next_poll_time - poll_time).total_seconds())
+        poll_time = next_poll_time
+
+    assert delays_list == [
+        MIN_POLL_INTERVAL_SECONDS,
+        MIN_POLL_INTERVAL_SECONDS * 1.5,
+        MIN_POLL_INTERVAL_SECONDS * 1.5 ** 2,
+    ]
+
+
+def test_terminal_status_clears_the_case_and_records_the_job_duration():
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=NOW)
+
+    assert record_case_poll(CASE_ID, PANEL_NAME, "1", "complete", "SUCCEEDED", now=NOW + timedelta(hours=2)) is None
+    assert get_case_poll_state(CASE_ID) is None
+    assert get_panel_job_durations(PANEL_NAME) == [2 * 60 * 60]
+
+
+def test_failed_job_duration_is_not_recorded():
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "running", "RUNNING", now=NOW)
+    record_case_poll(CASE_ID, PANEL_NAME, "1", "failed", "FAILED", now=NOW + timedelta(hours=2))
+
+    assert get_case_poll_state(CASE_ID) is None
+    assert get_panel_job_durations(PANEL_NAME) == []
+
+
+def test_run_is_due_until_its_next_poll_time_is_recorded():
+    assert is_run_poll_due(PORTAL_RUN_ID, NOW)
+
+    next_poll_time = NOW + timedelta(seconds=MIN_POLL_INTERVAL_SECONDS)
+    record_run_next_poll_time(PORTAL_RUN_ID, next_poll_time)
+
+    assert not is_run_poll_due(PORTAL_RUN_ID, NOW)
+    assert is_run_poll_due(PORTAL_RUN_ID, next_poll_time)
+
+    # The case has reached a terminal status
+    record_run_next_poll_time(PORTAL_RUN_ID, None)
+
+    assert is_run_poll_due(PORTAL_RUN_ID, NOW)
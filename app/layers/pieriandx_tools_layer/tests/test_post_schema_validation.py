@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the packing of post schema validation failures into comments
+
+Failures were previously posted as a summary comment plus one comment per failure,
+the packed comments must hold every failure, in order, within the comment length limit.
+"""
+
+# Standard imports
+import re
+import sys
+from os import environ
+from pathlib import Path
+from threading import Lock
+from typing import List
+
+import pytest
+
+# Globals
+LAMBDA_DIR = Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "post_schema_validation_py"
+
+sys.path.insert(0, str(LAMBDA_DIR))
+environ.setdefault("WORKFLOW_NAME", "pieriandx-tso500-ctdna")
+
+# Local imports
+import post_schema_validation  # noqa: E402
+from post_schema_validation import MAX_COMMENT_LENGTH, REQUIRED_TAG_FIELDS  # noqa: E402
+
+WORKFLOW_RUN_ID = "wfr.01J5M2JFE1JPYV62RYQEG99CP5"
+EXECUTION_ARN = (
+    "arn:aws:states:ap-southeast-2:123456789012:execution:"
+    "pieriandxPostSchemaValidationSfn:01J5M2JFE1JPYV62RYQEG99CP5"
+)
+FOOTER = f"---\nStep Functions Execution: {EXECUTION_ARN}"
+
+VALID_TAGS = {
+    "libraryId": "L2400001",
+    "subjectId": "SBJ00001",
+    "individualId": "SBJ00001",
+    "projectId": "PRJ00001",
+    "fastqRgidList": ["GACTGAGTAG+CACTATCAAC.1"],
+    "panelVersion": "main",
+    "instrumentRunId": "20240411_A00123_0001_BHJGJFDS",
+    "isIdentified": False,
+    "sampleType": "patientcare",
+}
+
+
+class CommentRecorder:
+    def __init__(self):
+        self.comments: List[str] = []
+        self.failing_comment_idx: List[int] = []
+        self._lock = Lock()
+
+    def add_comment_to_workflow_run(self, workflow_run_orcabus_id: str, comment: str, author: str):
+        assert workflow_run_orcabus_id == WORKFLOW_RUN_ID
+        with self._lock:
+            self.comments.append(comment)
+            comment_idx = len(self.comments) - 1
+        if comment_idx in self.failing_comment_idx:
+            raise ConnectionError("Workflow manager is unavailable")
+
+
+@pytest.fixture
+def comment_recorder(monkeypatch) -> CommentRecorder:
+    comment_recorder = CommentRecorder()
+    monkeypatch.setattr(
+        post_schema_validation, "add_comment_to_workflow_run", comment_recorder.add_comment_to_workflow_run
+    )
+    return comment_recorder
+
+
+def get_failures(count: int, length: int = 80) -> List[str]:
+    return [
+        f"data.inputs.dataFiles.file{idx} is missing or null".ljust(length, ".")
+        for idx in range(1, count + 1)
+    ]
+
+
+def get_reason_lines(comments: List[str]) -> List[str]:
+    return [
+        reason_line
+        for comment in comments
+        for reason_line in comment.split("\n")
+        if re.match(r"Reason \d+ of \d+: ", reason_line)
+    ]
+
+
+def test_single_failure_is_posted_as_one_comment(comment_recorder):
+    comment_stats = post_schema_validation._post_failure_comments(WORKFLOW_RUN_ID, get_failures(1), EXECUTION_ARN)
+
+    assert comment_stats == {"commentCount": 1, "commentCallsSaved": 0}
+    assert comment_recorder.comments == [f"Post schema validation failed: {get_failures(1)[0]}\n{FOOTER}"]
+
+
+@pytest.mark.parametrize("failure_count,failure_length", [
+    (2, 80),
+    (15, 80),
+    (15, 400),
+    (60, 120),
+])
+def test_failures_are_packed_into_comments_in_order(comment_recorder, failure_count, failure_length):
+    failures = get_failures(failure_count, failure_length)
+
+    comment_stats = post_schema_validation._post_failure_comments(WORKFLOW_RUN_ID, failures, EXECUTION_ARN)
+
+    # The summary is posted first
+    assert comment_recorder.comments[0].startswith(f"Post schema validation failed for {failure_count} reasons\n")
+
+    for comment in comment_recorder.comments:
+        assert len(comment) <= MAX_COMMENT_LENGTH
+        assert comment.endswith(f"\n{FOOTER}")
+        assert "[truncated" not in comment
+
+    # Every failure is posted once, later comments may be posted in any order
+    assert sorted(get_reason_lines(comment_recorder.comments), key=lambda line: int(line.split()[1])) == [
+        f"Reason {idx} of {failure_count}: {failure}"
+        for idx, failure in enumerate(failures, start=1)
+    ]
+
+    assert comment_stats["commentCount"] == len(comment_recorder.comments)
+    assert comment_stats["commentCount"] < failure_count + 1
+    assert comment_stats["commentCallsSaved"] == failure_count + 1 - comment_stats["commentCount"]
+
+
+def test_15_short_failures_fit_in_two_comments(comment_recorder):
+    comment_stats = post_schema_validation._post_failure_comments(WORKFLOW_RUN_ID, get_failures(15), EXECUTION_ARN)
+
+    assert comment_stats == {"commentCount": 2, "commentCallsSaved": 14}
+
+
+def test_failure_too_long_for_a_comment_is_truncated(comment_recorder):
+    failures = get_failures(2, 2 * MAX_COMMENT_LENGTH)
+
+    post_schema_validation._post_failure_comments(WORKFLOW_RUN_ID, failures, EXECUTION_ARN)
+
+    # The summary, then one truncated comment per failure
+    assert len(comment_recorder.comments) == 3
+    assert all(len(comment) <= MAX_COMMENT_LENGTH for comment in comment_recorder.comments)
+    assert all("[truncated" in comment for comment in comment_recorder.comments[1:])
+
+
+def test_failed_comment_post_is_raised_after_the_others_are_posted(comment_recorder):
+    comment_recorder.failing_comment_idx.append(1)
+
+    with pytest.raises(Exception, match=r"Failed to post 1 of \d+ comment\(s\)"):
+        post_schema_validation._post_failure_comments(WORKFLOW_RUN_ID, get_failures(60, 120), EXECUTION_ARN)
+
+    assert len(comment_recorder.comments) > 2
+
+
+def test_handler_returns_the_comment_stats(comment_recorder):
+    validation_response = post_schema_validation.handler(
+        {"workflowRunId": WORKFLOW_RUN_ID, "data": {"tags": {"sampleType": None}}, "executionArn": EXECUTION_ARN},
+        None
+    )
+
+    assert validation_response == {
+        "isValid": False,
+        "commentCount": len(comment_recorder.comments),
+        "commentCallsSaved": len(REQUIRED_TAG_FIELDS) + 1 - len(comment_recorder.comments),
+    }
+    assert len(get_reason_lines(comment_recorder.comments)) == len(REQUIRED_TAG_FIELDS)
+
+
+def test_valid_payload_posts_no_comments(comment_recorder):
+    validation_response = post_schema_validation.handler(
+        {"workflowRunId": WORKFLOW_RUN_ID, "data": {"tags": VALID_TAGS}, "executionArn": EXECUTION_ARN},
+        None
+    )
+
+    assert validation_response == {"isValid": True}
+    assert comment_recorder.comments == []
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the shared PierianDx API rate limit token bucket
+"""
+
+# Standard imports
+import logging
+from typing import List
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# Local imports
+from pieriandx_tools.aws_helpers import dynamodb_helpers
+from pieriandx_tools.pieriandx_helpers import rate_limit_helpers
+from pieriandx_tools.pieriandx_helpers.rate_limit_helpers import (
+    RateLimitExceededError,
+    take_token,
+    wait_for_token,
+)
+
+
+@pytest.fixture
+def now(monkeypatch) -> List[float]:
+    """
+    Freeze the bucket's clock, append to the list to move it on
+    """
+    now_list = [1000.0]
+    monkeypatch.setattr(rate_limit_helpers, "time", lambda: now_list[-1])
+    return now_list
+
+
+@pytest.fixture
+def token_waits(monkeypatch) -> List[float]:
+    """
+    Record the waits for tokens rather than sleeping through them
+    """
+    waits_list: List[float] = []
+    monkeypatch.setattr(rate_limit_helpers, "sleep", waits_list.append)
+    return waits_list
+
+
+def test_burst_is_sent_without_waiting(now):
+    assert [take_token(2.0, 3.0, 60.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_calls_past_the_burst_wait_in_turn(now):
+    for _ in range(3):
+        take_token(2.0, 3.0, 60.0)
+
+    assert take_token(2.0, 3.0, 60.0) == 0.5
+    assert take_token(2.0, 3.0, 60.0) == 1.0
+
+
+def test_bucket_refills(now):
+    for _ in range(3):
+        take_token(2.0, 3.0, 60.0)
+
+    now.append(now[-1] + 1.0)
+
+    assert take_token(2.0, 3.0, 60.0) == 0.0
+    assert take_token(2.0, 3.0, 60.0) == 0.0
+    assert take_token(2.0, 3.0, 60.0) == 0.5
+
+
+def test_call_over_the_max_wait_does_not_take_a_token(now):
+    take_token(1.0, 1.0, 60.0)
+    take_token(1.0, 1.0, 60.0)
+
+    with pytest.raises(RateLimitExceededError):
+        take_token(1.0, 1.0, 1.5)
+
+    # The refused call is not queued ahead of the next one
+    assert take_token(1.0, 1.0, 60.0) == 2.0
+
+
+def test_wait_for_token_sleeps_until_the_token_is_refilled(monkeypatch, now, token_waits):
+    monkeypatch.setenv("PIERIANDX_API_RATE_LIMIT_PER_SECOND", "4")
+    monkeypatch.setenv("PIERIANDX_API_RATE_LIMIT_BURST", "1")
+
+    wait_for_token()
+    wait_for_token()
+
+    assert token_waits == [0.25]
+
+
+def test_rate_limit_can_be_turned_off(monkeypatch, token_waits, local_state_table):
+    monkeypatch.setenv("PIERIANDX_API_RATE_LIMIT_PER_SECOND", "0")
+
+    for _ in range(100):
+        wait_for_token()
+
+    assert token_waits == []
+    assert len(local_state_table) == 0
+
+
+@pytest.mark.parametrize("bucket_error", [
+    dynamodb_helpers.StateItemConditionFailedError("Could not update the bucket"),
+    ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem"),
+    EndpointConnectionError(endpoint_url="https://dynamodb.ap-southeast-2.amazonaws.com"),
+])
+def test_call_is_sent_when_the_bucket_cannot_be_updated(monkeypatch, token_waits, bucket_error):
+    def update_state_item(*args, **kwargs):
+        raise bucket_error
+
+    monkeypatch.setattr(rate_limit_helpers, "update_state_item", update_state_item)
+
+    wait_for_token()
+
+    assert token_waits == []
+
+
+def test_local_bucket_in_a_lambda_is_logged_once(monkeypatch, caplog, now, token_waits):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "generatePieriandxObjects")
+    monkeypatch.setattr(rate_limit_helpers, "LOCAL_BUCKET_LOGGED", False)
+
+    with caplog.at_level(logging.ERROR, logger=rate_limit_helpers.logger.name):
+        wait_for_token()
+        wait_for_token()
+
+    assert [
+        record.getMessage() for record in caplog.records
+        if "PIERIANDX_STATE_TABLE_NAME is not set" in record.getMessage()
+    ] == [
+        "PIERIANDX_STATE_TABLE_NAME is not set for lambda generatePieriandxObjects, "
+        "PierianDx API calls are only rate limited within this lambda instance"
+    ]
+
+
+def test_local_bucket_outside_a_lambda_is_not_logged(monkeypatch, caplog, now, token_waits):
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    monkeypatch.setattr(rate_limit_helpers, "LOCAL_BUCKET_LOGGED", False)
+
+    with caplog.at_level(logging.ERROR, logger=rate_limit_helpers.logger.name):
+        wait_for_token()
+
+    assert caplog.records == []
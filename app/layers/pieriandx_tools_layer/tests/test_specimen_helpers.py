@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the specimen type index
+
+The specimen label was previously looked up by querying the specimen tree dataframe,
+the index must return the same label for every code that the query found exactly once.
+"""
+
+# Standard imports
+import json
+
+import pandas as pd
+import pytest
+
+# Local imports
+from pieriandx_tools.pieriandx_lookup import get_records_from_json, specimen_helpers
+from pieriandx_tools.pieriandx_lookup.specimen_helpers import (
+    get_specimen_label_from_specimen_code,
+    get_specimen_type_index,
+)
+
+SPECIMEN_TREE_RECORDS = [
+    {"Code": 119297000, "CodeSystem": "SNOMEDCT", "CodeLabel": "Blood specimen"},
+    {"Code": 122555007, "CodeSystem": "SNOMEDCT", "CodeLabel": "Venous blood specimen"},
+    {"Code": 258580003, "CodeSystem": "SNOMEDCT", "CodeLabel": "Whole blood sample"},
+    # Ambiguous
+    {"Code": 258580003, "CodeSystem": "SNOMEDCT", "CodeLabel": "Whole blood specimen"},
+    # Not a code
+    {"Code": None, "CodeSystem": "SNOMEDCT", "CodeLabel": "Specimen type"},
+]
+
+
+@pytest.fixture(autouse=True)
+def specimen_tree(monkeypatch):
+    """
+    Start each test from the specimen tree records, without an index
+    """
+    monkeypatch.setattr(specimen_helpers, "SNOMED_CT_SPECIMEN_TYPE_RECORDS", SPECIMEN_TREE_RECORDS)
+    monkeypatch.setattr(specimen_helpers, "SNOMED_CT_SPECIMEN_TYPE_INDEX", None)
+    monkeypatch.setattr(specimen_helpers, "SNOMED_CT_SPECIMEN_TYPE_DF", None)
+
+
+def get_old_specimen_label_from_specimen_code(specimen_code: int) -> str:
+    query_df = pd.DataFrame(SPECIMEN_TREE_RECORDS).query(f"Code=={specimen_code}")
+    assert query_df.shape[0] == 1, f"Failed to get specimen code {specimen_code}"
+    return query_df['CodeLabel'].item()
+
+
+@pytest.mark.parametrize("specimen_code", [119297000, 122555007])
+def test_label_matches_the_dataframe_query(specimen_code):
+    assert get_specimen_label_from_specimen_code(specimen_code) == get_old_specimen_label_from_specimen_code(
+        specimen_code
+    )
+
+
+def test_codes_are_looked_up_as_integers():
+    assert get_specimen_label_from_specimen_code("119297000") == "Blood specimen"
+
+
+@pytest.mark.parametrize("specimen_code", [
+    # Ambiguous
+    258580003,
+    # Unknown
+    1,
+])
+def test_codes_the_dataframe_query_rejects_are_rejected(specimen_code):
+    with pytest.raises(AssertionError):
+        get_old_specimen_label_from_specimen_code(specimen_code)
+
+    with pytest.raises(ValueError):
+        get_specimen_label_from_specimen_code(specimen_code)
+
+
+def test_index_leaves_out_ambiguous_codes_and_records_without_a_code():
+    assert get_specimen_type_index() == {
+        119297000: "Blood specimen",
+        122555007: "Venous blood specimen",
+    }
+
+
+def test_index_is_built_once(monkeypatch):
+    specimen_type_index = get_specimen_type_index()
+
+    monkeypatch.setattr(specimen_helpers, "SNOMED_CT_SPECIMEN_TYPE_RECORDS", [])
+
+    assert get_specimen_type_index() is specimen_type_index
+
+
+def test_column_oriented_tree_gives_the_same_index(monkeypatch):
+    # As written by pandas' to_json
+    column_oriented_tree = json.loads(pd.DataFrame(SPECIMEN_TREE_RECORDS).to_json())
+    monkeypatch.setattr(
+        specimen_helpers, "SNOMED_CT_SPECIMEN_TYPE_RECORDS", get_records_from_json(column_oriented_tree)
+    )
+
+    assert get_specimen_type_index() == {
+        119297000: "Blood specimen",
+        122555007: "Venous blood specimen",
+    }
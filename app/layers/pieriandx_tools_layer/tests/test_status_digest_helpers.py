@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the case status digests
+"""
+
+# Standard imports
+from time import time
+
+# Local imports
+from pieriandx_tools.aws_helpers import dynamodb_helpers
+from pieriandx_tools.pieriandx_helpers.status_digest_helpers import (
+    get_cached_case_status,
+    get_case_status_digest,
+    save_case_status_digest,
+)
+
+CASE_ID = "12345"
+CASE_STATUS = {
+    "informaticsjobId": 2,
+    "jobStatus": "complete",
+    "status": "RUNNING",
+    "reportId": 7,
+    "statusChanged": True,
+}
+
+
+def get_case_data(job_status: str = "complete", report_status: str = "waiting"):
+    return {
+        "id": CASE_ID,
+        "specimens": [{"accessionNumber": "L2400001_001"}],
+        "informaticsJobs": [{"id": "1", "status": "failed"}, {"id": "2", "status": job_status}],
+        "reports": [{"id": "7", "status": report_status}],
+    }
+
+
+def test_digest_only_covers_job_and_report_statuses():
+    case_data = get_case_data()
+    reordered_case_data = {
+        **case_data,
+        "specimens": [{"accessionNumber": "L2400001_002"}],
+        "informaticsJobs": list(reversed(case_data["informaticsJobs"])),
+    }
+
+    assert get_case_status_digest(case_data) == get_case_status_digest(reordered_case_data)
+    assert get_case_status_digest(case_data) != get_case_status_digest(get_case_data(report_status="complete"))
+
+
+def test_saved_case_status_is_returned_while_the_digest_is_unchanged():
+    digest = get_case_status_digest(get_case_data())
+
+    assert get_cached_case_status(CASE_ID, digest) is None
+
+    save_case_status_digest(CASE_ID, digest, CASE_STATUS)
+
+    assert get_cached_case_status(CASE_ID, digest) == {
+        "informaticsjobId": 2,
+        "jobStatus": "complete",
+        "status": "RUNNING",
+        "reportId": 7,
+    }
+    assert get_cached_case_status(CASE_ID, get_case_status_digest(get_case_data(report_status="complete"))) is None
+
+
+def test_digest_is_kept_while_the_run_is_monitored(monkeypatch):
+    digest = get_case_status_digest(get_case_data())
+    save_case_status_digest(CASE_ID, digest, CASE_STATUS)
+
+    # An expired digest would be seen as a status change, and record a duplicate status transition
+    saved_time = time()
+    monkeypatch.setattr(dynamodb_helpers, "time", lambda: saved_time + 7 * 24 * 60 * 60)
+
+    assert get_cached_case_status(CASE_ID, digest) is not None
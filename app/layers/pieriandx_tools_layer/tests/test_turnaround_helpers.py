@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+"""
+Tests for writing transition records to the turnaround store
+"""
+
+# Standard imports
+import gzip
+import json
+from datetime import datetime, timezone
+
+# Local imports
+from pieriandx_tools.pieriandx_helpers.turnaround_helpers import (
+    TURNAROUND_STORE_URI_ENV_VAR,
+    get_transition_record,
+    write_transition_records,
+)
+
+
+def test_write_transition_records_as_gzipped_json_lines(monkeypatch, tmp_path):
+    monkeypatch.setenv(TURNAROUND_STORE_URI_ENV_VAR, str(tmp_path))
+    timestamp = datetime(2026, 10, 19, 1, 2, 3, tzinfo=timezone.utc)
+
+    output_path = write_transition_records([
+        get_transition_record("1", "2", "main", "running", "RUNNING", timestamp),
+        get_transition_record("1", "2", "main", "complete", "RUNNING", timestamp),
+    ])
+
+    assert output_path.startswith(str(tmp_path / "date=2026-10-19"))
+    assert output_path.endswith(".jsonl.gz")
+    with gzip.open(output_path, "rt") as records_h:
+        records_list = [json.loads(line) for line in records_h]
+    assert [record['jobStatus'] for record in records_list] == ["running", "complete"]
+    assert records_list[0]['timestamp'] == "2026-10-19T01:02:03+00:00"
+
+
+def test_write_no_transition_records(monkeypatch, tmp_path):
+    monkeypatch.setenv(TURNAROUND_STORE_URI_ENV_VAR, str(tmp_path))
+
+    assert write_transition_records([]) is None
+    assert list(tmp_path.iterdir()) == []
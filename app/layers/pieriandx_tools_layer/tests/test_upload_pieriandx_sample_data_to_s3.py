@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the upload_pieriandx_sample_data_to_s3 lambda
+
+The pieriandx bucket, the source buckets and the presigned urls are stood in for by an in-memory object store
+"""
+
+# Standard imports
+import gzip
+import hashlib
+import sys
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+# Globals
+LAMBDA_DIR = (
+    Path(__file__).absolute().parent.parent.parent.parent / "lambdas" / "upload_pieriandx_sample_data_to_s3_py"
+)
+
+sys.path.insert(0, str(LAMBDA_DIR))
+
+# Local imports
+import upload_pieriandx_sample_data_to_s3  # noqa: E402
+from pieriandx_tools.aws_helpers import s3_helpers  # noqa: E402
+from pieriandx_tools.utils.stream_helpers import ChecksumReader  # noqa: E402
+
+SRC_BUCKET = "pipeline-cache"
+DEST_BUCKET = "pdx-xfer"
+CONTENTS = b"Sample\tMetric\nL2400001\t0.5\n" * 1000
+
+
+class FakeS3:
+    """
+    An in-memory object store, standing in for both the source buckets and the pieriandx bucket
+    """
+    def __init__(self):
+        self.objects: Dict[str, Dict] = {}
+        self.denied_buckets: List[str] = []
+        self.failing_dest_keys: List[str] = []
+        self.calls: List[str] = []
+        self.bytes_read_by_url: Dict[str, int] = {}
+
+    def put(
+            self,
+            bucket: str,
+            key: str,
+            body: bytes,
+            metadata: Optional[Dict[str, str]] = None,
+            etag: Optional[str] = None,
+            server_side_encryption: str = "AES256"
+    ):
+        self.objects[f"s3://{bucket}/{key.lstrip('/')}"] = {
+            "Body": body,
+            "Metadata": metadata or {},
+            "ETag": f'"{etag or hashlib.md5(body).hexdigest()}"',
+            "ServerSideEncryption": server_side_encryption,
+        }
+
+    def head_object(self, bucket: str, key: str) -> Optional[Dict]:
+        self.calls.append(f"head {bucket}")
+        if bucket in self.denied_buckets:
+            raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+        s3_object = self.objects.get(f"s3://{bucket}/{key.lstrip('/')}")
+        if s3_object is None:
+            return None
+        return {
+            "ContentLength": len(s3_object["Body"]),
+            **{k: v for k, v in s3_object.items() if k != "Body"}
+        }
+
+    def get_object_metadata(self, bucket: str, key: str) -> Optional[Dict[str, str]]:
+        s3_object = self.head_object(bucket, key)
+        return s3_object["Metadata"] if s3_object is not None else None
+
+    def get_object_md5sum(self, bucket: str, key: str) -> str:
+        self.calls.append(f"md5sum {bucket}")
+        return hashlib.md5(self.objects[f"s3://{bucket}/{key.lstrip('/')}"]["Body"]).hexdigest()
+
+    def copy_object(self, src_bucket, src_key, dest_bucket, dest_key, metadata=None):
+        self.calls.append(f"copy {dest_key.lstrip('/')}")
+        if dest_key.lstrip("/") in self.failing_dest_keys:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "CopyObject")
+        self.put(
+            dest_bucket, dest_key,
+            self.objects[f"s3://{src_bucket}/{src_key.lstrip('/')}"]["Body"],
+            metadata=metadata
+        )
+
+    def upload_fileobj(self, bucket, key, fileobj, metadata=None):
+        self.calls.append(f"upload {key.lstrip('/')}")
+        if key.lstrip("/") in self.failing_dest_keys:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "PutObject")
+        # Read in parts, as the managed transfer does
+        body_chunks_list = []
+        while len(chunk := fileobj.read(1024)) > 0:
+            body_chunks_list.append(chunk)
+        self.put(bucket, key, b"".join(body_chunks_list), metadata=metadata)
+
+    def get_presigned_url(self, s3_uri: str) -> str:
+        return f"https://presigned/{s3_uri}"
+
+    def requests_get(self, url: str, stream: bool = False):
+        s3_object = self.objects[url.removeprefix("https://presigned/")]
+        fake_s3 = self
+
+        class CountingBytesIO(BytesIO):
+            def read(self, size=-1):
+                chunk = super().read(size)
+                fake_s3.bytes_read_by_url[url] = fake_s3.bytes_read_by_url.get(url, 0) + len(chunk)
+                return chunk
+
+        class FakeResponse:
+            headers = {"ETag": s3_object["ETag"]}
+            raw = CountingBytesIO(s3_object["Body"])
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def raise_for_status(self):
+                pass
+
+        return FakeResponse()
+
+
+@pytest.fixture
+def fake_s3(monkeypatch) -> FakeS3:
+    fake_s3 = FakeS3()
+    for attr, value in [
+        ("get_pieriandx_s3_client", lambda: None),
+        ("head_object_with_pieriandx_client", fake_s3.head_object),
+        ("get_pieriandx_object_metadata", fake_s3.get_object_metadata),
+        ("get_object_md5sum_with_pieriandx_client", fake_s3.get_object_md5sum),
+        ("copy_object_into_pieriandx_bucket", fake_s3.copy_object),
+        ("upload_fileobj", fake_s3.upload_fileobj),
+        ("get_presigned_url", fake_s3.get_presigned_url),
+        ("get_s3_object_id_from_s3_uri", lambda s3_uri: s3_uri),
+        ("SERVER_SIDE_COPY_DENIED_BUCKETS", set()),
+    ]:
+        monkeypatch.setattr(upload_pieriandx_sample_data_to_s3, attr, value)
+    monkeypatch.setattr(upload_pieriandx_sample_data_to_s3.requests, "get", fake_s3.requests_get)
+    return fake_s3
+
+
+def get_data_file(name: str, **kwargs) -> Dict:
+    return {
+        "srcUri": f"s3://{SRC_BUCKET}/Results/{name}",
+        "destUri": f"s3://{DEST_BUCKET}/melbourne/case/{name}",
+        "needsDecompression": False,
+        "contents": None,
+        **kwargs
+    }
+
+
+def test_checksum_reader_counts_and_hashes_the_bytes_read():
+    src_reader = ChecksumReader(BytesIO(CONTENTS))
+
+    while len(src_reader.read(1000)) > 0:
+        pass
+
+    assert src_reader.bytes_read == len(CONTENTS)
+    assert src_reader.hexdigest() == hashlib.md5(CONTENTS).hexdigest()
+
+
+@pytest.mark.parametrize("needs_decompression", [False, True])
+def test_streamed_file_reports_the_md5sum_of_the_uploaded_bytes(fake_s3, needs_decompression):
+    fake_s3.denied_buckets.append(SRC_BUCKET)
+    fake_s3.put(SRC_BUCKET, "Results/L2400001.tsv", gzip.compress(CONTENTS) if needs_decompression else CONTENTS)
+
+    upload_result = upload_pieriandx_sample_data_to_s3.handler(
+        get_data_file("L2400001.tsv", needsDecompression=needs_decompression), None
+    )["uploadResultsList"][0]
+
+    assert upload_result["transferMode"] == "stream"
+    assert upload_result["bytesTransferred"] == len(CONTENTS)
+    assert upload_result["md5sum"] == hashlib.md5(CONTENTS).hexdigest()
+    assert fake_s3.objects[f"s3://{DEST_BUCKET}/melbourne/case/L2400001.tsv"]["Body"] == CONTENTS
+
+
+@pytest.mark.parametrize("metadata,etag,server_side_encryption,expected_md5sum_source", [
+    # Single part upload, the etag is the md5sum
+    ({}, None, "AES256", "etag"),
+    # Multipart upload, with the md5sum in the metadata
+    ({"md5sum": hashlib.md5(CONTENTS).hexdigest()}, "0123456789abcdef0123456789abcdef-2", "AES256", "metadata"),
+    # Multipart upload, without the md5sum in the metadata
+    ({}, "0123456789abcdef0123456789abcdef-2", "AES256", "computed"),
+    # SSE-KMS, the etag is not the md5sum
+    ({}, "0123456789abcdef0123456789abcdef", "aws:kms", "computed"),
+])
+def test_copied_file_reports_the_md5sum_of_the_source(
+        fake_s3, metadata, etag, server_side_encryption, expected_md5sum_source
+):
+    fake_s3.put(
+        SRC_BUCKET, "Results/L2400001.tsv", CONTENTS,
+        metadata=metadata, etag=etag, server_side_encryption=server_side_encryption
+    )
+
+    upload_result = upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)[
+        "uploadResultsList"
+    ][0]
+
+    assert upload_result["transferMode"] == "copy"
+    assert upload_result["md5sum"] == hashlib.md5(CONTENTS).hexdigest()
+    assert (f"md5sum {SRC_BUCKET}" in fake_s3.calls) == (expected_md5sum_source == "computed")
+    assert fake_s3.objects[f"s3://{DEST_BUCKET}/melbourne/case/L2400001.tsv"]["Metadata"] == {
+        "src-etag": fake_s3.objects[f"s3://{SRC_BUCKET}/Results/L2400001.tsv"]["ETag"].strip('"'),
+        "md5sum": hashlib.md5(CONTENTS).hexdigest(),
+    }
+
+
+@pytest.mark.parametrize("copy_denied", [False, True], ids=["copy", "stream"])
+def test_unchanged_file_is_skipped(fake_s3, copy_denied):
+    if copy_denied:
+        fake_s3.denied_buckets.append(SRC_BUCKET)
+    fake_s3.put(SRC_BUCKET, "Results/L2400001.tsv", CONTENTS, etag="0123456789abcdef0123456789abcdef-2")
+
+    first_upload_result = upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)
+    fake_s3.calls.clear()
+    fake_s3.bytes_read_by_url.clear()
+    second_upload_result = upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)
+
+    assert first_upload_result["uploadedCount"] == 1
+    assert second_upload_result["skippedCount"] == 1
+    assert second_upload_result["uploadResultsList"][0]["transferMode"] == "none"
+    assert second_upload_result["totalBytesTransferred"] == 0
+    assert not any(
+        call_iter.startswith(("copy", "upload", "md5sum"))
+        for call_iter in fake_s3.calls
+    )
+    # Only the headers of the presigned url are read
+    assert sum(fake_s3.bytes_read_by_url.values()) == 0
+
+    if not copy_denied:
+        # Skipped copies report the md5sum of the previous copy
+        assert second_upload_result["uploadResultsList"][0]["md5sum"] == hashlib.md5(CONTENTS).hexdigest()
+
+
+def test_changed_file_is_uploaded_again(fake_s3):
+    fake_s3.put(SRC_BUCKET, "Results/L2400001.tsv", CONTENTS)
+    upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)
+
+    fake_s3.put(SRC_BUCKET, "Results/L2400001.tsv", CONTENTS + b"L2400002\t0.6\n")
+
+    assert upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)["uploadedCount"] == 1
+
+
+@pytest.mark.parametrize("force_upload,expected_uploaded_count", [(False, 0), (True, 1)])
+def test_unchanged_contents_are_skipped_unless_forced(fake_s3, force_upload, expected_uploaded_count):
+    data_file = get_data_file("L2400001.json", srcUri=None, contents='{"msi": 0.5}')
+    upload_pieriandx_sample_data_to_s3.handler(data_file, None)
+
+    upload_result = upload_pieriandx_sample_data_to_s3.handler({**data_file, "forceUpload": force_upload}, None)
+
+    assert upload_result["uploadedCount"] == expected_uploaded_count
+    assert upload_result["uploadResultsList"][0]["md5sum"] == hashlib.md5(b'{"msi": 0.5}').hexdigest()
+
+
+def test_copy_that_fails_on_the_client_side_falls_back_to_streaming(fake_s3, monkeypatch):
+    def failing_copy(*args, **kwargs):
+        raise EndpointConnectionError(endpoint_url=f"https://{DEST_BUCKET}.s3.amazonaws.com")
+
+    monkeypatch.setattr(upload_pieriandx_sample_data_to_s3, "copy_object_into_pieriandx_bucket", failing_copy)
+    fake_s3.put(SRC_BUCKET, "Results/L2400001.tsv", CONTENTS)
+
+    upload_result = upload_pieriandx_sample_data_to_s3.handler(get_data_file("L2400001.tsv"), None)
+
+    assert upload_result["uploadResultsList"][0]["transferMode"] == "stream"
+    # The next file tries a server-side copy again
+    assert SRC_BUCKET not in upload_pieriandx_sample_data_to_s3.SERVER_SIDE_COPY_DENIED_BUCKETS
+
+
+def test_failed_files_are_reported_together_after_every_file_is_attempted(fake_s3):
+    data_files_list = [get_data_file(f"L240000{idx}.tsv") for idx in range(1, 6)]
+    for data_file in data_files_list:
+        fake_s3.put(SRC_BUCKET, data_file["srcUri"].removeprefix(f"s3://{SRC_BUCKET}/"), CONTENTS)
+    fake_s3.failing_dest_keys.extend(["melbourne/case/L2400002.tsv", "melbourne/case/L2400004.tsv"])
+
+    with pytest.raises(Exception) as exc_info:
+        upload_pieriandx_sample_data_to_s3.handler({"dataFiles": data_files_list, "maxConcurrency": 3}, None)
+
+    assert str(exc_info.value).startswith("Failed to upload 2 data file(s)")
+    assert data_files_list[1]["destUri"] in str(exc_info.value)
+    assert data_files_list[3]["destUri"] in str(exc_info.value)
+    # The other files are still uploaded
+    assert all(
+        f"s3://{DEST_BUCKET}/melbourne/case/L240000{idx}.tsv" in fake_s3.objects
+        for idx in [1, 3, 5]
+    )
+
+
+def test_results_are_returned_in_the_input_order(fake_s3):
+    data_files_list = [get_data_file(f"L240000{idx}.tsv") for idx in range(1, 6)]
+    for idx, data_file in enumerate(data_files_list):
+        fake_s3.put(SRC_BUCKET, data_file["srcUri"].removeprefix(f"s3://{SRC_BUCKET}/"), CONTENTS * (5 - idx))
+
+    upload_result = upload_pieriandx_sample_data_to_s3.handler(
+        {"dataFiles": data_files_list, "maxConcurrency": 5}, None
+    )
+
+    assert [
+        upload_result_iter["destUri"]
+        for upload_result_iter in upload_result["uploadResultsList"]
+    ] == [data_file["destUri"] for data_file in data_files_list]
+    assert upload_result["totalBytesTransferred"] == len(CONTENTS) * 15
+
+
+def test_object_md5sum_is_computed_by_streaming_the_object(monkeypatch):
+    s3_client = boto3.client(
+        "s3", region_name="ap-southeast-2",
+        aws_access_key_id="testing", aws_secret_access_key="testing"
+    )
+    monkeypatch.setattr(s3_helpers, "PIERIANDX_S3_CLIENT", s3_client)
+    monkeypatch.setattr(s3_helpers, "MD5SUM_READ_CHUNK_SIZE", 1000)
+
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            "get_object",
+            {"Body": StreamingBody(BytesIO(CONTENTS), len(CONTENTS))},
+            {"Bucket": SRC_BUCKET, "Key": "Results/L2400001.tsv"},
+        )
+        assert s3_helpers.get_object_md5sum_with_pieriandx_client(
+            SRC_BUCKET, "/Results/L2400001.tsv"
+        ) == hashlib.md5(CONTENTS).hexdigest()
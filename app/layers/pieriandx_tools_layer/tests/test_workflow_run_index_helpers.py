@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Tests for the workflow run index
+"""
+
+# Standard imports
+from time import time
+
+# Local imports
+from pieriandx_tools.aws_helpers.dynamodb_helpers import put_state_item
+from pieriandx_tools.utils import workflow_run_index_helpers
+from pieriandx_tools.utils.workflow_run_index_helpers import (
+    WORKFLOW_RUN_INDEX_RESEED_SECONDS,
+    WORKFLOW_RUN_INDEX_SK,
+    get_indexed_workflow_runs_by_status,
+    get_most_recently_changed_active_run,
+    get_workflow_run_index,
+    get_workflow_run_index_pk,
+    update_workflow_run_index,
+)
+
+WORKFLOW_NAME = "pieriandx-tso500-ctdna"
+LIBRARY_ID = "L2400001"
+
+
+def get_workflow_run_state_change(orcabus_id: str, status: str, timestamp: str):
+    """
+    A workflow run state change event detail
+    """
+    return {
+        "orcabusId": orcabus_id,
+        "portalRunId": f"20261019{orcabus_id[-4:]}",
+        "workflowRunName": None,
+        "workflow": {"name": WORKFLOW_NAME, "version": "2.1.0"},
+        "libraries": [{"orcabusId": "lib.01", "libraryId": LIBRARY_ID}],
+        "status": status,
+        "timestamp": timestamp,
+    }
+
+
+def get_orcabus_ids(index_data, status=None):
+    return [
+        workflow_run['orcabusId']
+        for workflow_run in get_indexed_workflow_runs_by_status(index_data, status)
+    ]
+
+
+def test_index_is_not_used_until_seeded():
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [
+        get_workflow_run_state_change("wfr.0001", "DRAFT", "2026-10-19T00:00:00Z"),
+    ])
+
+    assert get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID) is None
+
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [], is_complete=True)
+
+    assert get_orcabus_ids(get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID)) == ["wfr.0001"]
+
+
+def test_seed_expires(monkeypatch):
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [
+        get_workflow_run_state_change("wfr.0001", "DRAFT", "2026-10-19T00:00:00Z"),
+    ], is_complete=True)
+    seeded_time = time()
+
+    monkeypatch.setattr(
+        workflow_run_index_helpers, "time", lambda: seeded_time + WORKFLOW_RUN_INDEX_RESEED_SECONDS + 1
+    )
+
+    # State change events do not renew the seed
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [
+        get_workflow_run_state_change("wfr.0001", "READY", "2026-10-19T01:00:00Z"),
+    ])
+    assert get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID) is None
+
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [], is_complete=True)
+    assert get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID) is not None
+
+
+def test_index_seeded_before_seeded_at_is_reseeded():
+    put_state_item(
+        get_workflow_run_index_pk(WORKFLOW_NAME, LIBRARY_ID), WORKFLOW_RUN_INDEX_SK,
+        {"isComplete": True, "runs": {}, "statusIndex": {}, "activeStateChanges": []},
+    )
+
+    assert get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID) is None
+
+
+def test_out_of_order_state_changes_are_ignored():
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [
+        get_workflow_run_state_change("wfr.0001", "SUCCEEDED", "2026-10-19T02:00:00Z"),
+        get_workflow_run_state_change("wfr.0001", "RUNNING", "2026-10-19T01:00:00+00:00"),
+    ], is_complete=True)
+
+    index_data = get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID)
+    assert get_orcabus_ids(index_data, "SUCCEEDED") == ["wfr.0001"]
+    assert get_orcabus_ids(index_data, "RUNNING") == []
+
+
+def test_latest_runs_by_status_and_most_recent_active_run():
+    update_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID, [
+        get_workflow_run_state_change("wfr.0001", "SUCCEEDED", "2026-10-19T01:00:00Z"),
+        get_workflow_run_state_change("wfr.0002", "SUCCEEDED", "2026-10-19T02:00:00Z"),
+        get_workflow_run_state_change("wfr.0003", "DRAFT", "2026-10-19T03:00:00Z"),
+        get_workflow_run_state_change("wfr.0004", "FAILED", "2026-10-19T04:00:00Z"),
+    ], is_complete=True)
+
+    index_data = get_workflow_run_index(WORKFLOW_NAME, LIBRARY_ID)
+    assert get_orcabus_ids(index_data, "SUCCEEDED") == ["wfr.0002", "wfr.0001"]
+    assert get_orcabus_ids(index_data) == ["wfr.0004", "wfr.0003", "wfr.0002", "wfr.0001"]
+    # Failed runs are not active
+    assert get_most_recently_changed_active_run(index_data)['orcabusId'] == "wfr.0003"
@@ -30,6 +30,7 @@ import {
   SSM_PARAMETER_PATH_S3_SPECIMEN_TYPE_MAP,
   SSM_PARAMETER_PATH_SEQUENCER_ROOT,
   SSM_PARAMETER_PATH_WORKFLOW_NAME,
+  STATE_TABLE_NAME,
   USER_EMAIL,
   WORKFLOW_NAME,
 } from './constants';
@@ -112,6 +113,9 @@ export const getStatefulStackProps = (stage: StageName): StatefulApplicationStac
 
     // Bucket Stuff
     lookupBucketName: S3_PIERIANDX_LOOKUP_BUCKET[stage],
+
+    // DynamoDB Stuff
+    stateTableName: STATE_TABLE_NAME,
   };
 };
 
@@ -129,5 +133,8 @@ export const getStatelessStackProps = (stage: StageName): StatelessApplicationSt
 
     // S3 bucket
     lookupBucketName: S3_PIERIANDX_LOOKUP_BUCKET[stage],
+
+    // DynamoDB
+    stateTableName: STATE_TABLE_NAME,
   };
 };
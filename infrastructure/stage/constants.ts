@@ -40,9 +40,20 @@ export const SUCCEEDED_STATUS = 'SUCCEEDED';
 export const RUNNABLE_STATUS = 'RUNNABLE';
 
 /* Monitoring constants */
-export const MONITOR_RUNS_FREQUENCY = Duration.minutes(15);
+// Cases are polled on their own adaptive schedule, at most every 15 minutes (see poll_schedule_helpers),
+// runs that are not due a poll are skipped before their payloads are fetched
+export const MONITOR_RUNS_FREQUENCY = Duration.minutes(5);
 export const MONITOR_EVENT_RULE_NAME: EventBridgeRuleName = 'monitorPdxRunsSchedule';
 
+/* Tracing constants */
+// Fraction of successful external dependency calls emitted as latency metrics, failed calls are always emitted
+export const DEPENDENCY_TRACE_SAMPLE_RATE = 0.1;
+
+/* PierianDx API rate limit constants */
+// Shared by all lambdas through a token bucket in the state table
+export const PIERIANDX_API_RATE_LIMIT_PER_SECOND = 5;
+export const PIERIANDX_API_RATE_LIMIT_BURST = 10;
+
 /* PierianDx Constants */
 export const USER_EMAIL = 'services@umccr.org';
 
@@ -181,6 +192,11 @@ export const PROJECT_INFO_DEFAULT: ProjectInfo = {
 // S3
 export const SPECIMEN_TYPE_MAP_KEY = 'snomed/tso500_ctdna_snomed_ct_specimen_type_map.json.gz';
 export const DISEASE_TREE_KEY = 'snomed/tso500_ctdna_snomed_ct_disease_tree.json.gz';
+// Compact code sets of the above trees, built on every deployment by the buildSnomedCodeSets lambda
+export const SPECIMEN_TYPE_CODE_SET_KEY = 'snomed/tso500_ctdna_snomed_ct_specimen_type_codes.bin';
+export const DISEASE_CODE_SET_KEY = 'snomed/tso500_ctdna_snomed_ct_disease_codes.bin';
+// Informatics job status transitions, queried with app/dev-tools/turnaround_analytics/query_turnaround.py
+export const TURNAROUND_STORE_PREFIX = 'analytics/turnaround/';
 export const SNOMED_CT_SPECIMEN_TYPE_S3_PATH: Record<StageName, string> = {
   BETA: `s3://${S3_PIERIANDX_LOOKUP_BUCKET.BETA}/${SPECIMEN_TYPE_MAP_KEY}`,
   GAMMA: `s3://${S3_PIERIANDX_LOOKUP_BUCKET.GAMMA}/${SPECIMEN_TYPE_MAP_KEY}`,
@@ -275,6 +291,30 @@ export const SSM_SCHEMA_ROOT = path.join(SSM_PARAMETER_PATH_PREFIX, 'schemas');
 export const TEST_DATA_BUCKET_NAME = TEST_DATA_BUCKET;
 export const REFERENCE_DATA_BUCKET_NAME = REFERENCE_DATA_BUCKET;
 
+/* DynamoDB constants */
+// Shared table for monitor bookkeeping, caches and ledgers
+export const STATE_TABLE_NAME = 'PierianDxTso500CtdnaStateTable';
+export const STATE_TABLE_PARTITION_KEY = 'pk';
+export const STATE_TABLE_SORT_KEY = 'sk';
+export const STATE_TABLE_TTL_ATTRIBUTE = 'expiresAt';
+
+/* Workflow run index constants */
+// Events that cannot be added to the workflow run index are retried, then kept in a dead letter queue
+// The target retries are for delivery to the lambda, the lambda retries are for failed invocations
+export const WORKFLOW_RUN_INDEX_TARGET_RETRY_ATTEMPTS = 4;
+export const WORKFLOW_RUN_INDEX_LAMBDA_RETRY_ATTEMPTS = 2;
+export const WORKFLOW_RUN_INDEX_TARGET_MAX_EVENT_AGE = Duration.hours(2);
+export const WORKFLOW_RUN_INDEX_DLQ_RETENTION_PERIOD = Duration.days(14);
+
+/* Launch constants */
+// READY events are queued and launched in batches, so that the PierianDx objects of all the events
+// in a batch are generated in a single invocation, sharing the SNOMED lookups and samplesheet reads
+export const LAUNCH_READY_EVENTS_BATCH_SIZE = 10;
+export const LAUNCH_READY_EVENTS_MAX_BATCHING_WINDOW = Duration.minutes(1);
+// Events that cannot be handed to the launch state machine are retried, then kept in a dead letter queue
+export const LAUNCH_READY_EVENTS_MAX_RECEIVE_COUNT = 3;
+export const LAUNCH_READY_EVENTS_DLQ_RETENTION_PERIOD = Duration.days(14);
+
 /* Redcap paths */
 export const REDCAP_LAMBDA_FUNCTION_NAME: Record<StageName, string> = {
   BETA: 'redcap-apis-dev-lambda-function',
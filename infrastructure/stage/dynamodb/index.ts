@@ -0,0 +1,43 @@
+import { RemovalPolicy } from 'aws-cdk-lib';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import { Construct } from 'constructs';
+import { AddStateTableProps } from './interfaces';
+import { NagSuppressions } from 'cdk-nag';
+import {
+  STATE_TABLE_PARTITION_KEY,
+  STATE_TABLE_SORT_KEY,
+  STATE_TABLE_TTL_ATTRIBUTE,
+} from '../constants';
+
+export function addStateTable(scope: Construct, props: AddStateTableProps) {
+  const stateTable = new dynamodb.Table(scope, props.tableName, {
+    tableName: props.tableName,
+    partitionKey: {
+      name: STATE_TABLE_PARTITION_KEY,
+      type: dynamodb.AttributeType.STRING,
+    },
+    sortKey: {
+      name: STATE_TABLE_SORT_KEY,
+      type: dynamodb.AttributeType.STRING,
+    },
+    timeToLiveAttribute: STATE_TABLE_TTL_ATTRIBUTE,
+    billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+    removalPolicy: RemovalPolicy.RETAIN_ON_UPDATE_OR_DELETE,
+  });
+
+  // The table only holds caches and bookkeeping state that can be rebuilt from
+  // the PierianDx and Workflow Manager APIs
+  NagSuppressions.addResourceSuppressions(
+    stateTable,
+    [
+      {
+        id: 'AwsSolutions-DDB3',
+        reason:
+          'Point-in-time recovery not required for the PierianDx state table; it holds caches and bookkeeping state that can be rebuilt from the PierianDx and Workflow Manager APIs',
+      },
+    ],
+    true
+  );
+
+  return stateTable;
+}
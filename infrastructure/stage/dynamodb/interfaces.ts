@@ -0,0 +1,4 @@
+// New tables
+export interface AddStateTableProps {
+  tableName: string;
+}
@@ -6,6 +6,7 @@ import {
   EventBridgeRuleProps,
   EventBridgeRulesProps,
   BuildDraftRuleProps,
+  BuildWorkflowRunIndexRuleProps,
   ScheduledEventBridgeRuleProps,
 } from './interfaces';
 import { EventPattern, Rule } from 'aws-cdk-lib/aws-events';
@@ -77,6 +78,19 @@ function buildWorkflowManagerReadyEventPattern(): EventPattern {
   };
 }
 
+function buildWorkflowManagerIndexedWorkflowsEventPattern(): EventPattern {
+  // All state changes of the workflows that find_latest_workflow is queried for
+  return {
+    detailType: [WORKFLOW_RUN_STATE_CHANGE_DETAIL_TYPE],
+    source: [WORKFLOW_MANAGER_EVENT_SOURCE],
+    detail: {
+      workflow: {
+        name: [WORKFLOW_NAME, DRAGEN_TSO500_CTDNA_WORKFLOW_NAME],
+      },
+    },
+  };
+}
+
 function buildEventRule(scope: Construct, props: EventBridgeRuleProps): Rule {
   return new events.Rule(scope, props.ruleName, {
     ruleName: `${STACK_PREFIX}--${props.ruleName}`,
@@ -112,6 +126,17 @@ function buildWorkflowRunUpdateReadyEventRule(scope: Construct, props: BuildRead
   });
 }
 
+function buildWorkflowRunIndexEventRule(
+  scope: Construct,
+  props: BuildWorkflowRunIndexRuleProps
+): Rule {
+  return buildEventRule(scope, {
+    ruleName: props.ruleName,
+    eventPattern: buildWorkflowManagerIndexedWorkflowsEventPattern(),
+    eventBus: props.eventBus,
+  });
+}
+
 export function buildAllEventRules(
   scope: Construct,
   props: EventBridgeRulesProps
@@ -151,6 +176,16 @@ export function buildAllEventRules(
         });
         break;
       }
+      case 'wrscIndexedWorkflows': {
+        eventBridgeRuleObjects.push({
+          ruleName: ruleName,
+          ruleObject: buildWorkflowRunIndexEventRule(scope, {
+            ruleName: ruleName,
+            eventBus: props.eventBus,
+          }),
+        });
+        break;
+      }
       case 'monitorPdxRunsSchedule': {
         eventBridgeRuleObjects.push({
           ruleName: ruleName,
@@ -11,6 +11,8 @@ export type EventBridgeRuleName =
   | 'wrscDraft'
   // Pre-ready
   | 'wrscReady'
+  // Workflow run index
+  | 'wrscIndexedWorkflows'
   // Monitor runs
   | 'monitorPdxRunsSchedule';
 
@@ -21,6 +23,8 @@ export const eventBridgeRuleNameList: EventBridgeRuleName[] = [
   'wrscDraft',
   // Pre-ready
   'wrscReady',
+  // Workflow run index
+  'wrscIndexedWorkflows',
   // Monitor runs
   'monitorPdxRunsSchedule',
 ];
@@ -49,3 +53,4 @@ export interface ScheduledEventBridgeRuleProps extends Omit<
 
 export type BuildDraftRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
 export type BuildReadyRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
+export type BuildWorkflowRunIndexRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
@@ -1,10 +1,29 @@
 import * as eventsTargets from 'aws-cdk-lib/aws-events-targets';
 import * as events from 'aws-cdk-lib/aws-events';
+import * as lambdaDestinations from 'aws-cdk-lib/aws-lambda-destinations';
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+import * as pipes from 'aws-cdk-lib/aws-pipes';
+import * as iam from 'aws-cdk-lib/aws-iam';
+import { Construct } from 'constructs';
+import { NagSuppressions } from 'cdk-nag';
 import {
+  AddLambdaAsEventBridgeTargetProps,
+  AddSfnAsBatchedEventBridgeTargetProps,
   AddSfnAsEventBridgeTargetProps,
   eventBridgeTargetsNameList,
   EventBridgeTargetsProps,
 } from './interfaces';
+import {
+  LAUNCH_READY_EVENTS_BATCH_SIZE,
+  LAUNCH_READY_EVENTS_DLQ_RETENTION_PERIOD,
+  LAUNCH_READY_EVENTS_MAX_BATCHING_WINDOW,
+  LAUNCH_READY_EVENTS_MAX_RECEIVE_COUNT,
+  STACK_PREFIX,
+  WORKFLOW_RUN_INDEX_DLQ_RETENTION_PERIOD,
+  WORKFLOW_RUN_INDEX_LAMBDA_RETRY_ATTEMPTS,
+  WORKFLOW_RUN_INDEX_TARGET_MAX_EVENT_AGE,
+  WORKFLOW_RUN_INDEX_TARGET_RETRY_ATTEMPTS,
+} from '../constants';
 
 export function buildWrscToSfnTarget(props: AddSfnAsEventBridgeTargetProps) {
   // We take in the event detail from the pieriandx ready event
@@ -16,6 +35,70 @@ export function buildWrscToSfnTarget(props: AddSfnAsEventBridgeTargetProps) {
   );
 }
 
+export function buildWrscToBatchedSfnTarget(
+  scope: Construct,
+  props: AddSfnAsBatchedEventBridgeTargetProps
+) {
+  // Events that could not be handed to the state machine are kept here
+  // rather than dropped, so that they can be inspected and redriven
+  const deadLetterQueue = new sqs.Queue(scope, props.deadLetterQueueName, {
+    retentionPeriod: LAUNCH_READY_EVENTS_DLQ_RETENTION_PERIOD,
+    enforceSSL: true,
+  });
+
+  NagSuppressions.addResourceSuppressions(
+    deadLetterQueue,
+    [
+      {
+        id: 'AwsSolutions-SQS3',
+        reason: 'This queue is itself the dead letter queue of the batched event queue',
+      },
+    ],
+    true
+  );
+
+  // We queue the event detail from the workflow run state change event
+  const queue = new sqs.Queue(scope, props.queueName, {
+    enforceSSL: true,
+    deadLetterQueue: {
+      queue: deadLetterQueue,
+      maxReceiveCount: LAUNCH_READY_EVENTS_MAX_RECEIVE_COUNT,
+    },
+  });
+
+  props.eventBridgeRuleObj.addTarget(
+    new eventsTargets.SqsQueue(queue, {
+      message: events.RuleTargetInput.fromEventPath('$.detail'),
+    })
+  );
+
+  // And start the state machine with each batch of queued events,
+  // the state machine input is the list of sqs messages, the event detail is the body of each message
+  const pipeRole = new iam.Role(scope, `${props.pipeName}Role`, {
+    assumedBy: new iam.ServicePrincipal('pipes.amazonaws.com'),
+  });
+  queue.grantConsumeMessages(pipeRole);
+  props.stateMachineObj.grantStartExecution(pipeRole);
+
+  new pipes.CfnPipe(scope, props.pipeName, {
+    name: `${STACK_PREFIX}--${props.pipeName}`,
+    roleArn: pipeRole.roleArn,
+    source: queue.queueArn,
+    sourceParameters: {
+      sqsQueueParameters: {
+        batchSize: LAUNCH_READY_EVENTS_BATCH_SIZE,
+        maximumBatchingWindowInSeconds: LAUNCH_READY_EVENTS_MAX_BATCHING_WINDOW.toSeconds(),
+      },
+    },
+    target: props.stateMachineObj.stateMachineArn,
+    targetParameters: {
+      stepFunctionStateMachineParameters: {
+        invocationType: 'FIRE_AND_FORGET',
+      },
+    },
+  });
+}
+
 export function buildIcav2WesEventStateChangeToWrscSfnTarget(
   props: AddSfnAsEventBridgeTargetProps
 ) {
@@ -27,7 +110,47 @@ export function buildIcav2WesEventStateChangeToWrscSfnTarget(
   );
 }
 
-export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
+export function buildWrscToLambdaTarget(
+  scope: Construct,
+  props: AddLambdaAsEventBridgeTargetProps
+) {
+  // Events that could not be delivered to, or handled by, the lambda are kept here
+  // rather than dropped, so that they can be inspected and redriven
+  const deadLetterQueue = new sqs.Queue(scope, props.deadLetterQueueName, {
+    retentionPeriod: WORKFLOW_RUN_INDEX_DLQ_RETENTION_PERIOD,
+    enforceSSL: true,
+  });
+
+  NagSuppressions.addResourceSuppressions(
+    deadLetterQueue,
+    [
+      {
+        id: 'AwsSolutions-SQS3',
+        reason: 'This queue is itself the dead letter queue of the event target and lambda',
+      },
+    ],
+    true
+  );
+
+  // Lambda targets are invoked asynchronously, so retry failed invocations of the handler too
+  props.lambdaFunction.configureAsyncInvoke({
+    retryAttempts: WORKFLOW_RUN_INDEX_LAMBDA_RETRY_ATTEMPTS,
+    maxEventAge: WORKFLOW_RUN_INDEX_TARGET_MAX_EVENT_AGE,
+    onFailure: new lambdaDestinations.SqsDestination(deadLetterQueue),
+  });
+
+  // We take in the event detail from the workflow run state change event
+  props.eventBridgeRuleObj.addTarget(
+    new eventsTargets.LambdaFunction(props.lambdaFunction, {
+      event: events.RuleTargetInput.fromEventPath('$.detail'),
+      deadLetterQueue: deadLetterQueue,
+      retryAttempts: WORKFLOW_RUN_INDEX_TARGET_RETRY_ATTEMPTS,
+      maxEventAge: WORKFLOW_RUN_INDEX_TARGET_MAX_EVENT_AGE,
+    })
+  );
+}
+
+export function buildAllEventBridgeTargets(scope: Construct, props: EventBridgeTargetsProps) {
   for (const eventBridgeTargetsName of eventBridgeTargetsNameList) {
     switch (eventBridgeTargetsName) {
       case 'upstreamSucceededEventToGlueSucceededEvents': {
@@ -67,13 +190,16 @@ export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
       }
 
       case 'readyToIcav2WesSubmittedSfnTarget': {
-        buildWrscToSfnTarget(<AddSfnAsEventBridgeTargetProps>{
+        buildWrscToBatchedSfnTarget(scope, <AddSfnAsBatchedEventBridgeTargetProps>{
           eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
             (eventBridgeObject) => eventBridgeObject.ruleName === 'wrscReady'
           )?.ruleObject,
           stateMachineObj: props.stepFunctionObjects.find(
             (sfnObject) => sfnObject.stateMachineName === 'launchPieriandxFromReadyEvent'
           )?.sfnObject,
+          queueName: 'launchPieriandxReadyEventsQueue',
+          deadLetterQueueName: 'launchPieriandxReadyEventsDeadLetterQueue',
+          pipeName: 'launchPieriandxReadyEventsPipe',
         });
         break;
       }
@@ -89,6 +215,19 @@ export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
         });
         break;
       }
+
+      case 'wrscToUpdateWorkflowRunIndexLambdaTarget': {
+        buildWrscToLambdaTarget(scope, <AddLambdaAsEventBridgeTargetProps>{
+          eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
+            (eventBridgeObject) => eventBridgeObject.ruleName === 'wrscIndexedWorkflows'
+          )?.ruleObject,
+          lambdaFunction: props.lambdaObjects.find(
+            (lambdaObject) => lambdaObject.lambdaName === 'updateWorkflowRunIndex'
+          )?.lambdaFunction,
+          deadLetterQueueName: 'updateWorkflowRunIndexDeadLetterQueue',
+        });
+        break;
+      }
     }
   }
 }
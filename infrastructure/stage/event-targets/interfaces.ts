@@ -2,6 +2,8 @@ import { StateMachine } from 'aws-cdk-lib/aws-stepfunctions';
 import { Rule } from 'aws-cdk-lib/aws-events';
 import { EventBridgeRuleObject } from '../event-rules/interfaces';
 import { StepFunctionObject } from '../step-functions/interfaces';
+import { IFunction } from 'aws-cdk-lib/aws-lambda';
+import { LambdaObject } from '../lambda/interfaces';
 
 /**
  * EventBridge Target Interfaces
@@ -16,7 +18,9 @@ export type EventBridgeTargetName =
   // Ready to ICAv2 WES Submitted
   | 'readyToIcav2WesSubmittedSfnTarget'
   // Post submission
-  | 'monitorPdxRuns';
+  | 'monitorPdxRuns'
+  // Workflow run index
+  | 'wrscToUpdateWorkflowRunIndexLambdaTarget';
 
 export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   // Dragen WGTS Succeeded
@@ -29,6 +33,8 @@ export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   'readyToIcav2WesSubmittedSfnTarget',
   // Post submission
   'monitorPdxRuns',
+  // Workflow run index
+  'wrscToUpdateWorkflowRunIndexLambdaTarget',
 ];
 
 export interface AddSfnAsEventBridgeTargetProps {
@@ -36,7 +42,20 @@ export interface AddSfnAsEventBridgeTargetProps {
   eventBridgeRuleObj: Rule;
 }
 
+export interface AddSfnAsBatchedEventBridgeTargetProps extends AddSfnAsEventBridgeTargetProps {
+  queueName: string;
+  deadLetterQueueName: string;
+  pipeName: string;
+}
+
+export interface AddLambdaAsEventBridgeTargetProps {
+  lambdaFunction: IFunction;
+  eventBridgeRuleObj: Rule;
+  deadLetterQueueName: string;
+}
+
 export interface EventBridgeTargetsProps {
   eventBridgeRuleObjects: EventBridgeRuleObject[];
   stepFunctionObjects: StepFunctionObject[];
+  lambdaObjects: LambdaObject[];
 }
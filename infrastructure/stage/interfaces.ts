@@ -56,6 +56,9 @@ export interface StatefulApplicationStackConfig {
 
   // Bucket
   lookupBucketName: string;
+
+  // DynamoDB
+  stateTableName: string;
 }
 
 /**
@@ -73,4 +76,7 @@ export interface StatelessApplicationStackConfig {
 
   // S3 Bucket
   lookupBucketName: string;
+
+  // DynamoDB
+  stateTableName: string;
 }
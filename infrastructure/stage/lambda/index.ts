@@ -12,6 +12,14 @@ import {
   SSM_SCHEMA_ROOT,
   WORKFLOW_NAME,
   DEFAULT_PAYLOAD_VERSION,
+  DEPENDENCY_TRACE_SAMPLE_RATE,
+  PIERIANDX_API_RATE_LIMIT_PER_SECOND,
+  PIERIANDX_API_RATE_LIMIT_BURST,
+  DISEASE_CODE_SET_KEY,
+  DISEASE_TREE_KEY,
+  SPECIMEN_TYPE_CODE_SET_KEY,
+  SPECIMEN_TYPE_MAP_KEY,
+  TURNAROUND_STORE_PREFIX,
 } from '../constants';
 import { REPO_NAME } from '../../toolchain/constants';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
@@ -22,6 +30,7 @@ import { camelCaseToKebabCase, camelCaseToSnakeCase } from '../utils';
 import * as path from 'path';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import * as cdk from 'aws-cdk-lib';
+import * as cr from 'aws-cdk-lib/custom-resources';
 import { SchemaNames } from '../event-schemas/interfaces';
 
 function buildLambda(scope: Construct, props: BuildLambdaInput): LambdaObject {
@@ -157,6 +166,126 @@ function buildLambda(scope: Construct, props: BuildLambdaInput): LambdaObject {
       ],
       true
     );
+
+    // Dependency latency tracing
+    lambdaFunction.addEnvironment(
+      'PIERIANDX_TRACE_SAMPLE_RATE',
+      DEPENDENCY_TRACE_SAMPLE_RATE.toString()
+    );
+
+    // PierianDx API rate limit
+    lambdaFunction.addEnvironment(
+      'PIERIANDX_API_RATE_LIMIT_PER_SECOND',
+      PIERIANDX_API_RATE_LIMIT_PER_SECOND.toString()
+    );
+    lambdaFunction.addEnvironment(
+      'PIERIANDX_API_RATE_LIMIT_BURST',
+      PIERIANDX_API_RATE_LIMIT_BURST.toString()
+    );
+  }
+
+  /*
+  The code set and state table helpers are part of the PierianDx layer,
+  add the layer to lambdas that use them without needing PierianDx access
+  */
+  if (
+    !lambdaRequirements.needsPieriandxLayerAccess &&
+    (lambdaRequirements.needsSnomedCodeSetAccess ||
+      lambdaRequirements.needsSnomedCodeSetBuildAccess ||
+      lambdaRequirements.needsStateTableAccess)
+  ) {
+    lambdaFunction.addLayers(props.pieriandxLambdaLayer);
+  }
+
+  /*
+  Needs the SNOMED code sets (pre-flight validation of specimen and disease codes)
+  */
+  if (lambdaRequirements.needsSnomedCodeSetAccess) {
+    props.s3LookUpBucket.grantRead(lambdaFunction, 'snomed/*');
+
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${SPECIMEN_TYPE_CODE_SET_KEY}`
+    );
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_DISEASE_CODE_SET_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${DISEASE_CODE_SET_KEY}`
+    );
+
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers the SNOMED objects in the PierianDx lookup bucket; the code sets are rebuilt whenever the SNOMED trees are updated',
+        },
+      ],
+      true
+    );
+  }
+
+  /*
+  Builds the SNOMED code sets from the SNOMED trees
+  */
+  if (lambdaRequirements.needsSnomedCodeSetBuildAccess) {
+    props.s3LookUpBucket.grantRead(lambdaFunction, SPECIMEN_TYPE_MAP_KEY);
+    props.s3LookUpBucket.grantRead(lambdaFunction, DISEASE_TREE_KEY);
+    props.s3LookUpBucket.grantPut(lambdaFunction, SPECIMEN_TYPE_CODE_SET_KEY);
+    props.s3LookUpBucket.grantPut(lambdaFunction, DISEASE_CODE_SET_KEY);
+
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_SPECIMEN_TYPE_TREE_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${SPECIMEN_TYPE_MAP_KEY}`
+    );
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_SPECIMEN_TYPE_CODE_SET_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${SPECIMEN_TYPE_CODE_SET_KEY}`
+    );
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_DISEASE_TREE_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${DISEASE_TREE_KEY}`
+    );
+    lambdaFunction.addEnvironment(
+      'SNOMED_CT_DISEASE_CODE_SET_S3_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${DISEASE_CODE_SET_KEY}`
+    );
+
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard actions are generated by the S3 grant helpers; the grants are scoped to the SNOMED tree and code set objects',
+        },
+      ],
+      true
+    );
+  }
+
+  /*
+  Needs to append job status transitions to the turnaround store
+  */
+  if (lambdaRequirements.needsTurnaroundStoreAccess) {
+    props.s3LookUpBucket.grantPut(lambdaFunction, `${TURNAROUND_STORE_PREFIX}*`);
+
+    lambdaFunction.addEnvironment(
+      'PIERIANDX_TURNAROUND_STORE_URI',
+      `s3://${props.s3LookUpBucket.bucketName}/${TURNAROUND_STORE_PREFIX}`
+    );
+
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers the turnaround store prefix in the PierianDx lookup bucket; each status transition is written as a new object',
+        },
+      ],
+      true
+    );
   }
 
   if (lambdaRequirements.needsRedcapLambdaPermission) {
@@ -241,6 +370,27 @@ function buildLambda(scope: Construct, props: BuildLambdaInput): LambdaObject {
     );
   }
 
+  /*
+    State table, used for monitor bookkeeping, caches and ledgers,
+    all PierianDx API calls also share the rate limit bucket and circuit breaker in the state table
+   */
+  if (lambdaRequirements.needsStateTableAccess || lambdaRequirements.needsPieriandxLayerAccess) {
+    props.stateTable.grantReadWriteData(lambdaFunction);
+    lambdaFunction.addEnvironment('PIERIANDX_STATE_TABLE_NAME', props.stateTable.tableName);
+
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers the indexes of the PierianDx state table; index ARNs are generated by the DynamoDB grant helper',
+        },
+      ],
+      true
+    );
+  }
+
   /* Return the function */
   return {
     lambdaName: props.lambdaName,
@@ -263,6 +413,52 @@ export function buildAllLambdas(scope: Construct, props: BuildLambdasInput): Lam
   return lambdaObjects;
 }
 
+export function buildSnomedCodeSetsCustomResource(scope: Construct, lambdaObjects: LambdaObject[]) {
+  /*
+  Rebuild the SNOMED code sets from the SNOMED trees on every deployment,
+  so post schema validation never checks codes against a missing or stale code set
+  */
+  const buildSnomedCodeSetsLambdaObject = lambdaObjects.find(
+    (lambdaObject) => lambdaObject.lambdaName === 'buildSnomedCodeSets'
+  );
+  if (buildSnomedCodeSetsLambdaObject === undefined) {
+    throw new Error('buildSnomedCodeSets lambda not found');
+  }
+
+  const buildSnomedCodeSetsProvider = new cr.Provider(scope, 'BuildSnomedCodeSetsProvider', {
+    onEventHandler: buildSnomedCodeSetsLambdaObject.lambdaFunction,
+  });
+
+  NagSuppressions.addResourceSuppressions(
+    buildSnomedCodeSetsProvider,
+    [
+      {
+        id: 'AwsSolutions-L1',
+        reason: 'The runtime of the custom resource provider framework lambda is managed by the CDK',
+      },
+      {
+        id: 'AwsSolutions-IAM4',
+        reason:
+          'Basic execution managed policy provides CloudWatch Logs permissions for the custom resource provider framework lambda',
+      },
+      {
+        id: 'AwsSolutions-IAM5',
+        reason:
+          'The custom resource provider framework lambda may invoke any version of the buildSnomedCodeSets lambda',
+      },
+    ],
+    true
+  );
+
+  new cdk.CustomResource(scope, 'BuildSnomedCodeSets', {
+    serviceToken: buildSnomedCodeSetsProvider.serviceToken,
+    properties: {
+      // Changes on every deployment, so the code sets are rebuilt on every deployment
+      deploymentTime: new Date().toISOString(),
+    },
+  });
+}
+
 export function getLambdaResourceLogicalArn(lambdaFunction: lambda.Function): string | null {
   // Find L1 CloudFormation CfnFunction resource(s) under the L2 Function (exclude Alias/Version L1s)
   const cfnFunctions = lambdaFunction.node
@@ -4,6 +4,7 @@ import { SsmParameterPaths } from '../ssm/interfaces';
 import { ISecret } from 'aws-cdk-lib/aws-secretsmanager';
 import { IFunction } from 'aws-cdk-lib/aws-lambda';
 import { IBucket } from 'aws-cdk-lib/aws-s3';
+import { ITable } from 'aws-cdk-lib/aws-dynamodb';
 
 export type LambdaNameList =
   // Shared pre-ready lambdas
@@ -13,6 +14,7 @@ export type LambdaNameList =
   | 'generateWruEventObjectWithMergedData'
   | 'getMissingSchemaFields'
   | 'findLatestWorkflow'
+  | 'updateWorkflowRunIndex'
   | 'getDataFilesFromTso500WorkflowRun'
   // Glue upstream
   // Draft to ready (generic)
@@ -27,18 +29,18 @@ export type LambdaNameList =
   // Validation
   | 'validateDraftDataCompleteSchema'
   | 'postSchemaValidation'
+  | 'buildSnomedCodeSets'
   // Commentary Functions
   | 'addPopulateDraftComment'
   // Ready to PierianDx Submission
   | 'generatePieriandxObjects'
-  | 'generateCase'
-  | 'generateSequencerrun'
-  | 'generateInformaticsjob'
+  | 'launchPieriandxCase'
   | 'uploadPieriandxSampleDataToS3'
   // Monitor Runs to WRSC events
   | 'generateOutputDataPayload'
   | 'listActiveWorkflowRuns'
-  | 'getInformaticsjobAndReportStatus';
+  | 'getInformaticsjobAndReportStatus'
+  | 'saveCaseStatusDigest';
 
 export const lambdaNameList: LambdaNameList[] = [
   // Shared pre-ready lambdas
@@ -48,6 +50,7 @@ export const lambdaNameList: LambdaNameList[] = [
   'generateWruEventObjectWithMergedData',
   'getMissingSchemaFields',
   'findLatestWorkflow',
+  'updateWorkflowRunIndex',
   'getDataFilesFromTso500WorkflowRun',
   // Glue upstream
   // Draft to ready (generic)
@@ -62,18 +65,18 @@ export const lambdaNameList: LambdaNameList[] = [
   // Validation
   'validateDraftDataCompleteSchema',
   'postSchemaValidation',
+  'buildSnomedCodeSets',
   // Commentary Functions
   'addPopulateDraftComment',
   // Ready to PierianDx Submission
   'generatePieriandxObjects',
-  'generateCase',
-  'generateSequencerrun',
-  'generateInformaticsjob',
+  'launchPieriandxCase',
   'uploadPieriandxSampleDataToS3',
   // Monitor Runs to WRSC events
   'generateOutputDataPayload',
   'listActiveWorkflowRuns',
   'getInformaticsjobAndReportStatus',
+  'saveCaseStatusDigest',
 ];
 
 // Requirements interface for Lambda functions
@@ -83,10 +86,14 @@ export interface LambdaRequirements {
   needsRedcapLambdaPermission?: boolean;
   needsHigherMemory?: boolean;
   needsSsmParametersAccess?: boolean;
+  needsSnomedCodeSetAccess?: boolean;
+  needsSnomedCodeSetBuildAccess?: boolean;
   needsSchemaRegistryAccess?: boolean;
   needsExtendedTimeout?: boolean;
   needsWorkflowInfo?: boolean;
   needsRepoUrl?: boolean;
+  needsStateTableAccess?: boolean;
+  needsTurnaroundStoreAccess?: boolean;
 }
 
 // Lambda requirements mapping
@@ -108,9 +115,14 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   },
   findLatestWorkflow: {
     needsOrcabusApiTools: true,
+    needsStateTableAccess: true,
+  },
+  updateWorkflowRunIndex: {
+    needsStateTableAccess: true,
   },
   getDataFilesFromTso500WorkflowRun: {
     needsOrcabusApiTools: true,
+    needsStateTableAccess: true,
   },
   // Glue upstream
   // Draft to ready (generic)
@@ -119,6 +131,7 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   },
   getFastqRgidsFromLibraryId: {
     needsOrcabusApiTools: true,
+    needsStateTableAccess: true,
   },
   getMetadataTags: {
     needsOrcabusApiTools: true,
@@ -130,15 +143,18 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   getRedcapTagsForLibraryId: {
     needsOrcabusApiTools: true,
     needsSsmParametersAccess: true,
+    needsStateTableAccess: true,
   },
   generateCaseMetadata: {
     needsOrcabusApiTools: true,
     needsPieriandxLayerAccess: true,
     needsExtendedTimeout: true,
+    needsStateTableAccess: true,
   },
   getCaseMetadataFromRedcap: {
     needsRedcapLambdaPermission: true,
     needsHigherMemory: true,
+    needsStateTableAccess: true,
   },
   // Validation
   validateDraftDataCompleteSchema: {
@@ -148,6 +164,13 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   postSchemaValidation: {
     needsOrcabusApiTools: true,
     needsWorkflowInfo: true,
+    needsSnomedCodeSetAccess: true,
+  },
+  buildSnomedCodeSets: {
+    // Run on every deployment, see buildSnomedCodeSetsCustomResource
+    needsSnomedCodeSetBuildAccess: true,
+    needsHigherMemory: true,
+    needsExtendedTimeout: true,
   },
   // Commentary Functions
   addPopulateDraftComment: {
@@ -159,18 +182,16 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   generatePieriandxObjects: {
     needsPieriandxLayerAccess: true,
     needsOrcabusApiTools: true,
+    // All ready events of a launch batch are handled in a single invocation
+    needsExtendedTimeout: true,
   },
-  generateCase: {
-    needsPieriandxLayerAccess: true,
-    needsOrcabusApiTools: true,
-  },
-  generateSequencerrun: {
-    needsPieriandxLayerAccess: true,
-    needsOrcabusApiTools: true,
-  },
-  generateInformaticsjob: {
+  launchPieriandxCase: {
     needsPieriandxLayerAccess: true,
     needsOrcabusApiTools: true,
+    // Case, sequencer run and informatics job creation in a single invocation
+    needsExtendedTimeout: true,
+    // Case ledger
+    needsStateTableAccess: true,
   },
   generateOutputDataPayload: {
     needsPieriandxLayerAccess: true,
@@ -179,14 +200,26 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   uploadPieriandxSampleDataToS3: {
     needsOrcabusApiTools: true,
     needsPieriandxLayerAccess: true,
+    // All data files for a case are uploaded in a single invocation
+    needsExtendedTimeout: true,
   },
   // Monitor Runs to WRSC events
   listActiveWorkflowRuns: {
     needsOrcabusApiTools: true,
+    // Skips runs that are not due a poll
+    needsStateTableAccess: true,
   },
   getInformaticsjobAndReportStatus: {
     needsPieriandxLayerAccess: true,
     needsOrcabusApiTools: true,
+    needsStateTableAccess: true,
+    // Job status transitions, for turnaround analytics
+    needsTurnaroundStoreAccess: true,
+  },
+  saveCaseStatusDigest: {
+    // The status digest helpers are in the pieriandx_helpers package, which imports the orcabus api tools
+    needsOrcabusApiTools: true,
+    needsStateTableAccess: true,
   },
 };
 
@@ -197,6 +230,7 @@ export interface BuildLambdasInput {
   redcapLambdaFunction: IFunction;
   s3CredentialsSecret: ISecret;
   s3LookUpBucket: IBucket;
+  stateTable: ITable;
 }
 
 export interface BuildLambdaInput extends BuildLambdasInput {
@@ -19,7 +19,7 @@ export function addLookUpBucket(scope: Construct, props: AddLookUpBucketProps) {
       {
         id: 'AwsSolutions-S1',
         reason:
-          'Server access logs not required for the PierianDx lookup bucket; it contains only static SNOMED mapping reference data with no sensitive content',
+          'Server access logs not required for the PierianDx lookup bucket; it contains only static SNOMED mapping reference data and job turnaround records (case and job ids, statuses and timestamps) with no sensitive content',
       },
     ],
     true
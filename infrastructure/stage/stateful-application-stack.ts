@@ -4,6 +4,7 @@ import { StatefulApplicationStackConfig } from './interfaces';
 import { buildSsmParameters } from './ssm';
 import { buildSchemas } from './event-schemas';
 import { addLookUpBucket } from './s3';
+import { addStateTable } from './dynamodb';
 import { GitStack } from '@orcabus/platform-cdk-constructs/deployment-stack-pipeline';
 
 export type StatefulApplicationStackProps = cdk.StackProps & StatefulApplicationStackConfig;
@@ -31,5 +32,10 @@ export class StatefulApplicationStack extends GitStack {
     addLookUpBucket(this, {
       bucketName: props.lookupBucketName,
     });
+
+    // Add in the state table
+    addStateTable(this, {
+      tableName: props.stateTableName,
+    });
   }
 }
@@ -3,9 +3,10 @@ import * as events from 'aws-cdk-lib/aws-events';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
 import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { Construct } from 'constructs';
 import { StatelessApplicationStackConfig } from './interfaces';
-import { buildAllLambdas } from './lambda';
+import { buildAllLambdas, buildSnomedCodeSetsCustomResource } from './lambda';
 import { buildAllStepFunctions } from './step-functions';
 import { buildAllEventRules } from './event-rules';
 import { buildAllEventBridgeTargets } from './event-targets';
@@ -58,6 +59,9 @@ export class StatelessApplicationStack extends GitStack {
     // Get the s3 bucket
     const s3LookUpBucket = s3.Bucket.fromBucketName(this, 'S3LookUpBucket', props.lookupBucketName);
 
+    // Get the state table
+    const stateTable = dynamodb.Table.fromTableName(this, 'StateTable', props.stateTableName);
+
     // Build the lambdas
     const lambdas = buildAllLambdas(this, {
       // PierianDx Lambda layer
@@ -77,8 +81,14 @@ export class StatelessApplicationStack extends GitStack {
 
       // s3LookUpBucket
       s3LookUpBucket: s3LookUpBucket,
+
+      // stateTable
+      stateTable: stateTable,
     });
 
+    // Build the SNOMED code sets on every deployment
+    buildSnomedCodeSetsCustomResource(this, lambdas);
+
     // Build the state machines
     const stateMachines = buildAllStepFunctions(this, {
       lambdaObjects: lambdas,
@@ -92,9 +102,10 @@ export class StatelessApplicationStack extends GitStack {
     });
 
     // Add event targets
-    buildAllEventBridgeTargets({
+    buildAllEventBridgeTargets(this, {
       eventBridgeRuleObjects: eventRules,
       stepFunctionObjects: stateMachines,
+      lambdaObjects: lambdas,
     });
   }
 }
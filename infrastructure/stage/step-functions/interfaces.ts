@@ -128,9 +128,7 @@ export const stepFunctionToLambdasMap: Record<StateMachineName, LambdaNameList[]
   launchPieriandxFromReadyEvent: [
     // Ready to ICAv2 WES lambdas
     'generatePieriandxObjects',
-    'generateCase',
-    'generateSequencerrun',
-    'generateInformaticsjob',
+    'launchPieriandxCase',
     'uploadPieriandxSampleDataToS3',
     // Re update object
     'getPayload',
@@ -144,5 +142,6 @@ export const stepFunctionToLambdasMap: Record<StateMachineName, LambdaNameList[]
     'generateOutputDataPayload',
     'generateWruEventObjectWithMergedData',
     'comparePayload',
+    'saveCaseStatusDigest',
   ],
 };